@@ -1,10 +1,13 @@
 from fastapi import APIRouter, Request, Form, HTTPException, Body, Depends
 from fastapi.responses import JSONResponse
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import json
 import boto3
 from datetime import datetime, timedelta
 from backend.integrations.aws import aws_integration
+from backend.database import get_slow_query_sketches, save_slow_query_sketches
+from backend.monitoring.sketch import DDSketch
+from backend.monitoring.log_tailer import log_tailer
 from backend.models.database import SessionLocal, AwsCredentials
 from sqlalchemy.orm import Session
 
@@ -177,32 +180,51 @@ async def get_log_events(log_group_name: str, log_stream_name: str, hours: int =
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get('/aws/slow-queries')
-async def analyze_slow_queries(db_identifier: str, hours: int = 24, db: Session = Depends(get_db)):
-    """RDS 인스턴스의 슬로우 쿼리 분석"""
+def analyze_slow_queries(db_identifier: str, hours: int = 24, mode: str = 'filter', persist: bool = False,
+                        db: Session = Depends(get_db)):
+    """RDS 인스턴스의 슬로우 쿼리 분석
+
+    mode:
+      - filter: filter_log_events 로 duration 로그 라인만 받아 파싱 (기본값)
+      - insights: Logs Insights 로 서버 측에서 파싱/정렬
+      - scan: 모든 스트림의 전체 이벤트를 받아 파싱
+    persist=true 이면 시간 버킷별 duration 스케치를 저장해 /aws/slow-queries/trend 에서 비교할 수 있습니다.
+    분석 범위에 온전히 포함된 버킷은 이번 결과로 교체되므로 겹치는 기간을 다시 저장해도 중복 집계되지 않습니다.
+    """
+    if mode not in ('filter', 'insights', 'scan'):
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 mode: {mode}")
+    if persist and mode == 'insights':
+        # insights 결과는 상위 limit 건만 포함하므로 분포로 저장하지 않음
+        raise HTTPException(status_code=400, detail="persist 는 filter/scan 모드에서만 사용할 수 있습니다")
     try:
         # 1. 로그 그룹 조회
         log_groups = aws_integration.list_rds_log_groups(db, db_identifier)
         
         all_slow_queries = []
         
-        for log_group in log_groups:
-            log_group_name = log_group['logGroupName']
-            
-            # 2. 로그 스트림 조회
-            streams = aws_integration.list_log_streams(db, log_group_name, hours)
-            
-            for stream in streams:
-                stream_name = stream['logStreamName']
-                
-                # 3. 로그 이벤트 조회
-                events = aws_integration.get_log_events(db, log_group_name, stream_name, hours)
-                
-                # 4. 슬로우 쿼리 파싱
-                slow_queries = aws_integration.parse_slow_query_log(events)
-                all_slow_queries.extend(slow_queries)
+        # 2~4. 로그 이벤트 조회 및 슬로우 쿼리 파싱
+        if mode == 'insights':
+            all_slow_queries = aws_integration.query_slow_queries_insights(db, log_groups, hours)
+        else:
+            if mode == 'filter':
+                pages = aws_integration.iter_slow_query_events(db, log_groups, hours)
+            else:
+                pages = aws_integration.iter_log_group_events(db, log_groups, hours)
+            for events in pages:
+                all_slow_queries.extend(aws_integration.parse_slow_query_log(events))
+            all_slow_queries.sort(key=lambda x: x['duration'], reverse=True)
+            # 조회 시작 시각은 첫 페이지를 받을 때 정해지므로, 그 이후 시각을 기준으로 잡으면 항상 조회 범위 안
+            window_start = int((datetime.now() - timedelta(hours=hours)).timestamp() * 1000)
         
         # 5. 전체 분석
-        analysis = aws_integration.analyze_slow_queries(all_slow_queries)
+        stats = aws_integration.build_slow_query_stats(all_slow_queries)
+        analysis = stats.to_dict()
+        if persist:
+            # 분석 범위에 온전히 포함된 버킷만 교체 저장 (같은 기간을 다시 분석해도 중복 집계되지 않음)
+            saved, error = save_slow_query_sketches(db_identifier, stats.timeline.rows(),
+                                                    replace_since_ms=stats.timeline.first_full_bucket(window_start))
+            if not saved:
+                print(f"Error saving slow query sketches: {error}")
         
         return {
             "db_identifier": db_identifier,
@@ -225,17 +247,10 @@ async def get_slow_queries_summary(db_identifier: str, hours: int = 24, db: Sess
         total_events = 0
         total_slow_queries = 0
         
-        for log_group in log_groups[:3]:  # 최근 3개 로그 그룹만
-            log_group_name = log_group['logGroupName']
-            streams = aws_integration.list_log_streams(db, log_group_name, hours)
-            
-            for stream in streams[:5]:  # 최근 5개 스트림만
-                stream_name = stream['logStreamName']
-                events = aws_integration.get_log_events(db, log_group_name, stream_name, hours)
-                total_events += len(events)
-                
-                slow_queries = aws_integration.parse_slow_query_log(events)
-                total_slow_queries += len(slow_queries)
+        # 최근 3개 로그 그룹에서 duration 로그 라인만 서버 측 필터로 조회
+        for events in aws_integration.iter_slow_query_events(db, log_groups[:3], hours):
+            total_events += len(events)
+            total_slow_queries += len(aws_integration.parse_slow_query_log(events))
         
         return {
             "db_identifier": db_identifier,
@@ -248,6 +263,94 @@ async def get_slow_queries_summary(db_identifier: str, hours: int = 24, db: Sess
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post('/aws/slow-queries/tail/start')
+async def start_slow_query_tail(payload: dict = Body(...)):
+    """슬로우 쿼리 로그 백그라운드 증분 수집 시작"""
+    db_identifier = payload.get('db_identifier')
+    if not db_identifier:
+        raise HTTPException(status_code=400, detail="db_identifier가 필요합니다")
+    log_tailer.add_target(db_identifier, int(payload.get('initial_hours', 1)))
+    log_tailer.start()
+    return {"status": "success", "message": f"Started slow query log tailing for {db_identifier}"}
+
+@router.post('/aws/slow-queries/tail/stop')
+async def stop_slow_query_tail(payload: dict = Body(...)):
+    """슬로우 쿼리 로그 백그라운드 증분 수집 중지"""
+    db_identifier = payload.get('db_identifier')
+    if not db_identifier:
+        raise HTTPException(status_code=400, detail="db_identifier가 필요합니다")
+    log_tailer.remove_target(db_identifier)
+    return {"status": "success", "message": f"Stopped slow query log tailing for {db_identifier}"}
+
+@router.get('/aws/slow-queries/live')
+async def get_live_slow_queries(db_identifier: str):
+    """백그라운드 수집기가 유지하는 누적 슬로우 쿼리 통계 (로그를 다시 읽지 않음)"""
+    snapshot = log_tailer.snapshot(db_identifier)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="수집 중인 대상이 아닙니다. /aws/slow-queries/tail/start 로 시작하세요")
+    return snapshot
+
+@router.get('/aws/slow-queries/trend')
+async def get_slow_query_trend(db_identifier: str, days: int = 30, bucket_hours: int = 24, fingerprint: str = ''):
+    """저장된 스케치를 bucket_hours 단위로 병합해 기간별 p50/p95/p99 추세 반환
+
+    fingerprint 를 지정하지 않으면 전체 쿼리 기준입니다.
+    """
+    since_ms = int((datetime.now() - timedelta(days=days)).timestamp() * 1000)
+    rows, error = get_slow_query_sketches(db_identifier, since_ms, fingerprint)
+    if error:
+        raise HTTPException(status_code=500, detail=error)
+
+    bucket_ms = bucket_hours * 3600 * 1000
+    merged: Dict[int, DDSketch] = {}
+    query = None
+    for row in rows:
+        start = row['bucket_start'] - row['bucket_start'] % bucket_ms
+        sketch = merged.get(start)
+        if sketch is None:
+            sketch = merged[start] = DDSketch.from_dict(row['sketch'])
+        else:
+            sketch.merge(DDSketch.from_dict(row['sketch']))
+        query = query or row.get('query')
+
+    trend = []
+    for start in sorted(merged):
+        sketch = merged[start]
+        p50, p95, p99 = sketch.quantiles((0.5, 0.95, 0.99))
+        trend.append({
+            "bucket_start": start,
+            "datetime": datetime.fromtimestamp(start / 1000).strftime('%Y-%m-%d %H:%M:%S'),
+            "count": int(sketch.count),
+            "mean": sketch.mean,
+            "p50": p50,
+            "p95": p95,
+            "p99": p99,
+            "max": sketch.max
+        })
+    return {
+        "db_identifier": db_identifier,
+        "fingerprint": fingerprint,
+        "query": query,
+        "days": days,
+        "bucket_hours": bucket_hours,
+        "trend": trend
+    }
+
+@router.get('/aws/slow-queries/stats')
+def get_slow_query_stats(db_identifier: str, hours: int = 24, min_duration_ms: float = 1000, limit: int = 100, db: Session = Depends(get_db)):
+    """Logs Insights 로 statement 별 슬로우 쿼리 통계를 서버 측에서 집계"""
+    try:
+        log_groups = aws_integration.list_rds_log_groups(db, db_identifier)
+        stats = aws_integration.query_slow_query_stats_insights(db, log_groups, hours, min_duration_ms, limit)
+        return {
+            "db_identifier": db_identifier,
+            "hours": hours,
+            "stats": stats,
+            "log_groups_count": len(log_groups)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get('/aws/rds-log-files')
 async def list_rds_log_files(db_identifier: str, pattern: str = 'postgresql.log', db: Session = Depends(get_db)):
     """RDS 인스턴스의 로그 파일 목록 조회 (RDS API)"""
@@ -267,20 +370,23 @@ async def get_rds_log_file_content(db_identifier: str, log_file_name: str, max_b
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get('/aws/rds-log-file-slow-queries')
-async def analyze_rds_log_file_slow_queries(db_identifier: str, log_file_name: str, max_bytes: int = 1048576, db: Session = Depends(get_db)):
-    """RDS 인스턴스의 로그 파일에서 슬로우 쿼리 분석 (RDS API)"""
+def analyze_rds_log_file_slow_queries(db_identifier: str, log_file_name: str, max_bytes: Optional[int] = None,
+                                      min_duration_ms: float = 1000, top_k: int = 10, db: Session = Depends(get_db)):
+    """RDS 인스턴스의 로그 파일에서 슬로우 쿼리 분석 (RDS API)
+
+    로그 파일을 조각 단위로 내려받아 증분 파싱하고 상위 top_k 개 쿼리와 분포 통계만 반환합니다.
+    max_bytes 를 지정하지 않으면 파일 전체를 분석합니다.
+    boto3 다운로드와 파싱이 블로킹이므로 동기 함수로 두어 스레드풀에서 실행합니다.
+    """
     try:
-        content = aws_integration.download_rds_log_file(db, db_identifier, log_file_name, max_bytes)
-        # 로그 파일을 이벤트 리스트처럼 분할 (줄 단위)
-        log_events = [{"message": line, "timestamp": 0} for line in content.splitlines() if line.strip()]
-        slow_queries = aws_integration.parse_slow_query_log(log_events)
-        analysis = aws_integration.analyze_slow_queries(slow_queries)
+        result = aws_integration.analyze_rds_log_file(db, db_identifier, log_file_name, max_bytes, min_duration_ms, top_k)
         return {
             "db_identifier": db_identifier,
             "log_file_name": log_file_name,
-            "slow_queries": slow_queries,
-            "analysis": analysis,
-            "log_length": len(content)
+            "slow_queries": result["analysis"]["top_queries"],
+            "analysis": result["analysis"],
+            "log_length": result["bytes_processed"],
+            "portions": result["portions"]
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -365,6 +471,7 @@ async def add_aws_credentials(payload: dict = Body(...), db: Session = Depends(g
         db.add(cred)
         db.commit()
         db.refresh(cred)
+        aws_integration.invalidate_sessions()
         print(f"Credential saved with ID: {cred.id}")
         
         # IAM Role 방식이고 저장 성공했으면 Role 정보도 반환
@@ -400,6 +507,7 @@ async def delete_aws_credentials(cred_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail='Not found')
     db.delete(cred)
     db.commit()
+    aws_integration.invalidate_sessions()
     return {'success': True}
 
 @router.post('/aws/credentials/{cred_id}/activate')
@@ -410,4 +518,6 @@ async def activate_aws_credentials(cred_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail='Not found')
     cred.is_active = True
     db.commit()
+    # 활성 인증 정보가 바뀌었으므로 캐시된 세션/클라이언트 폐기
+    aws_integration.invalidate_sessions()
     return {'success': True} 
\ No newline at end of file
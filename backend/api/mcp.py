@@ -1,17 +1,22 @@
 """
 MCP 관련 API 엔드포인트
 """
-from fastapi import APIRouter, Form, HTTPException
+from fastapi import APIRouter, Body, Form, HTTPException
 from backend.services.mcp_manager import mcp_manager
 from backend.services.ai_chat_service import ai_chat_service
+from backend.services.sql_analysis import classify_statement, split_statements
 
 router = APIRouter(prefix="/api/mcp", tags=["mcp"])
 
+# 직접 호출 엔드포인트에서 허용하는 도구 (query 는 읽기 전용 SQL 만)
+READ_ONLY_TOOLS = ("list_tables", "describe_table", "query")
+
 @router.get("/status")
-def get_mcp_status():
-    """MCP 상태 조회"""
+def get_mcp_status(refresh: bool = False):
+    """MCP 상태 조회 (서버 연결 상태는 캐시된 값, refresh=true 면 병렬로 다시 확인)"""
     try:
         context = ai_chat_service.get_full_context_for_ai()
+        context["servers"] = mcp_manager.get_mcp_server_status(refresh=refresh)
         return {
             "status": "success",
             "data": context
@@ -116,4 +121,45 @@ def remove_database_from_mcp(db_name: str):
             "message": f"데이터베이스 '{db_name}'이 MCP에서 제거되었습니다."
         }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"MCP 데이터베이스 제거 실패: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"MCP 데이터베이스 제거 실패: {str(e)}")
+@router.post("/database/{db_name}/call")
+def call_database_tool(db_name: str, payload: dict = Body(...)):
+    """데이터베이스 MCP 서버 도구 호출 ({"tool": "query", "arguments": {...}})
+
+    MCP 서버의 query 는 실행 후 커밋하므로, 쓰기 정책을 우회하지 않도록 읽기 전용 SQL 만 허용합니다.
+    """
+    tool = payload.get("tool")
+    if not tool:
+        raise HTTPException(status_code=400, detail="tool 이 필요합니다.")
+    if tool not in READ_ONLY_TOOLS:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 도구입니다: {tool}")
+    arguments = payload.get("arguments") or {}
+    if tool == "query":
+        statements = [classify_statement(s) for s in split_statements(arguments.get("query") or "")]
+        if not statements:
+            raise HTTPException(status_code=400, detail="query 가 필요합니다.")
+        rejected = next((s for s in statements if not s.read_only), None)
+        if rejected is not None:
+            raise HTTPException(status_code=403, detail=f"읽기 전용 SQL 만 실행할 수 있습니다: {rejected.reason or rejected.command}")
+    try:
+        result = ai_chat_service.call_database_tool(db_name, tool, arguments)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"MCP 서버에 데이터베이스 '{db_name}'이 등록되어 있지 않습니다.")
+    except TimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except ConnectionError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"MCP 도구 호출 실패: {str(e)}")
+    return {
+        "status": "success",
+        "data": result
+    }
+
+@router.get("/processes")
+def get_mcp_processes():
+    """MCP 서버 프로세스 상태 조회"""
+    return {
+        "status": "success",
+        "processes": mcp_manager.supervisor.status()
+    }
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Request, HTTPException, Form, Depends
+from fastapi import APIRouter, Request, HTTPException, Form, Depends, Body
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import json
+import time
 from datetime import datetime, timedelta
 import psycopg2
 import mysql.connector
@@ -10,13 +11,24 @@ from sqlalchemy import create_engine, text, MetaData, inspect
 from sqlalchemy.orm import Session
 
 from backend.monitoring.metrics_collector import metrics_collector
-from backend.models.database import DatabaseMetrics, MonitoringConfig, DatabaseConnection
+from backend.monitoring.timeseries import CHART_FIELDS
+from backend.monitoring.cloudwatch import RDS_METRICS, RDS_METRIC_UNITS, fetch_rds_metrics, get_dimension_name
+from backend.monitoring.slow_query_log import NO_STATEMENT, iter_slow_queries
+from backend.monitoring.sql_fingerprint import merge_statement_rows
+from backend.monitoring.pg_capabilities import build_statements_query, capability_cache
+from backend.monitoring.schema_introspection import monitoring_schema, schema_cache
+from backend.monitoring.statement_snapshots import DIFF_ORDER_KEYS, diff_snapshots, statement_snapshotter
+from backend.models.database import DatabaseMetrics, MonitoringConfig, DatabaseConnection, SessionLocal
 from backend.database import get_registered_databases # Import the new function
+from backend.database import get_statement_snapshot, get_statement_texts, list_statement_snapshots
 from backend.integrations.aws import AWSIntegration
 
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
 
+# 핑거프린트로 병합할 때 pg_stat_statements 에서 읽어 올 최대 행 수 (기본 pg_stat_statements.max)
+FINGERPRINT_SCAN_LIMIT = 5000
+
 @router.get("/monitoring", response_class=HTMLResponse)
 async def monitoring_dashboard(request: Request):
     """모니터링 대시보드"""
@@ -38,7 +50,7 @@ async def monitoring_dashboard(request: Request):
     })
 
 @router.get("/monitoring/{db_name}", response_class=HTMLResponse)
-async def database_monitoring(request: Request, db_name: str):
+async def database_monitoring(request: Request, db_name: str, width: int = 500):
     """특정 데이터베이스의 상세 모니터링"""
     databases = get_registered_databases() # Use the new function
     selected_db = next((db for db in databases if db["name"] == db_name), None)
@@ -52,23 +64,14 @@ async def database_monitoring(request: Request, db_name: str):
     # 24시간 히스토리
     history_metrics = metrics_collector.get_metrics_history(db_name, hours=24)
     
-    # 차트 데이터 준비
-    chart_data = {
-        "timestamps": [],
-        "active_connections": [],
-        "total_connections": [],
-        "queries_per_second": [],
-        "slow_queries_count": [],
-        "disk_usage": []
-    }
-    
-    for metric in history_metrics:
-        chart_data["timestamps"].append(metric.timestamp.strftime("%H:%M"))
-        chart_data["active_connections"].append(metric.active_connections or 0)
-        chart_data["total_connections"].append(metric.total_connections or 0)
-        chart_data["queries_per_second"].append(metric.queries_per_second or 0)
-        chart_data["slow_queries_count"].append(metric.slow_queries_count or 0)
-        chart_data["disk_usage"].append(metric.disk_usage or 0)
+    # 차트 데이터 준비 (컬럼형 시계열에서 바로 생성, 화면 폭에 맞춰 다운샘플링)
+    chart_data = {"timestamps": []}
+    chart_data.update({field: [] for field in CHART_FIELDS})
+    series = metrics_collector.get_metrics_series(db_name)
+    if series:
+        timestamps, values = series.aligned(CHART_FIELDS, time.time() - 24 * 3600, width=width)
+        chart_data["timestamps"] = [time.strftime("%H:%M", time.localtime(ts)) for ts in timestamps]
+        chart_data.update(values)
     
     return templates.TemplateResponse("database_monitoring.html", {
         "request": request,
@@ -97,13 +100,20 @@ async def start_monitoring(request: Request, db_name: str, use_cloudwatch: bool
         port=int(selected_db["port"]),
         user=selected_db["user"],
         password=selected_db["password"],
-        dbname=selected_db["dbname"]
+        dbname=selected_db["dbname"],
+        cloudwatch_id=selected_db.get("cloudwatch_id")
     )
     
     metrics_collector.add_database(db_connection, config, use_cloudwatch=use_cloudwatch)
+    # pg_stat_statements 스냅샷은 PostgreSQL 에서만 수집
+    is_postgresql = selected_db.get("type", "postgresql") == "postgresql"
+    if is_postgresql:
+        statement_snapshotter.add_database(db_connection)
     
     # 모니터링 시작
     metrics_collector.start_monitoring()
+    if is_postgresql:
+        statement_snapshotter.start()
     
     return {"status": "success", "message": f"Started monitoring for {db_name} (cloudwatch={use_cloudwatch})"}
 
@@ -111,11 +121,34 @@ async def start_monitoring(request: Request, db_name: str, use_cloudwatch: bool
 async def stop_monitoring(request: Request, db_name: str):
     """특정 데이터베이스 모니터링 중지"""
     metrics_collector.remove_database(db_name)
+    statement_snapshotter.remove_database(db_name)
     return {"status": "success", "message": f"Stopped monitoring for {db_name}"}
 
 @router.get("/api/metrics/{db_name}")
-async def get_metrics_api(db_name: str, hours: int = 24):
-    """API로 메트릭 데이터 반환 (JSON)"""
+async def get_metrics_api(
+    db_name: str,
+    hours: int = 24,
+    format: str = "full",
+    width: Optional[int] = None,
+    fields: Optional[str] = None
+):
+    """API로 메트릭 데이터 반환 (JSON)
+
+    format=compact 이면 필드별 epoch 타임스탬프/값 배열을 반환하고,
+    width 가 주어지면 LTTB 로 차트 폭에 맞게 다운샘플링합니다.
+    """
+    if format == "compact":
+        field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else list(CHART_FIELDS)
+        since = time.time() - hours * 3600
+        series = metrics_collector.get_metrics_series(db_name)
+        return {
+            "db_name": db_name,
+            "format": "compact",
+            "hours": hours,
+            "count": series.count(since) if series else 0,
+            "series": series.series(field_list, since, width=width) if series else {}
+        }
+    
     history_metrics = metrics_collector.get_metrics_history(db_name, hours=hours)
     
     # Pydantic 모델을 dict로 변환
@@ -160,7 +193,7 @@ async def get_latest_metrics_api(db_name: str):
     }
 
 @router.get("/api/schema/{db_name}")
-async def get_database_schema(db_name: str):
+async def get_database_schema(db_name: str, refresh: bool = False):
     """데이터베이스 스키마 정보 반환 (JSON)"""
     databases = get_registered_databases()
     selected_db = next((db for db in databases if db["name"] == db_name), None)
@@ -169,8 +202,9 @@ async def get_database_schema(db_name: str):
         raise HTTPException(status_code=404, detail="Database not found")
     
     try:
+        db_type = selected_db.get("type", "postgresql")
         # 데이터베이스 연결
-        if selected_db["type"] == "postgresql":
+        if db_type == "postgresql":
             conn = psycopg2.connect(
                 host=selected_db["host"],
                 port=int(selected_db["port"]),
@@ -178,8 +212,8 @@ async def get_database_schema(db_name: str):
                 password=selected_db["password"],
                 database=selected_db["dbname"]
             )
-            schema_info = get_postgresql_schema(conn)
-        elif selected_db["type"] == "mysql":
+            schema_info = get_postgresql_schema(conn, refresh=refresh)
+        elif db_type == "mysql":
             conn = mysql.connector.connect(
                 host=selected_db["host"],
                 port=int(selected_db["port"]),
@@ -203,14 +237,18 @@ async def get_database_schema(db_name: str):
         raise HTTPException(status_code=500, detail=f"Failed to get schema: {str(e)}")
 
 @router.get("/api/query-history/{db_name}")
-async def get_query_history(db_name: str, limit: int = 20):
-    """DB 쿼리 히스토리/성능 정보 조회 (최신/느린/자주 실행된 쿼리 등)"""
+async def get_query_history(db_name: str, limit: int = 20, group_by_fingerprint: bool = False):
+    """DB 쿼리 히스토리/성능 정보 조회 (최신/느린/자주 실행된 쿼리 등)
+
+    group_by_fingerprint=true 이면 IN 목록 길이나 리터럴만 다른 항목을 핑거프린트로 합쳐 반환합니다.
+    """
     databases = get_registered_databases()
     selected_db = next((db for db in databases if db["name"] == db_name), None)
     if not selected_db:
         raise HTTPException(status_code=404, detail="Database not found")
     try:
-        if selected_db["type"] == "postgresql":
+        db_type = selected_db.get("type", "postgresql")
+        if db_type == "postgresql":
             import psycopg2
             conn = psycopg2.connect(
                 host=selected_db["host"],
@@ -219,21 +257,24 @@ async def get_query_history(db_name: str, limit: int = 20):
                 password=selected_db["password"],
                 database=selected_db["dbname"]
             )
+            caps = capability_cache.get(conn)
+            if not caps.has_pg_stat_statements:
+                conn.close()
+                raise HTTPException(status_code=400, detail="pg_stat_statements extension is not installed")
             cur = conn.cursor()
-            cur.execute("""
-                SELECT query, calls, total_time, mean_time, rows, max_time, min_time
-                  FROM pg_stat_statements
-                 WHERE query NOT LIKE 'EXPLAIN%'
-                 ORDER BY total_time DESC
-                 LIMIT %s
-            """, (limit,))
+            cur.execute(build_statements_query(caps), (FINGERPRINT_SCAN_LIMIT if group_by_fingerprint else limit,))
             rows = cur.fetchall() or []
             columns = [desc[0] for desc in cur.description] if cur.description else []
             data = [list(row) for row in rows]
             cur.close()
             conn.close()
+            if group_by_fingerprint:
+                merged = merge_statement_rows([dict(zip(columns, row)) for row in data], limit)
+                headers = ["fingerprint", "query", "calls", "total_time", "mean_time", "rows", "max_time", "min_time", "variants"]
+                data = [[item[h] for h in headers] for item in merged]
+                return {"status": "success", "db_type": "postgresql", "headers": headers, "data": data}
             return {"status": "success", "db_type": "postgresql", "headers": columns, "data": data}
-        elif selected_db["type"] == "mysql":
+        elif db_type == "mysql":
             import mysql.connector
             conn = mysql.connector.connect(
                 host=selected_db["host"],
@@ -257,6 +298,8 @@ async def get_query_history(db_name: str, limit: int = 20):
             return {"status": "success", "db_type": "mysql", "headers": columns, "data": data}
         else:
             raise HTTPException(status_code=400, detail="Unsupported database type")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get query history: {str(e)}")
 
@@ -283,13 +326,12 @@ async def get_query_insights(db_name: str, limit: int = 20):
                 limit=limit
             )
             events = response.get('events', [])
-            # duration: 123.45 ms  statement: SELECT ...
-            import re
+            # duration: 123.45 ms  statement|execute <name>: SELECT ...
             rows = []
             for e in events:
-                m = re.search(r'duration: ([0-9.]+) ms\s+statement: (.*)', e['message'])
-                if m:
-                    rows.append([float(m.group(1)), m.group(2)])
+                for entry in iter_slow_queries(e['message']):
+                    if entry['query'] != NO_STATEMENT:
+                        rows.append([entry['duration'], entry['query']])
             if rows:
                 result["cloudwatch"] = {
                     "headers": ["duration_ms", "query"],
@@ -303,7 +345,8 @@ async def get_query_insights(db_name: str, limit: int = 20):
     # 2. DB 자체 뷰 기반 분석 시도 (기존 쿼리 히스토리 로직 활용)
     try:
         dbview = None
-        if selected_db["type"] == "postgresql":
+        db_type = selected_db.get("type", "postgresql")
+        if db_type == "postgresql":
             import psycopg2
             conn = psycopg2.connect(
                 host=selected_db["host"],
@@ -312,22 +355,19 @@ async def get_query_insights(db_name: str, limit: int = 20):
                 password=selected_db["password"],
                 database=selected_db["dbname"]
             )
+            caps = capability_cache.get(conn)
+            rows = []
             cur = conn.cursor()
-            cur.execute("""
-                SELECT query, calls, total_time, mean_time, rows, max_time, min_time
-                  FROM pg_stat_statements
-                 WHERE query NOT LIKE 'EXPLAIN%'
-                 ORDER BY total_time DESC
-                 LIMIT %s
-            """, (limit,))
-            rows = cur.fetchall() or []
+            if caps.has_pg_stat_statements:
+                cur.execute(build_statements_query(caps), (limit,))
+                rows = cur.fetchall() or []
             columns = [desc[0] for desc in cur.description] if cur.description else []
             data = [list(row) for row in rows]
             cur.close()
             conn.close()
             if data:
                 dbview = {"headers": columns, "data": data}
-        elif selected_db["type"] == "mysql":
+        elif db_type == "mysql":
             import mysql.connector
             conn = mysql.connector.connect(
                 host=selected_db["host"],
@@ -361,135 +401,81 @@ async def get_query_insights(db_name: str, limit: int = 20):
         raise HTTPException(status_code=404, detail="No query insights available (CloudWatch/DBview 모두 실패)")
     return result
 
-def get_postgresql_schema(conn):
-    """PostgreSQL 스키마 정보 추출"""
-    cursor = conn.cursor()
-    schema_info = {
-        "tables": [],
-        "relationships": []
-    }
-    
+def _db_connection(selected_db: Dict) -> DatabaseConnection:
+    return DatabaseConnection(
+        name=selected_db["name"],
+        host=selected_db["host"],
+        port=int(selected_db["port"]),
+        user=selected_db["user"],
+        password=selected_db["password"],
+        dbname=selected_db["dbname"],
+        cloudwatch_id=selected_db.get("cloudwatch_id")
+    )
+
+@router.post("/api/statement-snapshots/{db_name}")
+async def capture_statement_snapshot_api(db_name: str):
+    """pg_stat_statements 스냅샷을 지금 찍어 저장"""
+    databases = get_registered_databases()
+    selected_db = next((db for db in databases if db["name"] == db_name), None)
+    if not selected_db:
+        raise HTTPException(status_code=404, detail="Database not found")
     try:
-        # 테이블 목록 조회
-        cursor.execute("""
-            SELECT 
-                t.table_name,
-                t.table_type,
-                obj_description(c.oid) as table_comment
-            FROM information_schema.tables t
-            JOIN pg_class c ON c.relname = t.table_name
-            WHERE t.table_schema = 'public'
-            AND t.table_type = 'BASE TABLE'
-            ORDER BY t.table_name
-        """)
-        
-        tables = cursor.fetchall()
-        
-        for table in tables:
-            table_name = table[0]
-            table_comment = table[2] or ""
-            
-            # 컬럼 정보 조회
-            cursor.execute("""
-                SELECT 
-                    c.column_name,
-                    c.data_type,
-                    c.is_nullable,
-                    c.column_default,
-                    c.character_maximum_length,
-                    c.numeric_precision,
-                    c.numeric_scale,
-                    col_description(a.attrelid, a.attnum) as column_comment
-                FROM information_schema.columns c
-                JOIN pg_attribute a ON a.attname = c.column_name
-                JOIN pg_class pc ON pc.oid = a.attrelid
-                WHERE c.table_name = %s
-                AND c.table_schema = 'public'
-                ORDER BY c.ordinal_position
-            """, (table_name,))
-            
-            columns = []
-            for col in cursor.fetchall():
-                column_info = {
-                    "name": col[0],
-                    "type": col[1],
-                    "nullable": col[2] == "YES",
-                    "default": col[3],
-                    "max_length": col[4],
-                    "precision": col[5],
-                    "scale": col[6],
-                    "comment": col[7] or ""
-                }
-                columns.append(column_info)
-            
-            # 인덱스 정보 조회
-            cursor.execute("""
-                SELECT 
-                    i.relname as index_name,
-                    array_to_string(array_agg(a.attname), ', ') as column_names,
-                    ix.indisunique as is_unique,
-                    ix.indisprimary as is_primary
-                FROM pg_class t
-                JOIN pg_index ix ON t.oid = ix.indrelid
-                JOIN pg_class i ON ix.indexrelid = i.oid
-                JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = ANY(ix.indkey)
-                WHERE t.relname = %s
-                GROUP BY i.relname, ix.indisunique, ix.indisprimary
-                ORDER BY i.relname
-            """, (table_name,))
-            
-            indexes = []
-            for idx in cursor.fetchall():
-                index_info = {
-                    "name": idx[0],
-                    "columns": idx[1].split(", "),
-                    "unique": idx[2],
-                    "primary": idx[3]
-                }
-                indexes.append(index_info)
-            
-            table_info = {
-                "name": table_name,
-                "comment": table_comment,
-                "columns": columns,
-                "indexes": indexes
-            }
-            schema_info["tables"].append(table_info)
-        
-        # 외래키 관계 조회
-        cursor.execute("""
-            SELECT 
-                tc.table_name,
-                kcu.column_name,
-                ccu.table_name AS foreign_table_name,
-                ccu.column_name AS foreign_column_name,
-                tc.constraint_name
-            FROM information_schema.table_constraints AS tc
-            JOIN information_schema.key_column_usage AS kcu
-                ON tc.constraint_name = kcu.constraint_name
-                AND tc.table_schema = kcu.table_schema
-            JOIN information_schema.constraint_column_usage AS ccu
-                ON ccu.constraint_name = tc.constraint_name
-                AND ccu.table_schema = tc.table_schema
-            WHERE tc.constraint_type = 'FOREIGN KEY'
-            AND tc.table_schema = 'public'
-        """)
-        
-        relationships = cursor.fetchall()
-        for rel in relationships:
-            relationship_info = {
-                "table": rel[0],
-                "column": rel[1],
-                "foreign_table": rel[2],
-                "foreign_column": rel[3],
-                "constraint_name": rel[4]
-            }
-            schema_info["relationships"].append(relationship_info)
-        
-    finally:
-        cursor.close()
-    
-    return schema_info
+        snapshot, error = statement_snapshotter.capture(_db_connection(selected_db))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to capture pg_stat_statements snapshot: {str(e)}")
+    if error:
+        raise HTTPException(status_code=500, detail=f"Failed to save pg_stat_statements snapshot: {error}")
+    return {
+        "status": "success",
+        "id": snapshot.id,
+        "captured_at": snapshot.captured_at,
+        "statements": len(snapshot.entries)
+    }
+
+@router.get("/api/statement-snapshots/{db_name}")
+async def list_statement_snapshots_api(db_name: str, hours: int = 24):
+    """최근 hours 시간 동안 저장된 pg_stat_statements 스냅샷 목록"""
+    since_ms = int((time.time() - hours * 3600) * 1000)
+    snapshots, error = list_statement_snapshots(db_name, since_ms)
+    if error:
+        raise HTTPException(status_code=500, detail=f"Failed to list snapshots: {error}")
+    return {"status": "success", "db_name": db_name, "snapshots": snapshots}
+
+@router.get("/api/statement-diff/{db_name}")
+async def get_statement_diff(db_name: str, hours: float = 1, start_id: Optional[int] = None,
+                             end_id: Optional[int] = None, order_by: str = "total_time", limit: int = 20):
+    """두 pg_stat_statements 스냅샷 사이 구간의 쿼리별 증가량 top-N
+
+    start_id/end_id 를 주지 않으면 최신 스냅샷과 그보다 hours 시간 이전의 스냅샷을 비교합니다.
+    order_by: total_time, calls, rows, blks(shared hit + read), mean_time 및 각 블록 카운터
+    """
+    if order_by not in DIFF_ORDER_KEYS:
+        raise HTTPException(status_code=400, detail=f"order_by must be one of: {', '.join(DIFF_ORDER_KEYS)}")
+    end, error = get_statement_snapshot(db_name, snapshot_id=end_id)
+    if error:
+        raise HTTPException(status_code=500, detail=f"Failed to load snapshot: {error}")
+    if end is None:
+        raise HTTPException(status_code=404, detail="No pg_stat_statements snapshot found")
+    if start_id is not None:
+        start, error = get_statement_snapshot(db_name, snapshot_id=start_id)
+    else:
+        start, error = get_statement_snapshot(db_name, before_ms=end.captured_at - int(hours * 3600 * 1000))
+    if error:
+        raise HTTPException(status_code=500, detail=f"Failed to load snapshot: {error}")
+    if start is None or start.id == end.id:
+        raise HTTPException(status_code=404, detail="No earlier snapshot to compare with")
+
+    result = diff_snapshots(start, end, order_by=order_by, limit=limit)
+    texts, _ = get_statement_texts(db_name, [item["queryid"] for item in result["statements"]])
+    for item in result["statements"]:
+        item["query"] = texts.get(item["queryid"])
+    result["status"] = "success"
+    result["db_name"] = db_name
+    return result
+
+def get_postgresql_schema(conn, refresh: bool = False):
+    """PostgreSQL 스키마 정보 추출 (public 스키마, 카탈로그 일괄 조회 결과를 대상별로 캐시)"""
+    return monitoring_schema(schema_cache.get(conn, refresh=refresh))
 
 def get_mysql_schema(conn):
     """MySQL 스키마 정보 추출"""
@@ -612,6 +598,14 @@ def get_mysql_schema(conn):
 # ================= CloudWatch 기반 모니터링 API =================
 from fastapi import HTTPException
 
+def get_cloudwatch_client():
+    """활성 AWS 인증 정보의 캐시된 CloudWatch 클라이언트 반환 (앱 DB 연결 풀 사용)"""
+    db = SessionLocal()
+    try:
+        return AWSIntegration().get_client(db, 'cloudwatch')
+    finally:
+        db.close()
+
 @router.get("/api/monitoring/cloudwatch/metrics/{db_identifier}")
 async def get_cloudwatch_metrics(
     db_identifier: str, 
@@ -622,30 +616,13 @@ async def get_cloudwatch_metrics(
 ):
     """CloudWatch에서 RDS 메트릭 데이터 조회 (인스턴스/클러스터 자동 판별)"""
     try:
-        aws_integration = AWSIntegration()
-        import psycopg2
-        from backend.config import DB_HOST, DB_PORT, DB_USER, DB_PASSWORD, DB_NAME
-        conn = psycopg2.connect(
-            host=DB_HOST,
-            port=DB_PORT,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            dbname=DB_NAME
-        )
-        session = aws_integration.get_boto3_session_from_connection(conn)
-        cloudwatch = session.client('cloudwatch')
-        from datetime import datetime, timedelta
+        cloudwatch = get_cloudwatch_client()
         end_time = datetime.utcnow()
         start_time = end_time - timedelta(hours=hours)
-        # 클러스터/인스턴스 자동 판별
-        if any(x in db_identifier.lower() for x in ["cluster", "aurora"]):
-            dimension_name = "DBClusterIdentifier"
-        else:
-            dimension_name = "DBInstanceIdentifier"
         response = cloudwatch.get_metric_statistics(
             Namespace='AWS/RDS',
             MetricName=metric_name,
-            Dimensions=[{'Name': dimension_name, 'Value': db_identifier}],
+            Dimensions=[{'Name': get_dimension_name(db_identifier), 'Value': db_identifier}],
             StartTime=start_time,
             EndTime=end_time,
             Period=period,
@@ -673,6 +650,68 @@ async def get_cloudwatch_metrics(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"CloudWatch 메트릭 조회 실패: {str(e)}")
 
+@router.post("/api/monitoring/cloudwatch/metrics/batch")
+def get_cloudwatch_metrics_batch(payload: dict = Body(...)):
+    """여러 인스턴스/메트릭/통계를 GetMetricData 한 번으로 조회해 같은 타임스탬프 축으로 정렬해 반환
+
+    payload 예시:
+    {
+        "db_identifiers": ["prod-db-1", "prod-cluster"],
+        "metrics": [{"name": "CPUUtilization", "stat": "Average"}, {"name": "DatabaseConnections", "stat": "Maximum"}],
+        "period": 300,
+        "hours": 24
+    }
+    metrics 는 문자열 목록도 허용하며, 이때 통계는 "stat" (기본 Average) 를 사용합니다.
+    잘못된 payload 나 조회 실패는 {"status": "error", "message": ...} 로 반환합니다.
+    """
+    try:
+        db_identifiers = payload.get("db_identifiers") or ([payload["db_identifier"]] if payload.get("db_identifier") else [])
+        default_stat = payload.get("stat", "Average")
+        metrics = []
+        for metric in payload.get("metrics") or []:
+            if isinstance(metric, str):
+                metrics.append((metric, default_stat))
+            else:
+                metrics.append((metric["name"], metric.get("stat", default_stat)))
+        if not db_identifiers or not metrics:
+            return {"status": "error", "message": "db_identifiers 와 metrics 가 필요합니다."}
+        period = int(payload.get("period", 300))
+        hours = int(payload.get("hours", 24))
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        return {"status": "error", "message": f"잘못된 요청 형식입니다: {str(e)}"}
+    
+    keys = [(db_identifier, name, stat) for db_identifier in db_identifiers for name, stat in metrics]
+    
+    try:
+        end_time = datetime.utcnow()
+        start_time = end_time - timedelta(hours=hours)
+        results = fetch_rds_metrics(get_cloudwatch_client(), keys, start_time, end_time, period)
+    except Exception as e:
+        return {"status": "error", "message": f"CloudWatch 메트릭 조회 실패: {str(e)}"}
+    
+    # 모든 시계열을 공통 타임스탬프 축으로 정렬 (값이 없는 지점은 null)
+    timestamps = sorted({ts for data in results.values() for ts in data["timestamps"]})
+    series = []
+    for (db_identifier, name, stat) in keys:
+        data = results[(db_identifier, name, stat)]
+        by_time = dict(zip(data["timestamps"], data["values"]))
+        series.append({
+            "db_identifier": db_identifier,
+            "metric_name": name,
+            "stat": stat,
+            "unit": RDS_METRIC_UNITS.get(name),
+            "values": [by_time.get(ts) for ts in timestamps]
+        })
+    
+    return {
+        "status": "success",
+        "period": period,
+        "hours": hours,
+        "timestamps": [ts.isoformat() for ts in timestamps],
+        "series": series,
+        "count": len(timestamps)
+    }
+
 @router.get("/api/monitoring/cloudwatch/rds-info/{db_identifier}")
 async def get_rds_instance_info(db_identifier: str):
     """RDS 인스턴스 정보 조회 (최대 커넥션 수 등)"""
@@ -687,8 +726,10 @@ async def get_rds_instance_info(db_identifier: str):
             password=DB_PASSWORD,
             dbname=DB_NAME
         )
-        session = aws_integration.get_boto3_session_from_connection(conn)
-        rds = session.client('rds')
+        try:
+            rds = aws_integration.get_client_from_connection(conn, 'rds')
+        finally:
+            conn.close()
         response = rds.describe_db_instances(DBInstanceIdentifier=db_identifier)
         instance = response['DBInstances'][0]
         instance_type = instance['DBInstanceClass']
@@ -731,18 +772,7 @@ async def get_available_cloudwatch_metrics():
     """사용 가능한 CloudWatch 메트릭 목록"""
     return {
         "status": "success",
-        "metrics": [
-            {"name": "DatabaseConnections", "description": "활성 데이터베이스 연결 수", "unit": "Count", "namespace": "AWS/RDS"},
-            {"name": "CPUUtilization", "description": "CPU 사용률", "unit": "Percent", "namespace": "AWS/RDS"},
-            {"name": "FreeableMemory", "description": "사용 가능한 메모리", "unit": "Bytes", "namespace": "AWS/RDS"},
-            {"name": "FreeStorageSpace", "description": "사용 가능한 스토리지 공간", "unit": "Bytes", "namespace": "AWS/RDS"},
-            {"name": "ReadIOPS", "description": "읽기 IOPS", "unit": "Count/Second", "namespace": "AWS/RDS"},
-            {"name": "WriteIOPS", "description": "쓰기 IOPS", "unit": "Count/Second", "namespace": "AWS/RDS"},
-            {"name": "ReadLatency", "description": "읽기 지연시간", "unit": "Seconds", "namespace": "AWS/RDS"},
-            {"name": "WriteLatency", "description": "쓰기 지연시간", "unit": "Seconds", "namespace": "AWS/RDS"},
-            {"name": "NetworkReceiveThroughput", "description": "네트워크 수신 처리량", "unit": "Bytes/Second", "namespace": "AWS/RDS"},
-            {"name": "NetworkTransmitThroughput", "description": "네트워크 송신 처리량", "unit": "Bytes/Second", "namespace": "AWS/RDS"}
-        ]
+        "metrics": RDS_METRICS
     }
 
 def get_max_connections_by_instance_type(instance_type: str) -> int:
@@ -1,6 +1,7 @@
 import psycopg2
 from psycopg2.extras import RealDictCursor
 import os
+import json
 from backend.config import DB_HOST, DB_PORT, DB_USER, DB_PASSWORD, DB_NAME
 
 def get_app_db_connection():
@@ -13,6 +14,20 @@ def get_app_db_connection():
         dbname=DB_NAME
     )
 
+# 등록 DB / AI 모델 설정 변경 리스너 (캐시 무효화용)
+_config_change_listeners = []
+
+def add_config_change_listener(callback):
+    """설정이 바뀔 때 callback(kind) 호출 ("databases", "ai_model", "mcp")"""
+    _config_change_listeners.append(callback)
+
+def notify_config_change(kind):
+    for callback in list(_config_change_listeners):
+        try:
+            callback(kind)
+        except Exception as e:
+            print(f"WARNING: Config change listener failed: {e}")
+
 def create_tables_if_not_exists():
     """Creates necessary tables for storing database connections and OpenAI keys."""
     conn = None
@@ -31,10 +46,13 @@ def create_tables_if_not_exists():
                 password VARCHAR(255),
                 dbname VARCHAR(255),
                 cloudwatch_id VARCHAR(255),  -- AWS RDS 인스턴스ID
-                remark VARCHAR(255)  -- 비고(설명) 컬럼 추가
+                remark VARCHAR(255),  -- 비고(설명) 컬럼 추가
+                replica_hosts TEXT,  -- 읽기 복제본 "host:port" 목록 (쉼표 구분)
+                read_routing VARCHAR(32) DEFAULT 'primary',  -- primary / replica / lag_aware
+                max_replica_lag_seconds INTEGER  -- lag_aware 허용 지연 (초)
             );
         """)
-        # 이미 있는 경우 cloudwatch_id, remark 컬럼이 없으면 추가
+        # 이미 있는 경우 cloudwatch_id, remark, 복제본 라우팅 컬럼이 없으면 추가
         cur.execute("""
             DO $$
             BEGIN
@@ -50,6 +68,14 @@ def create_tables_if_not_exists():
                 ) THEN
                     ALTER TABLE databases ADD COLUMN remark VARCHAR(255);
                 END IF;
+                IF NOT EXISTS (
+                    SELECT 1 FROM information_schema.columns 
+                    WHERE table_name='databases' AND column_name='replica_hosts'
+                ) THEN
+                    ALTER TABLE databases ADD COLUMN replica_hosts TEXT;
+                    ALTER TABLE databases ADD COLUMN read_routing VARCHAR(32) DEFAULT 'primary';
+                    ALTER TABLE databases ADD COLUMN max_replica_lag_seconds INTEGER;
+                END IF;
             END$$;
         """)
 
@@ -137,6 +163,83 @@ def create_tables_if_not_exists():
             );
         """)
 
+        # 슬로우 쿼리 duration 스케치 (시간 버킷/핑거프린트별, 장기 추세 비교용)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS slow_query_sketches (
+                id SERIAL PRIMARY KEY,
+                db_identifier VARCHAR(255) NOT NULL,
+                bucket_start BIGINT NOT NULL,
+                fingerprint VARCHAR(32) NOT NULL DEFAULT '',
+                query TEXT,
+                sketch TEXT NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (db_identifier, bucket_start, fingerprint)
+            );
+        """)
+
+        # 로그 tail 체크포인트 (CloudWatch 스트림 nextForwardToken / RDS 로그 파일 Marker)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS log_tail_checkpoints (
+                id SERIAL PRIMARY KEY,
+                db_identifier VARCHAR(255) NOT NULL,
+                source VARCHAR(20) NOT NULL,
+                stream VARCHAR(1024) NOT NULL,
+                position TEXT NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (db_identifier, source, stream)
+            );
+        """)
+
+        # 로그 tail 대상 (재시작 후 복원, since_ms 는 다음 주기의 스트림/파일 조회 시작 시각)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS log_tail_targets (
+                id SERIAL PRIMARY KEY,
+                db_identifier VARCHAR(255) NOT NULL UNIQUE,
+                since_ms BIGINT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+        """)
+
+        # pg_stat_statements 스냅샷 (entries 는 컬럼 목록 + 행 배열 JSON, 큰 값은 TOAST 로 압축 저장됨)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS statement_snapshots (
+                id SERIAL PRIMARY KEY,
+                db_name VARCHAR(255) NOT NULL,
+                captured_at BIGINT NOT NULL,
+                stats_reset VARCHAR(64),
+                dealloc BIGINT,
+                entries TEXT NOT NULL
+            );
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_statement_snapshots_db_time ON statement_snapshots (db_name, captured_at);")
+
+        # 스냅샷 쿼리 텍스트 (queryid 당 한 번만 저장)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS statement_texts (
+                id SERIAL PRIMARY KEY,
+                db_name VARCHAR(255) NOT NULL,
+                queryid BIGINT NOT NULL,
+                query TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (db_name, queryid)
+            );
+        """)
+
+        # 플레이북 단계별로 DB 마다 고정(컴파일)해 둔 SQL
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS playbook_compiled_sql (
+                id SERIAL PRIMARY KEY,
+                db_name VARCHAR(255) NOT NULL,
+                playbook VARCHAR(255) NOT NULL,
+                step_index INTEGER NOT NULL,
+                prompt_hash VARCHAR(64) NOT NULL,
+                sql TEXT NOT NULL,
+                compiled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (db_name, playbook, step_index)
+            );
+        """)
+
         conn.commit()
         print("INFO: Database tables checked/created successfully.")
     except Exception as e:
@@ -145,7 +248,8 @@ def create_tables_if_not_exists():
         if conn:
             conn.close()
 
-def execute_sql(sql, dbinfo):
+def execute_sql(sql, dbinfo, read_only=False):
+    """SQL 한 문장 실행 후 (headers, data) 반환 (read_only 가 아니면 성공 시 커밋)"""
     conn = psycopg2.connect(
         host=dbinfo["host"],
         user=dbinfo["user"],
@@ -154,14 +258,20 @@ def execute_sql(sql, dbinfo):
         port=dbinfo.get("port", 5432)
     )
     try:
+        if read_only:
+            # 분류를 통과한 문장도 서버에서 한 번 더 쓰기를 막음
+            conn.set_session(readonly=True)
         with conn.cursor() as cursor:
             cursor.execute(sql)
             if cursor.description:
                 headers = [desc[0] for desc in cursor.description]
                 data = cursor.fetchall()
-                return headers, data
             else: # Non-SELECT queries (no result)
-                return [], []
+                headers, data = [], []
+        if not read_only:
+            # 허용된 쓰기 문장이 연결을 닫을 때 롤백되지 않도록 커밋
+            conn.commit()
+        return headers, data
     finally:
         conn.close()
 
@@ -203,6 +313,8 @@ def get_tables(dbinfo):
         return []
 
 def get_table_schemas(dbinfo):
+    """NL2SQL 프롬프트용 스키마 문자열 (카탈로그 일괄 조회 결과를 대상별로 캐시)"""
+    from backend.monitoring.schema_introspection import schema_cache, schema_prompt_text
     # If no dbname, return schema for all DBs as a dict
     if not dbinfo.get("dbname"):
         dbs = get_all_databases(dbinfo)
@@ -211,61 +323,14 @@ def get_table_schemas(dbinfo):
             try:
                 info = dbinfo.copy()
                 info["dbname"] = db
-                conn = psycopg2.connect(
-                    host=info["host"],
-                    user=info["user"],
-                    password=info["password"],
-                    dbname=db,
-                    port=info.get("port", 5432)
-                )
-                with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cursor:
-                    cursor.execute("""
-                        SELECT table_schema, table_name, column_name, data_type
-                        FROM information_schema.columns
-                        WHERE table_schema NOT IN ('pg_catalog', 'information_schema')
-                        ORDER BY table_schema, table_name, ordinal_position;
-                    """)
-                    rows = cursor.fetchall()
-                conn.close()
-                schema = {}
-                for row in rows:
-                    t = f"{row['table_schema']}.{row['table_name']}"
-                    if t not in schema:
-                        schema[t] = []
-                    schema[t].append(f"{row['column_name']} {row['data_type']}")
-                result[db] = schema
+                result[db] = schema_prompt_text(schema_cache.get_for(info))
             except Exception:
                 continue
         # Summarize as a string
-        return "\n".join([
-            f"[{db}]\n" + "\n".join([f"{t}({', '.join(cols)})" for t, cols in tables.items()])
-            for db, tables in result.items()
-        ])
+        return "\n".join([f"[{db}]\n" + text for db, text in result.items()])
     # Single DB
     try:
-        conn = psycopg2.connect(
-            host=dbinfo["host"],
-            user=dbinfo["user"],
-            password=dbinfo["password"],
-            dbname=dbinfo["dbname"],
-            port=dbinfo.get("port", 5432)
-        )
-        with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cursor:
-            cursor.execute("""
-                SELECT table_schema, table_name, column_name, data_type
-                FROM information_schema.columns
-                WHERE table_schema NOT IN ('pg_catalog', 'information_schema')
-                ORDER BY table_schema, table_name, ordinal_position;
-            """)
-            rows = cursor.fetchall()
-        conn.close()
-        schema = {}
-        for row in rows:
-            t = f"{row['table_schema']}.{row['table_name']}"
-            if t not in schema:
-                schema[t] = []
-            schema[t].append(f"{row['column_name']} {row['data_type']}")
-        return "\n".join([f"{t}({', '.join(cols)})" for t, cols in schema.items()])
+        return schema_prompt_text(schema_cache.get_for(dbinfo))
     except Exception as e:
         return ""
 
@@ -289,7 +354,7 @@ def get_registered_databases():
     try:
         conn = get_app_db_connection()
         cur = conn.cursor(cursor_factory=RealDictCursor)
-        cur.execute("SELECT name, host, port, username AS user, password, dbname, cloudwatch_id FROM databases;")
+        cur.execute("SELECT name, host, port, username AS user, password, dbname, cloudwatch_id, replica_hosts, read_routing, max_replica_lag_seconds FROM databases;")
         databases = cur.fetchall()
         return databases
     except Exception as e:
@@ -329,7 +394,9 @@ def get_selected_openai_key():
         if conn:
             conn.close()
 
-def add_or_update_database(name, host, port, user, password, dbname, remark=None, cloudwatch_id=None):
+def add_or_update_database(name, host, port, user, password, dbname, remark=None, cloudwatch_id=None,
+                           replica_hosts=None, read_routing=None, max_replica_lag_seconds=None):
+    """DB 등록/수정 (복제본 설정이 None 이면 기존 값을 유지, replica_hosts='' 는 목록 비움)"""
     conn = None
     try:
         conn = get_app_db_connection()
@@ -339,10 +406,12 @@ def add_or_update_database(name, host, port, user, password, dbname, remark=None
         port_num = int(port) if port and port.strip() else 5432
         
         cur.execute(
-            "INSERT INTO databases (name, host, port, username, password, dbname, remark, cloudwatch_id) VALUES (%s, %s, %s, %s, %s, %s, %s, %s) ON CONFLICT (name) DO UPDATE SET host = EXCLUDED.host, port = EXCLUDED.port, username = EXCLUDED.username, password = EXCLUDED.password, dbname = EXCLUDED.dbname, remark = EXCLUDED.remark, cloudwatch_id = EXCLUDED.cloudwatch_id;",
-            (name, host, port_num, user, password, dbname, remark, cloudwatch_id)
+            "INSERT INTO databases (name, host, port, username, password, dbname, remark, cloudwatch_id, replica_hosts, read_routing, max_replica_lag_seconds) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) ON CONFLICT (name) DO UPDATE SET host = EXCLUDED.host, port = EXCLUDED.port, username = EXCLUDED.username, password = EXCLUDED.password, dbname = EXCLUDED.dbname, remark = EXCLUDED.remark, cloudwatch_id = EXCLUDED.cloudwatch_id, replica_hosts = COALESCE(EXCLUDED.replica_hosts, databases.replica_hosts), read_routing = COALESCE(EXCLUDED.read_routing, databases.read_routing), max_replica_lag_seconds = COALESCE(EXCLUDED.max_replica_lag_seconds, databases.max_replica_lag_seconds);",
+            (name, host, port_num, user, password, dbname, remark, cloudwatch_id,
+             replica_hosts, read_routing, max_replica_lag_seconds)
         )
         conn.commit()
+        notify_config_change("databases")
         
         # MCP에 데이터베이스 자동 등록
         try:
@@ -372,6 +441,7 @@ def delete_database(name):
         cur = conn.cursor()
         cur.execute("DELETE FROM databases WHERE name = %s;", (name,))
         conn.commit()
+        notify_config_change("databases")
         
         # MCP에서 데이터베이스 자동 제거
         try:
@@ -397,6 +467,7 @@ def add_or_update_openai_key(name, key):
             (name, key)
         )
         conn.commit()
+        notify_config_change("ai_model")
         return True, None
     except Exception as e:
         return False, str(e)
@@ -412,6 +483,7 @@ def select_openai_key(name):
         cur.execute("UPDATE openai_keys SET is_selected = FALSE;")
         cur.execute("UPDATE openai_keys SET is_selected = TRUE WHERE name = %s;", (name,))
         conn.commit()
+        notify_config_change("ai_model")
         return True, None
     except Exception as e:
         return False, str(e)
@@ -426,6 +498,7 @@ def delete_openai_key(name):
         cur = conn.cursor()
         cur.execute("DELETE FROM openai_keys WHERE name = %s;", (name,))
         conn.commit()
+        notify_config_change("ai_model")
         return True, None
     except Exception as e:
         return False, str(e)
@@ -458,6 +531,7 @@ def add_or_update_azure_openai_config(name, api_key, endpoint, deployment_name,
             (name, api_key, endpoint, deployment_name, api_version)
         )
         conn.commit()
+        notify_config_change("ai_model")
         return True, None
     except Exception as e:
         return False, str(e)
@@ -477,6 +551,7 @@ def select_azure_openai_config(name):
         # Select the chosen Azure OpenAI config
         cur.execute("UPDATE azure_openai_configs SET is_selected = TRUE WHERE name = %s;", (name,))
         conn.commit()
+        notify_config_change("ai_model")
         return True, None
     except Exception as e:
         return False, str(e)
@@ -491,6 +566,7 @@ def delete_azure_openai_config(name):
         cur = conn.cursor()
         cur.execute("DELETE FROM azure_openai_configs WHERE name = %s;", (name,))
         conn.commit()
+        notify_config_change("ai_model")
         return True, None
     except Exception as e:
         return False, str(e)
@@ -523,6 +599,7 @@ def add_or_update_gemini_config(name, api_key, model_name):
             (name, api_key, model_name)
         )
         conn.commit()
+        notify_config_change("ai_model")
         return True, None
     except Exception as e:
         return False, str(e)
@@ -544,6 +621,7 @@ def select_gemini_config(name):
         # Select the chosen Gemini config
         cur.execute("UPDATE gemini_configs SET is_selected = TRUE WHERE name = %s;", (name,))
         conn.commit()
+        notify_config_change("ai_model")
         return True, None
     except Exception as e:
         return False, str(e)
@@ -558,6 +636,7 @@ def delete_gemini_config(name):
         cur = conn.cursor()
         cur.execute("DELETE FROM gemini_configs WHERE name = %s;", (name,))
         conn.commit()
+        notify_config_change("ai_model")
         return True, None
     except Exception as e:
         return False, str(e)
@@ -590,6 +669,7 @@ def add_or_update_claude_config(name, api_key, model_name):
             (name, api_key, model_name)
         )
         conn.commit()
+        notify_config_change("ai_model")
         return True, None
     except Exception as e:
         return False, str(e)
@@ -611,6 +691,7 @@ def select_claude_config(name):
         # Select the chosen Claude config
         cur.execute("UPDATE claude_configs SET is_selected = TRUE WHERE name = %s;", (name,))
         conn.commit()
+        notify_config_change("ai_model")
         return True, None
     except Exception as e:
         return False, str(e)
@@ -625,6 +706,7 @@ def delete_claude_config(name):
         cur = conn.cursor()
         cur.execute("DELETE FROM claude_configs WHERE name = %s;", (name,))
         conn.commit()
+        notify_config_change("ai_model")
         return True, None
     except Exception as e:
         return False, str(e)
@@ -757,3 +839,355 @@ def delete_conversation(conversation_id: int):
     finally:
         if conn:
             conn.close()
+
+def _merge_slow_query_sketches(cur, db_identifier: str, rows: list):
+    """스케치 행을 기존 스케치와 병합해 저장 (호출한 쪽에서 커밋)"""
+    from backend.monitoring.sketch import DDSketch
+    for row in rows:
+        cur.execute(
+            "SELECT sketch FROM slow_query_sketches WHERE db_identifier = %s AND bucket_start = %s AND fingerprint = %s FOR UPDATE;",
+            (db_identifier, row['bucket_start'], row['fingerprint'])
+        )
+        existing = cur.fetchone()
+        sketch = row['sketch']
+        if existing:
+            sketch = DDSketch.from_dict(json.loads(existing[0]))
+            sketch.merge(row['sketch'])
+        cur.execute("""
+            INSERT INTO slow_query_sketches (db_identifier, bucket_start, fingerprint, query, sketch)
+            VALUES (%s, %s, %s, %s, %s)
+            ON CONFLICT (db_identifier, bucket_start, fingerprint)
+            DO UPDATE SET sketch = EXCLUDED.sketch,
+                          query = COALESCE(slow_query_sketches.query, EXCLUDED.query),
+                          updated_at = CURRENT_TIMESTAMP;
+        """, (db_identifier, row['bucket_start'], row['fingerprint'], row.get('query'), json.dumps(sketch.to_dict())))
+
+def save_slow_query_sketches(db_identifier: str, rows: list, replace_since_ms: int = None):
+    """시간 버킷/핑거프린트별 스케치를 저장
+
+    replace_since_ms 가 없으면 증분(로그 tail)으로 보고 기존 스케치와 병합합니다.
+    있으면 그 시각 이후 버킷을 분석 결과로 통째로 교체하고 이전(일부만 분석된) 버킷은 건너뛰어,
+    겹치는 기간을 다시 분석해 저장해도 중복 집계되지 않습니다.
+    """
+    conn = None
+    try:
+        conn = get_app_db_connection()
+        cur = conn.cursor()
+        if replace_since_ms is not None:
+            cur.execute(
+                "DELETE FROM slow_query_sketches WHERE db_identifier = %s AND bucket_start >= %s;",
+                (db_identifier, replace_since_ms)
+            )
+            for row in rows:
+                if row['bucket_start'] < replace_since_ms:
+                    continue
+                cur.execute("""
+                    INSERT INTO slow_query_sketches (db_identifier, bucket_start, fingerprint, query, sketch)
+                    VALUES (%s, %s, %s, %s, %s)
+                    ON CONFLICT (db_identifier, bucket_start, fingerprint)
+                    DO UPDATE SET sketch = EXCLUDED.sketch,
+                                  query = COALESCE(EXCLUDED.query, slow_query_sketches.query),
+                                  updated_at = CURRENT_TIMESTAMP;
+                """, (db_identifier, row['bucket_start'], row['fingerprint'], row.get('query'),
+                      json.dumps(row['sketch'].to_dict())))
+            conn.commit()
+            return True, None
+        _merge_slow_query_sketches(cur, db_identifier, rows)
+        conn.commit()
+        return True, None
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        return False, str(e)
+    finally:
+        if conn:
+            conn.close()
+
+def get_slow_query_sketches(db_identifier: str, since_ms: int, fingerprint: str = ''):
+    """since_ms 이후 버킷의 스케치 목록 (fingerprint='' 이면 전체 쿼리 스케치)"""
+    conn = None
+    try:
+        conn = get_app_db_connection()
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute("""
+            SELECT bucket_start, fingerprint, query, sketch
+              FROM slow_query_sketches
+             WHERE db_identifier = %s AND fingerprint = %s AND bucket_start >= %s
+             ORDER BY bucket_start;
+        """, (db_identifier, fingerprint, since_ms))
+        rows = cur.fetchall()
+        for row in rows:
+            row['sketch'] = json.loads(row['sketch'])
+        return rows, None
+    except Exception as e:
+        return None, str(e)
+    finally:
+        if conn:
+            conn.close()
+
+def get_log_tail_checkpoints(db_identifier: str):
+    """{(source, stream): position} 형태의 체크포인트 조회"""
+    conn = None
+    try:
+        conn = get_app_db_connection()
+        cur = conn.cursor()
+        cur.execute("SELECT source, stream, position FROM log_tail_checkpoints WHERE db_identifier = %s;", (db_identifier,))
+        return {(source, stream): position for source, stream, position in cur.fetchall()}, None
+    except Exception as e:
+        return {}, str(e)
+    finally:
+        if conn:
+            conn.close()
+
+def save_log_tail_progress(db_identifier: str, rows: list, checkpoints: dict, since_ms: int):
+    """로그 tail 한 주기의 스케치 병합, 체크포인트, 수집 시작 시각을 한 트랜잭션으로 저장
+
+    스케치와 체크포인트가 함께 커밋되므로 중간에 중단돼도 같은 로그를 두 번 집계하지 않습니다.
+    """
+    conn = None
+    try:
+        conn = get_app_db_connection()
+        cur = conn.cursor()
+        _merge_slow_query_sketches(cur, db_identifier, rows)
+        for (source, stream), position in checkpoints.items():
+            cur.execute("""
+                INSERT INTO log_tail_checkpoints (db_identifier, source, stream, position)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (db_identifier, source, stream)
+                DO UPDATE SET position = EXCLUDED.position, updated_at = CURRENT_TIMESTAMP;
+            """, (db_identifier, source, stream, position))
+        cur.execute(
+            "UPDATE log_tail_targets SET since_ms = %s, updated_at = CURRENT_TIMESTAMP WHERE db_identifier = %s;",
+            (since_ms, db_identifier)
+        )
+        conn.commit()
+        return True, None
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        return False, str(e)
+    finally:
+        if conn:
+            conn.close()
+
+def get_log_tail_targets():
+    """{db_identifier: since_ms} 형태의 로그 tail 대상 조회"""
+    conn = None
+    try:
+        conn = get_app_db_connection()
+        cur = conn.cursor()
+        cur.execute("SELECT db_identifier, since_ms FROM log_tail_targets ORDER BY id;")
+        return dict(cur.fetchall()), None
+    except Exception as e:
+        return {}, str(e)
+    finally:
+        if conn:
+            conn.close()
+
+def save_log_tail_target(db_identifier: str, since_ms: int):
+    """로그 tail 대상 저장 (재시작 후 이어서 수집)"""
+    conn = None
+    try:
+        conn = get_app_db_connection()
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO log_tail_targets (db_identifier, since_ms)
+            VALUES (%s, %s)
+            ON CONFLICT (db_identifier) DO NOTHING;
+        """, (db_identifier, since_ms))
+        conn.commit()
+        return True, None
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        return False, str(e)
+    finally:
+        if conn:
+            conn.close()
+
+def delete_log_tail_target(db_identifier: str):
+    """로그 tail 대상 삭제 (체크포인트는 다시 시작할 때를 위해 남김)"""
+    conn = None
+    try:
+        conn = get_app_db_connection()
+        cur = conn.cursor()
+        cur.execute("DELETE FROM log_tail_targets WHERE db_identifier = %s;", (db_identifier,))
+        conn.commit()
+        return True, None
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        return False, str(e)
+    finally:
+        if conn:
+            conn.close()
+
+def save_statement_snapshot(db_name: str, snapshot, keep_since_ms: int = None):
+    """pg_stat_statements 스냅샷과 새 쿼리 텍스트 저장 후 (id, 에러) 반환
+
+    keep_since_ms 가 주어지면 그 이전 스냅샷은 삭제합니다.
+    """
+    conn = None
+    try:
+        conn = get_app_db_connection()
+        cur = conn.cursor()
+        cur.execute("""
+            INSERT INTO statement_snapshots (db_name, captured_at, stats_reset, dealloc, entries)
+            VALUES (%s, %s, %s, %s, %s) RETURNING id;
+        """, (db_name, snapshot.captured_at, snapshot.stats_reset, snapshot.dealloc, json.dumps(snapshot.to_dict())))
+        snapshot_id = cur.fetchone()[0]
+        for queryid, query in snapshot.queries.items():
+            cur.execute("""
+                INSERT INTO statement_texts (db_name, queryid, query) VALUES (%s, %s, %s)
+                ON CONFLICT (db_name, queryid) DO NOTHING;
+            """, (db_name, queryid, query))
+        if keep_since_ms is not None:
+            cur.execute("DELETE FROM statement_snapshots WHERE db_name = %s AND captured_at < %s;", (db_name, keep_since_ms))
+        conn.commit()
+        return snapshot_id, None
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        return None, str(e)
+    finally:
+        if conn:
+            conn.close()
+
+def list_statement_snapshots(db_name: str, since_ms: int = 0):
+    """since_ms 이후 스냅샷 목록 (entries 제외)"""
+    conn = None
+    try:
+        conn = get_app_db_connection()
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute("""
+            SELECT id, captured_at, stats_reset, dealloc
+              FROM statement_snapshots
+             WHERE db_name = %s AND captured_at >= %s
+             ORDER BY captured_at;
+        """, (db_name, since_ms))
+        return cur.fetchall(), None
+    except Exception as e:
+        return None, str(e)
+    finally:
+        if conn:
+            conn.close()
+
+def get_statement_snapshot(db_name: str, snapshot_id: int = None, before_ms: int = None):
+    """스냅샷 하나 조회 (id 지정, 또는 before_ms 이전의 가장 최근 것, 둘 다 없으면 최신)"""
+    from backend.monitoring.statement_snapshots import StatementSnapshot
+    conn = None
+    try:
+        conn = get_app_db_connection()
+        cur = conn.cursor()
+        if snapshot_id is not None:
+            cur.execute("""
+                SELECT id, captured_at, stats_reset, dealloc, entries FROM statement_snapshots
+                 WHERE db_name = %s AND id = %s;
+            """, (db_name, snapshot_id))
+        else:
+            cur.execute("""
+                SELECT id, captured_at, stats_reset, dealloc, entries FROM statement_snapshots
+                 WHERE db_name = %s AND captured_at <= %s
+                 ORDER BY captured_at DESC LIMIT 1;
+            """, (db_name, before_ms if before_ms is not None else 2 ** 62))
+        row = cur.fetchone()
+        if not row:
+            return None, None
+        return StatementSnapshot.from_dict(json.loads(row[4]), row[1], row[2], row[3], snapshot_id=row[0]), None
+    except Exception as e:
+        return None, str(e)
+    finally:
+        if conn:
+            conn.close()
+
+def get_statement_texts(db_name: str, queryids: list):
+    """{queryid: 쿼리 텍스트} 조회"""
+    if not queryids:
+        return {}, None
+    conn = None
+    try:
+        conn = get_app_db_connection()
+        cur = conn.cursor()
+        cur.execute("SELECT queryid, query FROM statement_texts WHERE db_name = %s AND queryid = ANY(%s);",
+                    (db_name, list(queryids)))
+        return dict(cur.fetchall()), None
+    except Exception as e:
+        return {}, str(e)
+    finally:
+        if conn:
+            conn.close()
+
+def get_known_statement_queryids(db_name: str):
+    """텍스트를 이미 저장한 queryid 집합"""
+    conn = None
+    try:
+        conn = get_app_db_connection()
+        cur = conn.cursor()
+        cur.execute("SELECT queryid FROM statement_texts WHERE db_name = %s;", (db_name,))
+        return {row[0] for row in cur.fetchall()}, None
+    except Exception as e:
+        return set(), str(e)
+    finally:
+        if conn:
+            conn.close()
+
+def get_compiled_playbook_sql(db_name: str, playbook: str):
+    """{step_index: {"prompt_hash", "sql", "compiled_at"}} 형태의 컴파일된 SQL 조회"""
+    conn = None
+    try:
+        conn = get_app_db_connection()
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute("""
+            SELECT step_index, prompt_hash, sql, compiled_at
+              FROM playbook_compiled_sql
+             WHERE db_name = %s AND playbook = %s;
+        """, (db_name, playbook))
+        return {row.pop('step_index'): row for row in cur.fetchall()}, None
+    except Exception as e:
+        return {}, str(e)
+    finally:
+        if conn:
+            conn.close()
+
+def save_compiled_playbook_sql(db_name: str, playbook: str, entries: dict):
+    """{step_index: (prompt_hash, sql)} 컴파일 결과 저장"""
+    if not entries:
+        return True, None
+    conn = None
+    try:
+        conn = get_app_db_connection()
+        cur = conn.cursor()
+        for step_index, (prompt_hash, sql) in entries.items():
+            cur.execute("""
+                INSERT INTO playbook_compiled_sql (db_name, playbook, step_index, prompt_hash, sql)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT (db_name, playbook, step_index)
+                DO UPDATE SET prompt_hash = EXCLUDED.prompt_hash, sql = EXCLUDED.sql, compiled_at = CURRENT_TIMESTAMP;
+            """, (db_name, playbook, step_index, prompt_hash, sql))
+        conn.commit()
+        return True, None
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        return False, str(e)
+    finally:
+        if conn:
+            conn.close()
+
+def delete_compiled_playbook_sql(db_name: str, playbook: str):
+    """플레이북의 컴파일된 SQL 삭제 (다음 실행부터 다시 LLM 사용)"""
+    conn = None
+    try:
+        conn = get_app_db_connection()
+        cur = conn.cursor()
+        cur.execute("DELETE FROM playbook_compiled_sql WHERE db_name = %s AND playbook = %s;", (db_name, playbook))
+        deleted = cur.rowcount
+        conn.commit()
+        return deleted, None
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        return 0, str(e)
+    finally:
+        if conn:
+            conn.close()
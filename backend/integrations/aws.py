@@ -1,9 +1,21 @@
 import boto3
-from typing import Optional, List, Dict
-import re
-from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Iterator
+from datetime import datetime, timedelta, timezone
 from sqlalchemy.orm import Session
-from backend.models.database import AwsCredentials
+from backend.models.database import AwsCredentials, SessionLocal
+from backend.integrations.aws_session import refreshable_session, session_cache
+from backend.integrations.rds_log_cache import is_rotated_log_file, rds_log_cache
+from backend.monitoring.slow_query_log import SlowQueryLogParser, SlowQueryStats, parse_log_events, to_slow_query
+from backend.integrations.cloudwatch_logs import (
+    SLOW_QUERY_INSIGHTS_QUERY,
+    SLOW_QUERY_INSIGHTS_STATS_QUERY,
+    call_with_backoff,
+    filter_log_events,
+    iter_log_event_pages,
+    list_streams_in_range,
+    run_insights_query,
+    stream_log_events,
+)
 from fastapi import HTTPException
 
 class AWSIntegration:
@@ -17,21 +29,26 @@ class AWSIntegration:
         # but the logic is moving to get_boto3_session.
         pass
 
-    def get_boto3_session(self, db: Session) -> boto3.Session:
-        """
-        Creates a boto3 session using the active AWS credentials stored in the database.
-        """
-        active_cred = db.query(AwsCredentials).filter(AwsCredentials.is_active == True).first()
-
-        if not active_cred:
-            raise HTTPException(status_code=401, detail="No active AWS credential found. Please configure and activate one.")
+    def _stored_credential(self, cred_id: int) -> Dict:
+        """저장된 자격 증명 값을 다시 읽음 (임시 자격 증명 갱신용)"""
+        db = SessionLocal()
+        try:
+            cred = db.query(AwsCredentials).filter(AwsCredentials.id == cred_id).first()
+            if not cred or not cred.access_key or not cred.secret_key:
+                raise RuntimeError(f"AWS credential {cred_id} is no longer available")
+            return {'access_key': cred.access_key, 'secret_key': cred.secret_key, 'session_token': cred.session_token}
+        finally:
+            db.close()
 
+    def _build_session(self, auth_type: str, access_key: Optional[str], secret_key: Optional[str],
+                       session_token: Optional[str], region: Optional[str], cred_id: Optional[int] = None) -> boto3.Session:
+        """인증 방식에 맞춰 boto3 세션을 생성하고 STS 로 유효성을 확인"""
         # IAM Role 방식 지원
-        if active_cred.auth_type == 'iam_role':
+        if auth_type == 'iam_role':
             # EC2/ECS/EKS에서 IAM Role을 사용하는 경우
             # boto3가 자동으로 메타데이터 서비스에서 임시 자격 증명을 가져옴
             try:
-                session = boto3.Session(region_name=active_cred.region)
+                session = boto3.Session(region_name=region)
                 # 세션이 유효한지 테스트
                 sts = session.client('sts')
                 sts.get_caller_identity()
@@ -40,17 +57,21 @@ class AWSIntegration:
                 raise HTTPException(status_code=401, detail=f"Failed to use IAM Role: {str(e)}")
         
         # Access Key 방식
-        elif active_cred.auth_type == 'access_key':
-            if not active_cred.access_key or not active_cred.secret_key:
+        elif auth_type == 'access_key':
+            if not access_key or not secret_key:
                 raise HTTPException(status_code=400, detail="The active AWS credential is incomplete (missing access key or secret key).")
             
             try:
-                session = boto3.Session(
-                    aws_access_key_id=active_cred.access_key,
-                    aws_secret_access_key=active_cred.secret_key,
-                    aws_session_token=active_cred.session_token,  # This can be None
-                    region_name=active_cred.region
-                )
+                if session_token and cred_id is not None:
+                    # 임시 자격 증명은 저장소에서 주기적으로 다시 읽어 교체된 토큰을 반영
+                    session = refreshable_session(lambda: self._stored_credential(cred_id), region)
+                else:
+                    session = boto3.Session(
+                        aws_access_key_id=access_key,
+                        aws_secret_access_key=secret_key,
+                        aws_session_token=session_token,  # This can be None
+                        region_name=region
+                    )
                 # 세션이 유효한지 테스트
                 sts = session.client('sts')
                 sts.get_caller_identity()
@@ -59,11 +80,50 @@ class AWSIntegration:
                 raise HTTPException(status_code=401, detail=f"Failed to authenticate with Access Key: {str(e)}")
         
         else:
-            raise HTTPException(status_code=400, detail=f"Unsupported authentication type: {active_cred.auth_type}")
+            raise HTTPException(status_code=400, detail=f"Unsupported authentication type: {auth_type}")
+
+    def _cache_args(self, cred: Dict) -> Dict:
+        """자격 증명 정보로 세션 캐시 인자 구성 (키: 자격 증명 ID + 리전)"""
+        return {
+            "key": (cred['id'], cred['region']),
+            "fingerprint": (cred['auth_type'], cred['access_key'], cred['secret_key'], cred['session_token']),
+            "factory": lambda: self._build_session(
+                cred['auth_type'], cred['access_key'], cred['secret_key'], cred['session_token'], cred['region'], cred['id']
+            )
+        }
+
+    def _active_credential(self, db: Session) -> Dict:
+        """DB에 저장된 활성 AWS 인증 정보 조회"""
+        active_cred = db.query(AwsCredentials).filter(AwsCredentials.is_active == True).first()
+
+        if not active_cred:
+            raise HTTPException(status_code=401, detail="No active AWS credential found. Please configure and activate one.")
+
+        return {
+            'id': active_cred.id,
+            'auth_type': active_cred.auth_type,
+            'access_key': active_cred.access_key,
+            'secret_key': active_cred.secret_key,
+            'session_token': active_cred.session_token,
+            'region': active_cred.region
+        }
+
+    def get_boto3_session(self, db: Session) -> boto3.Session:
+        """
+        Returns a cached boto3 session for the active AWS credentials stored in the database.
+        """
+        return session_cache.get_session(**self._cache_args(self._active_credential(db)))
+
+    def get_client(self, db: Session, service: str):
+        """활성 인증 정보의 캐시된 boto3 클라이언트 반환"""
+        return session_cache.get_client(service=service, **self._cache_args(self._active_credential(db)))
+
+    def invalidate_sessions(self):
+        """인증 정보 변경 시 캐시된 세션/클라이언트 폐기"""
+        session_cache.invalidate()
 
     def list_rds_instances(self, db: Session) -> dict:
-        session = self.get_boto3_session(db)
-        rds = session.client('rds')
+        rds = self.get_client(db, 'rds')
         # 인스턴스 정보
         instances = rds.describe_db_instances().get('DBInstances', [])
         # 클러스터 정보 (Aurora 등)
@@ -88,8 +148,7 @@ class AWSIntegration:
         return {'instances': instances, 'clusters': clusters}
 
     def get_cloudwatch_metrics(self, db: Session, db_identifier: str, metric_name: str, period: int = 60, stat: str = 'Average', minutes: int = 10) -> List[Dict]:
-        session = self.get_boto3_session(db)
-        cloudwatch = session.client('cloudwatch')
+        cloudwatch = self.get_client(db, 'cloudwatch')
         end_time = datetime.utcnow()
         start_time = end_time - timedelta(minutes=minutes)
         response = cloudwatch.get_metric_statistics(
@@ -106,8 +165,7 @@ class AWSIntegration:
     # CloudWatch Logs 관련 메서드들 추가
     def list_rds_log_groups(self, db: Session, db_identifier: str) -> List[Dict]:
         """RDS 인스턴스 또는 클러스터의 로그 그룹 목록 조회 (CloudWatch)"""
-        session = self.get_boto3_session(db)
-        logs = session.client('logs')
+        logs = self.get_client(db, 'logs')
         
         # 인스턴스/클러스터 패턴 모두 시도
         prefixes = [
@@ -126,138 +184,151 @@ class AWSIntegration:
             print(f"Error listing log groups: {e}")
             return []
 
-    def list_log_streams(self, db: Session, log_group_name: str, hours: int = 24) -> List[Dict]:
-        """로그 그룹의 스트림 목록 조회"""
-        session = self.get_boto3_session(db)
-        logs = session.client('logs')
+    def list_log_streams(self, db: Session, log_group_name: str, hours: int = 24, limit: Optional[int] = 50) -> List[Dict]:
+        """로그 그룹의 스트림 목록 조회 (조회 기간 내 이벤트가 있는 스트림만, nextToken 페이지 조회)"""
+        logs = self.get_client(db, 'logs')
         
         # 최근 시간 범위 계산
-        end_time = int(datetime.now().timestamp() * 1000)
         start_time = int((datetime.now() - timedelta(hours=hours)).timestamp() * 1000)
         
         try:
-            response = logs.describe_log_streams(
-                logGroupName=log_group_name,
-                orderBy='LastEventTime',
-                descending=True,
-                maxItems=50
-            )
-            return response.get('logStreams', [])
+            return list_streams_in_range(logs, log_group_name, start_time, limit=limit)
         except Exception as e:
             print(f"Error listing log streams: {e}")
             return []
 
-    def get_log_events(self, db: Session, log_group_name: str, log_stream_name: str, hours: int = 24) -> List[Dict]:
-        """로그 스트림의 이벤트 조회"""
-        session = self.get_boto3_session(db)
-        logs = session.client('logs')
+    def get_log_events(self, db: Session, log_group_name: str, log_stream_name: str, hours: int = 24,
+                       max_events: Optional[int] = 10000) -> List[Dict]:
+        """로그 스트림의 이벤트 조회 (nextForwardToken 으로 max_events 까지 페이지 조회)"""
+        logs = self.get_client(db, 'logs')
         
         # 최근 시간 범위 계산
         end_time = int(datetime.now().timestamp() * 1000)
         start_time = int((datetime.now() - timedelta(hours=hours)).timestamp() * 1000)
         
+        events = []
         try:
-            response = logs.get_log_events(
-                logGroupName=log_group_name,
-                logStreamName=log_stream_name,
-                startTime=start_time,
-                endTime=end_time,
-                startFromHead=False
-            )
-            return response.get('events', [])
+            for page in iter_log_event_pages(logs, log_group_name, log_stream_name, start_time, end_time, max_events):
+                events.extend(page)
+            return events
         except Exception as e:
             print(f"Error getting log events: {e}")
+            return events
+
+    def iter_log_group_events(self, db: Session, log_groups: List[Dict], hours: int = 24,
+                              max_streams: Optional[int] = 50) -> Iterator[List[Dict]]:
+        """여러 로그 그룹의 스트림을 병렬로 조회하며 이벤트 페이지가 도착하는 대로 yield"""
+        logs = self.get_client(db, 'logs')
+        end_time = int(datetime.now().timestamp() * 1000)
+        start_time = int((datetime.now() - timedelta(hours=hours)).timestamp() * 1000)
+
+        targets = []
+        for log_group in log_groups:
+            log_group_name = log_group['logGroupName']
+            for stream in self.list_log_streams(db, log_group_name, hours, limit=max_streams):
+                targets.append((log_group_name, stream['logStreamName']))
+
+        for _, _, events in stream_log_events(logs, targets, start_time, end_time):
+            yield events
+
+    def iter_slow_query_events(self, db: Session, log_groups: List[Dict], hours: int = 24,
+                               max_events: Optional[int] = None) -> Iterator[List[Dict]]:
+        """로그 그룹별로 duration 로그 라인만 서버 측 필터로 조회해 페이지 단위로 yield"""
+        logs = self.get_client(db, 'logs')
+        end_time = int(datetime.now().timestamp() * 1000)
+        start_time = int((datetime.now() - timedelta(hours=hours)).timestamp() * 1000)
+
+        for log_group in log_groups:
+            yield from filter_log_events(logs, log_group['logGroupName'], start_time, end_time, max_events=max_events)
+
+    def _insights_time_range(self, hours: int):
+        end_time = int(datetime.now().timestamp() * 1000)
+        start_time = int((datetime.now() - timedelta(hours=hours)).timestamp() * 1000)
+        return start_time, end_time
+
+    def query_slow_queries_insights(self, db: Session, log_groups: List[Dict], hours: int = 24,
+                                    min_duration_ms: float = 1000, limit: int = 1000) -> List[Dict]:
+        """Logs Insights 로 슬로우 쿼리를 서버 측에서 파싱/정렬해 parse_slow_query_log 와 같은 형태로 반환"""
+        if not log_groups:
             return []
+        logs = self.get_client(db, 'logs')
+        start_time, end_time = self._insights_time_range(hours)
+        rows = run_insights_query(
+            logs,
+            [g['logGroupName'] for g in log_groups],
+            SLOW_QUERY_INSIGHTS_QUERY.format(min_duration_ms=min_duration_ms, limit=limit),
+            start_time,
+            end_time
+        )
 
-    def parse_slow_query_log(self, log_events: List[Dict]) -> List[Dict]:
-        """PostgreSQL 슬로우 쿼리 로그 파싱 (duration만 있는 로그도 포함)"""
         slow_queries = []
-        # 기존 패턴 + duration만 있는 로그도 인식
-        patterns = [
-            # duration + statement
-            r'duration: ([\d\.]+) ms\s+statement: (.+?)(?=\n\d{4}-\d{2}-\d{2}|\n$|$)',
-            r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2} UTC.*?duration: ([\d\.]+) ms.*?statement: (.+?)(?=\n\d{4}-\d{2}-\d{2}|\n$|$))',
-            r'duration: ([\d\.]+) ms.*?statement: (.+?)(?=\n\d{4}-\d{2}-\d{2}|\n$|$)',
-            # duration만 있는 로그
-            r'duration: ([\d\.]+) ms'
-        ]
-        for event in log_events:
-            message = event.get('message', '')
-            timestamp = event.get('timestamp', 0)
-            matched = False
-            for i, pattern in enumerate(patterns):
-                matches = re.finditer(pattern, message, re.DOTALL | re.IGNORECASE)
-                for match in matches:
-                    try:
-                        if i < 3:  # statement 있는 패턴
-                            if len(match.groups()) == 2:
-                                duration = float(match.group(1))
-                                query = match.group(2).strip()
-                            elif len(match.groups()) == 3:
-                                duration = float(match.group(2))
-                                query = match.group(3).strip()
-                            else:
-                                continue
-                        else:  # duration만 있는 패턴
-                            duration = float(match.group(1))
-                            query = '(쿼리문 없음)'
-                        if duration >= 1000:  # 1초 이상만 슬로우 쿼리
-                            slow_queries.append({
-                                'timestamp': timestamp,
-                                'duration': duration,
-                                'query': query,
-                                'duration_seconds': duration / 1000.0,
-                                'datetime': datetime.fromtimestamp(timestamp / 1000).strftime('%Y-%m-%d %H:%M:%S') if timestamp else ''
-                            })
-                        matched = True
-                    except (ValueError, IndexError) as e:
-                        print(f"Error parsing log entry: {e}")
-                        continue
-                if matched:
-                    break
+        for row in rows:
+            try:
+                duration = float(row.get('duration_ms'))
+            except (TypeError, ValueError):
+                continue
+            timestamp = 0
+            if row.get('@timestamp'):
+                try:
+                    parsed = datetime.strptime(row['@timestamp'], '%Y-%m-%d %H:%M:%S.%f')
+                    timestamp = int(parsed.replace(tzinfo=timezone.utc).timestamp() * 1000)
+                except ValueError:
+                    pass
+            slow_queries.append({
+                'timestamp': timestamp,
+                'duration': duration,
+                'query': (row.get('statement') or '').strip() or '(쿼리문 없음)',
+                'duration_seconds': duration / 1000.0,
+                'datetime': datetime.fromtimestamp(timestamp / 1000).strftime('%Y-%m-%d %H:%M:%S') if timestamp else ''
+            })
         slow_queries.sort(key=lambda x: x['duration'], reverse=True)
         return slow_queries
 
+    def query_slow_query_stats_insights(self, db: Session, log_groups: List[Dict], hours: int = 24,
+                                        min_duration_ms: float = 1000, limit: int = 100) -> List[Dict]:
+        """Logs Insights 로 statement 별 호출 수/총·평균·최대 시간을 서버 측에서 집계"""
+        if not log_groups:
+            return []
+        logs = self.get_client(db, 'logs')
+        start_time, end_time = self._insights_time_range(hours)
+        rows = run_insights_query(
+            logs,
+            [g['logGroupName'] for g in log_groups],
+            SLOW_QUERY_INSIGHTS_STATS_QUERY.format(min_duration_ms=min_duration_ms, limit=limit),
+            start_time,
+            end_time
+        )
+        stats = []
+        for row in rows:
+            try:
+                stats.append({
+                    'query': (row.get('statement') or '').strip() or '(쿼리문 없음)',
+                    'calls': int(float(row.get('calls', 0))),
+                    'total_duration': float(row.get('total_ms', 0)),
+                    'avg_duration': float(row.get('avg_ms', 0)),
+                    'max_duration': float(row.get('max_ms', 0))
+                })
+            except (TypeError, ValueError):
+                continue
+        return stats
+
+    def parse_slow_query_log(self, log_events: List[Dict]) -> List[Dict]:
+        """PostgreSQL 슬로우 쿼리 로그 파싱 (duration만 있는 로그도 포함, 1초 이상만)"""
+        return parse_log_events(log_events, min_duration_ms=1000)
+
+    def build_slow_query_stats(self, slow_queries: List[Dict]) -> SlowQueryStats:
+        """슬로우 쿼리 목록을 통계/스케치로 누적"""
+        stats = SlowQueryStats(top_k=10)
+        stats.extend(slow_queries)
+        return stats
+
     def analyze_slow_queries(self, slow_queries: List[Dict]) -> Dict:
         """슬로우 쿼리 분석 통계"""
-        if not slow_queries:
-            return {
-                'total_count': 0,
-                'avg_duration': 0,
-                'max_duration': 0,
-                'min_duration': 0,
-                'total_duration': 0,
-                'duration_distribution': {},
-                'top_queries': []
-            }
-        
-        durations = [q['duration'] for q in slow_queries]
-        total_duration = sum(durations)
-        
-        # duration 분포 (1초, 5초, 10초, 30초, 1분, 5분 이상)
-        distribution = {
-            '1-5s': len([d for d in durations if 1000 <= d < 5000]),
-            '5-10s': len([d for d in durations if 5000 <= d < 10000]),
-            '10-30s': len([d for d in durations if 10000 <= d < 30000]),
-            '30s-1m': len([d for d in durations if 30000 <= d < 60000]),
-            '1-5m': len([d for d in durations if 60000 <= d < 300000]),
-            '5m+': len([d for d in durations if d >= 300000])
-        }
-        
-        return {
-            'total_count': len(slow_queries),
-            'avg_duration': total_duration / len(slow_queries),
-            'max_duration': max(durations),
-            'min_duration': min(durations),
-            'total_duration': total_duration,
-            'duration_distribution': distribution,
-            'top_queries': slow_queries[:10]  # 상위 10개 쿼리
-        }
+        return self.build_slow_query_stats(slow_queries).to_dict()
 
     def list_rds_log_files(self, db: Session, db_identifier: str, pattern: str = 'postgresql.log') -> list:
         """RDS 인스턴스의 로그 파일 목록 조회 (RDS API)"""
-        session = self.get_boto3_session(db)
-        rds = session.client('rds')
+        rds = self.get_client(db, 'rds')
         try:
             response = rds.describe_db_log_files(
                 DBInstanceIdentifier=db_identifier,
@@ -268,60 +339,136 @@ class AWSIntegration:
             print(f"Error listing RDS log files: {e}")
             return []
 
-    def download_rds_log_file(self, db: Session, db_identifier: str, log_file_name: str, max_bytes: int = 1048576) -> str:
-        """RDS 인스턴스의 로그 파일 일부 다운로드 (최대 1MB, 필요시 반복 호출)"""
-        session = self.get_boto3_session(db)
-        rds = session.client('rds')
+    def iter_rds_log_file_portions(self, db: Session, db_identifier: str, log_file_name: str,
+                                   max_bytes: Optional[int] = None) -> Iterator[str]:
+        """download_db_log_file_portion 의 Marker 를 따라가며 로그 파일 조각을 순서대로 yield
+
+        max_bytes 가 주어지면 그만큼 읽은 뒤 중단합니다 (None 이면 파일 끝까지).
+        로테이션이 끝난 파일의 조각은 더 바뀌지 않으므로 로컬 디스크 캐시에서 먼저 찾습니다.
+        """
+        rds = None
+        cacheable = is_rotated_log_file(log_file_name)
         marker = '0'
-        content = ''
-        try:
-            while True:
-                response = rds.download_db_log_file_portion(
+        downloaded = 0
+        while True:
+            cached = rds_log_cache.get_portion(db_identifier, log_file_name, marker) if cacheable else None
+            if cached is not None:
+                data, next_marker, pending = cached['data'], cached['marker'], cached['pending']
+            else:
+                if rds is None:
+                    rds = self.get_client(db, 'rds')
+                response = call_with_backoff(
+                    rds.download_db_log_file_portion,
                     DBInstanceIdentifier=db_identifier,
                     LogFileName=log_file_name,
                     Marker=marker,
-                    NumberOfLines=1000
+                    NumberOfLines=10000
                 )
-                content += response.get('LogFileData', '')
-                if not response.get('AdditionalDataPending'):
-                    break
-                marker = response.get('Marker')
-                if len(content) > max_bytes:
-                    break
-            return content
+                data = response.get('LogFileData') or ''
+                next_marker = response.get('Marker')
+                pending = bool(response.get('AdditionalDataPending'))
+                if cacheable:
+                    rds_log_cache.put_portion(db_identifier, log_file_name, marker, data, next_marker, pending)
+            if data:
+                downloaded += len(data)
+                yield data
+            if not pending:
+                break
+            marker = next_marker
+            if max_bytes is not None and downloaded > max_bytes:
+                break
+
+    def download_rds_log_file(self, db: Session, db_identifier: str, log_file_name: str, max_bytes: int = 1048576) -> str:
+        """RDS 인스턴스의 로그 파일 일부 다운로드 (최대 max_bytes)"""
+        portions = []
+        try:
+            for data in self.iter_rds_log_file_portions(db, db_identifier, log_file_name, max_bytes):
+                portions.append(data)
+            return ''.join(portions)
         except Exception as e:
             print(f"Error downloading RDS log file: {e}")
-            return ''
+            return ''.join(portions)
 
-    def get_boto3_session_from_connection(self, conn) -> boto3.Session:
-        """PostgreSQL 연결을 통해 AWS 세션 생성 (임시 방법)"""
+    def analyze_rds_log_file(self, db: Session, db_identifier: str, log_file_name: str,
+                             max_bytes: Optional[int] = None, min_duration_ms: float = 1000,
+                             top_k: int = 10) -> Dict:
+        """로그 파일을 조각 단위로 내려받으며 증분 파싱해 고정 크기 통계만 유지 (파일 크기와 무관한 메모리)
+
+        로테이션이 끝난 파일은 같은 옵션의 분석 결과를 로컬 캐시에 저장해 재사용합니다.
+        """
+        cacheable = is_rotated_log_file(log_file_name)
+        params = f"{max_bytes}:{min_duration_ms}:{top_k}"
+        if cacheable:
+            cached = rds_log_cache.get_analysis(db_identifier, log_file_name, params)
+            if cached is not None:
+                return cached
+        parser = SlowQueryLogParser(min_duration_ms=min_duration_ms)
+        stats = SlowQueryStats(top_k=top_k)
+        bytes_processed = 0
+        portions = 0
+        for data in self.iter_rds_log_file_portions(db, db_identifier, log_file_name, max_bytes):
+            bytes_processed += len(data)
+            portions += 1
+            stats.extend(parser.feed(data))
+        stats.extend(parser.close())
+        analysis = stats.to_dict()
+        analysis['top_queries'] = [to_slow_query(entry) for entry in analysis['top_queries']]
+        result = {
+            'analysis': analysis,
+            'bytes_processed': bytes_processed,
+            'portions': portions
+        }
+        if cacheable:
+            rds_log_cache.put_analysis(db_identifier, log_file_name, params, result)
+        return result
+
+    def _active_credential_from_connection(self, conn) -> Dict:
+        """PostgreSQL 연결로 활성 AWS 인증 정보 조회"""
+        cur = conn.cursor()
         try:
-            # 데이터베이스에서 활성 AWS 인증 정보 조회
-            cur = conn.cursor()
             cur.execute("""
-                SELECT access_key, secret_key, session_token, region 
+                SELECT id, auth_type, access_key, secret_key, session_token, region 
                 FROM aws_credentials 
                 WHERE is_active = true 
                 LIMIT 1
             """)
             result = cur.fetchone()
-            
-            if not result:
-                raise HTTPException(status_code=401, detail="활성 AWS 인증 정보가 없습니다.")
-            
-            access_key, secret_key, session_token, region = result
-            
-            if not access_key or not secret_key:
-                raise HTTPException(status_code=400, detail="AWS 인증 정보가 불완전합니다.")
-            
-            session = boto3.Session(
-                aws_access_key_id=access_key,
-                aws_secret_access_key=secret_key,
-                aws_session_token=session_token,
-                region_name=region
-            )
-            return session
-            
+        finally:
+            cur.close()
+        
+        if not result:
+            raise HTTPException(status_code=401, detail="활성 AWS 인증 정보가 없습니다.")
+        
+        cred_id, auth_type, access_key, secret_key, session_token, region = result
+        auth_type = auth_type or 'access_key'
+        
+        if auth_type == 'access_key' and (not access_key or not secret_key):
+            raise HTTPException(status_code=400, detail="AWS 인증 정보가 불완전합니다.")
+        
+        return {
+            'id': cred_id,
+            'auth_type': auth_type,
+            'access_key': access_key,
+            'secret_key': secret_key,
+            'session_token': session_token,
+            'region': region
+        }
+
+    def get_boto3_session_from_connection(self, conn) -> boto3.Session:
+        """PostgreSQL 연결을 통해 AWS 세션 조회 (캐시 사용)"""
+        try:
+            return session_cache.get_session(**self._cache_args(self._active_credential_from_connection(conn)))
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"AWS 세션 생성 실패: {str(e)}")
+
+    def get_client_from_connection(self, conn, service: str):
+        """PostgreSQL 연결을 통해 캐시된 boto3 클라이언트 조회"""
+        try:
+            return session_cache.get_client(service=service, **self._cache_args(self._active_credential_from_connection(conn)))
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"AWS 세션 생성 실패: {str(e)}")
 
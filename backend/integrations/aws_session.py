@@ -0,0 +1,126 @@
+"""
+boto3 세션/클라이언트 캐시
+자격 증명(ID + 리전)별로 boto3 세션과 서비스 클라이언트를 재사용합니다.
+저장된 자격 증명 값이 바뀌면 세션을 다시 만들고, 임시 자격 증명(session token)은
+botocore RefreshableCredentials 로 감싸 CREDENTIAL_REFRESH_INTERVAL 마다 저장소에서 다시 읽어 갱신합니다.
+세션 생성(STS 확인 포함)은 캐시 잠금 밖에서 키별로 한 번만 수행합니다.
+"""
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import boto3
+import botocore.session
+from botocore.credentials import CredentialProvider, CredentialResolver, RefreshableCredentials
+
+# 임시 자격 증명을 저장소에서 다시 읽는 주기 (초)
+CREDENTIAL_REFRESH_INTERVAL = int(os.getenv("AWS_CREDENTIAL_REFRESH_INTERVAL", "900"))
+# botocore 는 만료까지 이 시간(초)보다 적게 남으면 갱신하므로 expiry_time 에 더해 둠
+ADVISORY_REFRESH_TIMEOUT = 15 * 60
+
+
+class StoredCredentialProvider(CredentialProvider):
+    """이미 만들어 둔 자격 증명을 그대로 돌려주는 botocore 자격 증명 공급자"""
+
+    METHOD = "stored-session-token"
+
+    def __init__(self, credentials: RefreshableCredentials):
+        self._stored = credentials
+
+    def load(self) -> RefreshableCredentials:
+        return self._stored
+
+
+def refreshable_session(load: Callable[[], Dict[str, Optional[str]]], region: Optional[str]) -> boto3.Session:
+    """load() 가 돌려주는 {"access_key", "secret_key", "session_token"} 로 갱신 가능한 세션 생성
+
+    botocore 는 expiry_time 이 다가오면 load() 를 다시 호출하므로, 저장소에서 교체된 토큰을
+    이미 만들어 둔 클라이언트도 그대로 사용합니다. 갱신 판단 구간을 넘겨 만료 시각을 잡아
+    load() (앱 DB 조회) 는 CREDENTIAL_REFRESH_INTERVAL 마다 한 번만 호출됩니다.
+    """
+    def metadata() -> Dict[str, str]:
+        credential = load()
+        expiry = datetime.now(timezone.utc) + timedelta(
+            seconds=CREDENTIAL_REFRESH_INTERVAL + ADVISORY_REFRESH_TIMEOUT
+        )
+        return {
+            "access_key": credential["access_key"],
+            "secret_key": credential["secret_key"],
+            "token": credential.get("session_token"),
+            "expiry_time": expiry.isoformat()
+        }
+
+    credentials = RefreshableCredentials.create_from_metadata(
+        metadata(), refresh_using=metadata, method=StoredCredentialProvider.METHOD
+    )
+    botocore_session = botocore.session.get_session()
+    botocore_session.register_component(
+        "credential_provider", CredentialResolver([StoredCredentialProvider(credentials)])
+    )
+    return boto3.Session(botocore_session=botocore_session, region_name=region)
+
+
+class _CachedSession:
+    def __init__(self, session: boto3.Session, fingerprint: Hashable):
+        self.session = session
+        self.fingerprint = fingerprint
+        self.clients: Dict[str, Any] = {}
+        # boto3 세션은 스레드 안전하지 않으므로 클라이언트 생성은 세션별 잠금 안에서
+        self.lock = threading.Lock()
+
+
+class Boto3SessionCache:
+    """키별 boto3 세션/클라이언트 캐시 (스레드 안전)"""
+
+    def __init__(self):
+        self._entries: Dict[Hashable, _CachedSession] = {}
+        self._build_locks: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, key: Hashable, fingerprint: Hashable) -> Optional[_CachedSession]:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry if entry and entry.fingerprint == fingerprint else None
+
+    def _entry(self, key: Hashable, fingerprint: Hashable, factory: Callable[[], boto3.Session]) -> _CachedSession:
+        entry = self._lookup(key, fingerprint)
+        if entry:
+            return entry
+        with self._lock:
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+        # factory 는 STS 호출 등으로 느릴 수 있으므로 전역 잠금 밖에서, 같은 키는 한 스레드만 생성
+        with build_lock:
+            entry = self._lookup(key, fingerprint)
+            if entry:
+                return entry
+            entry = _CachedSession(factory(), fingerprint)
+            with self._lock:
+                self._entries[key] = entry
+            return entry
+
+    def get_session(self, key: Hashable, fingerprint: Hashable, factory: Callable[[], boto3.Session]) -> boto3.Session:
+        """캐시된 세션 반환. 없거나 자격 증명이 바뀌었으면 factory 로 새로 생성"""
+        return self._entry(key, fingerprint, factory).session
+
+    def get_client(self, key: Hashable, fingerprint: Hashable, service: str, factory: Callable[[], boto3.Session]):
+        """캐시된 세션에서 서비스 클라이언트 반환 (클라이언트도 세션과 함께 재사용)"""
+        entry = self._entry(key, fingerprint, factory)
+        with entry.lock:
+            client = entry.clients.get(service)
+            if client is None:
+                client = entry.session.client(service)
+                entry.clients[service] = client
+            return client
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """특정 키 또는 전체 캐시 무효화"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+# 전역 세션 캐시 (API, 모니터링, CloudWatch MCP 서버가 공유)
+session_cache = Boto3SessionCache()
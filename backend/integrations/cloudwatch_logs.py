@@ -0,0 +1,244 @@
+"""
+CloudWatch Logs 조회 엔진
+로그 스트림을 페이지 단위로 끝까지 읽고, 여러 스트림을 제한된 병렬도로 동시에 가져옵니다.
+스로틀링 오류는 지수 백오프로 재시도합니다.
+슬로우 쿼리는 filter_log_events / Logs Insights 로 서버 측에서 골라내 전송량을 줄입니다.
+"""
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+MAX_WORKERS = int(os.getenv("CLOUDWATCH_LOGS_MAX_WORKERS", "8"))
+
+THROTTLING_ERRORS = {
+    "ThrottlingException",
+    "Throttling",
+    "TooManyRequestsException",
+    "RequestLimitExceeded",
+    "ServiceUnavailableException",
+    "LimitExceededException",
+}
+
+
+def call_with_backoff(fn: Callable, *args, max_attempts: int = 6, base_delay: float = 0.2,
+                      max_delay: float = 5.0, **kwargs):
+    """스로틀링 오류면 지수 백오프(full jitter)로 재시도, 그 외 오류는 그대로 전달"""
+    for attempt in range(max_attempts):
+        try:
+            return fn(*args, **kwargs)
+        except ClientError as e:
+            code = e.response.get("Error", {}).get("Code")
+            if code not in THROTTLING_ERRORS or attempt == max_attempts - 1:
+                raise
+            time.sleep(random.uniform(0, min(max_delay, base_delay * (2 ** attempt))))
+
+
+def iter_log_event_pages(logs, log_group_name: str, log_stream_name: str, start_time: int,
+                         end_time: int, max_events: Optional[int] = None) -> Iterator[List[Dict]]:
+    """get_log_events 를 nextForwardToken 으로 끝까지 페이지 조회 (토큰이 반복되면 종료)"""
+    request = {
+        "logGroupName": log_group_name,
+        "logStreamName": log_stream_name,
+        "startTime": start_time,
+        "endTime": end_time,
+        "startFromHead": True
+    }
+    fetched = 0
+    while True:
+        response = call_with_backoff(logs.get_log_events, **request)
+        events = response.get("events", [])
+        if max_events is not None and fetched + len(events) > max_events:
+            events = events[:max_events - fetched]
+        if events:
+            fetched += len(events)
+            yield events
+        token = response.get("nextForwardToken")
+        if not token or token == request.get("nextToken") or (max_events is not None and fetched >= max_events):
+            break
+        request["nextToken"] = token
+
+
+def tail_log_stream(logs, log_group_name: str, log_stream_name: str, start_time: int,
+                    next_token: Optional[str] = None, max_pages: Optional[int] = None) -> Iterator[Tuple[List[Dict], str]]:
+    """체크포인트(nextForwardToken)부터 새 이벤트를 페이지 조회해 (이벤트, 다음 토큰) 을 yield
+
+    마지막으로 yield 한 토큰을 저장해 두면 다음 호출에서 그 이후 이벤트만 가져옵니다.
+    """
+    request = {
+        "logGroupName": log_group_name,
+        "logStreamName": log_stream_name,
+        "startTime": start_time,
+        "startFromHead": True
+    }
+    if next_token:
+        request["nextToken"] = next_token
+    pages = 0
+    while True:
+        response = call_with_backoff(logs.get_log_events, **request)
+        token = response.get("nextForwardToken")
+        yield response.get("events", []), token
+        pages += 1
+        if not token or token == request.get("nextToken") or (max_pages is not None and pages >= max_pages):
+            break
+        request["nextToken"] = token
+
+
+def list_streams_in_range(logs, log_group_name: str, start_time: int, limit: Optional[int] = None) -> List[Dict]:
+    """최근 이벤트 순으로 스트림을 페이지 조회하고, 마지막 이벤트가 start_time 이전인 스트림에서 중단"""
+    streams = []
+    request = {"logGroupName": log_group_name, "orderBy": "LastEventTime", "descending": True}
+    while True:
+        response = call_with_backoff(logs.describe_log_streams, **request)
+        for stream in response.get("logStreams", []):
+            if stream.get("lastEventTimestamp", 0) < start_time:
+                return streams
+            streams.append(stream)
+            if limit is not None and len(streams) >= limit:
+                return streams
+        token = response.get("nextToken")
+        if not token:
+            return streams
+        request["nextToken"] = token
+
+
+def stream_log_events(logs, targets: List[Tuple[str, str]], start_time: int, end_time: int,
+                      max_workers: int = MAX_WORKERS) -> Iterator[Tuple[str, str, List[Dict]]]:
+    """여러 (로그 그룹, 스트림) 을 병렬로 조회하며 도착하는 페이지를 순서대로 yield
+
+    각 스트림은 작업 스레드 하나가 처음부터 끝까지 페이지 조회하고, 페이지가 도착하는 즉시
+    호출자에게 전달되므로 파서가 전체 다운로드를 기다리지 않습니다.
+    """
+    if not targets:
+        return
+
+    pages: "queue.Queue" = queue.Queue(maxsize=max_workers * 4)
+    cancelled = threading.Event()
+    done = object()
+
+    def put(item) -> bool:
+        # 호출자가 순회를 중단하면 작업 스레드가 가득 찬 큐에서 멈추지 않도록 취소 확인
+        while not cancelled.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def worker(log_group_name: str, log_stream_name: str):
+        # 취소된 뒤에 시작된 작업은 GetLogEvents 를 호출하지 않음
+        if cancelled.is_set():
+            return
+        try:
+            for events in iter_log_event_pages(logs, log_group_name, log_stream_name, start_time, end_time):
+                if not put((log_group_name, log_stream_name, events)) or cancelled.is_set():
+                    return
+        except Exception as e:
+            print(f"Error getting log events from {log_group_name}/{log_stream_name}: {e}")
+        finally:
+            put(done)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(targets))))
+    try:
+        for log_group_name, log_stream_name in targets:
+            executor.submit(worker, log_group_name, log_stream_name)
+
+        remaining = len(targets)
+        while remaining:
+            item = pages.get()
+            if item is done:
+                remaining -= 1
+                continue
+            yield item
+    finally:
+        # 호출자가 중간에 멈추면 대기 중인 스트림은 취소하고, 실행 중인 작업은 기다리지 않음
+        cancelled.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+# PostgreSQL log_min_duration_statement 로그 라인만 서버에서 골라내는 필터 패턴
+SLOW_QUERY_FILTER_PATTERN = '"duration:"'
+
+# Logs Insights 에서 duration/statement 를 파싱해 서버 측에서 정렬/집계하는 쿼리
+SLOW_QUERY_INSIGHTS_QUERY = """fields @timestamp, @message
+| filter @message like /duration: /
+| parse @message /duration: (?<duration_ms>[\\d.]+) ms(?:\\s+(?:statement|execute [^:]*): (?<statement>.*))?/
+| filter duration_ms >= {min_duration_ms}
+| sort duration_ms desc
+| limit {limit}"""
+
+SLOW_QUERY_INSIGHTS_STATS_QUERY = """filter @message like /duration: /
+| parse @message /duration: (?<duration_ms>[\\d.]+) ms(?:\\s+(?:statement|execute [^:]*): (?<statement>.*))?/
+| filter duration_ms >= {min_duration_ms}
+| stats count(*) as calls, sum(duration_ms) as total_ms, avg(duration_ms) as avg_ms, max(duration_ms) as max_ms by statement
+| sort total_ms desc
+| limit {limit}"""
+
+INSIGHTS_FINAL_STATUSES = {"Complete", "Failed", "Cancelled", "Timeout", "Unknown"}
+
+
+def filter_log_events(logs, log_group_name: str, start_time: int, end_time: int,
+                      filter_pattern: str = SLOW_QUERY_FILTER_PATTERN,
+                      max_events: Optional[int] = None) -> Iterator[List[Dict]]:
+    """filter_log_events 로 로그 그룹의 모든 스트림에서 패턴과 일치하는 이벤트만 페이지 조회"""
+    request = {
+        "logGroupName": log_group_name,
+        "startTime": start_time,
+        "endTime": end_time,
+        "filterPattern": filter_pattern
+    }
+    fetched = 0
+    while True:
+        response = call_with_backoff(logs.filter_log_events, **request)
+        events = response.get("events", [])
+        if max_events is not None and fetched + len(events) > max_events:
+            events = events[:max_events - fetched]
+        if events:
+            fetched += len(events)
+            yield events
+        token = response.get("nextToken")
+        if not token or token == request.get("nextToken") or (max_events is not None and fetched >= max_events):
+            break
+        request["nextToken"] = token
+
+
+def run_insights_query(logs, log_group_names: List[str], query: str, start_time: int, end_time: int,
+                       poll_interval: float = 1.0, timeout: float = 60.0) -> List[Dict[str, str]]:
+    """Logs Insights 쿼리를 시작하고 완료될 때까지 폴링해 결과 행을 dict 목록으로 반환
+
+    start_time/end_time 은 다른 함수와 같이 밀리초 단위이며, Insights API 에는 초 단위로 전달합니다.
+    """
+    response = call_with_backoff(
+        logs.start_query,
+        logGroupNames=log_group_names,
+        startTime=start_time // 1000,
+        endTime=end_time // 1000,
+        queryString=query
+    )
+    query_id = response["queryId"]
+    deadline = time.time() + timeout
+    while True:
+        result = call_with_backoff(logs.get_query_results, queryId=query_id)
+        status = result.get("status")
+        if status in INSIGHTS_FINAL_STATUSES:
+            break
+        if time.time() >= deadline:
+            try:
+                logs.stop_query(queryId=query_id)
+            except Exception as e:
+                print(f"Error stopping Logs Insights query {query_id}: {e}")
+            raise TimeoutError(f"Logs Insights query {query_id} did not complete in {timeout}s")
+        time.sleep(poll_interval)
+
+    if status != "Complete":
+        raise RuntimeError(f"Logs Insights query {query_id} finished with status {status}")
+    return [
+        {field["field"]: field.get("value") for field in row if not field["field"].startswith("@ptr")}
+        for row in result.get("results", [])
+    ]
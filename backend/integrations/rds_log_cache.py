@@ -0,0 +1,132 @@
+"""
+RDS 로그 파일 로컬 디스크 캐시
+download_db_log_file_portion 으로 받은 로그 조각과 파싱한 분석 결과를
+(인스턴스, 로그 파일, Marker) 키로 압축 저장하고, 전체 크기를 넘으면 오래 안 쓴 항목부터 지웁니다.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+CACHE_DIR = os.getenv("RDS_LOG_CACHE_DIR", os.path.join(tempfile.gettempdir(), "rds_log_cache"))
+CACHE_MAX_BYTES = int(os.getenv("RDS_LOG_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# RDS 로그 파일 이름의 시간 접미사 (예: error/postgresql.log.2024-01-01-13)
+_ROTATION_SUFFIX_RE = re.compile(r'\.(\d{4}-\d{2}-\d{2}-\d{2})(\d{2})?$')
+
+
+def is_rotated_log_file(log_file_name: str, now: Optional[datetime] = None) -> bool:
+    """시간 접미사가 현재 시각(UTC)보다 이전인 로그 파일은 더 이상 쓰이지 않음"""
+    m = _ROTATION_SUFFIX_RE.search(log_file_name)
+    if not m:
+        return False
+    now = now or datetime.now(timezone.utc)
+    if m.group(2):
+        return m.group(1) + m.group(2) < now.strftime('%Y-%m-%d-%H%M')
+    return m.group(1) < now.strftime('%Y-%m-%d-%H')
+
+
+class RDSLogCache:
+    """압축 + 크기 제한 LRU 디스크 캐시 (마지막 사용 시각은 파일 mtime 으로 관리)"""
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self._sizes: Optional[Dict[str, int]] = None
+
+    def _key_path(self, *parts) -> str:
+        digest = hashlib.sha256('\0'.join(str(p) for p in parts).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest + '.json.gz')
+
+    def _index(self) -> Dict[str, int]:
+        # 처음 사용할 때 디렉터리를 훑어 파일별 크기 인덱스 생성
+        if self._sizes is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._sizes = {}
+            for name in os.listdir(self.directory):
+                if name.endswith('.json.gz'):
+                    path = os.path.join(self.directory, name)
+                    try:
+                        self._sizes[path] = os.path.getsize(path)
+                    except OSError:
+                        pass
+        return self._sizes
+
+    def _read(self, path: str) -> Optional[Dict]:
+        with self.lock:
+            sizes = self._index()
+            if path not in sizes:
+                return None
+            try:
+                with gzip.open(path, 'rt', encoding='utf-8') as f:
+                    value = json.load(f)
+                os.utime(path)
+                return value
+            except (OSError, ValueError):
+                sizes.pop(path, None)
+                return None
+
+    def _write(self, path: str, value: Dict):
+        with self.lock:
+            sizes = self._index()
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6) as f:
+                    f.write(json.dumps(value).encode('utf-8'))
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"Error writing RDS log cache entry: {e}")
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                return
+            sizes[path] = os.path.getsize(path)
+            self._evict(sizes)
+
+    def _evict(self, sizes: Dict[str, int]):
+        total = sum(sizes.values())
+        if total <= self.max_bytes:
+            return
+        by_last_used = sorted(sizes, key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0)
+        for path in by_last_used:
+            if total <= self.max_bytes:
+                break
+            total -= sizes.pop(path)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def get_portion(self, db_identifier: str, log_file_name: str, marker: str) -> Optional[Dict]:
+        """캐시된 로그 조각 ({'data', 'marker', 'pending'})"""
+        return self._read(self._key_path('portion', db_identifier, log_file_name, marker))
+
+    def put_portion(self, db_identifier: str, log_file_name: str, marker: str, data: str,
+                    next_marker: str, pending: bool):
+        self._write(self._key_path('portion', db_identifier, log_file_name, marker),
+                    {'data': data, 'marker': next_marker, 'pending': pending})
+
+    def get_analysis(self, db_identifier: str, log_file_name: str, params: str) -> Optional[Dict]:
+        """캐시된 로그 파일 분석 결과 (params 는 분석 옵션 문자열)"""
+        return self._read(self._key_path('analysis', db_identifier, log_file_name, params))
+
+    def put_analysis(self, db_identifier: str, log_file_name: str, params: str, result: Dict):
+        self._write(self._key_path('analysis', db_identifier, log_file_name, params), result)
+
+    def clear(self):
+        with self.lock:
+            for path in list(self._index()):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._sizes = {}
+
+
+# 전역 RDS 로그 캐시 인스턴스
+rds_log_cache = RDSLogCache()
@@ -0,0 +1,93 @@
+"""
+CloudWatch RDS 메트릭 조회
+GetMetricData 배치 요청으로 여러 인스턴스/메트릭/통계를 한 번에 가져옵니다.
+"""
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+# GetMetricData 한 번에 보낼 수 있는 최대 쿼리 수
+MAX_QUERIES_PER_REQUEST = 500
+
+# 사용 가능한 RDS CloudWatch 메트릭 목록
+RDS_METRICS = [
+    {"name": "DatabaseConnections", "description": "활성 데이터베이스 연결 수", "unit": "Count", "namespace": "AWS/RDS"},
+    {"name": "CPUUtilization", "description": "CPU 사용률", "unit": "Percent", "namespace": "AWS/RDS"},
+    {"name": "FreeableMemory", "description": "사용 가능한 메모리", "unit": "Bytes", "namespace": "AWS/RDS"},
+    {"name": "FreeStorageSpace", "description": "사용 가능한 스토리지 공간", "unit": "Bytes", "namespace": "AWS/RDS"},
+    {"name": "ReadIOPS", "description": "읽기 IOPS", "unit": "Count/Second", "namespace": "AWS/RDS"},
+    {"name": "WriteIOPS", "description": "쓰기 IOPS", "unit": "Count/Second", "namespace": "AWS/RDS"},
+    {"name": "ReadLatency", "description": "읽기 지연시간", "unit": "Seconds", "namespace": "AWS/RDS"},
+    {"name": "WriteLatency", "description": "쓰기 지연시간", "unit": "Seconds", "namespace": "AWS/RDS"},
+    {"name": "NetworkReceiveThroughput", "description": "네트워크 수신 처리량", "unit": "Bytes/Second", "namespace": "AWS/RDS"},
+    {"name": "NetworkTransmitThroughput", "description": "네트워크 송신 처리량", "unit": "Bytes/Second", "namespace": "AWS/RDS"}
+]
+
+RDS_METRIC_NAMES = [metric["name"] for metric in RDS_METRICS]
+RDS_METRIC_UNITS = {metric["name"]: metric["unit"] for metric in RDS_METRICS}
+
+# (식별자, 메트릭 이름, 통계)
+MetricKey = Tuple[str, str, str]
+
+
+def get_dimension_name(db_identifier: str) -> str:
+    """클러스터/인스턴스 자동 판별"""
+    if any(x in db_identifier.lower() for x in ["cluster", "aurora"]):
+        return "DBClusterIdentifier"
+    return "DBInstanceIdentifier"
+
+
+def build_metric_queries(keys: List[MetricKey], period: int = 60) -> Tuple[List[Dict], Dict[str, MetricKey]]:
+    """GetMetricData 쿼리 목록과 쿼리 ID -> 키 매핑 생성"""
+    queries = []
+    id_map = {}
+    for i, (db_identifier, metric_name, stat) in enumerate(keys):
+        query_id = f"m{i}"
+        id_map[query_id] = (db_identifier, metric_name, stat)
+        queries.append({
+            "Id": query_id,
+            "MetricStat": {
+                "Metric": {
+                    "Namespace": "AWS/RDS",
+                    "MetricName": metric_name,
+                    "Dimensions": [{"Name": get_dimension_name(db_identifier), "Value": db_identifier}]
+                },
+                "Period": period,
+                "Stat": stat
+            },
+            "ReturnData": True
+        })
+    return queries, id_map
+
+
+def get_metric_data(cloudwatch, queries: List[Dict], start_time: datetime, end_time: datetime) -> Dict[str, Dict[str, list]]:
+    """쿼리를 500개 단위로 나눠 GetMetricData 를 호출하고 NextToken 페이지를 모두 병합"""
+    results: Dict[str, Dict[str, list]] = {}
+    for offset in range(0, len(queries), MAX_QUERIES_PER_REQUEST):
+        request = {
+            "MetricDataQueries": queries[offset:offset + MAX_QUERIES_PER_REQUEST],
+            "StartTime": start_time,
+            "EndTime": end_time,
+            "ScanBy": "TimestampAscending"
+        }
+        while True:
+            response = cloudwatch.get_metric_data(**request)
+            for item in response.get("MetricDataResults", []):
+                series = results.setdefault(item["Id"], {"timestamps": [], "values": []})
+                series["timestamps"].extend(item.get("Timestamps", []))
+                series["values"].extend(item.get("Values", []))
+            next_token = response.get("NextToken")
+            if not next_token:
+                break
+            request["NextToken"] = next_token
+    return results
+
+
+def fetch_rds_metrics(cloudwatch, keys: List[MetricKey], start_time: datetime, end_time: datetime,
+                      period: int = 60) -> Dict[MetricKey, Dict[str, list]]:
+    """(식별자, 메트릭, 통계) 목록을 한 번의 배치로 조회해 키별 시계열로 반환"""
+    queries, id_map = build_metric_queries(keys, period)
+    raw = get_metric_data(cloudwatch, queries, start_time, end_time)
+    return {
+        key: raw.get(query_id, {"timestamps": [], "values": []})
+        for query_id, key in id_map.items()
+    }
@@ -0,0 +1,289 @@
+"""
+슬로우 쿼리 로그 증분 수집기
+RDS 로그(CloudWatch 로그 그룹 또는 RDS 로그 파일)를 주기적으로 이어 읽고,
+스트림별 체크포인트(nextForwardToken / 로그 파일 Marker)를 앱 DB 에 저장합니다.
+로그 파일 체크포인트에는 파서가 아직 파싱하지 않은 버퍼도 함께 저장하고,
+스케치와 체크포인트는 한 트랜잭션으로 저장해 재시작해도 유실/중복 집계가 없습니다.
+수집 대상도 저장해 두었다가 앱 시작 시 resume() 으로 복원합니다.
+API 는 메모리에 유지되는 누적 통계를 바로 읽습니다.
+"""
+import json
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from backend.database import (
+    delete_log_tail_target,
+    get_log_tail_checkpoints,
+    get_log_tail_targets,
+    save_log_tail_progress,
+    save_log_tail_target
+)
+from backend.integrations.cloudwatch_logs import call_with_backoff, list_streams_in_range, tail_log_stream
+from backend.integrations.rds_log_cache import is_rotated_log_file
+from backend.monitoring.sketch import SketchTimeline
+from backend.monitoring.slow_query_log import SlowQueryLogParser, SlowQueryStats, parse_log_events
+
+# 스트림 목록 조회 시 직전 주기 시작보다 이만큼 앞에서부터 확인 (늦게 도착한 이벤트 대비)
+STREAM_LOOKBACK_MS = 5 * 60 * 1000
+# 메모리에 유지할 시간 버킷 스케치 기간 (그 이전은 slow_query_sketches 테이블에서 조회)
+TIMELINE_RETENTION_MS = 48 * 3600 * 1000
+# 한 주기에 스트림/파일 하나에서 읽을 최대 페이지 수
+MAX_PAGES_PER_CYCLE = 100
+
+CLOUDWATCH = 'cloudwatch'
+RDS_FILE = 'rds_file'
+
+
+def encode_file_position(marker: str, pending: str = '') -> str:
+    """로그 파일 체크포인트 (Marker + 파서에 남은 버퍼)"""
+    return json.dumps({'marker': marker, 'pending': pending})
+
+
+def decode_file_position(position: Optional[str]) -> Tuple[str, str]:
+    """로그 파일 체크포인트를 (Marker, 남은 버퍼) 로 (이전 형식은 Marker 문자열만 저장됨)"""
+    if not position:
+        return '0', ''
+    try:
+        value = json.loads(position)
+    except ValueError:
+        value = None
+    if isinstance(value, dict):
+        return value.get('marker') or '0', value.get('pending') or ''
+    return position, ''
+
+
+class _TailTarget:
+    def __init__(self, db_identifier: str, initial_hours: int, since_ms: Optional[int] = None):
+        self.db_identifier = db_identifier
+        self.since = since_ms if since_ms is not None else int((time.time() - initial_hours * 3600) * 1000)
+        self.checkpoints: Dict[Tuple[str, str], str] = {}
+        self.parsers: Dict[str, SlowQueryLogParser] = {}
+        self.stats = SlowQueryStats()
+        # 앱 DB 저장에 실패한 주기의 스케치/체크포인트 (다음 주기에 함께 다시 저장)
+        self.unsaved_timeline = SketchTimeline()
+        self.unsaved_checkpoints: Dict[Tuple[str, str], str] = {}
+        self.last_run: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.ingested = 0
+
+
+class SlowQueryLogTailer:
+    """등록된 RDS 인스턴스의 슬로우 쿼리 로그를 백그라운드에서 이어 읽는 수집기"""
+
+    def __init__(self, interval: int = 60):
+        self.interval = interval
+        self.targets: Dict[str, _TailTarget] = {}
+        self.lock = threading.Lock()
+        self.is_running = False
+        self.tail_thread = None
+        self._stop_event = threading.Event()
+        # 테스트 등에서 주입하는 서비스별 클라이언트 ({'logs': ..., 'rds': ...})
+        self.clients: Optional[Dict] = None
+
+    def add_target(self, db_identifier: str, initial_hours: int = 1, since_ms: Optional[int] = None):
+        """수집 대상 추가 (저장된 체크포인트가 있으면 그 위치부터 이어 읽음)
+
+        since_ms 는 저장된 대상을 복원할 때 쓰며, 없으면 새 대상으로 앱 DB 에 저장합니다.
+        """
+        with self.lock:
+            if db_identifier in self.targets:
+                return
+            target = _TailTarget(db_identifier, initial_hours, since_ms)
+            checkpoints, error = get_log_tail_checkpoints(db_identifier)
+            if error:
+                print(f"Error loading log tail checkpoints for {db_identifier}: {error}")
+            target.checkpoints = checkpoints
+            self.targets[db_identifier] = target
+        if since_ms is None:
+            saved, error = save_log_tail_target(db_identifier, target.since)
+            if not saved:
+                print(f"Error saving log tail target {db_identifier}: {error}")
+
+    def remove_target(self, db_identifier: str):
+        with self.lock:
+            self.targets.pop(db_identifier, None)
+            if not self.targets:
+                self._stop_event.set()
+                self.is_running = False
+        deleted, error = delete_log_tail_target(db_identifier)
+        if not deleted:
+            print(f"Error deleting log tail target {db_identifier}: {error}")
+
+    def resume(self):
+        """앱 DB 에 저장된 수집 대상을 복원하고 수집 재개 (앱 시작 시 호출)"""
+        targets, error = get_log_tail_targets()
+        if error:
+            print(f"Error loading log tail targets: {error}")
+            return
+        for db_identifier, since_ms in targets.items():
+            self.add_target(db_identifier, since_ms=since_ms)
+        if self.targets:
+            self.start()
+
+    def get_client(self, service: str):
+        if self.clients is not None:
+            return self.clients[service]
+        from backend.integrations.aws import aws_integration
+        from backend.models.database import SessionLocal
+        db = SessionLocal()
+        try:
+            return aws_integration.get_client(db, service)
+        finally:
+            db.close()
+
+    def _list_log_groups(self, logs, db_identifier: str) -> List[str]:
+        groups = []
+        for prefix in (f"/aws/rds/instance/{db_identifier}/", f"/aws/rds/cluster/{db_identifier}/"):
+            response = call_with_backoff(logs.describe_log_groups, logGroupNamePrefix=prefix)
+            groups.extend(g['logGroupName'] for g in response.get('logGroups', []))
+        return groups
+
+    def _tail_cloudwatch(self, target: _TailTarget, groups: List[str], cycle: SlowQueryStats,
+                         updated: Dict[Tuple[str, str], str]):
+        logs = self.get_client('logs')
+        for group in groups:
+            for stream in list_streams_in_range(logs, group, target.since):
+                name = stream['logStreamName']
+                key = (CLOUDWATCH, f"{group}|{name}")
+                token = target.checkpoints.get(key)
+                for events, next_token in tail_log_stream(logs, group, name, target.since, token, MAX_PAGES_PER_CYCLE):
+                    cycle.extend(parse_log_events(events))
+                    if next_token:
+                        updated[key] = next_token
+
+    def _tail_rds_files(self, target: _TailTarget, cycle: SlowQueryStats, updated: Dict[Tuple[str, str], str]):
+        rds = self.get_client('rds')
+        request = {'DBInstanceIdentifier': target.db_identifier, 'FilenameContains': 'postgresql.log',
+                   'FileLastWritten': target.since}
+        files = []
+        while True:
+            response = call_with_backoff(rds.describe_db_log_files, **request)
+            files.extend(response.get('DescribeDBLogFiles', []))
+            if not response.get('Marker'):
+                break
+            request['Marker'] = response['Marker']
+
+        listed = set()
+        for log_file in files:
+            name = log_file['LogFileName']
+            listed.add(name)
+            key = (RDS_FILE, name)
+            marker, pending = decode_file_position(target.checkpoints.get(key))
+            parser = target.parsers.get(name)
+            if parser is None:
+                # 재시작 후에는 체크포인트에 저장된 버퍼부터 이어서 파싱
+                parser = target.parsers[name] = SlowQueryLogParser(pending=pending)
+            finished = False
+            for _ in range(MAX_PAGES_PER_CYCLE):
+                response = call_with_backoff(
+                    rds.download_db_log_file_portion,
+                    DBInstanceIdentifier=target.db_identifier,
+                    LogFileName=name,
+                    Marker=marker,
+                    NumberOfLines=10000
+                )
+                data = response.get('LogFileData') or ''
+                if data:
+                    cycle.extend(parser.feed(data))
+                marker = response.get('Marker') or marker
+                if not response.get('AdditionalDataPending'):
+                    finished = True
+                    break
+            if finished and is_rotated_log_file(name):
+                # 더 이상 쓰이지 않는 파일은 남은 버퍼까지 파싱하고 파서를 정리
+                cycle.extend(target.parsers.pop(name).close())
+            updated[key] = encode_file_position(marker, parser.pending)
+
+        # 목록에서 빠진 파일(삭제되었거나 오래 쓰이지 않음)의 파서도 정리
+        for name in [name for name in target.parsers if name not in listed]:
+            cycle.extend(target.parsers.pop(name).close())
+            marker, _ = decode_file_position(target.checkpoints.get((RDS_FILE, name)))
+            updated[(RDS_FILE, name)] = encode_file_position(marker)
+
+    def tail_once(self, db_identifier: str) -> int:
+        """대상 하나를 한 번 이어 읽고 새로 수집한 슬로우 쿼리 수 반환"""
+        target = self.targets.get(db_identifier)
+        if target is None:
+            return 0
+        cycle_start = int(time.time() * 1000)
+        cycle = SlowQueryStats()
+        updated: Dict[Tuple[str, str], str] = {}
+
+        groups = self._list_log_groups(self.get_client('logs'), db_identifier)
+        if groups:
+            self._tail_cloudwatch(target, groups, cycle, updated)
+        else:
+            self._tail_rds_files(target, cycle, updated)
+
+        # 스케치와 체크포인트를 한 트랜잭션으로 저장하고, 실패하면 다음 주기에 함께 다시 저장
+        since = cycle_start - STREAM_LOOKBACK_MS
+        target.unsaved_timeline.merge(cycle.timeline)
+        target.unsaved_timeline.prune(cycle_start - TIMELINE_RETENTION_MS)
+        target.unsaved_checkpoints.update(updated)
+        saved, error = save_log_tail_progress(db_identifier, target.unsaved_timeline.rows(),
+                                              target.unsaved_checkpoints, since)
+        if saved:
+            target.unsaved_timeline = SketchTimeline()
+            target.unsaved_checkpoints = {}
+        else:
+            print(f"Error saving log tail progress for {db_identifier}: {error}")
+
+        with self.lock:
+            target.checkpoints.update(updated)
+            target.stats.merge(cycle)
+            target.stats.timeline.prune(cycle_start - TIMELINE_RETENTION_MS)
+            target.since = since
+            target.last_run = time.time()
+            target.last_error = None
+            target.ingested += cycle.count
+        return cycle.count
+
+    def start(self):
+        """백그라운드 수집 시작"""
+        if self.is_running:
+            return
+        self.is_running = True
+        self._stop_event.clear()
+        self.tail_thread = threading.Thread(target=self._tail_loop, daemon=True)
+        self.tail_thread.start()
+
+    def stop(self):
+        """백그라운드 수집 중지"""
+        self.is_running = False
+        self._stop_event.set()
+        if self.tail_thread:
+            self.tail_thread.join()
+            self.tail_thread = None
+
+    def _tail_loop(self):
+        while self.is_running:
+            for db_identifier in list(self.targets):
+                try:
+                    self.tail_once(db_identifier)
+                except Exception as e:
+                    print(f"Error tailing slow query logs for {db_identifier}: {e}")
+                    target = self.targets.get(db_identifier)
+                    if target:
+                        target.last_error = str(e)
+            self._stop_event.wait(self.interval)
+
+    def snapshot(self, db_identifier: str) -> Optional[Dict]:
+        """누적 통계와 수집 상태 (API 용)"""
+        with self.lock:
+            target = self.targets.get(db_identifier)
+            if target is None:
+                return None
+            return {
+                'db_identifier': db_identifier,
+                'analysis': target.stats.to_dict(),
+                'ingested': target.ingested,
+                'last_run': target.last_run,
+                'last_error': target.last_error,
+                'checkpoints': len(target.checkpoints),
+                'running': self.is_running
+            }
+
+
+# 전역 로그 수집기 인스턴스
+log_tailer = SlowQueryLogTailer()
@@ -6,6 +6,9 @@ import time
 import threading
 import logging
 from ..models.database import DatabaseConnection, DatabaseMetrics, MonitoringConfig
+from .timeseries import MetricsTimeSeries
+from .cloudwatch import RDS_METRIC_NAMES, fetch_rds_metrics
+from .pg_capabilities import build_statements_summary_query, capability_cache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -14,15 +17,20 @@ class MetricsCollector:
     def __init__(self):
         self.monitoring_configs: Dict[str, MonitoringConfig] = {}
         self.metrics_history: Dict[str, List[DatabaseMetrics]] = {}
+        self.metrics_series: Dict[str, MetricsTimeSeries] = {}  # 차트용 컬럼형 히스토리
         self.db_connections: Dict[str, DatabaseConnection] = {}  # DB 연결 정보 저장
         self.is_running = False
         self.monitoring_thread = None
         self.use_cloudwatch: Dict[str, bool] = {}  # DB별 CloudWatch 사용 여부
+        self.cloudwatch_client = None  # 지정하면 공유 세션 캐시 대신 이 클라이언트 사용
+        self.cloudwatch_period = 60
+        self.last_cloudwatch_time: Dict[str, datetime] = {}  # DB별 마지막 CloudWatch 수집 시각
         
     def add_database(self, db_connection: DatabaseConnection, config: MonitoringConfig, use_cloudwatch: bool = False):
         """모니터링할 데이터베이스 추가 (CloudWatch 옵션 포함)"""
         self.monitoring_configs[db_connection.name] = config
         self.metrics_history[db_connection.name] = []
+        self.metrics_series[db_connection.name] = MetricsTimeSeries(max_points=1000)
         self.db_connections[db_connection.name] = db_connection
         self.use_cloudwatch[db_connection.name] = use_cloudwatch
         logger.info(f"Added database {db_connection.name} for monitoring (cloudwatch={use_cloudwatch})")
@@ -33,10 +41,14 @@ class MetricsCollector:
             del self.monitoring_configs[db_name]
         if db_name in self.metrics_history:
             del self.metrics_history[db_name]
+        if db_name in self.metrics_series:
+            del self.metrics_series[db_name]
         if db_name in self.db_connections:
             del self.db_connections[db_name]
         if db_name in self.use_cloudwatch:
             del self.use_cloudwatch[db_name]
+        if db_name in self.last_cloudwatch_time:
+            del self.last_cloudwatch_time[db_name]
         logger.info(f"Removed database {db_name} from monitoring")
         
     def collect_metrics(self, db_connection: DatabaseConnection) -> Optional[DatabaseMetrics]:
@@ -74,34 +86,24 @@ class MetricsCollector:
                     metrics.total_connections = conn_result['total_connections']
                     metrics.active_connections = conn_result['active_connections']
                 
-                # 쿼리 통계 (pg_stat_statements 확장 필요)
-                try:
-                    cursor.execute("""
-                        SELECT 
-                            sum(calls) as total_calls,
-                            sum(total_time) as total_time
-                        FROM pg_stat_statements
-                    """)
-                    query_result = cursor.fetchone()
-                    if query_result and query_result['total_calls']:
+                # 쿼리 통계 / 슬로우 쿼리 수 (pg_stat_statements 확장 필요, 버전별 컬럼 이름 사용)
+                caps = capability_cache.get(conn)
+                query_result = None
+                if caps.has_pg_stat_statements:
+                    try:
+                        cursor.execute(build_statements_summary_query(caps))
+                        query_result = cursor.fetchone()
+                    except psycopg2.Error:
+                        # 확장은 있지만 shared_preload_libraries 에 없는 경우 등
+                        conn.rollback()
+                if query_result:
+                    if query_result['total_calls']:
                         # 간단한 QPS 계산 (실제로는 더 정교한 계산 필요)
-                        metrics.queries_per_second = query_result['total_calls'] / 60.0
-                except:
+                        metrics.queries_per_second = float(query_result['total_calls']) / 60.0
+                    metrics.slow_queries_count = query_result['slow_count']
+                else:
                     logger.warning(f"pg_stat_statements not available for {db_connection.name}")
                 
-                # 슬로우 쿼리 수
-                try:
-                    cursor.execute("""
-                        SELECT count(*) as slow_count
-                        FROM pg_stat_statements 
-                        WHERE mean_time > 1000
-                    """)
-                    slow_result = cursor.fetchone()
-                    if slow_result:
-                        metrics.slow_queries_count = slow_result['slow_count']
-                except:
-                    pass
-                
                 # 업타임
                 cursor.execute("SELECT extract(epoch from now() - pg_postmaster_start_time()) as uptime")
                 uptime_result = cursor.fetchone()
@@ -124,11 +126,79 @@ class MetricsCollector:
             logger.error(f"Error collecting metrics for {db_connection.name}: {e}")
             return None
     
+    def get_cloudwatch_client(self):
+        """활성 AWS 인증 정보의 캐시된 CloudWatch 클라이언트 반환"""
+        if self.cloudwatch_client is not None:
+            return self.cloudwatch_client
+        from ..integrations.aws import aws_integration
+        from ..models.database import SessionLocal
+        db = SessionLocal()
+        try:
+            return aws_integration.get_client(db, 'cloudwatch')
+        finally:
+            db.close()
+    
     def collect_metrics_cloudwatch(self, db_connection: DatabaseConnection) -> Optional[DatabaseMetrics]:
-        """CloudWatch에서 메트릭 수집 (Stub, 실제 구현 필요)"""
-        # TODO: boto3 등으로 CloudWatch에서 메트릭 수집 구현
-        logger.info(f"CloudWatch metrics collection for {db_connection.name} (not implemented)")
-        return None
+        """CloudWatch에서 단일 데이터베이스의 메트릭 수집"""
+        collected = self.collect_metrics_cloudwatch_batch([db_connection])
+        return collected.get(db_connection.name)
+    
+    def collect_metrics_cloudwatch_batch(self, db_connections: List[DatabaseConnection]) -> Dict[str, DatabaseMetrics]:
+        """여러 데이터베이스의 RDS 메트릭을 GetMetricData 배치 한 번으로 수집
+        
+        수집된 모든 데이터포인트는 메트릭 이름을 필드로 하여 시계열 저장소에 병합하고,
+        가장 최근 포인트로 DatabaseMetrics 를 만들어 반환합니다.
+        """
+        if not db_connections:
+            return {}
+        
+        end_time = datetime.utcnow()
+        default_start = end_time - timedelta(hours=1)
+        start_time = min(self.last_cloudwatch_time.get(c.name, default_start) for c in db_connections)
+        
+        identifiers = {c.name: c.cloudwatch_id or c.name for c in db_connections}
+        keys = [
+            (identifier, metric_name, 'Average')
+            for identifier in set(identifiers.values())
+            for metric_name in RDS_METRIC_NAMES
+        ]
+        
+        try:
+            results = fetch_rds_metrics(self.get_cloudwatch_client(), keys, start_time, end_time, self.cloudwatch_period)
+        except Exception as e:
+            logger.error(f"Error collecting CloudWatch metrics: {e}")
+            return {}
+        
+        collected = {}
+        for db_name, identifier in identifiers.items():
+            series = self.metrics_series.setdefault(db_name, MetricsTimeSeries(max_points=1000))
+            latest: Dict[str, float] = {}
+            latest_time = None
+            for metric_name in RDS_METRIC_NAMES:
+                data = results.get((identifier, metric_name, 'Average'))
+                if not data or not data["timestamps"]:
+                    continue
+                for ts, value in zip(data["timestamps"], data["values"]):
+                    series.upsert(ts.timestamp(), {metric_name: value})
+                last_ts = data["timestamps"][-1]
+                latest[metric_name] = data["values"][-1]
+                if latest_time is None or last_ts > latest_time:
+                    latest_time = last_ts
+            
+            if latest_time is None:
+                continue
+            
+            self.last_cloudwatch_time[db_name] = latest_time.replace(tzinfo=None) + timedelta(seconds=1)
+            connections = latest.get('DatabaseConnections')
+            collected[db_name] = DatabaseMetrics(
+                db_name=db_name,
+                timestamp=datetime.fromtimestamp(latest_time.timestamp()),
+                cpu_usage=latest.get('CPUUtilization'),
+                active_connections=int(connections) if connections is not None else None,
+                total_connections=int(connections) if connections is not None else None
+            )
+        
+        return collected
     
     def start_monitoring(self):
         """모니터링 시작"""
@@ -147,11 +217,23 @@ class MetricsCollector:
             self.monitoring_thread.join()
         logger.info("Database monitoring stopped")
         
+    def _record_metrics(self, db_name: str, metrics: DatabaseMetrics):
+        """수집된 메트릭을 히스토리와 시계열 저장소에 기록"""
+        if db_name not in self.metrics_history:
+            return
+        self.metrics_history[db_name].append(metrics)
+        self.metrics_series[db_name].append_metrics(metrics)
+        # 히스토리 크기 제한 (최근 1000개만 유지)
+        if len(self.metrics_history[db_name]) > 1000:
+            self.metrics_history[db_name] = self.metrics_history[db_name][-1000:]
+        logger.info(f"Collected metrics for {db_name}: {metrics.active_connections} active connections")
+    
     def _monitoring_loop(self):
         """모니터링 루프"""
         while self.is_running:
             try:
-                for db_name, config in self.monitoring_configs.items():
+                cloudwatch_targets = []
+                for db_name, config in list(self.monitoring_configs.items()):
                     if not config.is_enabled:
                         continue
                     
@@ -160,18 +242,18 @@ class MetricsCollector:
                         logger.warning(f"No db_connection info for {db_name}")
                         continue
                     
-                    # CloudWatch 사용 여부에 따라 분기
+                    # CloudWatch 대상은 모아서 한 번에 배치 수집
                     if self.use_cloudwatch.get(db_name):
-                        metrics = self.collect_metrics_cloudwatch(db_connection)
-                    else:
-                        metrics = self.collect_metrics(db_connection)
+                        cloudwatch_targets.append(db_connection)
+                        continue
                     
+                    metrics = self.collect_metrics(db_connection)
                     if metrics:
-                        self.metrics_history[db_name].append(metrics)
-                        # 히스토리 크기 제한 (최근 1000개만 유지)
-                        if len(self.metrics_history[db_name]) > 1000:
-                            self.metrics_history[db_name] = self.metrics_history[db_name][-1000:]
-                        logger.info(f"Collected metrics for {db_name}: {metrics.active_connections} active connections")
+                        self._record_metrics(db_name, metrics)
+                
+                if cloudwatch_targets:
+                    for db_name, metrics in self.collect_metrics_cloudwatch_batch(cloudwatch_targets).items():
+                        self._record_metrics(db_name, metrics)
                 
                 # 설정된 간격만큼 대기
                 time.sleep(60)  # 기본 1분 간격
@@ -196,6 +278,10 @@ class MetricsCollector:
             metric for metric in self.metrics_history[db_name]
             if metric.timestamp >= cutoff_time
         ]
+    
+    def get_metrics_series(self, db_name: str) -> Optional[MetricsTimeSeries]:
+        """차트용 컬럼형 메트릭 시계열 반환"""
+        return self.metrics_series.get(db_name)
 
 # 전역 인스턴스
 metrics_collector = MetricsCollector() 
\ No newline at end of file
@@ -0,0 +1,197 @@
+"""
+PostgreSQL 대상별 기능 확인과 pg_stat_statements 쿼리 생성
+서버 버전, 설치된 확장(버전), track_io_timing 을 한 번 확인해 캐시하고,
+pg_stat_statements 확장 버전에 맞는 컬럼 이름으로 쿼리를 만듭니다.
+(1.8 / PostgreSQL 13 부터 total_time → total_exec_time, 1.11 / PostgreSQL 17 부터 blk_read_time → shared_blk_read_time)
+"""
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import psycopg2
+
+# 확인 결과 캐시 유지 시간 (확장 설치/설정 변경 반영 주기)
+CAPABILITY_TTL = 3600
+
+
+def _parse_version(version: Optional[str]) -> Tuple[int, ...]:
+    if not version:
+        return ()
+    return tuple(int(part) for part in version.split('.') if part.isdigit())
+
+
+class PgCapabilities:
+    """한 PostgreSQL 대상의 버전/확장/설정 정보"""
+
+    def __init__(self, server_version_num: int, extensions: Dict[str, str], track_io_timing: bool = False):
+        self.server_version_num = server_version_num
+        self.extensions = extensions
+        self.track_io_timing = track_io_timing
+        self.pgss_version = _parse_version(extensions.get('pg_stat_statements'))
+
+    @property
+    def has_pg_stat_statements(self) -> bool:
+        return bool(self.pgss_version)
+
+    @property
+    def exec_time_columns(self) -> bool:
+        """total_exec_time/mean_exec_time... 컬럼 사용 여부 (1.8+)"""
+        return self.pgss_version >= (1, 8)
+
+    @property
+    def has_wal_stats(self) -> bool:
+        return self.pgss_version >= (1, 8)
+
+    @property
+    def has_info_view(self) -> bool:
+        """pg_stat_statements_info (dealloc, stats_reset) 존재 여부 (1.9+)"""
+        return self.pgss_version >= (1, 9)
+
+    def to_dict(self) -> Dict:
+        return {
+            'server_version_num': self.server_version_num,
+            'extensions': self.extensions,
+            'track_io_timing': self.track_io_timing,
+            'pg_stat_statements': '.'.join(str(v) for v in self.pgss_version) or None
+        }
+
+
+def probe_capabilities(conn) -> PgCapabilities:
+    """서버 버전, 현재 DB 에 설치된 확장, track_io_timing 조회"""
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT current_setting('server_version_num')::int, current_setting('track_io_timing')")
+        row = cur.fetchone()
+        server_version_num, track_io_timing = row[0], row[1] == 'on'
+        cur.execute("SELECT extname, extversion FROM pg_extension")
+        extensions = {name: version for name, version in cur.fetchall()}
+    finally:
+        cur.close()
+    return PgCapabilities(server_version_num, extensions, track_io_timing)
+
+
+def statement_columns(caps: PgCapabilities) -> Dict[str, str]:
+    """{표준 이름: SQL 식} — 버전과 무관하게 total_time/mean_time 등의 이름으로 조회할 수 있게 함"""
+    suffix = '_exec_time' if caps.exec_time_columns else '_time'
+    columns = {
+        'calls': 'calls',
+        'total_time': f'total{suffix}',
+        'mean_time': f'mean{suffix}',
+        'max_time': f'max{suffix}',
+        'min_time': f'min{suffix}',
+        'stddev_time': f'stddev{suffix}',
+        'rows': 'rows',
+        'shared_blks_hit': 'shared_blks_hit',
+        'shared_blks_read': 'shared_blks_read',
+        'shared_blks_dirtied': 'shared_blks_dirtied',
+        'shared_blks_written': 'shared_blks_written',
+        'temp_blks_read': 'temp_blks_read',
+        'temp_blks_written': 'temp_blks_written',
+    }
+    # I/O 시간은 track_io_timing 이 꺼져 있으면 항상 0 이므로 생략
+    if caps.track_io_timing:
+        if caps.pgss_version >= (1, 11):
+            columns['blk_read_time'] = 'shared_blk_read_time + local_blk_read_time'
+            columns['blk_write_time'] = 'shared_blk_write_time + local_blk_write_time'
+        else:
+            columns['blk_read_time'] = 'blk_read_time'
+            columns['blk_write_time'] = 'blk_write_time'
+    if caps.has_wal_stats:
+        columns['wal_records'] = 'wal_records'
+        columns['wal_fpi'] = 'wal_fpi'
+        columns['wal_bytes'] = 'wal_bytes'
+    return columns
+
+
+def build_statements_query(caps: PgCapabilities, order_by: str = 'total_time') -> str:
+    """쿼리 텍스트 + 표준 이름 컬럼으로 pg_stat_statements 상위 항목 조회 (LIMIT %s 파라미터 하나)"""
+    columns = statement_columns(caps)
+    select = ', '.join(f'{expr} AS {name}' for name, expr in columns.items())
+    return f"""
+        SELECT query, {select}
+          FROM pg_stat_statements
+         WHERE query NOT LIKE 'EXPLAIN%%'
+         ORDER BY {columns[order_by]} DESC
+         LIMIT %s
+    """
+
+
+def build_statements_summary_query(caps: PgCapabilities, slow_mean_ms: float = 1000) -> str:
+    """전체 호출 수, 총 실행 시간, 평균 실행 시간이 slow_mean_ms 를 넘는 항목 수"""
+    columns = statement_columns(caps)
+    return f"""
+        SELECT sum(calls) AS total_calls,
+               sum({columns['total_time']}) AS total_time,
+               count(*) FILTER (WHERE {columns['mean_time']} > {float(slow_mean_ms)}) AS slow_count
+          FROM pg_stat_statements
+    """
+
+
+def target_key(host, port, dbname, user) -> Tuple[str, str, str, str]:
+    """캐시 키로 쓰는 접속 대상 (host, port, dbname, user)"""
+    return (str(host), str(port), str(dbname), str(user))
+
+
+def connection_target_key(conn) -> Tuple[str, str, str, str]:
+    params = conn.get_dsn_parameters()
+    return target_key(params.get('host'), params.get('port', 5432), params.get('dbname'), params.get('user'))
+
+
+def dbinfo_target_key(dbinfo: Dict) -> Tuple[str, str, str, str]:
+    return target_key(dbinfo['host'], dbinfo.get('port', 5432), dbinfo['dbname'], dbinfo['user'])
+
+
+class CapabilityCache:
+    """대상(host, port, dbname, user)별 기능 확인 결과 캐시"""
+
+    def __init__(self, ttl: float = CAPABILITY_TTL):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str, str, str], Tuple[float, PgCapabilities]] = {}
+
+    def _lookup(self, key) -> Optional[PgCapabilities]:
+        with self.lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.time():
+                return entry[1]
+        return None
+
+    def _store(self, key, caps: PgCapabilities) -> PgCapabilities:
+        with self.lock:
+            self._entries[key] = (time.time() + self.ttl, caps)
+        return caps
+
+    def get(self, conn) -> PgCapabilities:
+        """열린 연결의 대상 기능 정보 (캐시에 없으면 이 연결로 확인)"""
+        key = connection_target_key(conn)
+        return self._lookup(key) or self._store(key, probe_capabilities(conn))
+
+    def get_for(self, dbinfo: Dict) -> PgCapabilities:
+        """등록된 DB 정보의 대상 기능 정보 (캐시에 없으면 연결해서 확인)"""
+        key = dbinfo_target_key(dbinfo)
+        caps = self._lookup(key)
+        if caps is not None:
+            return caps
+        conn = psycopg2.connect(
+            host=dbinfo['host'],
+            port=dbinfo.get('port', 5432),
+            user=dbinfo['user'],
+            password=dbinfo['password'],
+            dbname=dbinfo['dbname']
+        )
+        try:
+            return self._store(key, probe_capabilities(conn))
+        finally:
+            conn.close()
+
+    def invalidate(self, dbinfo: Optional[Dict] = None):
+        """캐시 폐기 (dbinfo 가 없으면 전체)"""
+        with self.lock:
+            if dbinfo is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(dbinfo_target_key(dbinfo), None)
+
+
+# 전역 기능 정보 캐시 인스턴스
+capability_cache = CapabilityCache()
@@ -0,0 +1,273 @@
+"""
+PostgreSQL 스키마 일괄 조회
+테이블 수와 관계없이 pg_catalog 쿼리 4개(테이블/컬럼/인덱스/제약조건)로
+컬럼, 인덱스, 제약조건, 외래키, 크기, 예상 행 수를 한 번에 읽고 대상별로 캐시합니다.
+모니터링 스키마 API 와 NL2SQL 프롬프트가 같은 결과를 사용합니다.
+"""
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import psycopg2
+
+from backend.monitoring.pg_capabilities import connection_target_key, dbinfo_target_key
+
+# 캐시 유지 시간 (refresh 로 즉시 갱신 가능)
+SCHEMA_TTL = 300
+
+# 시스템 스키마 제외 조건 (n = pg_namespace)
+_USER_SCHEMA_FILTER = """
+    n.nspname NOT IN ('pg_catalog', 'information_schema')
+    AND n.nspname NOT LIKE 'pg\\_toast%'
+    AND n.nspname NOT LIKE 'pg\\_temp\\_%'
+"""
+
+TABLES_QUERY = f"""
+    SELECT c.oid, n.nspname, c.relname, c.relkind,
+           obj_description(c.oid, 'pg_class'),
+           c.reltuples::bigint,
+           CASE WHEN c.relkind IN ('r', 'p', 'm') THEN pg_total_relation_size(c.oid) END
+      FROM pg_class c
+      JOIN pg_namespace n ON n.oid = c.relnamespace
+     WHERE c.relkind IN ('r', 'p', 'v', 'm', 'f')
+       AND {_USER_SCHEMA_FILTER}
+     ORDER BY n.nspname, c.relname
+"""
+
+COLUMNS_QUERY = f"""
+    SELECT a.attrelid, a.attname, format_type(a.atttypid, NULL), format_type(a.atttypid, a.atttypmod),
+           a.atttypid, a.atttypmod, NOT a.attnotnull,
+           pg_get_expr(d.adbin, d.adrelid),
+           col_description(a.attrelid, a.attnum)
+      FROM pg_attribute a
+      JOIN pg_class c ON c.oid = a.attrelid
+      JOIN pg_namespace n ON n.oid = c.relnamespace
+      LEFT JOIN pg_attrdef d ON d.adrelid = a.attrelid AND d.adnum = a.attnum
+     WHERE a.attnum > 0 AND NOT a.attisdropped
+       AND c.relkind IN ('r', 'p', 'v', 'm', 'f')
+       AND {_USER_SCHEMA_FILTER}
+     ORDER BY a.attrelid, a.attnum
+"""
+
+INDEXES_QUERY = f"""
+    SELECT ix.indrelid, i.relname, ix.indisunique, ix.indisprimary,
+           ARRAY(SELECT pg_get_indexdef(ix.indexrelid, k, true) FROM generate_series(1, ix.indnatts) AS k),
+           pg_get_indexdef(ix.indexrelid),
+           pg_relation_size(ix.indexrelid)
+      FROM pg_index ix
+      JOIN pg_class i ON i.oid = ix.indexrelid
+      JOIN pg_class c ON c.oid = ix.indrelid
+      JOIN pg_namespace n ON n.oid = c.relnamespace
+     WHERE {_USER_SCHEMA_FILTER}
+     ORDER BY ix.indrelid, i.relname
+"""
+
+CONSTRAINTS_QUERY = f"""
+    SELECT con.conrelid, con.conname, con.contype, pg_get_constraintdef(con.oid, true),
+           ARRAY(SELECT a.attname
+                   FROM unnest(con.conkey) WITH ORDINALITY AS k(attnum, ord)
+                   JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = k.attnum
+                  ORDER BY k.ord),
+           fn.nspname, fc.relname,
+           ARRAY(SELECT a.attname
+                   FROM unnest(con.confkey) WITH ORDINALITY AS k(attnum, ord)
+                   JOIN pg_attribute a ON a.attrelid = con.confrelid AND a.attnum = k.attnum
+                  ORDER BY k.ord)
+      FROM pg_constraint con
+      JOIN pg_class c ON c.oid = con.conrelid
+      JOIN pg_namespace n ON n.oid = c.relnamespace
+      LEFT JOIN pg_class fc ON fc.oid = con.confrelid
+      LEFT JOIN pg_namespace fn ON fn.oid = fc.relnamespace
+     WHERE con.contype IN ('p', 'u', 'f', 'c', 'x')
+       AND {_USER_SCHEMA_FILTER}
+     ORDER BY con.conrelid, con.conname
+"""
+
+RELKIND_NAMES = {'r': 'table', 'p': 'partitioned table', 'v': 'view', 'm': 'materialized view', 'f': 'foreign table'}
+CONSTRAINT_TYPES = {'p': 'primary key', 'u': 'unique', 'f': 'foreign key', 'c': 'check', 'x': 'exclusion'}
+
+# information_schema 의 numeric_precision 과 같은 값 (int2/int4/int8/float4/float8)
+_FIXED_PRECISION = {21: (16, 0), 23: (32, 0), 20: (64, 0), 700: (24, None), 701: (53, None)}
+_CHAR_TYPES = (1042, 1043)  # bpchar, varchar
+_NUMERIC = 1700
+
+
+def _type_modifiers(type_oid: int, typmod: int) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+    """atttypmod 에서 (max_length, precision, scale) 계산"""
+    if type_oid in _CHAR_TYPES:
+        return (typmod - 4 if typmod >= 4 else None), None, None
+    if type_oid == _NUMERIC:
+        if typmod < 4:
+            return None, None, None
+        return None, ((typmod - 4) >> 16) & 0xFFFF, (typmod - 4) & 0xFFFF
+    precision, scale = _FIXED_PRECISION.get(type_oid, (None, None))
+    return None, precision, scale
+
+
+def introspect_schema(conn) -> Dict:
+    """사용자 스키마의 모든 테이블/뷰 정보를 카탈로그 쿼리 4개로 조회
+
+    반환값: {"tables": [...], "relationships": [...], "query_count": 4, "introspected_at": epoch 초}
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(TABLES_QUERY)
+        tables: Dict[int, Dict] = {}
+        for oid, schema, name, relkind, comment, reltuples, size in cursor.fetchall():
+            tables[oid] = {
+                "schema": schema,
+                "name": name,
+                "kind": RELKIND_NAMES.get(relkind, relkind),
+                "comment": comment or "",
+                # 한 번도 ANALYZE 되지 않은 테이블은 -1 (PostgreSQL 14+) 이므로 None 으로 표시
+                "row_estimate": reltuples if reltuples is not None and reltuples >= 0 else None,
+                "size_bytes": size,
+                "columns": [],
+                "indexes": [],
+                "constraints": []
+            }
+
+        cursor.execute(COLUMNS_QUERY)
+        for relid, name, data_type, full_type, type_oid, typmod, nullable, default, comment in cursor.fetchall():
+            table = tables.get(relid)
+            if table is None:
+                continue
+            max_length, precision, scale = _type_modifiers(type_oid, typmod)
+            table["columns"].append({
+                "name": name,
+                "type": data_type,
+                "full_type": full_type,
+                "nullable": nullable,
+                "default": default,
+                "max_length": max_length,
+                "precision": precision,
+                "scale": scale,
+                "comment": comment or ""
+            })
+
+        cursor.execute(INDEXES_QUERY)
+        for relid, name, unique, primary, columns, definition, size in cursor.fetchall():
+            table = tables.get(relid)
+            if table is None:
+                continue
+            table["indexes"].append({
+                "name": name,
+                "columns": list(columns),
+                "unique": unique,
+                "primary": primary,
+                "definition": definition,
+                "size_bytes": size
+            })
+
+        cursor.execute(CONSTRAINTS_QUERY)
+        relationships = []
+        for relid, name, contype, definition, columns, ref_schema, ref_table, ref_columns in cursor.fetchall():
+            table = tables.get(relid)
+            if table is None:
+                continue
+            constraint = {
+                "name": name,
+                "type": CONSTRAINT_TYPES.get(contype, contype),
+                "columns": list(columns),
+                "definition": definition
+            }
+            if contype == 'f':
+                constraint.update({"foreign_schema": ref_schema, "foreign_table": ref_table,
+                                   "foreign_columns": list(ref_columns)})
+                for column, foreign_column in zip(columns, ref_columns):
+                    relationships.append({
+                        "schema": table["schema"],
+                        "table": table["name"],
+                        "column": column,
+                        "foreign_schema": ref_schema,
+                        "foreign_table": ref_table,
+                        "foreign_column": foreign_column,
+                        "constraint_name": name
+                    })
+            table["constraints"].append(constraint)
+    finally:
+        cursor.close()
+
+    return {
+        "tables": list(tables.values()),
+        "relationships": relationships,
+        "query_count": 4,
+        "introspected_at": time.time()
+    }
+
+
+def monitoring_schema(schema_info: Dict, schema: str = 'public') -> Dict:
+    """모니터링 스키마 API 형식 (한 스키마의 일반/파티션 테이블과 그 외래키)"""
+    return {
+        "tables": [
+            t for t in schema_info["tables"]
+            if t["schema"] == schema and t["kind"] in ('table', 'partitioned table')
+        ],
+        "relationships": [r for r in schema_info["relationships"] if r["schema"] == schema]
+    }
+
+
+def schema_prompt_text(schema_info: Dict) -> str:
+    """NL2SQL 프롬프트용 "schema.table(column type, ...)" 목록"""
+    return "\n".join(
+        f"{t['schema']}.{t['name']}({', '.join(c['name'] + ' ' + c['type'] for c in t['columns'])})"
+        for t in schema_info["tables"]
+        if t["columns"]
+    )
+
+
+class SchemaCache:
+    """대상(host, port, dbname, user)별 스키마 조회 결과 캐시"""
+
+    def __init__(self, ttl: float = SCHEMA_TTL):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str, str, str], Tuple[float, Dict]] = {}
+
+    def _lookup(self, key) -> Optional[Dict]:
+        with self.lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.time():
+                return entry[1]
+        return None
+
+    def _store(self, key, schema_info: Dict) -> Dict:
+        with self.lock:
+            self._entries[key] = (time.time() + self.ttl, schema_info)
+        return schema_info
+
+    def get(self, conn, refresh: bool = False) -> Dict:
+        """열린 연결의 대상 스키마 (캐시에 없거나 refresh 면 이 연결로 조회)"""
+        key = connection_target_key(conn)
+        cached = None if refresh else self._lookup(key)
+        return cached or self._store(key, introspect_schema(conn))
+
+    def get_for(self, dbinfo: Dict, refresh: bool = False) -> Dict:
+        """등록된 DB 정보의 대상 스키마 (캐시에 없거나 refresh 면 연결해서 조회)"""
+        key = dbinfo_target_key(dbinfo)
+        cached = None if refresh else self._lookup(key)
+        if cached is not None:
+            return cached
+        conn = psycopg2.connect(
+            host=dbinfo['host'],
+            port=dbinfo.get('port', 5432),
+            user=dbinfo['user'],
+            password=dbinfo['password'],
+            dbname=dbinfo['dbname']
+        )
+        try:
+            return self._store(key, introspect_schema(conn))
+        finally:
+            conn.close()
+
+    def invalidate(self, dbinfo: Optional[Dict] = None):
+        """캐시 폐기 (dbinfo 가 없으면 전체)"""
+        with self.lock:
+            if dbinfo is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(dbinfo_target_key(dbinfo), None)
+
+
+# 전역 스키마 캐시 인스턴스
+schema_cache = SchemaCache()
@@ -0,0 +1,202 @@
+"""
+병합 가능한 분위수 스케치 (DDSketch)
+상대 오차 alpha 안에서 p50/p95/p99 등을 고정 크기 메모리로 계산하고,
+여러 스트림/작업자의 스케치를 병합하거나 JSON 으로 저장/복원할 수 있습니다.
+"""
+import math
+from typing import Callable, Dict, Iterable, List, Optional
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+DEFAULT_MAX_BINS = 2048
+# 이 값 이하의 duration 은 0 버킷으로 셈
+MIN_INDEXABLE_VALUE = 1e-6
+
+
+class DDSketch:
+    """로그 간격 버킷에 개수를 세는 분위수 스케치
+
+    값 v 는 ceil(log_gamma(v)) 버킷에 들어가며, 버킷 대표값은 실제 값과 최대 alpha 만큼의 상대 오차를 가집니다.
+    버킷 수가 max_bins 를 넘으면 가장 작은 버킷들을 합쳐 상위 분위수 정확도를 유지합니다.
+    """
+
+    __slots__ = ('relative_accuracy', 'max_bins', 'gamma', '_log_gamma', 'bins',
+                 'zero_count', 'count', 'sum', 'min', 'max')
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY, max_bins: int = DEFAULT_MAX_BINS):
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: Dict[int, float] = {}
+        self.zero_count = 0.0
+        self.count = 0.0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, value: float, weight: float = 1.0):
+        if value <= MIN_INDEXABLE_VALUE:
+            self.zero_count += weight
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.bins[index] = self.bins.get(index, 0.0) + weight
+            if len(self.bins) > self.max_bins:
+                self._collapse()
+        self.count += weight
+        self.sum += value * weight
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def extend(self, values: Iterable[float]):
+        for value in values:
+            self.add(value)
+
+    def _collapse(self):
+        """가장 작은 버킷들을 하나로 합쳐 버킷 수를 max_bins 로 제한"""
+        indexes = sorted(self.bins)
+        excess = len(indexes) - self.max_bins
+        target = indexes[excess]
+        for index in indexes[:excess]:
+            self.bins[target] += self.bins.pop(index)
+
+    def merge(self, other: 'DDSketch'):
+        """다른 스케치를 이 스케치에 합침 (같은 alpha 여야 함)"""
+        if not other.count:
+            return
+        if other.gamma != self.gamma:
+            raise ValueError("서로 다른 relative_accuracy 의 스케치는 병합할 수 없습니다")
+        for index, weight in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0.0) + weight
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def quantile(self, q: float) -> Optional[float]:
+        """q(0~1) 분위수 추정값, 비어 있으면 None"""
+        if not self.count:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return 0.0
+        value = self.max
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                value = 2 * self.gamma ** index / (self.gamma + 1)
+                break
+        # 버킷 대표값이 관측 범위를 벗어나지 않도록 보정
+        return min(max(value, self.min), self.max)
+
+    def quantiles(self, qs: Iterable[float]) -> List[Optional[float]]:
+        return [self.quantile(q) for q in qs]
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def to_dict(self) -> Dict:
+        """JSON 으로 저장할 수 있는 형태"""
+        return {
+            'alpha': self.relative_accuracy,
+            'max_bins': self.max_bins,
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min,
+            'max': self.max,
+            'zero': self.zero_count,
+            'bins': {str(index): weight for index, weight in self.bins.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'DDSketch':
+        sketch = cls(data.get('alpha', DEFAULT_RELATIVE_ACCURACY), data.get('max_bins', DEFAULT_MAX_BINS))
+        sketch.count = data.get('count', 0.0)
+        sketch.sum = data.get('sum', 0.0)
+        sketch.min = data.get('min')
+        sketch.max = data.get('max')
+        sketch.zero_count = data.get('zero', 0.0)
+        sketch.bins = {int(index): weight for index, weight in data.get('bins', {}).items()}
+        return sketch
+
+
+# 전체 쿼리 스케치를 나타내는 핑거프린트 키
+ALL_QUERIES = ''
+
+
+class SketchTimeline:
+    """시간 버킷별(기본 1시간) 전체/핑거프린트별 duration 스케치"""
+
+    def __init__(self, bucket_ms: int = 3600 * 1000, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        self.bucket_ms = bucket_ms
+        self.relative_accuracy = relative_accuracy
+        # {버킷 시작(ms): {핑거프린트: 스케치}}
+        self.buckets: Dict[int, Dict[str, DDSketch]] = {}
+        self.queries: Dict[str, str] = {}
+
+    def _sketch(self, bucket: int, key: str) -> DDSketch:
+        sketches = self.buckets.setdefault(bucket, {})
+        sketch = sketches.get(key)
+        if sketch is None:
+            sketch = sketches[key] = DDSketch(self.relative_accuracy)
+        return sketch
+
+    def add(self, timestamp: int, duration: float, fingerprint: Optional[str] = None, query: Optional[str] = None):
+        """timestamp(ms) 가 속한 버킷의 전체 스케치와 (있으면) 핑거프린트 스케치에 누적"""
+        if not timestamp:
+            return
+        bucket = timestamp - timestamp % self.bucket_ms
+        self._sketch(bucket, ALL_QUERIES).add(duration)
+        if fingerprint:
+            self._sketch(bucket, fingerprint).add(duration)
+            if query is not None and fingerprint not in self.queries:
+                self.queries[fingerprint] = query
+
+    def merge(self, other: 'SketchTimeline', rename: Optional[Callable[[str], str]] = None):
+        """다른 타임라인을 합침 (rename 이 있으면 핑거프린트 키를 바꿔서 합침)"""
+        for bucket, sketches in other.buckets.items():
+            for key, sketch in sketches.items():
+                if rename and key != ALL_QUERIES:
+                    key = rename(key)
+                self._sketch(bucket, key).merge(sketch)
+        for key, query in other.queries.items():
+            if rename:
+                renamed = rename(key)
+                query = query if renamed == key else None
+                key = renamed
+            if query is not None:
+                self.queries.setdefault(key, query)
+
+    def first_full_bucket(self, start_ms: int) -> int:
+        """start_ms 이후 처음으로 온전히 포함되는 버킷의 시작 시각"""
+        return -(-start_ms // self.bucket_ms) * self.bucket_ms
+
+    def prune(self, before_ms: int):
+        """before_ms 이전 버킷 제거 (메모리 상한 유지)"""
+        for bucket in [b for b in self.buckets if b < before_ms]:
+            del self.buckets[bucket]
+
+    def rows(self) -> List[Dict]:
+        """저장용 (버킷, 핑거프린트, 쿼리, 스케치) 행 목록"""
+        return [
+            {
+                'bucket_start': bucket,
+                'fingerprint': key,
+                'query': self.queries.get(key),
+                'sketch': sketch
+            }
+            for bucket, sketches in sorted(self.buckets.items())
+            for key, sketch in sketches.items()
+        ]
@@ -0,0 +1,323 @@
+"""
+PostgreSQL 슬로우 쿼리 로그 파서
+log_min_duration_statement 로 남는 `duration: ... ms` 로그를 미리 컴파일한 정규식 한 번의 스캔으로 추출합니다.
+
+- 여러 줄 statement: PostgreSQL 은 메시지의 줄바꿈 뒤에 탭을 붙이므로 탭으로 시작하는 줄은 이어지는 줄로 봅니다.
+- `duration: ... ms  statement|execute|bind|parse <name>: ...` 형식과 statement 없는 duration 로그를 모두 인식합니다.
+- 다음 줄의 `DETAIL:  parameters: ...` 를 바인드 파라미터로 붙입니다.
+- log_line_prefix 는 형식에 관계없이 건너뛰고, %t/%m 타임스탬프가 있으면 사용합니다.
+
+SlowQueryLogParser 와 SlowQueryStats 를 함께 쓰면 로그 크기와 관계없이 일정한 메모리로 분석할 수 있습니다.
+"""
+import heapq
+import re
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from backend.monitoring.sketch import DDSketch, SketchTimeline
+from backend.monitoring.sql_fingerprint import QueryAggregator
+
+NO_STATEMENT = '(쿼리문 없음)'
+
+# 리터럴로 시작하는 패턴이라 duration 이 없는 구간은 C 수준에서 빠르게 건너뜀
+DURATION_PATTERN = (
+    r'duration: (\d{%d,}(?:\.\d+)?) ms'
+    r'(?: +(statement|execute|bind|parse|fastpath function call)(?: ([^:\n]*))?: ([^\n]*(?:\n\t[^\n]*)*))?'
+)
+DURATION_RE = re.compile(DURATION_PATTERN % 1)
+_duration_res: Dict[int, 're.Pattern'] = {1: DURATION_RE}
+
+
+def duration_re(min_duration_ms: float) -> 're.Pattern':
+    """min_duration_ms 보다 자릿수가 적은 duration 은 정규식 단계에서 버리는 패턴
+
+    PostgreSQL 은 duration 정수부를 앞자리 0 없이 쓰므로, 기준의 정수부 자릿수보다 짧은 값은
+    기준 미만입니다. 대부분을 차지하는 빠른 쿼리를 Python 으로 넘기지 않고 건너뛸 수 있습니다.
+    """
+    digits = len(str(int(min_duration_ms))) if min_duration_ms >= 1 else 1
+    pattern = _duration_res.get(digits)
+    if pattern is None:
+        pattern = _duration_res[digits] = re.compile(DURATION_PATTERN % digits)
+    return pattern
+
+# duration 로그 바로 다음 레코드가 바인드 파라미터인 경우
+PARAMETERS_MARKER = 'DETAIL:  parameters: '
+# 파라미터 표시를 찾을 다음 줄 범위 (log_line_prefix 길이보다 충분히 길게)
+PARAMETERS_LOOKAHEAD = 1024
+# 현재 위치부터 레코드 끝까지 (탭으로 이어지는 줄 포함)
+RECORD_BODY_RE = re.compile(r'[^\n]*(?:\n\t[^\n]*)*')
+
+# log_line_prefix 의 %t / %m 타임스탬프
+PREFIX_TIMESTAMP_RE = re.compile(r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})(\.\d+)?(?: (UTC|GMT))?')
+FRACTION_RE = re.compile(r'\.\d+')
+
+
+def _prefix_timestamp(text: str, start: int, cache: Dict[str, int]) -> int:
+    """매치가 있는 줄의 접두어에서 타임스탬프(ms)를 추출, 없으면 0"""
+    line_start = text.rfind('\n', 0, start) + 1
+    # 대부분의 접두어는 타임스탬프로 시작하므로 줄 앞 19자로 캐시를 먼저 확인
+    key = text[line_start:line_start + 19]
+    base = cache.get(key)
+    if base is not None:
+        fraction_at = line_start + 19
+    else:
+        m = PREFIX_TIMESTAMP_RE.match(text, line_start, start) or PREFIX_TIMESTAMP_RE.search(text, line_start, start)
+        if not m:
+            return 0
+        key = m.group(1)
+        base = cache.get(key)
+        if base is None:
+            parsed = datetime.strptime(key, '%Y-%m-%d %H:%M:%S')
+            if m.group(3):
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            base = int(parsed.timestamp() * 1000)
+            cache[key] = base
+        fraction_at = m.end(1)
+    if text.startswith('.', fraction_at):
+        fraction = FRACTION_RE.match(text, fraction_at)
+        if fraction:
+            return base + int(float(fraction.group(0)) * 1000)
+    return base
+
+
+def _next_record_parameters(text: str, end: int) -> Optional[str]:
+    """end 바로 다음 레코드가 DETAIL parameters 줄이면 파라미터 문자열 반환"""
+    line_end = text.find('\n', end + 1)
+    if line_end == -1:
+        line_end = len(text)
+    marker = text.find(PARAMETERS_MARKER, end + 1, line_end)
+    if marker == -1:
+        return None
+    body = RECORD_BODY_RE.match(text, marker + len(PARAMETERS_MARKER)).group(0)
+    return body.replace('\n\t', '\n').strip()
+
+
+def iter_slow_queries(text: str, min_duration_ms: float = 0.0, timestamp: int = 0,
+                      endpos: Optional[int] = None, _cache: Optional[Dict[str, int]] = None) -> Iterator[Dict]:
+    """텍스트에서 duration 로그를 한 번에 스캔해 min_duration_ms 이상인 항목을 yield
+
+    timestamp 가 주어지면(CloudWatch 이벤트 시각 등) 접두어 대신 그 값을 사용합니다.
+    endpos 이후에서 시작하는 레코드는 건너뛰되, 파라미터 조회는 전체 텍스트를 봅니다.
+    """
+    cache = _cache if _cache is not None else {}
+    length = len(text) if endpos is None else endpos
+    # 매치마다 호출되는 부분이라 자주 쓰는 경로는 함수 호출 없이 처리
+    find, rfind, cache_get = text.find, text.rfind, cache.get
+    for m in duration_re(min_duration_ms).finditer(text, 0, length):
+        duration, kind, statement_name, query = m.groups()
+        duration = float(duration)
+        if duration < min_duration_ms:
+            continue
+        parameters = None
+        if query is not None:
+            if '\n\t' in query:
+                query = query.replace('\n\t', '\n')
+            query = query.strip()
+            # 다음 줄에 파라미터 표시가 있을 때만 자세히 확인
+            next_line = m.end() + 1
+            marker = find(PARAMETERS_MARKER, next_line, next_line + PARAMETERS_LOOKAHEAD)
+            if marker != -1 and find('\n', next_line, marker) == -1:
+                parameters = _next_record_parameters(text, m.end())
+        entry_timestamp = timestamp
+        if not entry_timestamp:
+            line_start = rfind('\n', 0, m.start()) + 1
+            base = cache_get(text[line_start:line_start + 19])
+            if base is None or text.startswith('.', line_start + 19):
+                entry_timestamp = _prefix_timestamp(text, m.start(), cache)
+            else:
+                entry_timestamp = base
+        yield {
+            'timestamp': entry_timestamp,
+            'duration': duration,
+            'query': query or NO_STATEMENT,
+            'kind': kind,
+            'statement_name': statement_name,
+            'parameters': parameters
+        }
+
+
+def to_slow_query(entry: Dict) -> Dict:
+    """파서 결과에 초 단위 duration 과 표시용 시각을 붙임"""
+    timestamp = entry['timestamp']
+    entry['duration_seconds'] = entry['duration'] / 1000.0
+    entry['datetime'] = datetime.fromtimestamp(timestamp / 1000).strftime('%Y-%m-%d %H:%M:%S') if timestamp else ''
+    return entry
+
+
+def parse_log_events(log_events: Iterable[Dict], min_duration_ms: float = 1000.0) -> List[Dict]:
+    """CloudWatch 로그 이벤트 목록에서 슬로우 쿼리 추출 (duration 내림차순)"""
+    cache: Dict[str, int] = {}
+    slow_queries = []
+    for event in log_events:
+        message = event.get('message', '')
+        if 'duration: ' not in message:
+            continue
+        for entry in iter_slow_queries(message, min_duration_ms, event.get('timestamp', 0) or 0, _cache=cache):
+            slow_queries.append(to_slow_query(entry))
+    slow_queries.sort(key=lambda x: x['duration'], reverse=True)
+    return slow_queries
+
+
+def parse_log_text(text: str, min_duration_ms: float = 1000.0) -> List[Dict]:
+    """로그 파일 텍스트에서 슬로우 쿼리 추출 (duration 내림차순)"""
+    slow_queries = [to_slow_query(entry) for entry in iter_slow_queries(text, min_duration_ms)]
+    slow_queries.sort(key=lambda x: x['duration'], reverse=True)
+    return slow_queries
+
+
+class SlowQueryLogParser:
+    """청크 단위로 들어오는 로그 텍스트를 레코드 경계에서 잘라 파싱하는 증분 파서
+
+    마지막 두 레코드는 다음 청크와 이어질 수 있으므로(여러 줄 statement, 파라미터 줄) 버퍼에 남깁니다.
+    남은 버퍼(pending)를 읽은 위치와 함께 저장해 두면 재시작 후 pending 으로 이어서 파싱할 수 있습니다.
+    """
+
+    def __init__(self, min_duration_ms: float = 1000.0, pending: str = ''):
+        self.min_duration_ms = min_duration_ms
+        self._buffer = pending
+        self._cache: Dict[str, int] = {}
+
+    @property
+    def pending(self) -> str:
+        """아직 파싱하지 않고 남겨 둔 텍스트"""
+        return self._buffer
+
+    def _last_record_start(self, text: str, end: int) -> int:
+        """end 이전의 마지막 레코드 시작 위치 (없으면 -1)"""
+        pos = text.rfind('\n', 0, end)
+        while pos != -1:
+            if pos + 1 < len(text) and text[pos + 1] != '\t':
+                return pos + 1
+            pos = text.rfind('\n', 0, pos)
+        return -1
+
+    def feed(self, chunk: str) -> List[Dict]:
+        """청크를 추가하고 완결된 레코드에서 찾은 슬로우 쿼리 반환"""
+        text = self._buffer + chunk
+        last = self._last_record_start(text, len(text) - 1)
+        cut = self._last_record_start(text, last - 1) if last > 0 else -1
+        if cut <= 0:
+            self._buffer = text
+            return []
+        entries = list(iter_slow_queries(text, self.min_duration_ms, endpos=cut, _cache=self._cache))
+        self._buffer = text[cut:]
+        return entries
+
+    def close(self) -> List[Dict]:
+        """남은 버퍼를 모두 파싱"""
+        text, self._buffer = self._buffer, ''
+        return list(iter_slow_queries(text, self.min_duration_ms, _cache=self._cache))
+
+
+# analyze_slow_queries 의 duration 분포 구간 (ms)
+DURATION_BUCKETS = [
+    ('1-5s', 1000, 5000),
+    ('5-10s', 5000, 10000),
+    ('10-30s', 10000, 30000),
+    ('30s-1m', 30000, 60000),
+    ('1-5m', 60000, 300000),
+    ('5m+', 300000, float('inf')),
+]
+
+
+class SlowQueryStats:
+    """슬로우 쿼리 통계를 고정 크기 메모리로 누적 (개수/합계/최소/최대, 구간 분포, 상위 K개)
+
+    로그 크기와 관계없이 상위 top_k 개 항목만 힙으로 유지하고,
+    쿼리문이 있는 항목은 핑거프린트별로도 집계합니다 (추적 한도를 넘는 핑거프린트는 "other" 로 합침).
+    분위수는 전체/핑거프린트/시간 버킷별 DDSketch 로 계산하므로 다른 작업자의 결과와 병합할 수 있습니다.
+    """
+
+    def __init__(self, top_k: int = 10, top_fingerprints: int = 20, bucket_ms: int = 3600 * 1000):
+        self.top_k = top_k
+        self.top_fingerprints = top_fingerprints
+        self.fingerprints = QueryAggregator()
+        self.sketch = DDSketch()
+        self.timeline = SketchTimeline(bucket_ms)
+        self.count = 0
+        self.total_duration = 0.0
+        self.min_duration: Optional[float] = None
+        self.max_duration: Optional[float] = None
+        self.distribution = {label: 0 for label, _, _ in DURATION_BUCKETS}
+        self._top: List = []
+        self._seq = 0
+
+    def add(self, entry: Dict):
+        duration = entry['duration']
+        self.count += 1
+        self.total_duration += duration
+        if self.min_duration is None or duration < self.min_duration:
+            self.min_duration = duration
+        if self.max_duration is None or duration > self.max_duration:
+            self.max_duration = duration
+        for label, low, high in DURATION_BUCKETS:
+            if low <= duration < high:
+                self.distribution[label] += 1
+                break
+        self.sketch.add(duration)
+        timestamp = entry.get('timestamp', 0)
+        key = None
+        if entry['query'] != NO_STATEMENT:
+            key = self.fingerprints.add(entry['query'], duration, timestamp)
+        self.timeline.add(timestamp, duration, key, self.fingerprints.query(key) if key else None)
+        self._push_top(entry)
+
+    def _push_top(self, entry: Dict):
+        # 같은 duration 이면 먼저 들어온 항목 우선 (seq 음수)
+        self._seq += 1
+        item = (entry['duration'], -self._seq, entry)
+        if len(self._top) < self.top_k:
+            heapq.heappush(self._top, item)
+        elif item[:2] > self._top[0][:2]:
+            heapq.heapreplace(self._top, item)
+
+    def extend(self, entries: Iterable[Dict]):
+        for entry in entries:
+            self.add(entry)
+
+    def merge(self, other: 'SlowQueryStats'):
+        """다른 스트림/작업자에서 누적한 통계를 합침"""
+        self.count += other.count
+        self.total_duration += other.total_duration
+        if other.min_duration is not None and (self.min_duration is None or other.min_duration < self.min_duration):
+            self.min_duration = other.min_duration
+        if other.max_duration is not None and (self.max_duration is None or other.max_duration > self.max_duration):
+            self.max_duration = other.max_duration
+        for label, value in other.distribution.items():
+            self.distribution[label] += value
+        self.fingerprints.merge(other.fingerprints)
+        self.sketch.merge(other.sketch)
+        self.timeline.merge(other.timeline, rename=self.fingerprints.tracked_key)
+        for entry in other.top_queries():
+            self._push_top(entry)
+
+    def top_queries(self) -> List[Dict]:
+        """duration 내림차순 상위 항목"""
+        return [entry for _, _, entry in sorted(self._top, key=lambda x: x[:2], reverse=True)]
+
+    def to_dict(self) -> Dict:
+        """analyze_slow_queries 와 같은 형태의 분석 결과"""
+        if not self.count:
+            return {
+                'total_count': 0,
+                'avg_duration': 0,
+                'max_duration': 0,
+                'min_duration': 0,
+                'total_duration': 0,
+                'duration_distribution': {},
+                'percentiles': {},
+                'top_queries': [],
+                'by_fingerprint': []
+            }
+        p50, p95, p99 = self.sketch.quantiles((0.5, 0.95, 0.99))
+        return {
+            'total_count': self.count,
+            'avg_duration': self.total_duration / self.count,
+            'max_duration': self.max_duration,
+            'min_duration': self.min_duration,
+            'total_duration': self.total_duration,
+            'duration_distribution': dict(self.distribution),
+            'percentiles': {'p50': p50, 'p95': p95, 'p99': p99},
+            'top_queries': self.top_queries(),
+            'by_fingerprint': self.fingerprints.results(limit=self.top_fingerprints)
+        }
@@ -0,0 +1,221 @@
+"""
+SQL 정규화/핑거프린트와 핑거프린트별 집계
+리터럴만 다른 같은 형태의 쿼리를 하나로 묶어 호출 수, 총/평균/백분위 시간, 처음/마지막 실행 시각을 계산합니다.
+"""
+import hashlib
+import os
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from backend.monitoring.sketch import DDSketch
+
+# 집계기 하나가 따로 추적하는 최대 핑거프린트 수 (넘치면 OTHER_FINGERPRINT 로 합침)
+MAX_FINGERPRINTS = int(os.getenv("SLOW_QUERY_MAX_FINGERPRINTS", "1000"))
+OTHER_FINGERPRINT = 'other'
+OTHER_QUERY = '(기타 쿼리)'
+
+# 문자열/달러 인용 리터럴, 인용 식별자, 숫자, 바인드 파라미터, 공백/주석을 한 번의 스캔으로 처리
+_TOKEN_RE = re.compile(
+    r"(?P<string>[Ee]'(?:[^'\\]|''|\\[\s\S])*'|[BbXxNnUu]?&?'(?:[^']|'')*')"
+    r"|(?P<dollar>\$(?P<tag>[A-Za-z_]\w*)?\$.*?\$(?P=tag)?\$)"
+    r"|(?P<quoted>\"(?:[^\"]|\"\")*\")"
+    r"|(?P<number>(?<![\w$.])\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|(?<![\w$.])\.\d+(?:[eE][+-]?\d+)?)"
+    r"|(?P<param>\$\d+|%s|\?)"
+    r"|(?P<space>(?:\s|--[^\n]*|/\*.*?\*/)+)",
+    re.DOTALL
+)
+
+# 리터럴을 치환한 뒤 남는 인용 식별자 (대소문자를 그대로 둠)
+_QUOTED_RE = re.compile(r'("(?:[^"]|"")*")')
+
+# 연산자/구두점 주변 공백 제거 (쓰는 사람마다 다른 띄어쓰기를 통일)
+_PUNCT_SPACE_RE = re.compile(r" ?([=<>!+\-/%,|&^~:]) ?| ?([(\[]) ?| ([)\]])")
+_COMMA_RE = re.compile(r",")
+
+# 값 목록 축약: IN (?, ?, ...), VALUES (?, ?), (?, ?), ARRAY[?, ?]
+_IN_LIST_RE = re.compile(r"\bin\((?:\?, )*\?\)")
+_VALUES_RE = re.compile(r"\bvalues\((?:\?, )*\?\)(?:, \((?:\?, )*\?\))*")
+_ARRAY_RE = re.compile(r"\barray\[(?:\?, )*\?\]")
+
+
+def _replace_token(m) -> str:
+    kind = m.lastgroup
+    if kind == 'space':
+        return ' '
+    if kind == 'quoted':
+        return m.group(0)
+    return '?'
+
+
+@lru_cache(maxsize=4096)
+def normalize_sql(sql: str) -> str:
+    """리터럴/파라미터를 ? 로 바꾸고 값 목록, 공백, 대소문자를 정규화 (인용 식별자는 대소문자 유지)"""
+    text = _TOKEN_RE.sub(_replace_token, sql).strip().rstrip(';').strip()
+    text = ''.join(part if i % 2 else part.lower() for i, part in enumerate(_QUOTED_RE.split(text)))
+    text = _PUNCT_SPACE_RE.sub(lambda m: m.group(1) or m.group(2) or m.group(3), text)
+    text = _COMMA_RE.sub(', ', text)
+    text = _IN_LIST_RE.sub('in (...)', text)
+    text = _VALUES_RE.sub('values (...)', text)
+    text = _ARRAY_RE.sub('array[...]', text)
+    return text
+
+
+def fingerprint(sql: str) -> str:
+    """정규화한 SQL 의 안정적인 16자리 해시"""
+    return hashlib.blake2b(normalize_sql(sql).encode('utf-8'), digest_size=8).hexdigest()
+
+
+class _FingerprintStats:
+    __slots__ = ('query', 'example', 'count', 'total', 'min', 'max', 'first_seen', 'last_seen', 'sketch')
+
+    def __init__(self, query: str, example: str):
+        self.query = query
+        self.example = example
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.first_seen: Optional[int] = None
+        self.last_seen: Optional[int] = None
+        self.sketch = DDSketch()
+
+    def merge(self, other: '_FingerprintStats'):
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        if other.first_seen is not None and (self.first_seen is None or other.first_seen < self.first_seen):
+            self.first_seen = other.first_seen
+        if other.last_seen is not None and (self.last_seen is None or other.last_seen > self.last_seen):
+            self.last_seen = other.last_seen
+        self.sketch.merge(other.sketch)
+
+
+class QueryAggregator:
+    """핑거프린트별 쿼리 실행 통계 집계기 (백분위는 DDSketch 로 고정 크기 메모리에서 계산)
+
+    max_fingerprints 개를 넘는 새 핑거프린트는 "other" 항목 하나로 합쳐 메모리 상한을 지킵니다.
+    """
+
+    def __init__(self, max_fingerprints: Optional[int] = MAX_FINGERPRINTS):
+        self.max_fingerprints = max_fingerprints
+        self._stats: Dict[str, _FingerprintStats] = {}
+
+    def _slot(self, key: str, query: str, example: str) -> Tuple[str, _FingerprintStats]:
+        """key 의 집계 항목 (추적 한도를 넘는 새 핑거프린트는 other 항목)"""
+        stats = self._stats.get(key)
+        if stats is not None:
+            return key, stats
+        tracked = len(self._stats) - (OTHER_FINGERPRINT in self._stats)
+        if self.max_fingerprints is not None and tracked >= self.max_fingerprints:
+            key = OTHER_FINGERPRINT
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _FingerprintStats(OTHER_QUERY, OTHER_QUERY)
+            return key, stats
+        stats = self._stats[key] = _FingerprintStats(query, example)
+        return key, stats
+
+    def __len__(self):
+        return len(self._stats)
+
+    def add(self, query: str, duration: float, timestamp: int = 0) -> str:
+        """쿼리 한 건의 실행 시간(ms)과 시각(ms)을 누적하고 핑거프린트 반환"""
+        key = fingerprint(query)
+        stats = self._stats.get(key)
+        if stats is None:
+            key, stats = self._slot(key, normalize_sql(query), query)
+        stats.count += 1
+        stats.total += duration
+        if stats.min is None or duration < stats.min:
+            stats.min = duration
+        if stats.max is None or duration > stats.max:
+            stats.max = duration
+        if timestamp:
+            if stats.first_seen is None or timestamp < stats.first_seen:
+                stats.first_seen = timestamp
+            if stats.last_seen is None or timestamp > stats.last_seen:
+                stats.last_seen = timestamp
+        stats.sketch.add(duration)
+        return key
+
+    def extend(self, entries: Iterable[Dict]):
+        """{'query', 'duration', 'timestamp'} 항목들을 누적"""
+        for entry in entries:
+            self.add(entry['query'], entry['duration'], entry.get('timestamp', 0))
+
+    def merge(self, other: 'QueryAggregator'):
+        """다른 집계기(다른 스트림/작업자)의 결과를 합침"""
+        for key, stats in other._stats.items():
+            _, mine = self._slot(key, stats.query, stats.example)
+            mine.merge(stats)
+
+    def tracked_key(self, key: str) -> str:
+        """key 가 따로 추적되지 않으면(한도 초과로 합쳐졌으면) OTHER_FINGERPRINT"""
+        return key if key in self._stats else OTHER_FINGERPRINT
+
+    def query(self, key: str) -> Optional[str]:
+        """핑거프린트의 정규화된 쿼리"""
+        stats = self._stats.get(key)
+        return stats.query if stats else None
+
+    def results(self, order_by: str = 'total_duration', limit: Optional[int] = None) -> List[Dict]:
+        """핑거프린트별 통계 목록 (order_by 기준 내림차순)"""
+        results = []
+        for key, stats in self._stats.items():
+            p50, p95, p99 = stats.sketch.quantiles((0.5, 0.95, 0.99))
+            results.append({
+                'fingerprint': key,
+                'query': stats.query,
+                'example': stats.example,
+                'count': stats.count,
+                'total_duration': stats.total,
+                'mean_duration': stats.total / stats.count,
+                'min_duration': stats.min,
+                'max_duration': stats.max,
+                'p50': p50,
+                'p95': p95,
+                'p99': p99,
+                'first_seen': stats.first_seen,
+                'last_seen': stats.last_seen
+            })
+        results.sort(key=lambda x: x[order_by], reverse=True)
+        return results[:limit] if limit is not None else results
+
+
+def merge_statement_rows(rows: Iterable[Dict], limit: Optional[int] = None) -> List[Dict]:
+    """pg_stat_statements 행을 핑거프린트로 병합 (IN 목록 길이 등만 다른 항목을 합침)
+
+    각 행은 query, calls, total_time, rows, max_time, min_time 키를 가집니다.
+    """
+    merged: Dict[str, Dict] = {}
+    for row in rows:
+        key = fingerprint(row['query'])
+        item = merged.get(key)
+        if item is None:
+            merged[key] = {
+                'fingerprint': key,
+                'query': normalize_sql(row['query']),
+                'calls': row['calls'] or 0,
+                'total_time': float(row['total_time'] or 0),
+                'rows': row.get('rows') or 0,
+                'max_time': float(row.get('max_time') or 0),
+                'min_time': float(row.get('min_time') or 0),
+                'variants': 1
+            }
+            continue
+        item['calls'] += row['calls'] or 0
+        item['total_time'] += float(row['total_time'] or 0)
+        item['rows'] += row.get('rows') or 0
+        item['max_time'] = max(item['max_time'], float(row.get('max_time') or 0))
+        item['min_time'] = min(item['min_time'], float(row.get('min_time') or 0))
+        item['variants'] += 1
+
+    results = list(merged.values())
+    for item in results:
+        item['mean_time'] = item['total_time'] / item['calls'] if item['calls'] else 0.0
+    results.sort(key=lambda x: x['total_time'], reverse=True)
+    return results[:limit] if limit is not None else results
@@ -0,0 +1,252 @@
+"""
+pg_stat_statements 스냅샷과 구간 비교
+누적값만 있는 pg_stat_statements 를 주기적으로 (queryid, dbid, userid) 키로 저장해 두고,
+두 스냅샷의 차이로 특정 구간에 실제로 많이 실행된/느렸던 쿼리를 찾습니다.
+"""
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import psycopg2
+
+from backend.database import get_known_statement_queryids, save_statement_snapshot
+from backend.models.database import DatabaseConnection
+from backend.monitoring.pg_capabilities import PgCapabilities, capability_cache, statement_columns
+
+# 스냅샷에 저장하는 누적 카운터 (순서가 저장 형식의 컬럼 순서)
+STATEMENT_COUNTERS = (
+    'calls', 'total_time', 'rows',
+    'shared_blks_hit', 'shared_blks_read', 'shared_blks_dirtied', 'shared_blks_written',
+    'temp_blks_read', 'temp_blks_written',
+)
+# diff 정렬 기준 (blks = 공유 버퍼 논리 읽기 = hit + read)
+DIFF_ORDER_KEYS = STATEMENT_COUNTERS + ('blks', 'mean_time')
+# 스냅샷 보관 기간
+SNAPSHOT_RETENTION_MS = 14 * 24 * 3600 * 1000
+
+_CALLS = STATEMENT_COUNTERS.index('calls')
+
+StatementKey = Tuple[int, int, int]
+
+
+class StatementSnapshot:
+    """한 시점의 pg_stat_statements 누적 카운터"""
+
+    def __init__(self, captured_at: int, entries: Dict[StatementKey, Tuple[float, ...]],
+                 stats_reset: Optional[str] = None, dealloc: Optional[int] = None,
+                 queries: Optional[Dict[int, str]] = None, snapshot_id: Optional[int] = None):
+        self.id = snapshot_id
+        self.captured_at = captured_at
+        self.entries = entries
+        self.stats_reset = stats_reset
+        self.dealloc = dealloc
+        # 새로 발견한 queryid 의 쿼리 텍스트만 담김 (텍스트는 queryid 당 한 번만 저장)
+        self.queries = queries or {}
+
+    def to_dict(self) -> Dict:
+        """저장용 형태 (entries 는 컬럼 목록 + 행 배열)"""
+        return {
+            'columns': ['queryid', 'dbid', 'userid'] + list(STATEMENT_COUNTERS),
+            'rows': [list(key) + list(counters) for key, counters in self.entries.items()]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, captured_at: int, stats_reset: Optional[str] = None,
+                  dealloc: Optional[int] = None, snapshot_id: Optional[int] = None) -> 'StatementSnapshot':
+        columns = data.get('columns', [])
+        positions = [columns.index(name) if name in columns else None for name in STATEMENT_COUNTERS]
+        entries = {}
+        for row in data.get('rows', []):
+            counters = tuple(row[p] if p is not None and row[p] is not None else 0 for p in positions)
+            entries[(row[0], row[1], row[2])] = counters
+        return cls(captured_at, entries, stats_reset, dealloc, snapshot_id=snapshot_id)
+
+
+def capture_statement_snapshot(conn, known_queryids: Optional[Set[int]] = None,
+                               caps: Optional[PgCapabilities] = None) -> StatementSnapshot:
+    """pg_stat_statements 현재 누적값 조회
+
+    쿼리 텍스트는 읽지 않고(showtext = false) known_queryids 에 없는 queryid 의 텍스트만 따로 가져옵니다.
+    """
+    known_queryids = known_queryids if known_queryids is not None else set()
+    caps = caps or capability_cache.get(conn)
+    if not caps.has_pg_stat_statements:
+        raise RuntimeError("pg_stat_statements extension is not installed")
+    columns = statement_columns(caps)
+    cur = conn.cursor()
+    try:
+        cur.execute(f"""
+            SELECT queryid, dbid, userid, {', '.join(columns[name] for name in STATEMENT_COUNTERS)}
+              FROM pg_stat_statements(false)
+             WHERE queryid IS NOT NULL
+        """)
+        entries = {}
+        for row in cur.fetchall():
+            entries[(row[0], row[1], row[2])] = tuple(float(v or 0) for v in row[3:])
+        captured_at = int(time.time() * 1000)
+
+        new_ids = sorted({key[0] for key in entries} - known_queryids)
+        queries = {}
+        if new_ids:
+            cur.execute("SELECT DISTINCT ON (queryid) queryid, query FROM pg_stat_statements WHERE queryid = ANY(%s)",
+                        (new_ids,))
+            queries = dict(cur.fetchall())
+
+        # pg_stat_statements 1.9 (PostgreSQL 14) 이상: 전체 리셋 시각과 max 초과로 밀려난 항목 수
+        stats_reset, dealloc = None, None
+        if caps.has_info_view:
+            cur.execute("SELECT dealloc, stats_reset FROM pg_stat_statements_info")
+            row = cur.fetchone()
+            if row:
+                dealloc, stats_reset = row[0], row[1].isoformat() if row[1] else None
+        return StatementSnapshot(captured_at, entries, stats_reset, dealloc, queries)
+    finally:
+        cur.close()
+
+
+def _counter_dict(values: Iterable[float]) -> Dict[str, float]:
+    item = dict(zip(STATEMENT_COUNTERS, values))
+    item['blks'] = item['shared_blks_hit'] + item['shared_blks_read']
+    item['mean_time'] = item['total_time'] / item['calls'] if item['calls'] else 0.0
+    return item
+
+
+def diff_snapshots(start: StatementSnapshot, end: StatementSnapshot, order_by: str = 'total_time',
+                   limit: int = 20) -> Dict:
+    """두 스냅샷 사이 구간의 쿼리별 증가량 top-N
+
+    - 전체 리셋(stats_reset 변경)이면 end 의 값이 곧 구간 값입니다.
+    - 개별 항목의 calls 가 줄었으면(항목 단위 리셋 또는 밀려났다가 다시 생김) end 값을 사용합니다.
+    - start 에 없던 항목은 구간 중 새로 생긴 것으로 보고 end 값을 사용합니다 (status='new').
+    - end 에 없는 항목은 dealloc 으로 밀려난 것이라 구간 값을 알 수 없어 evicted 개수로만 알려 줍니다.
+    """
+    if order_by not in DIFF_ORDER_KEYS:
+        raise ValueError(f"order_by must be one of {', '.join(DIFF_ORDER_KEYS)}")
+    if end.captured_at < start.captured_at:
+        start, end = end, start
+    reset = bool(start.stats_reset and end.stats_reset and start.stats_reset != end.stats_reset)
+    baseline = {} if reset else start.entries
+
+    statements = []
+    totals = [0.0] * len(STATEMENT_COUNTERS)
+    for key, counters in end.entries.items():
+        before = baseline.get(key)
+        if before is None:
+            status, delta = 'new', counters
+        elif counters[_CALLS] < before[_CALLS]:
+            status, delta = 'reset', counters
+        else:
+            status, delta = 'existing', tuple(a - b for a, b in zip(counters, before))
+        if not delta[_CALLS]:
+            continue
+        for i, value in enumerate(delta):
+            totals[i] += value
+        item = _counter_dict(delta)
+        item.update({'queryid': key[0], 'dbid': key[1], 'userid': key[2], 'status': status})
+        statements.append(item)
+
+    statements.sort(key=lambda item: item[order_by], reverse=True)
+    dealloc = None
+    if start.dealloc is not None and end.dealloc is not None:
+        dealloc = end.dealloc if reset or end.dealloc < start.dealloc else end.dealloc - start.dealloc
+    return {
+        'start': {'id': start.id, 'captured_at': start.captured_at, 'stats_reset': start.stats_reset},
+        'end': {'id': end.id, 'captured_at': end.captured_at, 'stats_reset': end.stats_reset},
+        'window_seconds': (end.captured_at - start.captured_at) / 1000.0,
+        'reset': reset,
+        'dealloc': dealloc,
+        'evicted': 0 if reset else len(start.entries.keys() - end.entries.keys()),
+        'totals': _counter_dict(totals),
+        'statement_count': len(statements),
+        'statements': statements[:limit]
+    }
+
+
+class StatementSnapshotter:
+    """등록된 PostgreSQL DB 의 pg_stat_statements 스냅샷을 주기적으로 저장"""
+
+    def __init__(self, interval: int = 900):
+        self.interval = interval
+        self.databases: Dict[str, DatabaseConnection] = {}
+        # DB별로 텍스트를 이미 저장한 queryid (처음 사용할 때 앱 DB 에서 로드)
+        self.known_queryids: Dict[str, Set[int]] = {}
+        self.last_error: Dict[str, str] = {}
+        self.lock = threading.Lock()
+        self.is_running = False
+        self.snapshot_thread = None
+        self._stop_event = threading.Event()
+
+    def add_database(self, db_connection: DatabaseConnection):
+        with self.lock:
+            self.databases[db_connection.name] = db_connection
+
+    def remove_database(self, db_name: str):
+        with self.lock:
+            self.databases.pop(db_name, None)
+            self.known_queryids.pop(db_name, None)
+            self.last_error.pop(db_name, None)
+
+    def capture(self, db_connection: DatabaseConnection) -> Tuple[Optional[StatementSnapshot], Optional[str]]:
+        """스냅샷 하나를 찍어 저장하고 (스냅샷, 에러) 반환"""
+        known = self.known_queryids.get(db_connection.name)
+        if known is None:
+            ids, error = get_known_statement_queryids(db_connection.name)
+            if error:
+                return None, error
+            known = self.known_queryids[db_connection.name] = ids
+        conn = psycopg2.connect(
+            host=db_connection.host,
+            port=db_connection.port,
+            user=db_connection.user,
+            password=db_connection.password,
+            dbname=db_connection.dbname
+        )
+        try:
+            snapshot = capture_statement_snapshot(conn, known)
+        finally:
+            conn.close()
+        snapshot_id, error = save_statement_snapshot(
+            db_connection.name, snapshot, keep_since_ms=snapshot.captured_at - SNAPSHOT_RETENTION_MS
+        )
+        if error:
+            return None, error
+        snapshot.id = snapshot_id
+        known.update(snapshot.queries)
+        return snapshot, None
+
+    def start(self):
+        """백그라운드 스냅샷 수집 시작"""
+        if self.is_running:
+            return
+        self.is_running = True
+        self._stop_event.clear()
+        self.snapshot_thread = threading.Thread(target=self._snapshot_loop, daemon=True)
+        self.snapshot_thread.start()
+
+    def stop(self):
+        """백그라운드 스냅샷 수집 중지"""
+        self.is_running = False
+        self._stop_event.set()
+        if self.snapshot_thread:
+            self.snapshot_thread.join()
+            self.snapshot_thread = None
+
+    def _snapshot_loop(self):
+        while self.is_running:
+            with self.lock:
+                targets: List[DatabaseConnection] = list(self.databases.values())
+            for db_connection in targets:
+                try:
+                    _, error = self.capture(db_connection)
+                except Exception as e:
+                    error = str(e)
+                if error:
+                    print(f"Error capturing pg_stat_statements snapshot for {db_connection.name}: {error}")
+                    self.last_error[db_connection.name] = error
+                else:
+                    self.last_error.pop(db_connection.name, None)
+            self._stop_event.wait(self.interval)
+
+
+# 전역 스냅샷 수집기 인스턴스
+statement_snapshotter = StatementSnapshotter()
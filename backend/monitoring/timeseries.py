@@ -0,0 +1,168 @@
+"""
+메트릭 시계열 저장소
+수집된 메트릭을 필드별 컬럼(array)으로 보관하고, 차트용 데이터를 바로 생성합니다.
+"""
+import bisect
+import math
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+NAN = float("nan")
+
+# DatabaseMetrics 중 시계열로 보관하는 숫자형 필드
+METRIC_FIELDS = (
+    "cpu_usage",
+    "memory_usage",
+    "active_connections",
+    "total_connections",
+    "slow_queries_count",
+    "queries_per_second",
+    "disk_usage",
+    "uptime",
+)
+
+# 모니터링 화면 기본 차트 필드
+CHART_FIELDS = (
+    "active_connections",
+    "total_connections",
+    "queries_per_second",
+    "slow_queries_count",
+    "disk_usage",
+)
+
+
+def lttb_indices(xs: Sequence[float], ys: Sequence[float], threshold: int) -> List[int]:
+    """Largest-Triangle-Three-Buckets 다운샘플링 (선택된 포인트의 인덱스 반환)"""
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    selected = [0]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # 다음 버킷의 평균점
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        span = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / span
+        avg_y = sum(ys[next_start:next_end]) / span
+
+        # 현재 버킷에서 삼각형 넓이가 가장 큰 포인트 선택
+        start = int(i * bucket_size) + 1
+        end = next_start
+        ax, ay = xs[a], ys[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+
+    selected.append(n - 1)
+    return selected
+
+
+class MetricsTimeSeries:
+    """단일 데이터베이스의 컬럼형 메트릭 시계열 (타임스탬프는 epoch 초)"""
+
+    def __init__(self, max_points: int = 1000):
+        self.max_points = max_points
+        self.timestamps = array("d")
+        self.columns: Dict[str, array] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def _column(self, field: str) -> array:
+        column = self.columns.get(field)
+        if column is None:
+            column = array("d", [NAN]) * len(self.timestamps)
+            self.columns[field] = column
+        return column
+
+    def upsert(self, timestamp: float, values: Dict[str, Optional[float]]):
+        """포인트 추가 (같은 타임스탬프가 있으면 값만 병합, 과거 시점이면 정렬 위치에 삽입)"""
+        with self._lock:
+            ts = self.timestamps
+            if not ts or timestamp > ts[-1]:
+                pos = len(ts)
+                ts.append(timestamp)
+                for column in self.columns.values():
+                    column.append(NAN)
+            else:
+                pos = bisect.bisect_left(ts, timestamp)
+                if pos == len(ts) or ts[pos] != timestamp:
+                    ts.insert(pos, timestamp)
+                    for column in self.columns.values():
+                        column.insert(pos, NAN)
+
+            for field, value in values.items():
+                if value is not None:
+                    self._column(field)[pos] = float(value)
+
+            # 히스토리 크기 제한
+            excess = len(ts) - self.max_points
+            if excess > 0:
+                del ts[:excess]
+                for column in self.columns.values():
+                    del column[:excess]
+
+    def append_metrics(self, metrics):
+        """DatabaseMetrics 한 건을 컬럼에 추가"""
+        self.upsert(
+            metrics.timestamp.timestamp(),
+            {field: getattr(metrics, field, None) for field in METRIC_FIELDS}
+        )
+
+    def _bounds(self, since: float, until: Optional[float]) -> Tuple[int, int]:
+        lo = bisect.bisect_left(self.timestamps, since)
+        hi = len(self.timestamps) if until is None else bisect.bisect_right(self.timestamps, until)
+        return lo, hi
+
+    def count(self, since: float, until: Optional[float] = None) -> int:
+        with self._lock:
+            lo, hi = self._bounds(since, until)
+            return hi - lo
+
+    def series(self, fields: Iterable[str], since: float, until: Optional[float] = None,
+               width: Optional[int] = None) -> Dict[str, Dict[str, List[float]]]:
+        """필드별 (t, v) 시계열 반환. 값이 없는 포인트는 제외하고 width 가 주어지면 LTTB 로 다운샘플링"""
+        with self._lock:
+            lo, hi = self._bounds(since, until)
+            xs_all = self.timestamps[lo:hi]
+            raw = {field: self.columns[field][lo:hi] for field in fields if field in self.columns}
+
+        result = {}
+        for field, ys_all in raw.items():
+            xs = [x for x, y in zip(xs_all, ys_all) if not math.isnan(y)]
+            ys = [y for y in ys_all if not math.isnan(y)]
+            if width and len(xs) > width:
+                idx = lttb_indices(xs, ys, width)
+                xs = [xs[i] for i in idx]
+                ys = [ys[i] for i in idx]
+            result[field] = {"t": [int(x) for x in xs], "v": ys}
+        return result
+
+    def aligned(self, fields: Sequence[str], since: float, until: Optional[float] = None,
+                width: Optional[int] = None) -> Tuple[List[float], Dict[str, List[float]]]:
+        """모든 필드가 같은 타임스탬프를 공유하는 시계열 반환 (LTTB 는 첫 번째 필드 기준, 결측치는 0)"""
+        with self._lock:
+            lo, hi = self._bounds(since, until)
+            xs = self.timestamps[lo:hi]
+            raw = {
+                field: self.columns[field][lo:hi] if field in self.columns else array("d", [NAN]) * (hi - lo)
+                for field in fields
+            }
+
+        if width and len(xs) > width and fields:
+            pivot = [0.0 if math.isnan(y) else y for y in raw[fields[0]]]
+            idx = lttb_indices(xs, pivot, width)
+            xs = [xs[i] for i in idx]
+            raw = {field: [column[i] for i in idx] for field, column in raw.items()}
+
+        values = {field: [0 if math.isnan(y) else y for y in column] for field, column in raw.items()}
+        return list(xs), values
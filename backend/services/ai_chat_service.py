@@ -3,13 +3,30 @@ AI 채팅 서비스
 MCP와 등록된 데이터베이스 정보를 통합하여 AI 채팅에 활용합니다.
 """
 import json
+import threading
+import time
 from typing import Dict, List, Optional, Any
-from backend.database import get_registered_databases, get_selected_ai_model
+from backend.database import add_config_change_listener, get_registered_databases, get_selected_ai_model
 from backend.services.mcp_manager import mcp_manager
 
+# 프롬프트 컨텍스트 캐시 유지 시간 (초, 앱 밖에서 DB 를 직접 고친 경우 대비)
+PROMPT_CONTEXT_TTL = 300
+
 class AIChatService:
     def __init__(self):
         self.mcp_manager = mcp_manager
+        # format_context_for_prompt 결과 캐시 (설정 변경 시 무효화)
+        self._prompt_context: Optional[str] = None
+        self._prompt_context_expires = 0.0
+        self._context_generation = 0
+        self._context_lock = threading.Lock()
+        add_config_change_listener(self.invalidate_context)
+    
+    def invalidate_context(self, kind: Optional[str] = None):
+        """캐시된 프롬프트 컨텍스트 폐기 (등록 DB, AI 모델, MCP 설정 변경 시 호출)"""
+        with self._context_lock:
+            self._prompt_context = None
+            self._context_generation += 1
     
     def get_database_context(self) -> Dict[str, Any]:
         """등록된 데이터베이스 정보와 MCP 상태를 반환"""
@@ -60,7 +77,7 @@ class AIChatService:
     
     def get_mcp_tools_context(self) -> Dict[str, Any]:
         """MCP 도구들의 상태와 기능을 반환"""
-        config = self.mcp_manager.load_mcp_config()
+        config = self.mcp_manager.get_cached_mcp_config()
         
         tools_context = {
             "available_tools": [],
@@ -106,7 +123,22 @@ class AIChatService:
         }
     
     def format_context_for_prompt(self) -> str:
-        """AI 프롬프트에 포함할 수 있는 형태로 컨텍스트를 포맷팅"""
+        """AI 프롬프트에 포함할 수 있는 형태로 컨텍스트를 포맷팅 (캐시된 문자열 반환)"""
+        cached = self._prompt_context
+        if cached is not None and time.time() < self._prompt_context_expires:
+            return cached
+        
+        generation = self._context_generation
+        text = self.build_context_for_prompt()
+        with self._context_lock:
+            # 만드는 동안 무효화되었으면 저장하지 않음
+            if generation == self._context_generation:
+                self._prompt_context = text
+                self._prompt_context_expires = time.time() + PROMPT_CONTEXT_TTL
+        return text
+    
+    def build_context_for_prompt(self) -> str:
+        """프롬프트 컨텍스트 문자열 생성 (DB/설정 조회)"""
         context = self.get_full_context_for_ai()
         
         prompt_parts = []
@@ -148,6 +180,10 @@ class AIChatService:
                 "context": None
             }
     
+    def call_database_tool(self, db_name: str, tool: str, arguments: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """데이터베이스 MCP 서버 도구 호출 (상주 프로세스 재사용)"""
+        return self.mcp_manager.call_database_tool(db_name, tool, arguments)
+    
     def get_database_recommendations(self) -> List[str]:
         """데이터베이스 사용에 대한 추천사항 반환"""
         context = self.get_database_context()
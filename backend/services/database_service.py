@@ -5,6 +5,7 @@ import psycopg2
 import mysql.connector
 from typing import Dict, List, Tuple, Optional, Any
 from backend.database import get_registered_databases, execute_sql
+from backend.monitoring.pg_capabilities import build_statements_query, capability_cache
 
 
 class DatabaseService:
@@ -76,25 +77,22 @@ class DatabaseService:
         if not db_info:
             return [], [], f"데이터베이스 '{db_name}'을 찾을 수 없습니다."
         
-        if db_info.get("type", "postgresql") == "postgresql":
-            query = """
-                SELECT query, calls, total_time, mean_time, rows, max_time, min_time
-                FROM pg_stat_statements
-                WHERE query NOT LIKE 'EXPLAIN%'
-                ORDER BY total_time DESC
-                LIMIT %s
-            """
-        else:  # MySQL
-            query = """
-                SELECT SQL_TEXT, COUNT_STAR, SUM_TIMER_WAIT/1000000000000 as total_time_s, 
-                       SUM_ERRORS, SUM_ROWS_AFFECTED
-                FROM performance_schema.events_statements_summary_by_digest
-                ORDER BY total_time_s DESC
-                LIMIT %s
-            """
-        
         try:
-            headers, data = execute_sql(query, db_info)
+            if db_info.get("type", "postgresql") == "postgresql":
+                caps = capability_cache.get_for(db_info)
+                if not caps.has_pg_stat_statements:
+                    return [], [], "pg_stat_statements 확장이 설치되어 있지 않습니다."
+                query = build_statements_query(caps)
+            else:  # MySQL
+                query = """
+                    SELECT SQL_TEXT, COUNT_STAR, SUM_TIMER_WAIT/1000000000000 as total_time_s, 
+                           SUM_ERRORS, SUM_ROWS_AFFECTED
+                    FROM performance_schema.events_statements_summary_by_digest
+                    ORDER BY total_time_s DESC
+                    LIMIT %s
+                """
+            # execute_sql 은 파라미터를 받지 않으므로 LIMIT 값을 직접 채움
+            headers, data = execute_sql(query % (int(limit),), db_info)
             return headers, data, None
         except Exception as e:
             return [], [], str(e)
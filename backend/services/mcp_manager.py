@@ -2,12 +2,17 @@
 MCP 관리 서비스
 데이터베이스 등록 시 자동으로 MCP 서버 설정을 업데이트합니다.
 """
+import copy
 import json
 import os
+import tempfile
+import threading
 import time
 import subprocess
 from typing import Dict, List, Optional
-from backend.database import get_registered_databases
+from backend.database import get_registered_databases, notify_config_change
+from backend.services.mcp_health import MCPHealthChecker
+from backend.services.mcp_supervisor import MCPSupervisor, postgres_server_command
 
 class MCPManager:
     def __init__(self):
@@ -15,6 +20,14 @@ class MCPManager:
         self.mcp_config_path = self.get_mcp_config_path()
         self.timeout = int(os.getenv("MCP_SERVER_TIMEOUT", "30"))
         self.max_retries = int(os.getenv("MCP_MAX_RETRIES", "3"))
+        # 설정 파일 메모리 캐시 (파일의 (mtime, 크기)가 바뀌면 다시 읽음)
+        self._config_lock = threading.Lock()
+        self._config_cache: Optional[Dict] = None
+        self._config_stamp = None
+        # 데이터베이스별 MCP 서버 프로세스 (AI 채팅에서 직접 호출)
+        self.supervisor = MCPSupervisor(call_timeout=self.timeout)
+        # postgres_* 서버 연결 상태 캐시
+        self.health = MCPHealthChecker()
         self.ensure_mcp_config_exists()
     
     def get_mcp_config_path(self) -> str:
@@ -68,19 +81,84 @@ class MCPManager:
             }
             self.save_mcp_config(default_config)
     
+    def _config_file_stamp(self):
+        try:
+            stat = os.stat(self.mcp_config_path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def get_cached_mcp_config(self) -> Dict:
+        """캐시된 설정 (파일이 바뀌었을 때만 다시 읽음, 호출자는 수정하면 안 됨)"""
+        stamp = self._config_file_stamp()
+        with self._config_lock:
+            if self._config_cache is not None and stamp == self._config_stamp:
+                return self._config_cache
+            reloaded = self._config_cache is not None
+            try:
+                with open(self.mcp_config_path, 'r', encoding='utf-8') as f:
+                    config = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                config = {"mcpServers": {}}
+            config.setdefault("mcpServers", {})
+            self._config_cache, self._config_stamp = config, stamp
+        if reloaded:
+            # 외부에서 파일이 바뀜
+            notify_config_change("mcp")
+        return config
+    
     def load_mcp_config(self) -> Dict:
-        """MCP 설정 파일 로드"""
+        """MCP 설정 파일 로드 (수정해도 캐시에 영향 없는 사본)"""
+        return copy.deepcopy(self.get_cached_mcp_config())
+    
+    def save_mcp_config(self, config: Dict) -> bool:
+        """MCP 설정 파일 저장 (내용이 같으면 쓰지 않음, 임시 파일에 쓴 뒤 교체)
+
+        반환값: 실제로 파일을 썼는지 여부
+        """
+        if self._config_file_stamp() is not None and config == self.get_cached_mcp_config():
+            return False
+        directory = os.path.dirname(self.mcp_config_path) or "."
+        os.makedirs(directory, exist_ok=True)
         try:
-            with open(self.mcp_config_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {"mcpServers": {}}
+            # mkstemp 는 0600 으로 만들므로 기존 파일 권한 (새 파일은 0644) 을 유지
+            mode = os.stat(self.mcp_config_path).st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o644
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".mcp-", suffix=".json.tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(config, f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_path, mode)
+            os.replace(tmp_path, self.mcp_config_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        with self._config_lock:
+            self._config_cache = copy.deepcopy(config)
+            self._config_stamp = self._config_file_stamp()
+        notify_config_change("mcp")
+        return True
     
-    def save_mcp_config(self, config: Dict):
-        """MCP 설정 파일 저장"""
-        os.makedirs(os.path.dirname(self.mcp_config_path), exist_ok=True)
-        with open(self.mcp_config_path, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
+    def postgres_server_config(self, connection_string: str) -> Dict:
+        """mcp.json 의 데이터베이스별 PostgreSQL MCP 서버 항목"""
+        return {
+            "command": "uvx",
+            "args": ["mcp-server-postgres@latest"],
+            "env": {
+                "POSTGRES_CONNECTION_STRING": connection_string
+            },
+            "disabled": False,
+            "autoApprove": [
+                "query",
+                "list_tables",
+                "describe_table",
+                "get_schema"
+            ]
+        }
     
     def generate_connection_string(self, db_info: Dict) -> str:
         """데이터베이스 정보로부터 연결 문자열 생성"""
@@ -100,20 +178,7 @@ class MCPManager:
         server_name = f"postgres_{db_name}"
         connection_string = self.generate_connection_string(db_info)
         
-        config["mcpServers"][server_name] = {
-            "command": "uvx",
-            "args": ["mcp-server-postgres@latest"],
-            "env": {
-                "POSTGRES_CONNECTION_STRING": connection_string
-            },
-            "disabled": False,
-            "autoApprove": [
-                "query",
-                "list_tables",
-                "describe_table",
-                "get_schema"
-            ]
-        }
+        config["mcpServers"][server_name] = self.postgres_server_config(connection_string)
         
         # AWS RDS/Aurora인 경우 CloudWatch 로그 서버도 추가
         cloudwatch_id = db_info.get('cloudwatch_id')
@@ -121,6 +186,7 @@ class MCPManager:
             self.add_cloudwatch_logs_server(db_name, cloudwatch_id, config)
         
         self.save_mcp_config(config)
+        self.register_database_server(db_name, db_info)
         print(f"INFO: Added database '{db_name}' to MCP configuration")
     
     def remove_database_from_mcp(self, db_name: str):
@@ -132,21 +198,21 @@ class MCPManager:
             del config["mcpServers"][server_name]
             self.save_mcp_config(config)
             print(f"INFO: Removed database '{db_name}' from MCP configuration")
+        self.supervisor.remove(server_name)
     
-    def sync_all_databases(self):
-        """등록된 모든 데이터베이스를 MCP와 동기화"""
+    def sync_all_databases(self) -> Dict[str, List[str]]:
+        """등록된 모든 데이터베이스를 MCP와 동기화
+
+        바뀐 postgres_* 항목만 추가/수정/삭제하고, 바뀐 것이 없으면 파일을 쓰지 않습니다.
+        연결 정보가 같은 기존 항목은 사용자가 고친 다른 필드(autoApprove 등)까지 그대로 둡니다.
+        반환값: {"added": [...], "updated": [...], "removed": [...]}
+        """
         databases = get_registered_databases()
         config = self.load_mcp_config()
+        servers = config["mcpServers"]
         
-        # 기존 데이터베이스 MCP 서버들 제거 (postgres_로 시작하는 것들)
-        servers_to_remove = [name for name in config["mcpServers"].keys() 
-                           if name.startswith("postgres_")]
-        for server_name in servers_to_remove:
-            del config["mcpServers"][server_name]
-        
-        # 현재 등록된 데이터베이스들을 MCP에 추가
+        desired = {}
         for db in databases:
-            db_name = db['name']
             db_info = {
                 'host': db['host'],
                 'port': db['port'],
@@ -154,31 +220,57 @@ class MCPManager:
                 'password': db['password'],
                 'dbname': db['dbname']
             }
-            
-            server_name = f"postgres_{db_name}"
-            connection_string = self.generate_connection_string(db_info)
-            
-            config["mcpServers"][server_name] = {
-                "command": "uvx",
-                "args": ["mcp-server-postgres@latest"],
-                "env": {
-                    "POSTGRES_CONNECTION_STRING": connection_string
-                },
-                "disabled": False,
-                "autoApprove": [
-                    "query",
-                    "list_tables",
-                    "describe_table",
-                    "get_schema"
-                ]
-            }
+            desired[f"postgres_{db['name']}"] = self.generate_connection_string(db_info)
+            self.register_database_server(db['name'], db_info)
         
-        self.save_mcp_config(config)
-        print(f"INFO: Synced {len(databases)} databases with MCP configuration")
+        changes = {"added": [], "updated": [], "removed": []}
+        for server_name in [name for name in servers if name.startswith("postgres_")]:
+            if server_name not in desired:
+                del servers[server_name]
+                changes["removed"].append(server_name)
+        
+        for server_name, connection_string in desired.items():
+            current = servers.get(server_name)
+            entry = self.postgres_server_config(connection_string)
+            if current is None:
+                servers[server_name] = entry
+                changes["added"].append(server_name)
+            elif (current.get("command"), current.get("args"), current.get("env")) != \
+                    (entry["command"], entry["args"], entry["env"]):
+                current.update(command=entry["command"], args=entry["args"], env=entry["env"])
+                changes["updated"].append(server_name)
+        
+        # 등록 해제된 데이터베이스의 프로세스 종료
+        for server_name in list(self.supervisor.servers):
+            if server_name.startswith("postgres_") and server_name not in desired:
+                self.supervisor.remove(server_name)
+        
+        if any(changes.values()):
+            self.save_mcp_config(config)
+        print(f"INFO: Synced {len(databases)} databases with MCP configuration "
+              f"(added {len(changes['added'])}, updated {len(changes['updated'])}, removed {len(changes['removed'])})")
+        return changes
+    
+    def register_database_server(self, db_name: str, db_info: Dict):
+        """데이터베이스 MCP 서버를 프로세스 관리자에 등록 (프로세스는 첫 호출 때 시작)
+
+        mcp.json 은 외부 MCP 클라이언트용으로 uvx 패키지를 가리키고,
+        앱 내부에서는 저장소의 scripts/postgres_mcp_server.py 를 현재 인터프리터로 실행합니다.
+        """
+        self.supervisor.ensure(
+            f"postgres_{db_name}",
+            postgres_server_command(),
+            {"POSTGRES_CONNECTION_STRING": self.generate_connection_string(db_info)}
+        )
+    
+    def call_database_tool(self, db_name: str, tool: str, arguments: Optional[Dict] = None,
+                           timeout: Optional[float] = None) -> Dict:
+        """데이터베이스 MCP 서버의 도구 호출 (list_tables, describe_table, query)"""
+        return self.supervisor.call_tool(f"postgres_{db_name}", tool, arguments, timeout=timeout)
     
     def get_mcp_databases(self) -> List[str]:
         """MCP에 등록된 데이터베이스 목록 반환"""
-        config = self.load_mcp_config()
+        config = self.get_cached_mcp_config()
         return [name.replace("postgres_", "") for name in config["mcpServers"].keys() 
                 if name.startswith("postgres_")]
     
@@ -222,24 +314,26 @@ class MCPManager:
         self.add_database_to_mcp(db_name, db_info)
         return True
     
-    def get_mcp_server_status(self) -> Dict[str, Dict]:
-        """모든 MCP 서버의 상태 확인"""
-        config = self.load_mcp_config()
-        status = {}
-        
-        for server_name, server_config in config["mcpServers"].items():
-            if server_name.startswith("postgres_"):
-                connection_string = server_config["env"].get("POSTGRES_CONNECTION_STRING", "")
-                if connection_string:
-                    is_connected = self.test_mcp_server_connection(server_name, connection_string)
-                    status[server_name] = {
-                        "connected": is_connected,
-                        "connection_string": connection_string,
-                        "disabled": server_config.get("disabled", False),
-                        "timeout": self.timeout,
-                        "max_retries": self.max_retries
-                    }
-        
+    def get_postgres_server_targets(self) -> Dict[str, str]:
+        """MCP 설정의 postgres_* 서버별 연결 문자열"""
+        config = self.get_cached_mcp_config()
+        return {
+            server_name: server_config.get("env", {}).get("POSTGRES_CONNECTION_STRING", "")
+            for server_name, server_config in config["mcpServers"].items()
+            if server_name.startswith("postgres_")
+            and not server_config.get("disabled", False)
+            and server_config.get("env", {}).get("POSTGRES_CONNECTION_STRING")
+        }
+    
+    def get_mcp_server_status(self, refresh: bool = False) -> Dict[str, Dict]:
+        """모든 MCP 서버의 상태 (기본은 캐시된 상태를 바로 반환, refresh 면 병렬로 다시 확인)"""
+        targets = self.get_postgres_server_targets()
+        if refresh:
+            status = self.health.refresh(targets)
+        else:
+            status = self.health.status(targets)
+        for server_status in status.values():
+            server_status["connect_timeout"] = self.health.connect_timeout
         return status
     
     def is_aws_rds_host(self, host: str) -> bool:
@@ -0,0 +1,404 @@
+"""
+MCP 서버 프로세스 관리
+등록된 데이터베이스마다 MCP 서버 프로세스를 하나씩 오래 띄워 두고,
+여러 호출자가 하나의 stdio 연결을 요청 id 로 나눠 쓰도록(멀티플렉싱) 합니다.
+주기적으로 ping 으로 상태를 확인하고, 죽은 프로세스는 지수 백오프로 재시작하며,
+오래 사용하지 않은 프로세스는 종료했다가 다음 호출 때 다시 띄웁니다.
+"""
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# 프로세스 하나당 기본 호출 타임아웃 (초)
+DEFAULT_CALL_TIMEOUT = float(os.getenv("MCP_CALL_TIMEOUT", "30"))
+# 이 시간 동안 호출이 없으면 프로세스 종료 (초)
+IDLE_TIMEOUT = float(os.getenv("MCP_IDLE_TIMEOUT", "600"))
+# 상태 확인 주기 (초)
+HEALTH_CHECK_INTERVAL = float(os.getenv("MCP_HEALTH_CHECK_INTERVAL", "30"))
+# 재시작 백오프 (초): base * 2^(연속 실패 수), 최대 max
+RESTART_BACKOFF_BASE = 1.0
+RESTART_BACKOFF_MAX = 60.0
+# 이 시간 이상 정상 동작하면 연속 실패 수 초기화 (초)
+STABLE_UPTIME = 60.0
+
+PROTOCOL_VERSION = "2024-11-05"
+
+
+class MCPError(Exception):
+    """MCP 서버가 JSON-RPC 오류로 응답함"""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(f"MCP error {code}: {message}")
+        self.code = code
+
+
+class _PendingCall:
+    __slots__ = ('event', 'response', 'chunks')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.response: Optional[Dict] = None
+        self.chunks: List[Dict] = []
+
+
+class MCPServerProcess:
+    """stdio JSON-RPC 로 통신하는 MCP 서버 프로세스 하나 (스레드 안전)"""
+
+    def __init__(self, command: List[str], env: Optional[Dict[str, str]] = None, cwd: Optional[str] = None):
+        self.command = command
+        self.env = env or {}
+        self.cwd = cwd
+        self.proc: Optional[subprocess.Popen] = None
+        self.started_at: Optional[float] = None
+        self.last_used = time.time()
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, _PendingCall] = {}
+        # stdout EOF 여부 (프로세스 종료가 poll() 에 반영되기 전에 먼저 알 수 있음)
+        self._closed = False
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self.proc is not None and not self._closed and self.proc.poll() is None
+
+    def start(self, timeout: float = DEFAULT_CALL_TIMEOUT):
+        """프로세스를 띄우고 initialize 핸드셰이크까지 완료"""
+        env = os.environ.copy()
+        env.update(self.env)
+        self.proc = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=env,
+            cwd=self.cwd,
+            text=True,
+            encoding='utf-8',
+            bufsize=1
+        )
+        self.started_at = time.time()
+        threading.Thread(target=self._read_stdout, args=(self.proc,), daemon=True).start()
+        threading.Thread(target=self._drain_stderr, args=(self.proc,), daemon=True).start()
+        try:
+            self.request("initialize", {
+                "protocolVersion": PROTOCOL_VERSION,
+                "capabilities": {},
+                "clientInfo": {"name": "db-monitor", "version": "1.0.0"}
+            }, timeout=timeout)
+            self._send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+        except Exception:
+            self.stop()
+            raise
+
+    def stop(self, timeout: float = 5.0):
+        """stdin 을 닫아 정상 종료를 기다리고, 안 되면 강제 종료"""
+        proc = self.proc
+        if proc is None:
+            return
+        try:
+            if proc.stdin:
+                proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+        with self._lock:
+            self._closed = True
+        self._fail_pending("MCP server process stopped")
+
+    def _send(self, message: Dict):
+        line = json.dumps(message, ensure_ascii=False)
+        with self._write_lock:
+            if not self.alive:
+                raise ConnectionError("MCP server process is not running")
+            self.proc.stdin.write(line + "\n")
+            self.proc.stdin.flush()
+
+    def request(self, method: str, params: Optional[Dict] = None, timeout: float = DEFAULT_CALL_TIMEOUT) -> Any:
+        """요청을 보내고 같은 id 의 응답을 기다려 result 반환 (타임아웃 시 서버에 취소 알림)"""
+        request_id = next(self._ids)
+        pending = _PendingCall()
+        with self._lock:
+            if self._closed:
+                raise ConnectionError("MCP server process is not running")
+            self._pending[request_id] = pending
+        self.last_used = time.time()
+        try:
+            self._send({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params or {}})
+            if not pending.event.wait(timeout):
+                try:
+                    self._send({"jsonrpc": "2.0", "method": "notifications/cancelled",
+                                "params": {"requestId": request_id, "reason": "timeout"}})
+                except (ConnectionError, OSError):
+                    pass
+                raise TimeoutError(f"MCP request '{method}' timed out after {timeout}s")
+        finally:
+            with self._lock:
+                self._pending.pop(request_id, None)
+            self.last_used = time.time()
+
+        response = pending.response
+        if 'error' in response:
+            error = response['error']
+            raise MCPError(error.get('code', 0), error.get('message', ''))
+        result = response.get('result')
+        # 스트리밍된 query 결과는 청크 알림으로 받은 행을 합쳐 돌려줌
+        if pending.chunks and isinstance(result, dict):
+            result['chunks'] = [c for c in sorted(pending.chunks, key=lambda c: c.get('seq', 0))]
+        return result
+
+    def call_tool(self, name: str, arguments: Optional[Dict] = None, timeout: float = DEFAULT_CALL_TIMEOUT) -> Dict:
+        """tools/call 결과의 텍스트 콘텐츠를 JSON 으로 풀어 반환"""
+        result = self.request("tools/call", {"name": name, "arguments": arguments or {}}, timeout=timeout)
+        chunks = result.pop('chunks', None) if isinstance(result, dict) else None
+        content = (result or {}).get('content') or []
+        text = next((c.get('text') for c in content if c.get('type') == 'text'), None)
+        try:
+            payload = json.loads(text) if text else {}
+        except ValueError:
+            payload = {"text": text}
+        if chunks and isinstance(payload, dict) and payload.get('streamed'):
+            payload['data'] = [row for chunk in chunks for row in chunk.get('rows', [])]
+        return payload
+
+    def ping(self, timeout: float = 5.0):
+        self.request("ping", timeout=timeout)
+
+    def _read_stdout(self, proc: subprocess.Popen):
+        for line in proc.stdout:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                message = json.loads(line)
+            except ValueError:
+                print(f"WARNING: Ignoring non JSON-RPC output from MCP server: {line[:200]}")
+                continue
+            if 'id' in message and ('result' in message or 'error' in message):
+                with self._lock:
+                    pending = self._pending.get(message['id'])
+                if pending is not None:
+                    pending.response = message
+                    pending.event.set()
+            elif message.get('method') == 'notifications/query/chunk':
+                params = message.get('params') or {}
+                with self._lock:
+                    pending = self._pending.get(params.get('requestId'))
+                if pending is not None:
+                    pending.chunks.append(params)
+        with self._lock:
+            self._closed = True
+        self._fail_pending("MCP server process exited")
+
+    def _drain_stderr(self, proc: subprocess.Popen):
+        for line in proc.stderr:
+            line = line.rstrip()
+            if line:
+                print(f"MCP[{os.path.basename(self.command[-1])}]: {line}")
+
+    def _fail_pending(self, reason: str):
+        with self._lock:
+            pending_calls = list(self._pending.values())
+        for pending in pending_calls:
+            if not pending.event.is_set():
+                pending.response = {"error": {"code": -32000, "message": reason}}
+                pending.event.set()
+
+
+class _SupervisedServer:
+    def __init__(self, name: str, command: List[str], env: Dict[str, str], cwd: Optional[str]):
+        self.name = name
+        self.command = command
+        self.env = env
+        self.cwd = cwd
+        self.process: Optional[MCPServerProcess] = None
+        self.failures = 0
+        self.restarts = 0
+        self.next_start_at = 0.0
+        self.last_error: Optional[str] = None
+        self.last_health_check: Optional[float] = None
+        # 유휴 시간으로 종료됨 (자동 재시작하지 않고 다음 호출 때 시작, 재시작 횟수에도 포함하지 않음)
+        self.idle_stopped = False
+        self.lock = threading.Lock()
+
+
+class MCPSupervisor:
+    """서버 이름별 MCP 프로세스 관리자"""
+
+    def __init__(self, idle_timeout: float = IDLE_TIMEOUT, interval: float = HEALTH_CHECK_INTERVAL,
+                 call_timeout: float = DEFAULT_CALL_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self.interval = interval
+        self.call_timeout = call_timeout
+        self.servers: Dict[str, _SupervisedServer] = {}
+        self.lock = threading.Lock()
+        self.is_running = False
+        self.supervise_thread = None
+        self._stop_event = threading.Event()
+
+    def ensure(self, name: str, command: List[str], env: Optional[Dict[str, str]] = None, cwd: Optional[str] = None):
+        """서버 등록 (명령/환경이 바뀌었으면 실행 중인 프로세스를 종료해 다음 호출 때 새 설정으로 시작)"""
+        env = env or {}
+        with self.lock:
+            server = self.servers.get(name)
+            if server is None:
+                self.servers[name] = _SupervisedServer(name, command, env, cwd)
+                return
+        with server.lock:
+            if (server.command, server.env, server.cwd) == (command, env, cwd):
+                return
+            server.command, server.env, server.cwd = command, env, cwd
+            self._stop_process(server)
+            server.failures = 0
+            server.next_start_at = 0.0
+
+    def remove(self, name: str):
+        with self.lock:
+            server = self.servers.pop(name, None)
+        if server is not None:
+            with server.lock:
+                self._stop_process(server)
+
+    def _stop_process(self, server: _SupervisedServer):
+        if server.process is not None:
+            server.process.stop()
+            server.process = None
+
+    def _record_failure(self, server: _SupervisedServer, error: str):
+        """프로세스 실패 기록 후 다음 시작 시각을 백오프만큼 미룸"""
+        uptime = time.time() - server.process.started_at if server.process and server.process.started_at else 0
+        if uptime >= STABLE_UPTIME:
+            server.failures = 0
+        server.failures += 1
+        server.last_error = error
+        server.idle_stopped = False
+        server.next_start_at = time.time() + min(RESTART_BACKOFF_MAX, RESTART_BACKOFF_BASE * 2 ** (server.failures - 1))
+        self._stop_process(server)
+        print(f"WARNING: MCP server '{server.name}' failed ({error}); next start in "
+              f"{server.next_start_at - time.time():.1f}s")
+
+    def _get_process(self, server: _SupervisedServer) -> MCPServerProcess:
+        """실행 중인 프로세스 반환 (없으면 백오프가 지났을 때 시작)"""
+        with server.lock:
+            if server.process is not None and server.process.alive:
+                return server.process
+            if server.process is not None:
+                self._record_failure(server, f"process exited (code {server.process.proc.poll()})")
+            wait = server.next_start_at - time.time()
+            if wait > 0:
+                raise ConnectionError(f"MCP server '{server.name}' is restarting (retry in {wait:.1f}s): {server.last_error}")
+            process = MCPServerProcess(server.command, server.env, server.cwd)
+            try:
+                process.start(timeout=self.call_timeout)
+            except Exception as e:
+                server.process = process
+                self._record_failure(server, str(e))
+                raise ConnectionError(f"MCP server '{server.name}' failed to start: {e}")
+            if server.last_error is not None and not server.idle_stopped:
+                server.restarts += 1
+            server.idle_stopped = False
+            server.process = process
+            return process
+
+    def call_tool(self, name: str, tool: str, arguments: Optional[Dict] = None,
+                  timeout: Optional[float] = None) -> Dict:
+        """서버 name 의 도구 호출 (여러 스레드가 같은 프로세스를 동시에 사용)"""
+        server = self.servers.get(name)
+        if server is None:
+            raise KeyError(f"MCP server '{name}' is not registered")
+        process = self._get_process(server)
+        return process.call_tool(tool, arguments, timeout=timeout or self.call_timeout)
+
+    def check_once(self):
+        """상태 확인 한 번: 유휴 프로세스 종료, ping 실패/종료된 프로세스는 백오프 후 재시작"""
+        now = time.time()
+        for server in list(self.servers.values()):
+            with server.lock:
+                process = server.process
+                if process is None:
+                    continue
+                if not process.alive:
+                    self._record_failure(server, f"process exited (code {process.proc.poll()})")
+                    continue
+                if server.failures and process.started_at and now - process.started_at >= STABLE_UPTIME:
+                    server.failures = 0
+                if now - process.last_used > self.idle_timeout:
+                    print(f"INFO: Stopping idle MCP server '{server.name}'")
+                    self._stop_process(server)
+                    server.failures = 0
+                    server.idle_stopped = True
+                    continue
+            try:
+                process.ping(timeout=min(5.0, self.call_timeout))
+                server.last_health_check = now
+            except Exception as e:
+                with server.lock:
+                    if server.process is process:
+                        self._record_failure(server, f"health check failed: {e}")
+        # 비정상 종료 후 백오프가 지난 서버는 바로 다시 띄움 (유휴 종료된 서버는 다음 호출 때 시작)
+        for server in list(self.servers.values()):
+            if (server.process is None and not server.idle_stopped and server.failures
+                    and server.next_start_at <= time.time()):
+                try:
+                    self._get_process(server)
+                except ConnectionError as e:
+                    print(f"WARNING: {e}")
+
+    def status(self) -> Dict[str, Dict]:
+        result = {}
+        for name, server in list(self.servers.items()):
+            process = server.process
+            result[name] = {
+                "running": bool(process and process.alive),
+                "pid": process.proc.pid if process and process.alive else None,
+                "uptime": time.time() - process.started_at if process and process.alive else None,
+                "idle_seconds": time.time() - process.last_used if process and process.alive else None,
+                "restarts": server.restarts,
+                "failures": server.failures,
+                "last_error": server.last_error,
+                "last_health_check": server.last_health_check
+            }
+        return result
+
+    def start(self):
+        """백그라운드 상태 확인 시작"""
+        if self.is_running:
+            return
+        self.is_running = True
+        self._stop_event.clear()
+        self.supervise_thread = threading.Thread(target=self._supervise_loop, daemon=True)
+        self.supervise_thread.start()
+
+    def stop(self):
+        """상태 확인 중지 후 모든 프로세스 종료"""
+        self.is_running = False
+        self._stop_event.set()
+        if self.supervise_thread:
+            self.supervise_thread.join()
+            self.supervise_thread = None
+        for server in list(self.servers.values()):
+            with server.lock:
+                self._stop_process(server)
+
+    def _supervise_loop(self):
+        while self.is_running:
+            try:
+                self.check_once()
+            except Exception as e:
+                print(f"Error supervising MCP servers: {e}")
+            self._stop_event.wait(self.interval)
+
+
+def postgres_server_command() -> List[str]:
+    """저장소에 포함된 PostgreSQL MCP 서버 실행 명령 (uvx 패키지 해석 없이 현재 인터프리터로 실행)"""
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return [sys.executable, os.path.join(root, "scripts", "postgres_mcp_server.py")]
@@ -0,0 +1,76 @@
+"""
+플레이북 일괄 실행
+플레이북의 단계들은 대부분 서로 독립적인 질문이므로, 단계별 LLM 호출과 SQL 실행을
+제한된 개수만큼 동시에 진행하고 끝나는 순서대로 결과를 돌려줍니다.
+앞 단계의 결과가 필요한 단계는 "dependsOn": [단계 번호(0부터)] 로 표시하며,
+의존 단계가 끝난 뒤 그 질문/응답을 대화 기록으로 받아 실행합니다.
+"""
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List
+
+# 플레이북 한 번 실행에서 동시에 진행할 단계 수
+PLAYBOOK_MAX_PARALLEL = int(os.getenv("PLAYBOOK_MAX_PARALLEL", "4"))
+
+
+def step_dependencies(steps: List[Dict]) -> List[List[int]]:
+    """단계별 의존 단계 번호 목록 (앞 단계만 가리킬 수 있음)"""
+    dependencies = []
+    for index, step in enumerate(steps):
+        depends_on = step.get("dependsOn") or []
+        if not isinstance(depends_on, list) or not all(isinstance(d, int) and 0 <= d < index for d in depends_on):
+            raise ValueError(f"{index}번 단계의 dependsOn 은 앞 단계 번호 목록이어야 합니다: {depends_on!r}")
+        dependencies.append(sorted(set(depends_on)))
+    return dependencies
+
+
+def run_playbook(steps: List[Dict], run_step: Callable[[int, Dict, List[Dict]], Dict],
+                 max_parallel: int = PLAYBOOK_MAX_PARALLEL) -> Iterator[Dict]:
+    """단계들을 동시에 실행하며 끝난 순서대로 단계 결과를 내보냄
+
+    run_step(index, step, chat_history) 는 assistant 메시지를 반환 (블로킹 호출)
+    각 결과: {"index", "title", "prompt", "message", "error", "elapsed_ms"}
+    """
+    dependencies = step_dependencies(steps)
+    results: Dict[int, Dict] = {}
+    pending = set(range(len(steps)))
+    running = {}
+
+    def execute(index: int) -> Dict:
+        step = steps[index]
+        history = []
+        for dep in dependencies[index]:
+            history.append({"role": "user", "sender": "user", "content": steps[dep]["prompt"]})
+            if results[dep]["message"]:
+                history.append(results[dep]["message"])
+        started = time.monotonic()
+        message, error = None, None
+        try:
+            message = run_step(index, step, history)
+        except Exception as e:
+            error = str(e)
+        return {
+            "index": index,
+            "title": step.get("title"),
+            "prompt": step.get("prompt"),
+            "message": message,
+            "error": error,
+            "elapsed_ms": round((time.monotonic() - started) * 1000, 1)
+        }
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_parallel, len(steps) or 1)))
+    try:
+        while pending or running:
+            for index in sorted(pending):
+                if all(dep in results for dep in dependencies[index]):
+                    pending.discard(index)
+                    running[executor.submit(execute, index)] = index
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = running.pop(future)
+                results[index] = future.result()
+                yield results[index]
+    finally:
+        # 클라이언트가 중간에 끊으면 아직 시작하지 않은 단계는 취소
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,108 @@
+"""
+플레이북 고정 SQL
+자주 쓰는 플레이북 단계는 매번 같은 SQL 이 나오므로 LLM 을 거치지 않고 바로 실행할 수 있게 합니다.
+- "sql": 미리 작성했거나 좋은 LLM 실행에서 기록해 둔 SQL
+- "sqlByPgStatStatements": {"1.8": "...", ...} pg_stat_statements 확장 버전별 변형
+- "sqlByVersion": {"13": "...", "9.6": "...", ...} 서버 버전별 변형
+  (변형은 대상 버전 이하 중 가장 높은 키를 쓰고, 맞는 변형이 없거나 버전을 모르면 "sql")
+- 컴파일: 고정 SQL 이 없는 단계를 DB 별로 한 번 LLM 으로 실행해, 오류 없이 실행된 읽기 전용 SQL 을 저장
+  (단계 프롬프트가 바뀌면 저장된 SQL 은 무시)
+우선순위: 고정 SQL > DB 별 컴파일 SQL > LLM
+"""
+import hashlib
+import re
+from typing import Dict, List, Optional, Tuple
+
+from backend.services.sql_analysis import classify_statement, split_statements
+
+SOURCE_PINNED = 'pinned'
+SOURCE_COMPILED = 'compiled'
+SOURCE_LLM = 'llm'
+
+# 버전 변형 키 ("13", "9.6", "1.8")
+_VERSION_KEY_RE = re.compile(r'^\d+(?:\.\d+)*$')
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256((prompt or '').encode('utf-8')).hexdigest()
+
+
+def version_key(key) -> Optional[Tuple[int, ...]]:
+    """변형 키 → 비교용 튜플 ("9.6" → (9, 6)), 형식이 맞지 않으면 None"""
+    if not isinstance(key, str) or not _VERSION_KEY_RE.match(key):
+        return None
+    return tuple(int(part) for part in key.split('.'))
+
+
+def invalid_version_keys(steps: List[Dict]) -> Dict[int, List[str]]:
+    """단계 번호별 형식이 잘못된 버전 변형 키 (모두 맞으면 빈 dict)"""
+    invalid = {}
+    for index, step in enumerate(steps):
+        keys = [
+            key
+            for field in ("sqlByVersion", "sqlByPgStatStatements")
+            for key in (step.get(field) or {})
+            if version_key(key) is None
+        ]
+        if keys:
+            invalid[index] = keys
+    return invalid
+
+
+def server_version(server_version_num: Optional[int]) -> Optional[Tuple[int, ...]]:
+    """server_version_num → 비교용 버전 (90624 → (9, 6), 130004 → (13,))"""
+    if not server_version_num:
+        return None
+    major = server_version_num // 10000
+    if major < 10:
+        return major, server_version_num // 100 % 100
+    return (major,)
+
+
+def needs_capabilities(step: Dict) -> bool:
+    return bool(step.get("sqlByVersion") or step.get("sqlByPgStatStatements"))
+
+
+def _pick_variant(variants: Dict, version: Optional[Tuple[int, ...]]) -> Optional[str]:
+    """version 이하 중 가장 높은 키의 변형 (형식이 잘못된 키는 무시)"""
+    if not variants or not version:
+        return None
+    best = None
+    for key in variants:
+        parsed = version_key(key)
+        if parsed is not None and parsed <= version and (best is None or parsed > best[0]):
+            best = (parsed, key)
+    return variants[best[1]] if best else None
+
+
+def pinned_sql(step: Dict, caps=None) -> Optional[str]:
+    """단계에 고정된 SQL (caps 는 PgCapabilities, pg_stat_statements 변형 > 서버 버전 변형 > "sql")"""
+    if caps is not None:
+        sql = _pick_variant(step.get("sqlByPgStatStatements"), caps.pgss_version) or \
+            _pick_variant(step.get("sqlByVersion"), server_version(caps.server_version_num))
+        if sql:
+            return sql
+    return step.get("sql") or None
+
+
+def resolve_step_sql(step: Dict, compiled: Optional[Dict] = None, caps=None) -> Tuple[Optional[str], str]:
+    """단계를 실행할 SQL 과 출처 (SQL 이 없으면 (None, "llm"))"""
+    sql = pinned_sql(step, caps)
+    if sql:
+        return sql, SOURCE_PINNED
+    if compiled and compiled.get("prompt_hash") == prompt_hash(step.get("prompt")):
+        return compiled["sql"], SOURCE_COMPILED
+    return None, SOURCE_LLM
+
+
+def compilable_sql(message: Dict) -> Optional[str]:
+    """LLM 실행 결과에서 고정할 수 있는 SQL (오류 없이 실행된 읽기 전용 문장만, 아니면 None)"""
+    sql = message.get("sql")
+    result = message.get("result")
+    if not sql or sql == "Error" or not isinstance(result, dict):
+        return None
+    if any("error" in entry for entry in result.get("statements", [])):
+        return None
+    if not all(classify_statement(text).read_only for text in split_statements(sql)):
+        return None
+    return sql
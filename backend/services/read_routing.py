@@ -0,0 +1,153 @@
+"""
+읽기 복제본 라우팅
+등록된 DB 의 읽기 복제본 목록과 라우팅 정책에 따라 읽기 전용 NL2SQL 쿼리를 보낼 대상을 고릅니다.
+정책:
+- primary: 항상 프라이머리
+- replica: 연결 가능한 복제본 중 라운드로빈, 없으면 프라이머리
+- lag_aware: 복제 지연이 max_replica_lag_seconds 이하인 복제본 중 라운드로빈, 없으면 프라이머리
+복제본 상태(복구 모드 여부, 지연)는 짧게 캐시해 쿼리마다 확인하지 않습니다.
+"""
+import itertools
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import psycopg2
+
+PRIMARY_ONLY = 'primary'
+REPLICA_PREFERRED = 'replica'
+LAG_AWARE = 'lag_aware'
+ROUTING_POLICIES = (PRIMARY_ONLY, REPLICA_PREFERRED, LAG_AWARE)
+
+# 복제본 상태 캐시 유지 시간 (초)
+REPLICA_STATUS_TTL = 10
+# 연결 실패한 복제본을 건너뛰는 시간 (초)
+REPLICA_FAILURE_COOLDOWN = 30
+REPLICA_CONNECT_TIMEOUT = 3
+DEFAULT_MAX_LAG_SECONDS = 30
+
+# WAL 수신기가 스트리밍 중이고 받은 WAL 을 모두 재생했으면 지연 0
+# (쓰기가 없는 프라이머리에서 replay 시각이 오래돼 보이는 것 방지)
+# 수신기가 끊겼거나 상태를 볼 권한이 없으면(status 가 NULL) 마지막 재생 시각 기준 지연으로 판단
+REPLICA_LAG_QUERY = """
+    SELECT pg_is_in_recovery(),
+           CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+                     AND EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN 0
+                ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+           END
+"""
+
+
+def parse_replica_hosts(value: Optional[str], default_port: int = 5432) -> List[Tuple[str, int]]:
+    """"host1:5432, host2" 형식 → [(host, port), ...]"""
+    replicas = []
+    for item in (value or '').replace('\n', ',').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, port = item.rpartition(':') if item.count(':') == 1 else (item, '', '')
+        replicas.append((host, int(port) if port.isdigit() else int(default_port or 5432)))
+    return replicas
+
+
+def probe_replica(dbinfo: Dict, host: str, port: int) -> Dict:
+    """복제본 하나의 상태 확인 (연결 가능 여부, 복구 모드 여부, 지연 초)"""
+    try:
+        conn = psycopg2.connect(
+            host=host,
+            port=port,
+            user=dbinfo['user'],
+            password=dbinfo['password'],
+            dbname=dbinfo['dbname'],
+            connect_timeout=REPLICA_CONNECT_TIMEOUT
+        )
+    except psycopg2.Error as e:
+        return {"healthy": False, "in_recovery": None, "lag_seconds": None, "error": str(e).strip()}
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(REPLICA_LAG_QUERY)
+            in_recovery, lag = cursor.fetchone()
+        return {
+            "healthy": True,
+            "in_recovery": in_recovery,
+            "lag_seconds": float(lag) if lag is not None else None,
+            "error": None
+        }
+    except psycopg2.Error as e:
+        return {"healthy": False, "in_recovery": None, "lag_seconds": None, "error": str(e).strip()}
+    finally:
+        conn.close()
+
+
+class ReplicaRouter:
+    """DB 별 복제본 상태 캐시와 라운드로빈 선택"""
+
+    def __init__(self, ttl: float = REPLICA_STATUS_TTL, cooldown: float = REPLICA_FAILURE_COOLDOWN, probe=probe_replica):
+        self.ttl = ttl
+        self.cooldown = cooldown
+        self.probe = probe
+        self.lock = threading.Lock()
+        self._status: Dict[Tuple[str, int, str], Tuple[float, Dict]] = {}
+        self._counters: Dict[str, itertools.count] = {}
+
+    def _replica_status(self, dbinfo: Dict, host: str, port: int) -> Dict:
+        key = (host, port, dbinfo.get('dbname', ''))
+        with self.lock:
+            entry = self._status.get(key)
+            if entry and entry[0] > time.time():
+                return entry[1]
+        status = self.probe(dbinfo, host, port)
+        ttl = self.ttl if status["healthy"] else self.cooldown
+        with self.lock:
+            self._status[key] = (time.time() + ttl, status)
+        return status
+
+    def mark_failed(self, dbinfo: Dict, error: str = ''):
+        """쿼리 중 연결이 실패한 복제본을 cooldown 동안 건너뜀"""
+        key = (dbinfo['host'], int(dbinfo.get('port', 5432)), dbinfo.get('dbname', ''))
+        with self.lock:
+            self._status[key] = (time.time() + self.cooldown,
+                                 {"healthy": False, "in_recovery": None, "lag_seconds": None, "error": error})
+
+    def eligible_replicas(self, dbinfo: Dict) -> List[Tuple[str, int]]:
+        """정책상 읽기 쿼리를 보낼 수 있는 복제본 목록"""
+        policy = dbinfo.get('read_routing') or PRIMARY_ONLY
+        if policy not in (REPLICA_PREFERRED, LAG_AWARE):
+            return []
+        max_lag = dbinfo.get('max_replica_lag_seconds')
+        max_lag = DEFAULT_MAX_LAG_SECONDS if max_lag is None else max_lag
+        eligible = []
+        for host, port in parse_replica_hosts(dbinfo.get('replica_hosts'), dbinfo.get('port', 5432)):
+            status = self._replica_status(dbinfo, host, port)
+            if not status["healthy"]:
+                continue
+            if policy == LAG_AWARE:
+                # 복구 모드가 아니면(승격된 서버 등) 지연을 알 수 없으므로 제외
+                if not status["in_recovery"] or status["lag_seconds"] is None or status["lag_seconds"] > max_lag:
+                    continue
+            eligible.append((host, port))
+        return eligible
+
+    def route(self, dbinfo: Dict, read_only: bool = True) -> Dict:
+        """쿼리를 보낼 연결 정보 (복제본이면 host/port 를 바꾼 사본, routed_to 에 대상 표시)"""
+        if not read_only:
+            return dict(dbinfo, routed_to='primary')
+        replicas = self.eligible_replicas(dbinfo)
+        if not replicas:
+            return dict(dbinfo, routed_to='primary')
+        name = dbinfo.get('name') or dbinfo['host']
+        with self.lock:
+            counter = self._counters.setdefault(name, itertools.count())
+            host, port = replicas[next(counter) % len(replicas)]
+        return dict(dbinfo, host=host, port=port, routed_to='replica')
+
+    def status(self, dbinfo: Dict) -> List[Dict]:
+        """복제본별 캐시된 상태 (없거나 오래됐으면 확인)"""
+        return [
+            dict(self._replica_status(dbinfo, host, port), host=host, port=port)
+            for host, port in parse_replica_hosts(dbinfo.get('replica_hosts'), dbinfo.get('port', 5432))
+        ]
+
+
+# 전역 복제본 라우터 인스턴스
+replica_router = ReplicaRouter()
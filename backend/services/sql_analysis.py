@@ -0,0 +1,186 @@
+"""
+AI 응답 SQL 추출/분류
+LLM 응답에서 SQL 블록을 모두 꺼내 문자열/주석/달러 인용을 고려해 문장 단위로 나누고,
+각 문장을 읽기 전용과 쓰기(DML/DDL/유지보수/트랜잭션 제어)로 분류합니다.
+읽기 전용 문장은 읽기 전용 트랜잭션으로 실행하고, 쓰기 문장은 정책에 따라 막습니다.
+"""
+import os
+import re
+from typing import Dict, List, Optional
+
+# 쓰기 문장 처리 정책: block(기본, 실행하지 않음) / allow
+WRITE_POLICY = os.getenv("AI_SQL_WRITE_POLICY", "block").lower()
+
+# ```sql / ```postgresql / ```psql / ```pgsql 코드 블록
+_SQL_BLOCK_RE = re.compile(r"```[ \t]*(?:sql|postgresql|postgres|psql|pgsql)[ \t]*\n?([\s\S]*?)```", re.IGNORECASE)
+
+# 문자열/달러 인용/인용 식별자/주석은 통째로, 나머지는 단어와 ; ( ) 단위로 스캔
+# (E'...' 문자열만 백슬래시 이스케이프를 해석하므로 E'a\'; ...' 의 \' 는 문자열을 닫지 않음)
+_TOKEN_RE = re.compile(
+    r"(?P<string>[Ee]'(?:[^'\\]|''|\\[\s\S])*'?|[BbXxNnUu]?&?'(?:[^']|'')*'?)"
+    r"|(?P<dollar>\$(?P<tag>[A-Za-z_]\w*)?\$[\s\S]*?(?:\$(?P=tag)?\$|$))"
+    r"|(?P<quoted>\"(?:[^\"]|\"\")*\"?)"
+    r"|(?P<comment>--[^\n]*|/\*[\s\S]*?(?:\*/|$))"
+    r"|(?P<semicolon>;)"
+    r"|(?P<open>\()"
+    r"|(?P<close>\))"
+    r"|(?P<word>[A-Za-z_][\w$]*)"
+)
+
+READ_ONLY = 'read'
+WRITE = 'write'
+DDL = 'ddl'
+MAINTENANCE = 'maintenance'
+TRANSACTION = 'transaction'
+UNKNOWN = 'unknown'
+
+_READ_COMMANDS = {'SELECT', 'WITH', 'VALUES', 'TABLE', 'SHOW', 'EXPLAIN'}
+_WRITE_COMMANDS = {'INSERT', 'UPDATE', 'DELETE', 'MERGE', 'TRUNCATE', 'COPY', 'UPSERT'}
+_DDL_COMMANDS = {'CREATE', 'ALTER', 'DROP', 'COMMENT', 'GRANT', 'REVOKE', 'SECURITY', 'IMPORT'}
+_MAINTENANCE_COMMANDS = {'VACUUM', 'ANALYZE', 'ANALYSE', 'REINDEX', 'CLUSTER', 'REFRESH', 'CHECKPOINT',
+                         'LOCK', 'DISCARD', 'LOAD', 'NOTIFY', 'LISTEN', 'UNLISTEN', 'CALL', 'DO'}
+_TRANSACTION_COMMANDS = {'BEGIN', 'START', 'COMMIT', 'END', 'ROLLBACK', 'ABORT', 'SAVEPOINT', 'RELEASE',
+                         'PREPARE', 'SET', 'RESET'}
+_COMMAND_KINDS = {}
+for _kind, _commands in ((READ_ONLY, _READ_COMMANDS), (WRITE, _WRITE_COMMANDS), (DDL, _DDL_COMMANDS),
+                         (MAINTENANCE, _MAINTENANCE_COMMANDS), (TRANSACTION, _TRANSACTION_COMMANDS)):
+    for _command in _commands:
+        _COMMAND_KINDS[_command] = _kind
+
+# 읽기 명령 안에 들어 있으면 쓰기로 보는 키워드 (WITH ... AS (DELETE ...) 같은 데이터 변경 CTE)
+_MODIFYING_WORDS = {'INSERT', 'UPDATE', 'DELETE', 'MERGE'}
+
+
+class SqlStatement:
+    """분류된 SQL 문장 하나"""
+
+    def __init__(self, text: str, command: str, kind: str, reason: Optional[str] = None):
+        self.text = text
+        self.command = command
+        self.kind = kind
+        self.reason = reason
+
+    @property
+    def read_only(self) -> bool:
+        return self.kind == READ_ONLY
+
+    def to_dict(self) -> Dict:
+        return {"sql": self.text, "command": self.command, "kind": self.kind,
+                "read_only": self.read_only, "reason": self.reason}
+
+    def __repr__(self):
+        return f"SqlStatement({self.command!r}, {self.kind!r})"
+
+
+def _tokens(sql: str):
+    """(종류, 값, 시작 위치) 순회 (공백/기타 기호 제외)"""
+    for m in _TOKEN_RE.finditer(sql):
+        yield m.lastgroup, m.group(0), m.start()
+
+
+def split_statements(sql: str) -> List[str]:
+    """최상위 ; 기준으로 문장 분리 (문자열, 인용 식별자, 주석, 달러 인용 안의 ; 는 무시)"""
+    statements = []
+    start = 0
+    for kind, _, pos in _tokens(sql):
+        if kind == 'semicolon':
+            statements.append(sql[start:pos])
+            start = pos + 1
+    statements.append(sql[start:])
+    return [s.strip() for s in statements if _has_code(s)]
+
+
+def _has_code(sql: str) -> bool:
+    return any(kind != 'comment' for kind, _, _ in _tokens(sql))
+
+
+def classify_statement(sql: str) -> SqlStatement:
+    """문장 하나를 첫 명령어와 본문 키워드로 분류"""
+    words = []
+    depth = 0
+    top_level_words = []
+    starts_with_paren = None
+    for kind, value, _ in _tokens(sql):
+        if starts_with_paren is None and kind != 'comment':
+            starts_with_paren = kind == 'open'
+        if kind == 'open':
+            depth += 1
+        elif kind == 'close':
+            depth = max(0, depth - 1)
+        elif kind == 'word':
+            upper = value.upper()
+            words.append(upper)
+            if depth == 0:
+                top_level_words.append(upper)
+
+    # (SELECT ...) UNION (SELECT ...) 처럼 괄호로 시작하는 문장은 괄호 안 첫 단어로 판단
+    if starts_with_paren or not top_level_words:
+        command = words[0] if words else ''
+    else:
+        command = top_level_words[0]
+    kind = _COMMAND_KINDS.get(command, UNKNOWN)
+    statement = SqlStatement(sql.strip(), command, kind)
+    if kind != READ_ONLY:
+        if kind == UNKNOWN:
+            statement.reason = f"알 수 없는 명령: {command or '(없음)'}"
+        return statement
+
+    if command == 'EXPLAIN':
+        # EXPLAIN ANALYZE 는 대상 문장을 실제로 실행하므로 대상 문장의 분류를 따름
+        analyze = any(w in ('ANALYZE', 'ANALYSE') for w in words[1:3]) or \
+            re.match(r"\s*EXPLAIN\s*\([^)]*\bANALY[SZ]E\b(?!\s+(?:false|off|0)\b)", sql, re.IGNORECASE)
+        if analyze and _MODIFYING_WORDS.intersection(words):
+            statement.kind, statement.reason = WRITE, "EXPLAIN ANALYZE 가 데이터 변경 문장을 실행함"
+        return statement
+
+    # FOR UPDATE / FOR NO KEY UPDATE 의 UPDATE 는 행 잠금이므로 데이터 변경 구문에서 제외
+    locking = False
+    modifying = set()
+    for i, word in enumerate(words):
+        if word == 'FOR' and i + 1 < len(words) and words[i + 1] in ('UPDATE', 'SHARE', 'NO', 'KEY'):
+            locking = True
+        elif word in _MODIFYING_WORDS and not (word == 'UPDATE' and i and words[i - 1] in ('FOR', 'KEY')):
+            modifying.add(word)
+    if modifying:
+        statement.kind, statement.reason = WRITE, f"데이터 변경 구문 포함: {', '.join(sorted(modifying))}"
+    elif command == 'SELECT' and 'INTO' in top_level_words:
+        statement.kind, statement.reason = DDL, "SELECT INTO 는 테이블을 만듦"
+    elif locking:
+        statement.kind, statement.reason = WRITE, "행 잠금(FOR UPDATE/SHARE) 사용"
+    return statement
+
+
+def extract_sql(response: str) -> str:
+    """응답에서 SQL 텍스트 추출 (모든 sql 코드 블록, 없으면 SQL 로 시작하는 응답 전체)"""
+    if not response:
+        return ""
+    blocks = [b.strip() for b in _SQL_BLOCK_RE.findall(response) if b.strip()]
+    if blocks:
+        return "\n".join(b if b.rstrip().endswith(';') else b + ";" for b in blocks)
+    first_word = next((value.upper() for kind, value, _ in _tokens(response) if kind != 'comment'), '')
+    if first_word in _READ_COMMANDS:
+        return response.strip()
+    return ""
+
+
+def analyze_response(response: str) -> List[SqlStatement]:
+    """LLM 응답 → 분류된 SQL 문장 목록"""
+    return [classify_statement(s) for s in split_statements(extract_sql(response))]
+
+
+def is_blocked(statement: SqlStatement, policy: Optional[str] = None) -> bool:
+    """정책상 실행하지 않을 문장인지 (읽기 전용은 항상 허용, 알 수 없는 명령은 항상 차단)"""
+    if statement.read_only:
+        return False
+    if statement.kind == UNKNOWN:
+        return True
+    return (policy or WRITE_POLICY) != 'allow'
+
+
+# 응답 전체가 답변 거절일 때 쓰는 표현 (SQL 이 없을 때만 거절로 판단)
+_REFUSAL_RE = re.compile(r"I can(?:'|no)t answer this question|죄송합니다|답변(?:할|드릴) 수 없", re.IGNORECASE)
+
+
+def is_refusal(response: str, statements: List[SqlStatement]) -> bool:
+    """SQL 없이 답변을 거절한 응답인지"""
+    return not statements and bool(_REFUSAL_RE.search(response or ""))
@@ -0,0 +1,228 @@
+"""
+AI 응답 SQL 실행
+한 턴에 나온 읽기 전용 문장들은 서로 독립적이므로 대상별 연결 풀에서 병렬로 실행하고,
+턴 전체에 행 수/시간 예산을 둡니다. 시간 예산은 문장마다 남은 시간을 statement_timeout 으로,
+행 예산은 서버 측 커서에서 나눠 가져오는 방식으로 지킵니다.
+쓰기 문장(정책상 허용된 경우)이 섞여 있으면 순서가 의미를 가지므로 전부 차례대로 실행합니다.
+"""
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
+
+from backend.database import execute_sql
+from backend.services.read_routing import PRIMARY_ONLY, replica_router
+from backend.services.sql_analysis import SqlStatement, is_blocked
+
+# 한 턴에서 동시에 실행할 문장 수 (대상별 풀 크기와 같음)
+MAX_PARALLEL = int(os.getenv("AI_SQL_MAX_PARALLEL", "4"))
+# 한 턴에서 가져올 전체 행 수
+TURN_ROW_BUDGET = int(os.getenv("AI_SQL_ROW_BUDGET", "5000"))
+# 한 턴의 전체 실행 시간 (초)
+TURN_TIME_BUDGET = float(os.getenv("AI_SQL_TIME_BUDGET", "30"))
+FETCH_SIZE = 500
+
+# 서버 측 커서(DECLARE)로 실행할 수 있는 명령 (EXPLAIN/SHOW 는 일반 커서)
+_CURSOR_COMMANDS = {'SELECT', 'WITH', 'VALUES', 'TABLE'}
+
+
+class TurnBudget:
+    """한 턴의 행 수/시간 예산 (여러 스레드가 나눠 씀)"""
+
+    def __init__(self, max_rows: int = TURN_ROW_BUDGET, seconds: float = TURN_TIME_BUDGET):
+        self.max_rows = max_rows
+        self.seconds = seconds
+        self.started = time.monotonic()
+        self.deadline = self.started + seconds
+        self.rows_left = max_rows
+        self.lock = threading.Lock()
+
+    def remaining_seconds(self) -> float:
+        return max(0.0, self.deadline - time.monotonic())
+
+    def take_rows(self, n: int) -> int:
+        """최대 n 행을 예산에서 가져감 (가져간 행 수 반환)"""
+        with self.lock:
+            granted = min(n, self.rows_left)
+            self.rows_left -= granted
+            return granted
+
+    def give_back(self, n: int):
+        with self.lock:
+            self.rows_left += n
+
+    def to_dict(self) -> Dict:
+        return {
+            "max_rows": self.max_rows,
+            "rows_used": self.max_rows - self.rows_left,
+            "time_budget_seconds": self.seconds,
+            "elapsed_ms": round((time.monotonic() - self.started) * 1000, 1)
+        }
+
+
+class BudgetExhausted(Exception):
+    pass
+
+
+class ConnectionPools:
+    """대상(host, port, dbname, user, password)별 연결 풀 (풀 크기만큼만 동시에 빌려줌)"""
+
+    def __init__(self, size: int = MAX_PARALLEL):
+        self.size = size
+        self.lock = threading.Lock()
+        self._pools: Dict[Tuple, Tuple[ThreadedConnectionPool, threading.BoundedSemaphore]] = {}
+
+    def _pool(self, dbinfo: Dict):
+        key = (dbinfo['host'], int(dbinfo.get('port', 5432)), dbinfo['dbname'], dbinfo['user'], dbinfo['password'])
+        with self.lock:
+            entry = self._pools.get(key)
+            if entry is None:
+                pool = ThreadedConnectionPool(
+                    0, self.size,
+                    host=key[0], port=key[1], dbname=key[2], user=key[3], password=key[4]
+                )
+                entry = self._pools[key] = (pool, threading.BoundedSemaphore(self.size))
+            return entry
+
+    def run(self, dbinfo: Dict, work: Callable, timeout: Optional[float] = None):
+        """풀에서 연결을 빌려 work(conn) 실행 (연결 오류면 연결을 버림)"""
+        pool, slots = self._pool(dbinfo)
+        if not slots.acquire(timeout=timeout):
+            raise BudgetExhausted("연결 대기 중 시간 예산 초과")
+        try:
+            conn = pool.getconn()
+            broken = False
+            try:
+                return work(conn)
+            except psycopg2.OperationalError as e:
+                # statement_timeout 취소는 연결을 계속 쓸 수 있음
+                broken = not isinstance(e, psycopg2.extensions.QueryCanceledError)
+                raise
+            finally:
+                if not broken and not conn.closed:
+                    try:
+                        conn.rollback()
+                    except psycopg2.Error:
+                        broken = True
+                pool.putconn(conn, close=broken or bool(conn.closed))
+        finally:
+            slots.release()
+
+    def close_all(self):
+        with self.lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool, _ in pools:
+            pool.closeall()
+
+
+# 전역 연결 풀 인스턴스
+connection_pools = ConnectionPools()
+
+_cursor_names = itertools.count(1)
+
+
+def _run_read(conn, statement: SqlStatement, budget: TurnBudget) -> Dict:
+    """읽기 전용 트랜잭션에서 남은 시간/행 예산 안에서 실행"""
+    timeout_ms = int(budget.remaining_seconds() * 1000)
+    if timeout_ms <= 0:
+        raise BudgetExhausted("시간 예산 초과로 실행하지 않음")
+    with conn.cursor() as setup:
+        setup.execute("SET TRANSACTION READ ONLY")
+        setup.execute("SET LOCAL statement_timeout = %s", (timeout_ms,))
+
+    server_side = statement.command in _CURSOR_COMMANDS
+    cursor = conn.cursor(name=f"ai_stmt_{next(_cursor_names)}") if server_side else conn.cursor()
+    try:
+        cursor.execute(statement.text)
+        if not server_side and cursor.description is None:
+            return {"headers": [], "data": [], "truncated": False}
+        rows = []
+        truncated = False
+        while True:
+            granted = budget.take_rows(FETCH_SIZE)
+            if granted == 0:
+                truncated = bool(cursor.fetchmany(1))
+                break
+            chunk = cursor.fetchmany(granted)
+            rows.extend(chunk)
+            if len(chunk) < granted:
+                budget.give_back(granted - len(chunk))
+                break
+        headers = [desc[0] for desc in cursor.description] if cursor.description else []
+        return {"headers": headers, "data": rows, "truncated": truncated}
+    finally:
+        cursor.close()
+
+
+def execute_read_statement(statement: SqlStatement, dbinfo: Dict, budget: TurnBudget,
+                           pools: ConnectionPools = connection_pools) -> Dict:
+    """라우팅 정책에 따라 복제본/프라이머리 풀에서 실행 (복제본 연결 실패 시 프라이머리로 재시도)"""
+    routed = replica_router.route(dbinfo, read_only=True)
+    if routed["routed_to"] == "replica":
+        try:
+            result = pools.run(routed, lambda conn: _run_read(conn, statement, budget), budget.remaining_seconds())
+            return dict(result, routed_to=f"replica {routed['host']}:{routed['port']}")
+        except psycopg2.OperationalError as e:
+            # statement_timeout 취소(QueryCanceled)는 복제본 장애가 아님
+            if isinstance(e, psycopg2.extensions.QueryCanceledError):
+                raise
+            replica_router.mark_failed(routed, str(e))
+    result = pools.run(dbinfo, lambda conn: _run_read(conn, statement, budget), budget.remaining_seconds())
+    return dict(result, routed_to="primary")
+
+
+def execute_statements(statements: List[SqlStatement], dbinfo: Dict, budget: Optional[TurnBudget] = None,
+                       run_read: Callable = execute_read_statement) -> List[Dict]:
+    """분류된 문장들을 실행하고 문장별 결과 목록 반환 (입력 순서 유지)
+
+    각 항목: statement.to_dict() + headers/data/truncated/routed_to/elapsed_ms 또는 error (차단 시 blocked)
+    허용된 쓰기 문장이 있으면 모든 문장을 순서대로, 읽기도 프라이머리에서 실행합니다.
+    """
+    budget = budget or TurnBudget()
+    entries = [statement.to_dict() for statement in statements]
+    read_dbinfo = dbinfo
+
+    def run(index: int):
+        statement, entry = statements[index], entries[index]
+        started = time.monotonic()
+        try:
+            if statement.read_only:
+                entry.update(run_read(statement, read_dbinfo, budget))
+            else:
+                # 허용된 쓰기 문장은 기존과 같이 프라이머리에서 단일 연결로 실행
+                headers, data = execute_sql(statement.text, dbinfo)
+                entry.update(headers=headers, data=data, truncated=False, routed_to="primary")
+        except BudgetExhausted as e:
+            entry["error"] = f"Error: {e}"
+            entry["skipped"] = True
+        except psycopg2.extensions.QueryCanceledError:
+            entry["error"] = f"Error: 시간 예산({budget.seconds:g}초) 초과로 취소됨"
+        except Exception as e:
+            entry["error"] = f"Error: {e}"
+        entry["elapsed_ms"] = round((time.monotonic() - started) * 1000, 1)
+
+    runnable = []
+    for index, statement in enumerate(statements):
+        if is_blocked(statement):
+            reason = f": {statement.reason}" if statement.reason else ""
+            entries[index]["blocked"] = True
+            entries[index]["error"] = f"차단됨 - {statement.kind} 문장은 실행하지 않습니다{reason} (AI_SQL_WRITE_POLICY=allow 로 허용)"
+        else:
+            runnable.append(index)
+
+    read_only = all(statements[i].read_only for i in runnable)
+    if not read_only:
+        # 쓰기 문장과 함께 실행하는 읽기는 방금 쓴 내용을 보도록 복제본 대신 프라이머리에서 실행
+        read_dbinfo = dict(dbinfo, read_routing=PRIMARY_ONLY)
+    if len(runnable) > 1 and read_only:
+        with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL, len(runnable))) as executor:
+            list(executor.map(run, runnable))
+    else:
+        for index in runnable:
+            run(index)
+    return entries
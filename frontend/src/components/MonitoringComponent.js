@@ -63,34 +63,45 @@ function MonitoringComponent({ selectedDb, databases, onDbChange }) {
     try {
       const dbIdentifier = selectedDb;
       const hours = getHours(timeRange);
-      const results = await Promise.all(
-        CLOUDWATCH_METRICS.map(async (metric) => {
-          const url = `/api/monitoring/cloudwatch/metrics/${dbIdentifier}?metric_name=${metric.name}&hours=${hours}`;
-          let errorMsg = null;
-          let json = { data: [] };
-          let status = 200;
-          try {
-            const res = await fetch(url);
-            status = res.status;
-            try {
-              json = await res.json();
-            } catch (e) {}
-            if (!res.ok) {
-              errorMsg = (json && json.detail) ? json.detail : `API 오류 (status ${status})`;
-            }
-          } catch (e) {
-            errorMsg = e.message || 'API 요청 실패';
-          }
-          // 콘솔에 응답(raw) 출력
-          console.log(`[CloudWatch][${metric.name}]`, json, errorMsg);
-          return { key: metric.key, data: json.data || [], error: errorMsg };
-        })
-      );
+      // 모든 메트릭을 배치 엔드포인트 한 번으로 조회
+      let json = { timestamps: [], series: [] };
+      let errorMsg = null;
+      try {
+        const res = await fetch('/api/monitoring/cloudwatch/metrics/batch', {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({
+            db_identifiers: [dbIdentifier],
+            metrics: CLOUDWATCH_METRICS.map(metric => metric.name),
+            period: 300,
+            hours
+          })
+        });
+        try {
+          json = await res.json();
+        } catch (e) {}
+        if (!res.ok || (json && json.status === 'error')) {
+          errorMsg = (json && (json.message || json.detail)) ? (json.message || json.detail) : `API 오류 (status ${res.status})`;
+        }
+      } catch (e) {
+        errorMsg = e.message || 'API 요청 실패';
+      }
+      console.log('[CloudWatch][batch]', json, errorMsg);
+      const timestamps = json.timestamps || [];
+      const seriesByName = {};
+      (json.series || []).forEach(series => {
+        seriesByName[series.metric_name] = series;
+      });
       const newMetrics = {};
       const newErrors = {};
-      results.forEach(({ key, data, error }) => {
-        newMetrics[key] = data;
-        if (error) newErrors[key] = error;
+      CLOUDWATCH_METRICS.forEach(metric => {
+        const series = seriesByName[metric.name];
+        newMetrics[metric.key] = series
+          ? series.values
+              .map((value, i) => ({ timestamp: timestamps[i], value, unit: series.unit }))
+              .filter(point => point.value !== null && point.value !== undefined)
+          : [];
+        if (errorMsg) newErrors[metric.key] = errorMsg;
       });
       setMetrics(newMetrics);
       setErrors(newErrors);
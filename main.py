@@ -1,15 +1,15 @@
 import os
 import openai
 from fastapi import FastAPI, Request, Form, Depends, Body
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.sessions import SessionMiddleware
-import re
 from typing import List, Dict, Any
 from openai.types.chat import ChatCompletionMessageParam, ChatCompletionUserMessageParam, ChatCompletionAssistantMessageParam, ChatCompletionSystemMessageParam
 import json
 import threading
 import datetime
+import time
 import google.generativeai as genai
 from anthropic import Anthropic
 
@@ -18,7 +18,6 @@ from backend.config import FRONTEND_ORIGINS, DB_HOST, DB_PORT, DB_USER, DB_PASSW
 from backend.database import (
     create_tables_if_not_exists,
     get_app_db_connection,
-    execute_sql,
     get_table_schemas,
     get_all_databases,
     test_db_connection,
@@ -47,11 +46,28 @@ from backend.database import (
     get_conversations,
     get_conversation_messages,
     add_message_to_conversation,
-    delete_conversation
+    delete_conversation,
+    get_compiled_playbook_sql,
+    save_compiled_playbook_sql,
+    delete_compiled_playbook_sql
 )
 from agent.agent import Agent
 from backend.api.monitoring import router as monitoring_router
 from backend.api.aws import router as aws_router
+from backend.monitoring.pg_capabilities import capability_cache
+from backend.monitoring.slow_query_log import NO_STATEMENT, SlowQueryLogParser
+from backend.services.playbook_runner import run_playbook, step_dependencies
+from backend.services.playbook_sql import (
+    SOURCE_LLM,
+    compilable_sql,
+    invalid_version_keys,
+    needs_capabilities,
+    prompt_hash,
+    resolve_step_sql
+)
+from backend.services.read_routing import PRIMARY_ONLY, ROUTING_POLICIES, replica_router
+from backend.services.sql_analysis import SqlStatement, analyze_response, classify_statement, is_refusal, split_statements
+from backend.services.sql_execution import TurnBudget, connection_pools, execute_statements
 
 # Initialize OpenAI API key globally (can be overridden by selected key from DB)
 openai.api_key = os.getenv("OPENAI_API_KEY")
@@ -86,10 +102,19 @@ async def startup_event():
     try:
         from backend.services.mcp_manager import mcp_manager
         mcp_manager.sync_all_databases()
+        mcp_manager.supervisor.start()
+        mcp_manager.health.start(mcp_manager.get_postgres_server_targets)
         print("INFO: MCP databases synchronized successfully.")
     except Exception as e:
         print(f"WARNING: Failed to sync MCP databases: {e}")
     
+    # Resume slow query log tailing targets saved before the restart
+    try:
+        from backend.monitoring.log_tailer import log_tailer
+        log_tailer.resume()
+    except Exception as e:
+        print(f"WARNING: Failed to resume slow query log tailing: {e}")
+    
     # Fetch initial DB connections for the agent
     agent_instance = Agent()
     initial_db_connections = get_registered_databases()
@@ -105,6 +130,10 @@ async def shutdown_event():
     print("INFO: FastAPI app shutdown. Stopping agent (if running)...")
     # In a real scenario, you might want a more graceful shutdown for the agent thread
     # For now, relying on daemon=True to terminate with main process.
+    from backend.services.mcp_manager import mcp_manager
+    mcp_manager.supervisor.stop()
+    mcp_manager.health.stop()
+    connection_pools.close_all()
 
 # API Routers
 app.include_router(monitoring_router)
@@ -112,20 +141,23 @@ app.include_router(aws_router)
 from backend.api.mcp import router as mcp_router
 app.include_router(mcp_router)
 
-# Slow query log parsing function (PostgreSQL specific implementation needed)
-def parse_slow_query_log(log_path, min_time=1.0):
+# Slow query log parsing function (PostgreSQL log_min_duration_statement output)
+def parse_slow_query_log(log_path, min_time=1.0, chunk_size=8 * 1024 * 1024):
     slow_queries = []
     if not os.path.exists(log_path):
         return slow_queries
-    with open(log_path, 'r') as f:
-        log = f.read()
-    # PostgreSQL slow query log format needs to be adjusted
-    pattern = re.compile(r'duration: ([\d\\.]+) ms.*?statement: (SELECT.*?;)', re.DOTALL)
-    for match in pattern.finditer(log):
-        query_time = float(match.group(1)) / 1000.0  # ms -> s
-        query = match.group(2).strip()
-        if query_time >= min_time:
-            slow_queries.append((query_time, query))
+    parser = SlowQueryLogParser(min_duration_ms=min_time * 1000.0)
+    entries = []
+    with open(log_path, 'r', errors='replace') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            entries.extend(parser.feed(chunk))
+    entries.extend(parser.close())
+    for entry in entries:
+        if entry['query'] != NO_STATEMENT:
+            slow_queries.append((entry['duration'] / 1000.0, entry['query']))  # ms -> s
     return slow_queries
 
 def mask_key(key):
@@ -133,15 +165,67 @@ def mask_key(key):
         return '*' * len(key)
     return key[:3] + '*' * (len(key)-7) + key[-4:]
 
-async def process_single_prompt(
-    prompt: str,
-    db_name: str,
-    db_connections: list,
-    chat_history: list
-) -> Dict[str, Any]:
+def serialize_rows(rows) -> list:
+    """Convert datetime objects in result rows to strings for JSON serialization"""
+    serialized_data = []
+    for row in rows:
+        serialized_row = []
+        for item in row:
+            if isinstance(item, datetime.datetime):
+                serialized_row.append(item.isoformat())
+            else:
+                serialized_row.append(item)
+        serialized_data.append(tuple(serialized_row))
+    return serialized_data
+
+def execute_ai_statements(statements: List[SqlStatement], target_db_info: Dict[str, Any]):
     """
-    Processes a single prompt, including AI calls and SQL execution,
-    and returns a message object to be added to the chat history.
+    Runs every classified statement of one turn (independent read-only statements in
+    parallel, within the per-turn row/time budget); writes are skipped unless
+    AI_SQL_WRITE_POLICY=allow.
+    A single statement keeps the {"headers", "data"} / "Error: ..." result shape;
+    several statements add a per-statement "statements" list and the budget usage.
+    """
+    budget = TurnBudget()
+    results = execute_statements(statements, target_db_info, budget)
+    for entry in results:
+        if "data" in entry:
+            entry["data"] = serialize_rows(entry["data"])
+
+    if len(results) == 1:
+        entry = results[0]
+        if "error" in entry:
+            return entry["error"]
+        return {"headers": entry["headers"], "data": entry["data"], "routed_to": entry["routed_to"],
+                "truncated": entry["truncated"]}
+
+    # Show the last statement that returned rows as the main table
+    last = next((entry for entry in reversed(results) if entry.get("headers")), None)
+    return {
+        "headers": last["headers"] if last else [],
+        "data": last["data"] if last else [],
+        "statements": results,
+        "budget": budget.to_dict()
+    }
+
+def get_target_db_info(db_name: str, db_connections: list):
+    """Connection info that SQL for db_name runs against (the app DB for "__ALL_DBS__")"""
+    if db_name == "__ALL_DBS__":
+        return {
+            "host": DB_HOST,
+            "port": DB_PORT,
+            "user": DB_USER,
+            "password": DB_PASSWORD,
+            "dbname": DB_NAME
+        }
+    return next((db for db in db_connections if db["name"] == db_name), None)
+
+def prepare_prompt_context(db_name: str, db_connections: list) -> Dict[str, Any]:
+    """
+    Resolves everything a prompt needs that does not depend on the prompt itself
+    (target DB, schema, system prompt, MCP context and the selected AI model), so a
+    playbook run can compute it once for all of its steps.
+    Returns {"error": message} when prompts for this DB cannot be processed.
     """
     # MCP 컨텍스트 추가
     from backend.services.ai_chat_service import ai_chat_service
@@ -155,13 +239,7 @@ async def process_single_prompt(
         # For "__ALL_DBS__", the AI will query the application's internal DB
         # to get metadata about all registered databases.
         # The schema provided to AI will be about the internal DB's 'databases' table.
-        target_db_info = {
-            "host": DB_HOST,
-            "port": DB_PORT,
-            "user": DB_USER,
-            "password": DB_PASSWORD,
-            "dbname": DB_NAME
-        }
+        target_db_info = get_target_db_info(db_name, db_connections)
         # Provide schema of the internal 'databases' table to AI
         schema_for_ai = "Table: databases (id INTEGER, name VARCHAR, host VARCHAR, port INTEGER, username VARCHAR, password VARCHAR, dbname VARCHAR)\n"
         schema_for_ai += "\nRegistered Databases:\n" + "\n".join([f"- {db['name']} (Host: {db['host']}, Port: {db['port']}, DB: {db['dbname']})" for db in db_connections])
@@ -185,16 +263,49 @@ async def process_single_prompt(
 """
     else:
         # For a specific DB, get its connection info and schema
-        target_db_info = next((db for db in db_connections if db["name"] == db_name), None)
+        target_db_info = get_target_db_info(db_name, db_connections)
         if not target_db_info:
-            return {"role": "assistant", "sender": "assistant", "content": None, "sql": "Error", "result": f"DB connection info for {db_name} not found."}
+            return {"error": f"DB connection info for {db_name} not found."}
 
         schema_for_ai = get_table_schemas(target_db_info)
         if not schema_for_ai:
-            return {"role": "assistant", "sender": "assistant", "content": None, "sql": "Error", "result": "Could not retrieve DB schema."}
+            return {"error": "Could not retrieve DB schema."}
         
         system_prompt_base = """당신은 PostgreSQL 데이터베이스 전문가입니다. 사용자의 자연어 질문을 SQL 쿼리로 변환하거나, 데이터베이스 관련 질문에 답변하는 것이 당신의 임무입니다.\n모든 답변은 한국어로 해주세요.\n\n주어진 데이터베이스 스키마와 질문을 바탕으로 질문에 답하는 SQL 쿼리를 생성하고, 그 쿼리에 대한 설명과 실행 결과에 대한 해석을 제공하세요. 필요하다면 추가적인 데이터베이스 관련 정보도 대화하듯이 설명해주세요.\n\n데이터베이스 스키마:\n{schema}\n\n지침:\n- SQL 쿼리는 반드시 ```sql ... ``` 블록 안에 포함해주세요.\n- SQL 쿼리 설명, 실행 결과 해석, 추가 정보 등은 자유롭게 마크다운을 사용하여 설명해주세요. (예: 제목, 목록, 굵게, 굵게, 코드 블록 등)\n- 만약 주어진 스키마로 질문에 답할 수 없다면, 그 이유를 한국어로 설명해주세요.\n- SQL 방언은 PostgreSQL입니다.\n- 데이터베이스 및 SQL과 관련 없는 질문이라도, 먼저 당신의 전문 분야가 데이터베이스임을 밝히고 최선을 다해 답변해 주세요.\n"""
 
+    selected_ai_model = get_selected_ai_model()
+    if not selected_ai_model:
+        return {"error": "사용할 AI 모델을 먼저 선택해주세요."}
+
+    return {
+        "target_db_info": target_db_info,
+        "schema": schema_for_ai,
+        "system_prompt_base": system_prompt_base,
+        "mcp_context": mcp_context,
+        "ai_model": selected_ai_model
+    }
+
+def run_single_prompt(
+    prompt: str,
+    db_name: str,
+    db_connections: list,
+    chat_history: list,
+    prompt_context: Dict[str, Any] = None
+) -> Dict[str, Any]:
+    """
+    Processes a single prompt, including AI calls and SQL execution,
+    and returns a message object to be added to the chat history.
+    Blocking; pass a prompt_context from prepare_prompt_context to reuse it.
+    """
+    context = prompt_context or prepare_prompt_context(db_name, db_connections)
+    if "error" in context:
+        return {"role": "assistant", "sender": "assistant", "content": None, "sql": "Error", "result": context["error"]}
+    target_db_info = context["target_db_info"]
+    schema_for_ai = context["schema"]
+    system_prompt_base = context["system_prompt_base"]
+    mcp_context = context["mcp_context"]
+    selected_ai_model = context["ai_model"]
+
     error_feedback = ""
     if chat_history and len(chat_history) > 1:
         # Check for previous errors in assistant messages
@@ -245,10 +356,6 @@ async def process_single_prompt(
     # Add the current user's prompt to the list of messages for the API
     messages_for_api.append(ChatCompletionUserMessageParam(role="user", content=prompt))
 
-    selected_ai_model = get_selected_ai_model()
-    if not selected_ai_model:
-        return {"role": "assistant", "sender": "assistant", "content": None, "sql": "Error", "result": "사용할 AI 모델을 먼저 선택해주세요."}
-
     client = None
     model_to_use = None
     if selected_ai_model["type"] == "openai":
@@ -322,49 +429,26 @@ async def process_single_prompt(
 
         ai_response_sql = ai_response_content.strip() if ai_response_content else ""
         
-        sql_to_run = None
-        # Extract SQL from AI response
-        sql_match = re.search(r"```sql\s*([\s\S]+?)```", ai_response_sql, re.IGNORECASE)
-        if sql_match:
-            sql_to_run = sql_match.group(1).strip()
-        elif ai_response_sql.lower().strip().startswith(('select', 'show', 'explain', 'with')):
-             sql_to_run = ai_response_sql
+        # Extract and classify every SQL statement in the AI response
+        statements = analyze_response(ai_response_sql)
+        sql_to_run = ";\n".join(statement.text for statement in statements) if statements else None
         
         result_message = ""
         bubble_content = ai_response_sql # Default to AI's full response for bubble content
         
-        # If AI explicitly states it can't answer or gives a general error
-        if "I can't answer this question" in ai_response_sql or "죄송합니다" in ai_response_sql:
+        # If AI explicitly states it can't answer (and generated no SQL)
+        if is_refusal(ai_response_sql, statements):
              result_message = ai_response_sql
-             sql_to_run = None
              bubble_content = ai_response_sql # Ensure the refusal message is shown
-        elif not sql_to_run:
-             # If no SQL was generated, and it's not a refusal, just show AI's content
-             pass
         
         # If AI response is exactly the SQL, don't duplicate in bubble_content
-        if sql_to_run and sql_to_run == bubble_content:
+        if sql_to_run and sql_to_run == bubble_content.rstrip().rstrip(';').strip():
             bubble_content = None
 
         ai_message: Dict[str, Any] = {"role": "assistant", "sender": "assistant", "content": bubble_content, "sql": sql_to_run, "result": None}
 
-        if sql_to_run:
-            try:
-                # Execute SQL against the determined target_db_info
-                headers, result_data = execute_sql(sql_to_run, target_db_info)
-                # Convert datetime objects in result_data to strings for JSON serialization
-                serialized_data = []
-                for row in result_data:
-                    serialized_row = []
-                    for item in row:
-                        if isinstance(item, datetime.datetime):
-                            serialized_row.append(item.isoformat())
-                        else:
-                            serialized_row.append(item)
-                    serialized_data.append(tuple(serialized_row))
-                ai_message["result"] = {"headers": headers, "data": serialized_data}
-            except Exception as e:
-                ai_message["result"] = f"Error: {e}"
+        if statements:
+            ai_message["result"] = execute_ai_statements(statements, target_db_info)
         else:
             if result_message: # If there's a refusal message
                 ai_message["result"] = result_message
@@ -374,6 +458,18 @@ async def process_single_prompt(
     except Exception as e:
         return {"role": "assistant", "sender": "assistant", "content": None, "sql": "Error", "result": f"An error occurred with OpenAI: {e}"}
 
+async def process_single_prompt(
+    prompt: str,
+    db_name: str,
+    db_connections: list,
+    chat_history: list
+) -> Dict[str, Any]:
+    """
+    Processes a single prompt, including AI calls and SQL execution,
+    and returns a message object to be added to the chat history.
+    """
+    return run_single_prompt(prompt, db_name, db_connections, chat_history)
+
 def get_playbooks():
     try:
         with open('playbooks.json', 'r', encoding='utf-8') as f:
@@ -381,6 +477,35 @@ def get_playbooks():
     except (FileNotFoundError, json.JSONDecodeError):
         return []
 
+def find_playbook(name: str):
+    return next((p for p in get_playbooks() if p.get("name") == name), None)
+
+def playbook_capabilities(steps: list, target_db_info: Dict[str, Any]):
+    """Server/pg_stat_statements versions for version-specific pinned SQL (None if unused or unreachable)"""
+    if not any(needs_capabilities(step) for step in steps):
+        return None
+    try:
+        return capability_cache.get_for(target_db_info)
+    except Exception as e:
+        print(f"WARNING: Could not read server capabilities for playbook SQL: {e}")
+        return None
+
+def run_pinned_sql(sql: str, source: str, target_db_info: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Executes pinned/compiled playbook SQL without an LLM call (same write policy as AI SQL).
+    Playbook SQL reads live activity, lock and statistics views, so it always runs on the
+    primary instead of following the DB's replica read routing.
+    """
+    statements = [classify_statement(text) for text in split_statements(sql)]
+    return {
+        "role": "assistant",
+        "sender": "assistant",
+        "content": None,
+        "sql": ";\n".join(statement.text for statement in statements),
+        "result": execute_ai_statements(statements, dict(target_db_info, read_routing=PRIMARY_ONLY)),
+        "source": source
+    }
+
 # Health check and system info endpoints
 @app.get("/health")
 def health_check():
@@ -423,9 +548,18 @@ def api_add_database(
     password: str = Form(''),
     dbname: str = Form(''),
     remark: str = Form(None),  # 비고(설명) 필드 추가, 선택사항
-    cloudwatch_id: str = Form(None)  # AWS RDS 인스턴스ID (CloudWatch용)
+    cloudwatch_id: str = Form(None),  # AWS RDS 인스턴스ID (CloudWatch용)
+    # Replica settings: omitted fields keep the stored values (an empty replica_hosts clears the list)
+    replica_hosts: str = Form(None),  # 읽기 복제본 "host:port" 목록 (쉼표 구분)
+    read_routing: str = Form(None),  # primary / replica / lag_aware
+    max_replica_lag_seconds: int = Form(None)
 ):
-    success, message = add_or_update_database(name, host, port, user, password, dbname, remark, cloudwatch_id)
+    if read_routing is not None and read_routing not in ROUTING_POLICIES:
+        return {"status": "error", "message": f"read_routing must be one of {', '.join(ROUTING_POLICIES)}"}
+    success, message = add_or_update_database(
+        name, host, port, user, password, dbname, remark, cloudwatch_id,
+        replica_hosts, read_routing, max_replica_lag_seconds
+    )
     if success:
         # Update agent with new database list
         if agent_instance:
@@ -434,6 +568,19 @@ def api_add_database(
     else:
         return {"status": "error", "message": message}
 
+@app.get("/api/databases/{name}/replicas")
+def api_get_database_replicas(name: str):
+    target_db = next((db for db in get_registered_databases() if db["name"] == name), None)
+    if not target_db:
+        return {"status": "error", "message": f"Database '{name}' not found."}
+    return {
+        "status": "success",
+        "read_routing": target_db.get("read_routing") or "primary",
+        "max_replica_lag_seconds": target_db.get("max_replica_lag_seconds"),
+        "replicas": replica_router.status(target_db),
+        "eligible": [f"{host}:{port}" for host, port in replica_router.eligible_replicas(target_db)]
+    }
+
 @app.delete("/api/databases/{name}")
 def api_delete_database(name: str):
     success, message = delete_database(name)
@@ -583,6 +730,164 @@ def api_delete_claude_config_endpoint(name: str):
 def api_get_playbooks_endpoint():
     return get_playbooks()
 
+@app.post("/api/playbooks/{name}/run")
+def api_run_playbook_endpoint(name: str, db_name: str = Form(...), conversation_id: int = Form(None),
+                              use_pinned_sql: bool = Form(True)):
+    """
+    Runs every step of a playbook against one DB and streams the results as NDJSON
+    lines in completion order: a "start" line, one "step" line per step and a final
+    "done" line. Independent steps run concurrently (PLAYBOOK_MAX_PARALLEL), and the
+    schema, MCP context and AI model are resolved once for the whole run.
+    Steps with pinned or compiled SQL run it directly unless use_pinned_sql is false;
+    each step's message carries its "source" (pinned, compiled or llm).
+    If conversation_id is given, the steps are saved to it in playbook order.
+    """
+    playbook = find_playbook(name)
+    if not playbook:
+        return {"status": "error", "message": f"Playbook '{name}' not found."}
+    steps = playbook.get("steps", [])
+    try:
+        step_dependencies(steps)
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+    invalid = invalid_version_keys(steps)
+    if invalid:
+        return {"status": "error", "message": f"Invalid SQL version keys (expected e.g. \"13\" or \"9.6\"): {invalid}"}
+
+    db_connections = get_registered_databases()
+    target_db_info = get_target_db_info(db_name, db_connections)
+    if not target_db_info:
+        return {"status": "error", "message": f"DB connection info for {db_name} not found."}
+
+    # Pinned SQL and SQL compiled for this DB skip the LLM entirely
+    resolved = [(None, SOURCE_LLM)] * len(steps)
+    if use_pinned_sql:
+        compiled, error = get_compiled_playbook_sql(db_name, name)
+        if error:
+            print(f"WARNING: Failed to load compiled playbook SQL: {error}")
+        caps = playbook_capabilities(steps, target_db_info)
+        resolved = [resolve_step_sql(step, compiled.get(index), caps) for index, step in enumerate(steps)]
+
+    prompt_context = None
+    if any(sql is None for sql, _ in resolved):
+        prompt_context = prepare_prompt_context(db_name, db_connections)
+        if "error" in prompt_context:
+            return {"status": "error", "message": prompt_context["error"]}
+
+    def run_step(index, step, chat_history):
+        sql, source = resolved[index]
+        if sql:
+            return run_pinned_sql(sql, source, target_db_info)
+        message = run_single_prompt(step["prompt"], db_name, db_connections, chat_history, prompt_context)
+        return dict(message, source=SOURCE_LLM)
+
+    def stream():
+        started = time.monotonic()
+        yield json.dumps({"type": "start", "playbook": name, "steps": len(steps)}, ensure_ascii=False) + "\n"
+        results = []
+        for result in run_playbook(steps, run_step):
+            results.append(result)
+            yield json.dumps(dict(result, type="step"), ensure_ascii=False, default=str) + "\n"
+
+        save_errors = []
+        if conversation_id:
+            for result in sorted(results, key=lambda r: r["index"]):
+                message = result["message"] or {"content": None, "sql": "Error", "result": f"Error: {result['error']}"}
+                success, error = add_message_to_conversation(conversation_id, "user", content=result["prompt"])
+                if success:
+                    success, error = add_message_to_conversation(
+                        conversation_id,
+                        "assistant",
+                        content=message["content"],
+                        sql_query=message["sql"],
+                        sql_result=json.dumps(message["result"], ensure_ascii=False, default=str) if message["result"] else None
+                    )
+                if not success:
+                    save_errors.append(error)
+        yield json.dumps({
+            "type": "done",
+            "playbook": name,
+            "elapsed_ms": round((time.monotonic() - started) * 1000, 1),
+            "failed_steps": [r["index"] for r in results if r["error"]],
+            "llm_steps": sum(1 for sql, _ in resolved if sql is None),
+            "save_errors": save_errors
+        }, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+@app.post("/api/playbooks/{name}/compile")
+def api_compile_playbook_endpoint(name: str, db_name: str = Form(...), force: bool = Form(False)):
+    """
+    Freezes the SQL the LLM generates for each step without pinned SQL, per DB, so
+    later runs skip the LLM. Only read-only SQL that ran without errors is stored.
+    Steps whose compiled SQL still matches their prompt are kept unless force is set.
+    Steps are compiled independently (dependsOn only affects runs).
+    """
+    playbook = find_playbook(name)
+    if not playbook:
+        return {"status": "error", "message": f"Playbook '{name}' not found."}
+    steps = playbook.get("steps", [])
+    invalid = invalid_version_keys(steps)
+    if invalid:
+        return {"status": "error", "message": f"Invalid SQL version keys (expected e.g. \"13\" or \"9.6\"): {invalid}"}
+
+    db_connections = get_registered_databases()
+    target_db_info = get_target_db_info(db_name, db_connections)
+    if not target_db_info:
+        return {"status": "error", "message": f"DB connection info for {db_name} not found."}
+    compiled, error = get_compiled_playbook_sql(db_name, name)
+    if error:
+        return {"status": "error", "message": error}
+    caps = playbook_capabilities(steps, target_db_info)
+
+    to_compile, skipped = [], []
+    for index, step in enumerate(steps):
+        _, source = resolve_step_sql(step, None if force else compiled.get(index), caps)
+        if source == SOURCE_LLM:
+            to_compile.append(index)
+        else:
+            skipped.append({"index": index, "title": step.get("title"), "reason": source})
+
+    compiled_steps, failed, entries = [], [], {}
+    if to_compile:
+        prompt_context = prepare_prompt_context(db_name, db_connections)
+        if "error" in prompt_context:
+            return {"status": "error", "message": prompt_context["error"]}
+
+        def run_step(position, step, chat_history):
+            return run_single_prompt(step["prompt"], db_name, db_connections, chat_history, prompt_context)
+
+        compile_steps = [{"title": steps[i].get("title"), "prompt": steps[i]["prompt"]} for i in to_compile]
+        for result in run_playbook(compile_steps, run_step):
+            index = to_compile[result["index"]]
+            sql = compilable_sql(result["message"]) if result["message"] else None
+            if sql:
+                entries[index] = (prompt_hash(steps[index]["prompt"]), sql)
+                compiled_steps.append({"index": index, "title": result["title"], "sql": sql})
+            else:
+                failed.append({
+                    "index": index,
+                    "title": result["title"],
+                    "error": result["error"] or "No read-only SQL that ran without errors."
+                })
+
+    success, error = save_compiled_playbook_sql(db_name, name, entries)
+    if not success:
+        return {"status": "error", "message": error}
+    return {
+        "status": "success",
+        "compiled": sorted(compiled_steps, key=lambda s: s["index"]),
+        "skipped": skipped,
+        "failed": sorted(failed, key=lambda s: s["index"])
+    }
+
+@app.delete("/api/playbooks/{name}/compile")
+def api_delete_compiled_playbook_endpoint(name: str, db_name: str):
+    deleted, error = delete_compiled_playbook_sql(db_name, name)
+    if error:
+        return {"status": "error", "message": error}
+    return {"status": "success", "deleted": deleted}
+
 @app.post("/api/conversations/new")
 async def api_create_new_conversation(db_name: str = Form(...), title: str = Form(...)):
     conversation_id, error = create_conversation(title, db_name)
@@ -12,6 +12,10 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 import time
 
+# 프로젝트 루트를 경로에 추가해 백엔드와 같은 boto3 세션 캐시를 사용
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.integrations.aws_session import session_cache
+
 class CloudWatchLogsMCPServer:
     def __init__(self):
         self.region = os.getenv('AWS_DEFAULT_REGION', 'ap-northeast-2')
@@ -22,29 +26,44 @@ class CloudWatchLogsMCPServer:
         # AWS 클라이언트 초기화
         self.setup_aws_clients()
     
+    def _session_factory(self) -> boto3.Session:
+        session_kwargs = {'region_name': self.region}
+        
+        if self.access_key and self.secret_key:
+            session_kwargs.update({
+                'aws_access_key_id': self.access_key,
+                'aws_secret_access_key': self.secret_key
+            })
+            if self.session_token:
+                session_kwargs['aws_session_token'] = self.session_token
+        
+        return boto3.Session(**session_kwargs)
+    
+    def _get_client(self, service: str):
+        """공유 세션 캐시에서 클라이언트 조회"""
+        try:
+            return session_cache.get_client(
+                key=("env", self.region),
+                fingerprint=(self.access_key, self.secret_key, self.session_token),
+                service=service,
+                factory=self._session_factory
+            )
+        except Exception as e:
+            print(f"ERROR: Failed to initialize AWS {service} client: {e}", file=sys.stderr)
+            return None
+    
+    @property
+    def logs_client(self):
+        return self._get_client('logs')
+    
+    @property
+    def rds_client(self):
+        return self._get_client('rds')
+    
     def setup_aws_clients(self):
         """AWS 클라이언트 설정"""
-        try:
-            session_kwargs = {'region_name': self.region}
-            
-            if self.access_key and self.secret_key:
-                session_kwargs.update({
-                    'aws_access_key_id': self.access_key,
-                    'aws_secret_access_key': self.secret_key
-                })
-                if self.session_token:
-                    session_kwargs['aws_session_token'] = self.session_token
-            
-            session = boto3.Session(**session_kwargs)
-            self.logs_client = session.client('logs')
-            self.rds_client = session.client('rds')
-            
+        if self.logs_client and self.rds_client:
             print(f"INFO: AWS clients initialized for region {self.region}", file=sys.stderr)
-            
-        except Exception as e:
-            print(f"ERROR: Failed to initialize AWS clients: {e}", file=sys.stderr)
-            self.logs_client = None
-            self.rds_client = None
     
     def get_rds_log_groups(self, db_instance_id: str) -> List[str]:
         """RDS 인스턴스의 로그 그룹 목록 조회"""
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+슬로우 쿼리 로그 파서 마이크로 벤치마크
+RDS 기본 log_line_prefix 형식의 합성 PostgreSQL 로그를 만들어 청크 단위로 파싱하고 처리량(MB/s)을 출력합니다.
+
+사용 예:
+    python scripts/bench_slow_query_parser.py --size-mb 2048
+    python scripts/bench_slow_query_parser.py --path /tmp/postgresql.log --keep
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.monitoring.slow_query_log import SlowQueryLogParser  # noqa: E402
+
+PREFIX = "2024-01-01 00:{m:02d}:{s:02d} UTC:10.0.0.{h}(5{p:04d}):app@appdb:[{p}]:"
+
+LINES = [
+    "LOG:  duration: {d:.3f} ms  statement: SELECT * FROM orders WHERE customer_id = {n} ORDER BY created_at DESC LIMIT 50\n",
+    "LOG:  duration: {d:.3f} ms  execute S_{n}: SELECT id, status FROM shipments WHERE order_id = $1\n"
+    "{prefix}DETAIL:  parameters: $1 = '{n}'\n",
+    "LOG:  duration: {d:.3f} ms  statement: UPDATE accounts\n\tSET balance = balance - {n}\n\tWHERE id = {n};\n",
+    "LOG:  duration: {d:.3f} ms\n",
+    "LOG:  connection authorized: user=app database=appdb SSL enabled (protocol=TLSv1.3)\n",
+    "LOG:  checkpoint complete: wrote {n} buffers (0.1%); 0 WAL file(s) added, 0 removed, 1 recycled\n",
+    "ERROR:  duplicate key value violates unique constraint \"orders_pkey\"\n"
+    "{prefix}STATEMENT:  INSERT INTO orders (id) VALUES ({n})\n",
+]
+
+
+def generate(path: str, size_mb: int):
+    """지정 크기의 합성 로그 파일 생성"""
+    target = size_mb * 1024 * 1024
+    rng = random.Random(42)
+    # 미리 만든 블록을 반복해서 쓰면 생성 시간이 파싱 시간을 압도하지 않음
+    block = []
+    for i in range(20000):
+        prefix = PREFIX.format(m=i % 60, s=(i // 60) % 60, h=i % 250, p=1000 + i % 9000)
+        line = rng.choice(LINES).format(d=rng.expovariate(1 / 800.0), n=i, prefix=prefix)
+        block.append(prefix + line)
+    block = ''.join(block)
+    written = 0
+    with open(path, 'w') as f:
+        while written < target:
+            f.write(block)
+            written += len(block)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size-mb', type=int, default=512)
+    parser.add_argument('--chunk-mb', type=int, default=8)
+    parser.add_argument('--min-duration-ms', type=float, default=1000.0)
+    parser.add_argument('--path', default=None)
+    parser.add_argument('--keep', action='store_true')
+    args = parser.parse_args()
+
+    path = args.path or os.path.join(tempfile.gettempdir(), 'bench_postgresql.log')
+    if not os.path.exists(path):
+        print(f"Generating {args.size_mb}MB synthetic log at {path} ...")
+        generate(path, args.size_mb)
+    size = os.path.getsize(path)
+
+    log_parser = SlowQueryLogParser(min_duration_ms=args.min_duration_ms)
+    found = 0
+    started = time.perf_counter()
+    with open(path, 'r') as f:
+        while True:
+            chunk = f.read(args.chunk_mb * 1024 * 1024)
+            if not chunk:
+                break
+            found += len(log_parser.feed(chunk))
+    found += len(log_parser.close())
+    elapsed = time.perf_counter() - started
+
+    print(f"size: {size / 1e6:.1f}MB, slow queries: {found}, elapsed: {elapsed:.2f}s, "
+          f"throughput: {size / 1e6 / elapsed:.1f}MB/s")
+
+    if not args.keep and not args.path:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,126 +2,383 @@
 """
 PostgreSQL MCP Server
 Docker 환경의 PostgreSQL 데이터베이스와 연동하는 MCP 서버
+
+stdin/stdout 으로 줄 단위 JSON-RPC 2.0 메시지를 주고받습니다.
+- 파이프라인으로 들어온 요청은 작은 커넥션 풀 크기만큼 동시에 처리합니다.
+- notifications/cancelled 를 받으면 실행 중인 쿼리를 취소하고 응답을 보내지 않습니다.
+- query 도구에 stream=true 를 주면 결과를 notifications/query/chunk 알림으로 나눠 보냅니다.
 """
 
-import asyncio
 import json
 import os
 import sys
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from typing import Any, Dict, List, Optional
 
 import psycopg2
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
+
+PROTOCOL_VERSION = "2024-11-05"
+POOL_SIZE = int(os.getenv("MCP_PG_POOL_SIZE", "4"))
+# 스트리밍 시 알림 하나에 담는 행 수
+CHUNK_ROWS = int(os.getenv("MCP_PG_CHUNK_ROWS", "500"))
+# 스트리밍하지 않을 때 응답에 담는 최대 행 수 (넘으면 truncated=true)
+MAX_ROWS = int(os.getenv("MCP_PG_MAX_ROWS", "10000"))
+
+# JSON-RPC 오류 코드
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+# 풀/작업자 스레드를 거치지 않고 바로 응답하는 메서드
+INLINE_METHODS = ("initialize", "ping", "tools/list")
+TOOL_METHODS = ("list_tables", "describe_table", "query")
+# 서버 측 커서(DECLARE ... CURSOR FOR)로 스트리밍할 수 있는 문장 (SHOW 는 커서로 선언할 수 없음)
+ROW_RETURNING_PREFIXES = ("SELECT", "WITH", "VALUES", "TABLE")
+
+TOOLS = [
+    {
+        "name": "list_tables",
+        "description": "public 스키마의 테이블 목록",
+        "inputSchema": {"type": "object", "properties": {}}
+    },
+    {
+        "name": "describe_table",
+        "description": "테이블 컬럼 정보",
+        "inputSchema": {
+            "type": "object",
+            "properties": {"table_name": {"type": "string"}},
+            "required": ["table_name"]
+        }
+    },
+    {
+        "name": "query",
+        "description": "SQL 실행 (stream=true 이면 결과를 청크 알림으로 전송)",
+        "inputSchema": {
+            "type": "object",
+            "properties": {"query": {"type": "string"}, "stream": {"type": "boolean"}},
+            "required": ["query"]
+        }
+    },
+]
+
+
+class JsonRpcError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class RequestCancelled(Exception):
+    pass
 
 
 class PostgreSQLMCPServer:
-    def __init__(self, connection_string: str):
+    def __init__(self, connection_string: str, pool_size: int = POOL_SIZE, pool=None):
         self.connection_string = connection_string
-        self.connection = None
-    
+        self.pool_size = pool_size
+        self.pool = pool
+        self.output = sys.stdout
+        self._write_lock = threading.Lock()
+        # 처리 중인 요청 {요청 id: {'conn': 사용 중인 연결, 'cancelled': 취소 여부}}
+        self._inflight: Dict[Any, Dict[str, Any]] = {}
+        self._inflight_lock = threading.Lock()
+
     def connect(self):
-        """PostgreSQL 데이터베이스에 연결"""
+        """PostgreSQL 커넥션 풀 생성"""
         try:
-            self.connection = psycopg2.connect(
-                self.connection_string,
+            self.pool = ThreadedConnectionPool(
+                1, self.pool_size, self.connection_string,
                 cursor_factory=RealDictCursor
             )
             return True
         except Exception as e:
             print(f"Database connection failed: {e}", file=sys.stderr)
             return False
-    
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.closeall()
+            self.pool = None
+
+    @contextmanager
+    def _connection(self, request_id: Any = None):
+        """풀에서 연결을 빌려 요청에 연결해 두고 (취소용) 끝나면 반납"""
+        conn = self.pool.getconn()
+        try:
+            if request_id is not None:
+                with self._inflight_lock:
+                    entry = self._inflight.get(request_id)
+                    if entry is not None:
+                        if entry["cancelled"]:
+                            raise RequestCancelled()
+                        entry["conn"] = conn
+            yield conn
+        finally:
+            if request_id is not None:
+                with self._inflight_lock:
+                    entry = self._inflight.get(request_id)
+                    if entry is not None:
+                        entry["conn"] = None
+            self.pool.putconn(conn, close=bool(conn.closed))
+
+    def _check_cancelled(self, request_id: Any):
+        with self._inflight_lock:
+            entry = self._inflight.get(request_id)
+            if entry is not None and entry["cancelled"]:
+                raise RequestCancelled()
+
+    def cancel(self, request_id: Any):
+        """요청 취소 (실행 중이면 서버에 쿼리 취소 요청)"""
+        with self._inflight_lock:
+            entry = self._inflight.get(request_id)
+            if entry is None:
+                return
+            entry["cancelled"] = True
+            conn = entry["conn"]
+            # 잠금을 쥔 채 취소해야 그 사이 연결이 풀에 반납되어 다른 요청의 쿼리를 취소하지 않음
+            if conn is not None:
+                try:
+                    conn.cancel()
+                except Exception as e:
+                    print(f"Error cancelling request {request_id}: {e}", file=sys.stderr)
+
     def list_tables(self) -> List[str]:
         """테이블 목록 조회"""
-        if not self.connection:
+        if not self.pool:
             return []
-        
+
         try:
-            with self.connection.cursor() as cursor:
-                cursor.execute("""
-                    SELECT table_name 
-                    FROM information_schema.tables 
-                    WHERE table_schema = 'public'
-                    ORDER BY table_name;
-                """)
-                return [row['table_name'] for row in cursor.fetchall()]
+            with self._connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("""
+                        SELECT table_name
+                        FROM information_schema.tables
+                        WHERE table_schema = 'public'
+                        ORDER BY table_name;
+                    """)
+                    tables = [row['table_name'] for row in cursor.fetchall()]
+                conn.rollback()
+                return tables
         except Exception as e:
             print(f"Error listing tables: {e}", file=sys.stderr)
             return []
-    
+
     def describe_table(self, table_name: str) -> List[Dict[str, Any]]:
         """테이블 스키마 조회"""
-        if not self.connection:
+        if not self.pool:
             return []
-        
+
         try:
-            with self.connection.cursor() as cursor:
-                cursor.execute("""
-                    SELECT 
-                        column_name,
-                        data_type,
-                        is_nullable,
-                        column_default
-                    FROM information_schema.columns 
-                    WHERE table_name = %s AND table_schema = 'public'
-                    ORDER BY ordinal_position;
-                """, (table_name,))
-                return [dict(row) for row in cursor.fetchall()]
+            with self._connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("""
+                        SELECT
+                            column_name,
+                            data_type,
+                            is_nullable,
+                            column_default
+                        FROM information_schema.columns
+                        WHERE table_name = %s AND table_schema = 'public'
+                        ORDER BY ordinal_position;
+                    """, (table_name,))
+                    schema = [dict(row) for row in cursor.fetchall()]
+                conn.rollback()
+                return schema
         except Exception as e:
             print(f"Error describing table {table_name}: {e}", file=sys.stderr)
             return []
-    
-    def execute_query(self, query: str) -> Dict[str, Any]:
+
+    def execute_query(self, query: str, request_id: Any = None, stream: bool = False,
+                      progress_token: Any = None) -> Dict[str, Any]:
         """SQL 쿼리 실행"""
-        if not self.connection:
+        if not self.pool:
             return {"error": "No database connection"}
-        
-        try:
-            with self.connection.cursor() as cursor:
-                cursor.execute(query)
-                
-                # SELECT 쿼리인 경우 결과 반환
-                if query.strip().upper().startswith('SELECT'):
-                    results = cursor.fetchall()
-                    return {
-                        "success": True,
-                        "data": [dict(row) for row in results],
-                        "row_count": len(results)
-                    }
+
+        with self._connection(request_id) as conn:
+            try:
+                if stream and query.lstrip().upper().startswith(ROW_RETURNING_PREFIXES):
+                    result = self._stream_query(conn, query, request_id, progress_token)
                 else:
-                    # INSERT, UPDATE, DELETE 등의 경우
-                    self.connection.commit()
-                    return {
-                        "success": True,
-                        "affected_rows": cursor.rowcount
-                    }
-        except Exception as e:
-            self.connection.rollback()
-            return {"error": str(e)}
-    
-    def handle_request(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+                    with conn.cursor() as cursor:
+                        cursor.execute(query)
+
+                        # 결과 행이 있는 쿼리 (SELECT, WITH ... RETURNING 등)
+                        if cursor.description is not None:
+                            rows = cursor.fetchmany(MAX_ROWS + 1)
+                            result = {
+                                "success": True,
+                                "data": [dict(row) for row in rows[:MAX_ROWS]],
+                                "row_count": min(len(rows), MAX_ROWS),
+                                "truncated": len(rows) > MAX_ROWS
+                            }
+                        else:
+                            # INSERT, UPDATE, DELETE 등의 경우
+                            result = {
+                                "success": True,
+                                "affected_rows": cursor.rowcount
+                            }
+                conn.commit()
+                return result
+            except RequestCancelled:
+                conn.rollback()
+                raise
+            except Exception as e:
+                conn.rollback()
+                return {"error": str(e)}
+
+    def _stream_query(self, conn, query: str, request_id: Any, progress_token: Any) -> Dict[str, Any]:
+        """서버 측 커서로 CHUNK_ROWS 행씩 읽어 알림으로 전송 (결과 전체를 메모리에 올리지 않음)"""
+        total = 0
+        chunks = 0
+        with conn.cursor(name=f"mcp_stream_{uuid.uuid4().hex}") as cursor:
+            cursor.itersize = CHUNK_ROWS
+            cursor.execute(query)
+            while True:
+                self._check_cancelled(request_id)
+                rows = cursor.fetchmany(CHUNK_ROWS)
+                if not rows:
+                    break
+                total += len(rows)
+                self.notify("notifications/query/chunk", {
+                    "requestId": request_id,
+                    "seq": chunks,
+                    "rows": [dict(row) for row in rows]
+                })
+                if progress_token is not None:
+                    self.notify("notifications/progress", {"progressToken": progress_token, "progress": total})
+                chunks += 1
+        return {"success": True, "streamed": True, "chunks": chunks, "row_count": total}
+
+    def handle_request(self, method: str, params: Dict[str, Any], request_id: Any = None,
+                       progress_token: Any = None) -> Dict[str, Any]:
         """MCP 요청 처리"""
         if method == "list_tables":
             tables = self.list_tables()
             return {"tables": tables}
-        
+
         elif method == "describe_table":
             table_name = params.get("table_name")
             if not table_name:
                 return {"error": "table_name parameter required"}
             schema = self.describe_table(table_name)
             return {"schema": schema}
-        
+
         elif method == "query":
             query = params.get("query")
             if not query:
                 return {"error": "query parameter required"}
-            result = self.execute_query(query)
+            result = self.execute_query(query, request_id, bool(params.get("stream")), progress_token)
             return result
-        
+
         else:
             return {"error": f"Unknown method: {method}"}
 
+    def dispatch(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """JSON-RPC 요청 하나를 처리해 result 반환"""
+        method = message["method"]
+        params = message.get("params") or {}
+        request_id = message.get("id")
+        if not isinstance(params, dict):
+            raise JsonRpcError(INVALID_PARAMS, "params must be an object")
+
+        if method == "initialize":
+            return {
+                "protocolVersion": params.get("protocolVersion", PROTOCOL_VERSION),
+                "capabilities": {"tools": {}},
+                "serverInfo": {"name": "postgres-mcp-server", "version": "1.0.0"}
+            }
+        if method == "ping":
+            return {}
+        if method == "tools/list":
+            return {"tools": TOOLS}
+        if method == "tools/call":
+            name = params.get("name")
+            if name not in TOOL_METHODS:
+                raise JsonRpcError(INVALID_PARAMS, f"Unknown tool: {name}")
+            progress_token = (params.get("_meta") or {}).get("progressToken")
+            result = self.handle_request(name, params.get("arguments") or {}, request_id, progress_token)
+            return {
+                "content": [{"type": "text", "text": json.dumps(result, ensure_ascii=False, default=str)}],
+                "isError": "error" in result
+            }
+        # 이전 클라이언트용: 도구 이름을 메서드로 직접 호출
+        if method in TOOL_METHODS:
+            return self.handle_request(method, params, request_id)
+        raise JsonRpcError(METHOD_NOT_FOUND, f"Method not found: {method}")
+
+    def _write(self, message: Dict[str, Any]):
+        line = json.dumps(message, ensure_ascii=False, default=str)
+        with self._write_lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    def notify(self, method: str, params: Dict[str, Any]):
+        self._write({"jsonrpc": "2.0", "method": method, "params": params})
+
+    def _send_error(self, request_id: Any, code: int, message: str):
+        self._write({"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}})
+
+    def _respond(self, message: Dict[str, Any]):
+        request_id = message["id"]
+        try:
+            result = self.dispatch(message)
+            response = {"jsonrpc": "2.0", "id": request_id, "result": result}
+        except RequestCancelled:
+            response = None
+        except JsonRpcError as e:
+            response = {"jsonrpc": "2.0", "id": request_id, "error": {"code": e.code, "message": e.message}}
+        except Exception as e:
+            print(f"Error handling request {request_id}: {e}", file=sys.stderr)
+            response = {"jsonrpc": "2.0", "id": request_id, "error": {"code": INTERNAL_ERROR, "message": str(e)}}
+        finally:
+            with self._inflight_lock:
+                entry = self._inflight.pop(request_id, None)
+        # 취소된 요청에는 응답하지 않음
+        if response is not None and not (entry and entry["cancelled"]):
+            self._write(response)
+
+    def serve(self, input_stream=None, output_stream=None):
+        """줄 단위 JSON-RPC 루프 (입력이 끝나면 처리 중인 요청을 마치고 반환)"""
+        input_stream = input_stream or sys.stdin
+        self.output = output_stream or sys.stdout
+        with ThreadPoolExecutor(max_workers=self.pool_size) as executor:
+            for line in input_stream:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    self._send_error(None, PARSE_ERROR, "Parse error")
+                    continue
+                if not isinstance(message, dict) or message.get("jsonrpc") != "2.0":
+                    self._send_error(None, INVALID_REQUEST, "Invalid Request")
+                    continue
+                if "method" not in message:
+                    continue  # 클라이언트가 보낸 응답은 무시
+
+                method = message["method"]
+                if method == "notifications/cancelled":
+                    self.cancel((message.get("params") or {}).get("requestId"))
+                    continue
+                if "id" not in message:
+                    continue  # 그 외 알림(notifications/initialized 등)은 응답 없음
+
+                with self._inflight_lock:
+                    self._inflight[message["id"]] = {"conn": None, "cancelled": False}
+                if method in INLINE_METHODS:
+                    self._respond(message)
+                else:
+                    executor.submit(self._respond, message)
+
 
 def main():
     """MCP 서버 메인 함수"""
@@ -129,34 +386,37 @@ def main():
     if not connection_string:
         print("POSTGRES_CONNECTION_STRING environment variable required", file=sys.stderr)
         sys.exit(1)
-    
+
     server = PostgreSQLMCPServer(connection_string)
-    
+
     if not server.connect():
         print("Failed to connect to database", file=sys.stderr)
         sys.exit(1)
-    
+
     print("PostgreSQL MCP Server started successfully", file=sys.stderr)
-    
-    # 간단한 테스트
-    if len(sys.argv) > 1 and sys.argv[1] == "--test":
-        # 테스트 모드
-        print("Testing database connection...")
-        tables = server.list_tables()
-        print(f"Found tables: {tables}")
-        
-        if tables:
-            for table in tables[:3]:  # 처음 3개 테이블만 테스트
-                schema = server.describe_table(table)
-                print(f"Table {table} schema: {len(schema)} columns")
-        
-        # 간단한 쿼리 테스트
-        result = server.execute_query("SELECT COUNT(*) as total FROM conversations;")
-        print(f"Conversations count: {result}")
-    else:
-        # 실제 MCP 서버 모드 (여기서는 간단한 JSON RPC 시뮬레이션)
-        print("MCP Server ready for requests", file=sys.stderr)
+
+    try:
+        # 간단한 테스트
+        if len(sys.argv) > 1 and sys.argv[1] == "--test":
+            # 테스트 모드
+            print("Testing database connection...")
+            tables = server.list_tables()
+            print(f"Found tables: {tables}")
+
+            if tables:
+                for table in tables[:3]:  # 처음 3개 테이블만 테스트
+                    schema = server.describe_table(table)
+                    print(f"Table {table} schema: {len(schema)} columns")
+
+            # 간단한 쿼리 테스트
+            result = server.execute_query("SELECT COUNT(*) as total FROM conversations;")
+            print(f"Conversations count: {result}")
+        else:
+            print("MCP Server ready for requests", file=sys.stderr)
+            server.serve()
+    finally:
+        server.close()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,37 @@
+"""
+AI 채팅 프롬프트 컨텍스트 캐시 테스트
+"""
+from backend import database
+from backend.services import ai_chat_service as ai_chat_service_module
+from backend.services.ai_chat_service import AIChatService
+
+
+class TestPromptContextCache:
+    """format_context_for_prompt 캐시 테스트"""
+
+    def test_cached_until_config_change(self, monkeypatch):
+        """같은 설정이면 DB 를 다시 조회하지 않고, 설정 변경 알림 후에는 다시 만듦"""
+        calls = []
+        databases = [{"name": "app", "host": "db", "port": 5432, "user": "u", "dbname": "app"}]
+
+        def registered():
+            calls.append("databases")
+            return list(databases)
+
+        def selected_model():
+            calls.append("model")
+            return {"type": "openai", "name": "main", "api_key": "k"}
+
+        monkeypatch.setattr(ai_chat_service_module, "get_registered_databases", registered)
+        monkeypatch.setattr(ai_chat_service_module, "get_selected_ai_model", selected_model)
+        service = AIChatService()
+
+        first = service.format_context_for_prompt()
+        assert "- app: db:5432/app" in first
+        assert service.format_context_for_prompt() is first
+        assert calls == ["databases", "model"]
+
+        databases.append({"name": "reports", "host": "db2", "port": 5433, "user": "u", "dbname": "rpt"})
+        database.notify_config_change("databases")
+        assert "- reports: db2:5433/rpt" in service.format_context_for_prompt()
+        assert calls == ["databases", "model"] * 2
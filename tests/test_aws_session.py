@@ -0,0 +1,102 @@
+"""
+boto3 세션 캐시 테스트
+"""
+import threading
+import time
+from datetime import timedelta
+
+import boto3
+
+from backend.integrations import aws_session
+from backend.integrations.aws_session import Boto3SessionCache, refreshable_session
+
+
+def make_factory(calls, session_token=None):
+    def factory():
+        calls.append(1)
+        return boto3.Session(
+            aws_access_key_id="AKIATEST",
+            aws_secret_access_key="secret",
+            aws_session_token=session_token,
+            region_name="ap-northeast-2"
+        )
+    return factory
+
+
+class TestBoto3SessionCache:
+    """세션/클라이언트 캐시 테스트"""
+
+    def test_reuses_session_and_clients(self):
+        """같은 키/자격 증명이면 세션과 클라이언트를 재사용"""
+        cache = Boto3SessionCache()
+        calls = []
+        factory = make_factory(calls)
+
+        first = cache.get_client((1, "ap-northeast-2"), ("key",), "logs", factory)
+        second = cache.get_client((1, "ap-northeast-2"), ("key",), "logs", factory)
+
+        assert first is second
+        assert len(calls) == 1
+
+    def test_rebuilds_on_credential_change_and_invalidate(self):
+        """자격 증명이 바뀌거나 무효화되면 새 세션 생성"""
+        cache = Boto3SessionCache()
+        calls = []
+        factory = make_factory(calls)
+
+        cache.get_session((1, "r"), ("old",), factory)
+        cache.get_session((1, "r"), ("new",), factory)
+        cache.invalidate()
+        cache.get_session((1, "r"), ("new",), factory)
+
+        assert len(calls) == 3
+
+    def test_session_token_refreshed_from_store(self):
+        """session token 세션은 갱신 주기가 지나야 저장소에서 다시 읽은 값으로 자격 증명을 갱신"""
+        stored = {"access_key": "AKIAOLD", "secret_key": "secret", "session_token": "old-token"}
+        loads = []
+
+        def load():
+            loads.append(1)
+            return dict(stored)
+
+        session = refreshable_session(load, "ap-northeast-2")
+        credentials = session.get_credentials()
+        assert credentials.method == "stored-session-token"
+        stored.update(access_key="AKIANEW", session_token="new-token")
+
+        # 갱신 주기 안에서는 접근할 때마다 저장소를 다시 읽지 않음
+        for _ in range(3):
+            assert session.get_credentials().get_frozen_credentials().token == "old-token"
+        assert len(loads) == 1
+
+        credentials._expiry_time = credentials._expiry_time - timedelta(seconds=aws_session.CREDENTIAL_REFRESH_INTERVAL)
+
+        frozen = credentials.get_frozen_credentials()
+        assert (frozen.access_key, frozen.token) == ("AKIANEW", "new-token")
+        assert len(loads) == 2
+
+    def test_builds_outside_cache_lock_once_per_key(self):
+        """느린 세션 생성 중에도 다른 키는 막히지 않고, 같은 키는 한 번만 생성"""
+        cache = Boto3SessionCache()
+        release = threading.Event()
+        calls = []
+
+        def slow_factory():
+            calls.append("slow")
+            release.wait(2)
+            return boto3.Session(region_name="us-east-1")
+
+        workers = [threading.Thread(target=cache.get_session, args=(("slow", "r"), ("k",), slow_factory)) for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        time.sleep(0.1)
+
+        started = time.time()
+        cache.get_session(("fast", "r"), ("k",), make_factory(calls))
+        assert time.time() - started < 1
+
+        release.set()
+        for worker in workers:
+            worker.join()
+        assert calls.count("slow") == 1
@@ -0,0 +1,176 @@
+"""
+CloudWatch Logs 페이지/병렬 조회 테스트
+"""
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from botocore.exceptions import ClientError
+
+from backend.integrations import cloudwatch_logs
+from backend.integrations.cloudwatch_logs import (
+    filter_log_events,
+    iter_log_event_pages,
+    list_streams_in_range,
+    run_insights_query,
+    stream_log_events,
+)
+
+
+class FakeLogsClient:
+    """스트림마다 3페이지를 반환하고, 마지막에는 같은 토큰을 돌려주는 가짜 클라이언트"""
+
+    def __init__(self, throttle_first: bool = False):
+        self.calls = []
+        self.throttle_first = throttle_first
+        self.lock = threading.Lock()
+
+    def get_log_events(self, **kwargs):
+        with self.lock:
+            self.calls.append(kwargs)
+            if self.throttle_first:
+                self.throttle_first = False
+                raise ClientError({"Error": {"Code": "ThrottlingException", "Message": "slow down"}}, "GetLogEvents")
+        page = int(kwargs.get("nextToken", "f/0").split("/")[1])
+        if page >= 3:
+            return {"events": [], "nextForwardToken": kwargs["nextToken"]}
+        events = [{"timestamp": page * 10 + i, "message": f"{kwargs['logStreamName']}-{page}-{i}"} for i in range(2)]
+        return {"events": events, "nextForwardToken": f"f/{page + 1}"}
+
+    def describe_log_streams(self, **kwargs):
+        if "nextToken" not in kwargs:
+            return {"logStreams": [{"logStreamName": "a", "lastEventTimestamp": 300},
+                                   {"logStreamName": "b", "lastEventTimestamp": 200}],
+                    "nextToken": "p2"}
+        return {"logStreams": [{"logStreamName": "c", "lastEventTimestamp": 150},
+                               {"logStreamName": "d", "lastEventTimestamp": 50}],
+                "nextToken": "p3"}
+
+
+class TestLogEventPages:
+    """단일 스트림 페이지 조회 테스트"""
+
+    def test_follows_forward_token_until_repeat(self):
+        """nextForwardToken 을 따라가다 토큰이 반복되면 종료"""
+        client = FakeLogsClient()
+        pages = list(iter_log_event_pages(client, "g", "s", 0, 100))
+
+        assert len(pages) == 3
+        assert len(client.calls) == 4
+        assert client.calls[0]["startFromHead"] is True
+
+    def test_max_events_cap(self):
+        """max_events 에 도달하면 더 이상 조회하지 않음"""
+        client = FakeLogsClient()
+        pages = list(iter_log_event_pages(client, "g", "s", 0, 100, max_events=3))
+
+        assert sum(len(p) for p in pages) == 3
+        assert len(client.calls) == 2
+
+    def test_retries_throttling(self):
+        """스로틀링 오류는 백오프 후 재시도"""
+        client = FakeLogsClient(throttle_first=True)
+        with patch.object(cloudwatch_logs.time, "sleep") as sleep:
+            pages = list(iter_log_event_pages(client, "g", "s", 0, 100))
+
+        assert len(pages) == 3
+        assert sleep.call_count == 1
+
+    def test_streams_in_range(self):
+        """조회 기간 이전에 마지막 이벤트가 있는 스트림에서 페이지 조회 중단"""
+        streams = list_streams_in_range(FakeLogsClient(), "g", start_time=100)
+
+        assert [s["logStreamName"] for s in streams] == ["a", "b", "c"]
+
+
+class TestStreamLogEvents:
+    """여러 스트림 병렬 조회 테스트"""
+
+    def test_collects_all_pages(self):
+        """모든 스트림의 모든 페이지가 전달됨"""
+        client = FakeLogsClient()
+        targets = [("g", f"s{i}") for i in range(5)]
+
+        results = list(stream_log_events(client, targets, 0, 100, max_workers=3))
+
+        assert len(results) == 15
+        assert {stream for _, stream, _ in results} == {f"s{i}" for i in range(5)}
+
+    def test_early_stop_does_not_hang(self):
+        """호출자가 중간에 순회를 멈춰도 작업 스레드가 종료됨"""
+        client = FakeLogsClient()
+        targets = [("g", f"s{i}") for i in range(20)]
+
+        gen = stream_log_events(client, targets, 0, 100, max_workers=1)
+        next(gen)
+        gen.close()
+        time.sleep(0.3)
+
+        # 대기 중이던 나머지 스트림은 GetLogEvents 를 한 번도 호출하지 않음
+        assert {call["logStreamName"] for call in client.calls} <= {"s0", "s1"}
+
+
+class FakeServerSideLogsClient:
+    """filter_log_events 2페이지와 두 번째 폴링에서 완료되는 Insights 쿼리를 흉내내는 가짜 클라이언트"""
+
+    def __init__(self, final_status: str = "Complete"):
+        self.filter_calls = []
+        self.polls = 0
+        self.final_status = final_status
+        self.started = None
+
+    def filter_log_events(self, **kwargs):
+        self.filter_calls.append(kwargs)
+        if "nextToken" not in kwargs:
+            return {"events": [{"timestamp": 1, "message": "duration: 1500.0 ms  statement: SELECT 1"}],
+                    "nextToken": "n1"}
+        return {"events": [{"timestamp": 2, "message": "duration: 2500.0 ms  statement: SELECT 2"}]}
+
+    def start_query(self, **kwargs):
+        self.started = kwargs
+        return {"queryId": "q-1"}
+
+    def get_query_results(self, queryId):
+        self.polls += 1
+        if self.polls < 2:
+            return {"status": "Running", "results": []}
+        return {"status": self.final_status, "results": [[
+            {"field": "@timestamp", "value": "2024-01-01 00:00:00.000"},
+            {"field": "duration_ms", "value": "1500.5"},
+            {"field": "statement", "value": "SELECT 1"},
+            {"field": "@ptr", "value": "abc"}
+        ]]}
+
+    def stop_query(self, queryId):
+        pass
+
+
+class TestServerSideFiltering:
+    """서버 측 필터링/Insights 테스트"""
+
+    def test_filter_log_events_paginates_with_pattern(self):
+        """duration 필터 패턴으로 nextToken 페이지를 끝까지 조회"""
+        client = FakeServerSideLogsClient()
+        pages = list(filter_log_events(client, "g", 0, 100))
+
+        assert len(pages) == 2
+        assert client.filter_calls[0]["filterPattern"] == '"duration:"'
+        assert client.filter_calls[1]["nextToken"] == "n1"
+
+    def test_insights_query_polls_until_complete(self):
+        """Insights 쿼리를 완료될 때까지 폴링하고 @ptr 을 제외한 필드를 반환"""
+        client = FakeServerSideLogsClient()
+        with patch.object(cloudwatch_logs.time, "sleep"):
+            rows = run_insights_query(client, ["g"], "fields @message", 5000, 10000)
+
+        assert client.polls == 2
+        assert client.started["startTime"] == 5
+        assert rows == [{"@timestamp": "2024-01-01 00:00:00.000", "duration_ms": "1500.5", "statement": "SELECT 1"}]
+
+    def test_insights_query_failure(self):
+        """Insights 쿼리가 실패 상태로 끝나면 예외"""
+        client = FakeServerSideLogsClient(final_status="Failed")
+        with patch.object(cloudwatch_logs.time, "sleep"):
+            with pytest.raises(RuntimeError):
+                run_insights_query(client, ["g"], "fields @message", 0, 1000)
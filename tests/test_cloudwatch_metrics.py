@@ -0,0 +1,129 @@
+"""
+CloudWatch GetMetricData 배치 수집 테스트
+"""
+from datetime import datetime, timedelta, timezone
+
+from backend.models.database import DatabaseConnection, MonitoringConfig
+from backend.monitoring.cloudwatch import RDS_METRIC_NAMES, fetch_rds_metrics
+from backend.monitoring.metrics_collector import MetricsCollector
+
+
+class FakeCloudWatchClient:
+    """GetMetricData 만 흉내내는 가짜 클라이언트 (쿼리마다 2개 포인트, 2페이지로 나눠 반환)"""
+
+    def __init__(self):
+        self.calls = []
+        self.base = datetime(2024, 1, 1, 0, 0, tzinfo=timezone.utc)
+
+    def get_metric_data(self, **kwargs):
+        self.calls.append(kwargs)
+        queries = kwargs["MetricDataQueries"]
+        page = 1 if "NextToken" in kwargs else 0
+        results = []
+        for q in queries:
+            name = q["MetricStat"]["Metric"]["MetricName"]
+            value = float(RDS_METRIC_NAMES.index(name) * 10 + page)
+            results.append({
+                "Id": q["Id"],
+                "Timestamps": [self.base + timedelta(minutes=page)],
+                "Values": [value],
+                "StatusCode": "Complete"
+            })
+        response = {"MetricDataResults": results}
+        if page == 0:
+            response["NextToken"] = "next"
+        return response
+
+
+class TestCloudWatchBatch:
+    """GetMetricData 배치 테스트"""
+
+    def test_chunks_and_paginates(self):
+        """500개 초과 쿼리는 나눠 보내고 NextToken 페이지는 병합"""
+        client = FakeCloudWatchClient()
+        keys = [(f"db-{i}", "CPUUtilization", "Average") for i in range(501)]
+
+        results = fetch_rds_metrics(client, keys, datetime(2024, 1, 1), datetime(2024, 1, 2))
+
+        assert len(client.calls) == 4  # 2개 청크 x 2페이지
+        assert len(client.calls[0]["MetricDataQueries"]) == 500
+        assert len(results) == 501
+        assert results[("db-500", "CPUUtilization", "Average")]["values"] == [10.0, 11.0]
+
+    def test_collector_merges_into_series(self):
+        """여러 인스턴스를 한 번의 배치로 수집하고 시계열 저장소에 병합"""
+        collector = MetricsCollector()
+        collector.cloudwatch_client = FakeCloudWatchClient()
+        connections = []
+        for name in ("alpha", "beta"):
+            conn = DatabaseConnection(
+                name=name, host="localhost", port=5432, user="u", password="p",
+                dbname="d", cloudwatch_id=f"{name}-instance"
+            )
+            collector.add_database(conn, MonitoringConfig(db_name=name), use_cloudwatch=True)
+            connections.append(conn)
+
+        collected = collector.collect_metrics_cloudwatch_batch(connections)
+
+        assert set(collected) == {"alpha", "beta"}
+        assert len(collector.cloudwatch_client.calls) == 2  # 1개 청크 x 2페이지
+        assert collected["alpha"].cpu_usage == 11.0
+        assert collected["alpha"].active_connections == 1
+        series = collector.get_metrics_series("alpha").series(["CPUUtilization"], since=0)
+        assert series["CPUUtilization"]["v"] == [10.0, 11.0]
+
+
+class TestCloudWatchBatchEndpoint:
+    """배치 메트릭 엔드포인트 테스트"""
+
+    def test_batch_endpoint_aligns_series(self):
+        """여러 인스턴스/메트릭을 한 번에 조회하고 공통 타임스탬프 축으로 정렬"""
+        from unittest.mock import patch
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from backend.api import monitoring
+
+        app = FastAPI()
+        app.include_router(monitoring.router)
+        client = FakeCloudWatchClient()
+
+        with patch.object(monitoring, "get_cloudwatch_client", return_value=client):
+            response = TestClient(app).post("/api/monitoring/cloudwatch/metrics/batch", json={
+                "db_identifiers": ["db-1", "db-2"],
+                "metrics": ["CPUUtilization", {"name": "DatabaseConnections", "stat": "Maximum"}],
+                "period": 60,
+                "hours": 1
+            })
+
+        assert response.status_code == 200
+        body = response.json()
+        assert len(client.calls) == 2  # 쿼리 4개를 한 배치(2페이지)로 조회
+        assert body["count"] == 2
+        assert len(body["series"]) == 4
+        assert body["series"][1]["stat"] == "Maximum"
+        assert all(len(s["values"]) == 2 for s in body["series"])
+
+    def test_batch_endpoint_rejects_malformed_payload(self):
+        """metrics 항목이나 period 가 잘못되면 CloudWatch 를 호출하지 않고 오류 응답"""
+        from unittest.mock import patch
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from backend.api import monitoring
+
+        app = FastAPI()
+        app.include_router(monitoring.router)
+        client = FakeCloudWatchClient()
+
+        with patch.object(monitoring, "get_cloudwatch_client", return_value=client):
+            http = TestClient(app)
+            missing_name = http.post("/api/monitoring/cloudwatch/metrics/batch", json={
+                "db_identifiers": ["db-1"], "metrics": [{"stat": "Maximum"}]
+            })
+            bad_period = http.post("/api/monitoring/cloudwatch/metrics/batch", json={
+                "db_identifiers": ["db-1"], "metrics": ["CPUUtilization"], "period": "5m"
+            })
+
+        for response in (missing_name, bad_period):
+            assert response.status_code == 200
+            assert response.json()["status"] == "error"
+        assert client.calls == []
@@ -0,0 +1,201 @@
+"""
+슬로우 쿼리 로그 증분 수집기 테스트
+"""
+import time
+from unittest.mock import patch
+
+from backend.monitoring import log_tailer as log_tailer_module
+from backend.monitoring.log_tailer import SlowQueryLogTailer, decode_file_position, encode_file_position
+
+
+class FakeTailLogsClient:
+    """이벤트가 계속 추가되는 스트림 하나를 가진 가짜 CloudWatch Logs 클라이언트 (토큰 = 읽은 위치)"""
+
+    def __init__(self, has_groups: bool = True):
+        self.has_groups = has_groups
+        self.events = []
+        self.calls = []
+
+    def append(self, duration: float, query: str):
+        self.events.append({
+            "timestamp": int(time.time() * 1000),
+            "message": f"LOG:  duration: {duration} ms  statement: {query}"
+        })
+
+    def describe_log_groups(self, logGroupNamePrefix):
+        if self.has_groups and "/instance/" in logGroupNamePrefix:
+            return {"logGroups": [{"logGroupName": logGroupNamePrefix + "postgresql"}]}
+        return {"logGroups": []}
+
+    def describe_log_streams(self, **kwargs):
+        return {"logStreams": [{"logStreamName": "db-1.0", "lastEventTimestamp": int(time.time() * 1000)}]}
+
+    def get_log_events(self, **kwargs):
+        self.calls.append(kwargs)
+        start = int(kwargs.get("nextToken", "f/0").split("/")[1])
+        end = min(start + 2, len(self.events))
+        return {"events": self.events[start:end], "nextForwardToken": f"f/{end}"}
+
+
+class FakeTailRDSClient:
+    """로그 파일 하나에 내용이 추가되는 가짜 RDS 클라이언트 (Marker = 읽은 위치)"""
+
+    def __init__(self, name: str = "error/postgresql.log"):
+        self.files = {name: ""}
+
+    @property
+    def content(self):
+        return next(iter(self.files.values()))
+
+    @content.setter
+    def content(self, value):
+        self.files[next(iter(self.files))] = value
+
+    def describe_db_log_files(self, **kwargs):
+        return {"DescribeDBLogFiles": [{"LogFileName": name} for name in self.files]}
+
+    def download_db_log_file_portion(self, DBInstanceIdentifier, LogFileName, Marker, NumberOfLines):
+        content = self.files[LogFileName]
+        start = int(Marker)
+        end = min(start + 120, len(content))
+        return {"LogFileData": content[start:end], "Marker": str(end),
+                "AdditionalDataPending": end < len(content)}
+
+
+class TestSlowQueryLogTailer:
+    """증분 수집 테스트"""
+
+    def setup_method(self):
+        self.saved_checkpoints = {}
+        self.saved_sketches = []
+        self.saved_targets = {}
+        self.save_fails = False
+        self.patches = [
+            patch.object(log_tailer_module, "get_log_tail_checkpoints",
+                         side_effect=lambda db: (dict(self.saved_checkpoints), None)),
+            patch.object(log_tailer_module, "save_log_tail_progress", side_effect=self.save_progress),
+            patch.object(log_tailer_module, "get_log_tail_targets",
+                         side_effect=lambda: (dict(self.saved_targets), None)),
+            patch.object(log_tailer_module, "save_log_tail_target",
+                         side_effect=lambda db, since: (self.saved_targets.setdefault(db, since), (True, None))[1]),
+            patch.object(log_tailer_module, "delete_log_tail_target",
+                         side_effect=lambda db: (self.saved_targets.pop(db, None), (True, None))[1]),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def teardown_method(self):
+        for p in self.patches:
+            p.stop()
+
+    def save_progress(self, db, rows, checkpoints, since):
+        if self.save_fails:
+            return False, "app db down"
+        self.saved_sketches.extend(rows)
+        self.saved_checkpoints.update(checkpoints)
+        self.saved_targets[db] = since
+        return True, None
+
+    def test_cloudwatch_resumes_from_checkpoint(self):
+        """저장된 nextForwardToken 이후의 새 이벤트만 수집"""
+        logs = FakeTailLogsClient()
+        for i in range(3):
+            logs.append(1500.0 + i, f"SELECT {i}")
+        tailer = SlowQueryLogTailer()
+        tailer.clients = {"logs": logs}
+        tailer.add_target("db-1")
+
+        assert tailer.tail_once("db-1") == 3
+        assert tailer.tail_once("db-1") == 0
+
+        logs.append(5000.0, "SELECT 99")
+        assert tailer.tail_once("db-1") == 1
+
+        snapshot = tailer.snapshot("db-1")
+        assert snapshot["ingested"] == 4
+        assert snapshot["analysis"]["max_duration"] == 5000.0
+        assert list(self.saved_checkpoints.values()) == ["f/4"]
+        assert self.saved_sketches
+
+    def test_rds_log_file_marker(self):
+        """로그 그룹이 없으면 RDS 로그 파일을 Marker 체크포인트로 이어 읽음"""
+        rds = FakeTailRDSClient()
+        line = "2024-01-01 00:00:01 UTC::@:[1]:LOG:  duration: 2000.0 ms  statement: SELECT {}\n"
+        rds.content = "".join(line.format(i) for i in range(3))
+        tailer = SlowQueryLogTailer()
+        tailer.clients = {"logs": FakeTailLogsClient(has_groups=False), "rds": rds}
+        tailer.add_target("db-1")
+
+        first = tailer.tail_once("db-1")
+        rds.content += "".join(line.format(i) for i in range(3, 6))
+        second = tailer.tail_once("db-1")
+        tailer.targets["db-1"].stats.extend(tailer.targets["db-1"].parsers.popitem()[1].close())
+
+        assert first + second < 6  # 마지막 레코드는 다음 청크를 기다리며 버퍼에 남음
+        assert tailer.targets["db-1"].stats.count == 6
+        marker, pending = decode_file_position(self.saved_checkpoints[("rds_file", "error/postgresql.log")])
+        assert marker == str(len(rds.content)) and pending
+
+    def test_restart_resumes_targets_and_pending_buffer(self):
+        """재시작 후 저장된 대상과 체크포인트(버퍼 포함)로 이어 읽어 유실/중복 없이 집계"""
+        rds = FakeTailRDSClient()
+        line = "2024-01-01 00:00:01 UTC::@:[1]:LOG:  duration: 2000.0 ms  statement: SELECT {}\n"
+        rds.content = "".join(line.format(i) for i in range(3))
+        clients = {"logs": FakeTailLogsClient(has_groups=False), "rds": rds}
+        tailer = SlowQueryLogTailer()
+        tailer.clients = clients
+        tailer.add_target("db-1")
+        first = tailer.tail_once("db-1")
+
+        restarted = SlowQueryLogTailer()
+        restarted.clients = clients
+        with patch.object(restarted, "start") as start:
+            restarted.resume()
+        start.assert_called_once()
+        rds.content += "".join(line.format(i) for i in range(3, 6))
+        second = restarted.tail_once("db-1")
+        third = sum(1 for _ in restarted.targets["db-1"].parsers.popitem()[1].close())
+
+        assert first + second + third == 6
+
+    def test_failed_save_is_retried_with_next_cycle(self):
+        """앱 DB 저장에 실패한 주기의 스케치/체크포인트는 다음 주기에 함께 저장"""
+        logs = FakeTailLogsClient()
+        logs.append(1500.0, "SELECT 1")
+        tailer = SlowQueryLogTailer()
+        tailer.clients = {"logs": logs}
+        tailer.add_target("db-1")
+
+        self.save_fails = True
+        tailer.tail_once("db-1")
+        assert not self.saved_sketches
+
+        self.save_fails = False
+        logs.append(1600.0, "SELECT 2")
+        tailer.tail_once("db-1")
+
+        total = [r for r in self.saved_sketches if r["fingerprint"] == ""]
+        assert sum(r["sketch"].count for r in total) == 2
+        assert list(self.saved_checkpoints.values()) == ["f/2"]
+
+    def test_rotated_and_unlisted_files_are_closed(self):
+        """로테이션된 파일은 끝까지 읽으면, 목록에서 빠진 파일은 바로 파서를 닫고 남은 레코드를 집계"""
+        line = "2024-01-01 00:00:01 UTC::@:[1]:LOG:  duration: 2000.0 ms  statement: SELECT {}\n"
+        rds = FakeTailRDSClient("error/postgresql.log.2024-01-01-00")
+        rds.content = "".join(line.format(i) for i in range(3))
+        rds.files["error/postgresql.log"] = "".join(line.format(i) for i in range(3))
+        tailer = SlowQueryLogTailer()
+        tailer.clients = {"logs": FakeTailLogsClient(has_groups=False), "rds": rds}
+        tailer.add_target("db-1")
+
+        tailer.tail_once("db-1")
+        target = tailer.targets["db-1"]
+        assert list(target.parsers) == ["error/postgresql.log"]
+        assert target.stats.count == 3 + 1
+
+        del rds.files["error/postgresql.log"]
+        tailer.tail_once("db-1")
+
+        assert not target.parsers and target.stats.count == 6
+        assert decode_file_position(self.saved_checkpoints[("rds_file", "error/postgresql.log")])[1] == ""
+        assert decode_file_position(encode_file_position("7")) == ("7", "") and decode_file_position("12") == ("12", "")
@@ -0,0 +1,100 @@
+"""
+MCP 설정 동기화 테스트
+"""
+import json
+import os
+
+import pytest
+
+from backend.services import mcp_manager as mcp_manager_module
+from backend.services.mcp_manager import MCPManager
+
+
+def registered(*names, host="db"):
+    return [{"name": n, "host": host, "port": 5432, "user": "u", "password": "p", "dbname": n} for n in names]
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setenv("MCP_CONFIG_PATH", str(tmp_path / "mcp.json"))
+    manager = MCPManager()
+    yield manager
+    manager.supervisor.stop()
+
+
+class TestMCPConfigSync:
+    """차분 동기화와 설정 캐시 테스트"""
+
+    def test_sync_touches_only_changed_entries(self, manager, monkeypatch):
+        """바뀐 항목만 추가/수정/삭제하고, 바뀐 것이 없으면 파일을 쓰지 않음"""
+        monkeypatch.setattr(mcp_manager_module, "get_registered_databases", lambda: registered("a", "b"))
+        assert manager.sync_all_databases() == {"added": ["postgres_a", "postgres_b"], "updated": [], "removed": []}
+
+        # 사용자가 고친 필드는 연결 정보가 같으면 유지
+        config = manager.load_mcp_config()
+        config["mcpServers"]["postgres_a"]["autoApprove"] = ["query"]
+        assert manager.save_mcp_config(config) is True
+        mtime = os.stat(manager.mcp_config_path).st_mtime_ns
+
+        assert manager.sync_all_databases() == {"added": [], "updated": [], "removed": []}
+        assert os.stat(manager.mcp_config_path).st_mtime_ns == mtime
+
+        monkeypatch.setattr(mcp_manager_module, "get_registered_databases",
+                            lambda: registered("a", host="db2") + registered("c"))
+        assert manager.sync_all_databases() == {"added": ["postgres_c"], "updated": ["postgres_a"],
+                                                "removed": ["postgres_b"]}
+        with open(manager.mcp_config_path, encoding="utf-8") as f:
+            servers = json.load(f)["mcpServers"]
+        assert "postgres" in servers and "postgres_b" not in servers
+        assert servers["postgres_a"]["autoApprove"] == ["query"]
+        assert servers["postgres_a"]["env"]["POSTGRES_CONNECTION_STRING"] == "postgresql://u:p@db2:5432/a"
+        assert sorted(manager.supervisor.servers) == ["postgres_a", "postgres_c"]
+        assert not [n for n in os.listdir(os.path.dirname(manager.mcp_config_path)) if n.endswith(".tmp")]
+
+    def test_cached_config_reloads_on_file_change(self, manager):
+        """파일이 그대로면 캐시를 쓰고, 외부에서 바뀌면 다시 읽음"""
+        cached = manager.get_cached_mcp_config()
+        assert manager.get_cached_mcp_config() is cached
+        manager.load_mcp_config()["mcpServers"].clear()
+        assert "postgres" in manager.get_cached_mcp_config()["mcpServers"]
+
+        with open(manager.mcp_config_path, "w", encoding="utf-8") as f:
+            json.dump({"mcpServers": {"postgres_x": {"env": {}}}}, f)
+        assert manager.get_mcp_databases() == ["x"]
+
+
+    def test_save_keeps_file_mode(self, manager):
+        """새 설정 파일은 0644, 기존 파일은 원래 권한을 유지"""
+        if os.path.exists(manager.mcp_config_path):
+            os.remove(manager.mcp_config_path)
+        config = {"mcpServers": {"postgres_a": {"env": {}}}}
+        assert manager.save_mcp_config(config) is True
+        assert os.stat(manager.mcp_config_path).st_mode & 0o777 == 0o644
+
+        os.chmod(manager.mcp_config_path, 0o640)
+        config["mcpServers"]["postgres_b"] = {"env": {}}
+        assert manager.save_mcp_config(config) is True
+        assert os.stat(manager.mcp_config_path).st_mode & 0o777 == 0o640
+
+class TestDatabaseToolEndpoint:
+    """MCP 도구 직접 호출 엔드포인트 테스트"""
+
+    def test_only_read_only_sql_is_forwarded(self):
+        """query 는 읽기 전용 SQL 만 MCP 서버로 넘기고, 쓰기/여러 문장 중 쓰기/다른 도구는 거절"""
+        from unittest.mock import patch
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from backend.api import mcp
+
+        app = FastAPI()
+        app.include_router(mcp.router)
+        client = TestClient(app)
+        with patch.object(mcp.ai_chat_service, "call_database_tool", return_value={"row_count": 1}) as call:
+            ok = client.post("/api/mcp/database/db1/call", json={"tool": "query", "arguments": {"query": "SELECT 1"}})
+            write = client.post("/api/mcp/database/db1/call",
+                                json={"tool": "query", "arguments": {"query": "SELECT 1; DELETE FROM t"}})
+            other = client.post("/api/mcp/database/db1/call", json={"tool": "drop_everything"})
+
+        assert ok.status_code == 200 and ok.json()["data"] == {"row_count": 1}
+        assert write.status_code == 403 and other.status_code == 400
+        call.assert_called_once_with("db1", "query", {"query": "SELECT 1"})
@@ -0,0 +1,141 @@
+"""
+MCP 서버 프로세스 관리 테스트
+"""
+import sys
+import textwrap
+import threading
+import time
+
+import pytest
+
+from backend.services import mcp_supervisor
+from backend.services.mcp_supervisor import MCPError, MCPSupervisor
+
+# 요청마다 스레드에서 응답하는 작은 JSON-RPC 서버 (sleep 도구는 늦게, crash 도구는 종료)
+FAKE_SERVER = textwrap.dedent('''
+    import json, os, sys, threading, time
+    lock = threading.Lock()
+
+    def send(message):
+        with lock:
+            sys.stdout.write(json.dumps(message) + "\\n")
+            sys.stdout.flush()
+
+    def handle(message):
+        method, params = message["method"], message.get("params") or {}
+        if method == "tools/call":
+            args = params.get("arguments") or {}
+            if params["name"] == "crash":
+                os._exit(3)
+            if params["name"] == "fail":
+                send({"jsonrpc": "2.0", "id": message["id"], "error": {"code": -32602, "message": "bad"}})
+                return
+            if params["name"] == "stream":
+                for seq in range(2):
+                    send({"jsonrpc": "2.0", "method": "notifications/query/chunk",
+                          "params": {"requestId": message["id"], "seq": seq, "rows": [{"n": seq}]}})
+                payload = {"success": True, "streamed": True, "chunks": 2, "row_count": 2}
+            else:
+                time.sleep(args.get("delay", 0))
+                payload = {"pid": os.getpid(), "echo": args.get("value")}
+            result = {"content": [{"type": "text", "text": json.dumps(payload)}]}
+        else:
+            result = {}
+        send({"jsonrpc": "2.0", "id": message["id"], "result": result})
+
+    for line in sys.stdin:
+        message = json.loads(line)
+        if "id" in message:
+            threading.Thread(target=handle, args=(message,)).start()
+''')
+
+
+@pytest.fixture
+def supervisor(tmp_path):
+    script = tmp_path / "fake_mcp_server.py"
+    script.write_text(FAKE_SERVER)
+    sup = MCPSupervisor(idle_timeout=60, interval=60, call_timeout=5)
+    sup.ensure("postgres_test", [sys.executable, str(script)])
+    yield sup
+    sup.stop()
+
+
+class TestMCPSupervisor:
+    """상주 MCP 프로세스 테스트"""
+
+    def test_multiplexed_calls_share_process(self, supervisor):
+        """동시 호출은 한 프로세스에서 id 로 구분되어 각자 자기 응답을 받음"""
+        results = {}
+
+        def call(value, delay):
+            results[value] = supervisor.call_tool("postgres_test", "echo", {"value": value, "delay": delay})
+
+        threads = [threading.Thread(target=call, args=(i, 0.3 - i * 0.1)) for i in range(3)]
+        started = time.time()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert {v: r["echo"] for v, r in results.items()} == {0: 0, 1: 1, 2: 2}
+        assert len({r["pid"] for r in results.values()}) == 1
+        assert time.time() - started < 0.9
+        assert supervisor.call_tool("postgres_test", "stream") == {
+            "success": True, "streamed": True, "chunks": 2, "row_count": 2, "data": [{"n": 0}, {"n": 1}]
+        }
+        with pytest.raises(MCPError):
+            supervisor.call_tool("postgres_test", "fail")
+
+    def test_restart_with_backoff_after_crash(self, supervisor, monkeypatch):
+        """프로세스가 죽으면 백오프 동안 호출을 거절하고, 이후 새 프로세스로 재시작"""
+        monkeypatch.setattr(mcp_supervisor, "RESTART_BACKOFF_BASE", 0.3)
+        first_pid = supervisor.call_tool("postgres_test", "echo")["pid"]
+
+        with pytest.raises(MCPError):
+            supervisor.call_tool("postgres_test", "crash")
+        with pytest.raises(ConnectionError):
+            supervisor.call_tool("postgres_test", "echo")
+
+        time.sleep(0.35)
+        supervisor.check_once()
+        status = supervisor.status()["postgres_test"]
+        assert status["running"] and status["restarts"] == 1
+        assert supervisor.call_tool("postgres_test", "echo")["pid"] != first_pid
+
+    def test_idle_shutdown_and_lazy_start(self, supervisor):
+        """유휴 시간이 지나면 종료하고 다음 호출 때 다시 시작"""
+        supervisor.call_tool("postgres_test", "echo")
+        supervisor.idle_timeout = 0
+        time.sleep(0.01)
+        supervisor.check_once()
+        assert supervisor.status()["postgres_test"]["running"] is False
+
+        supervisor.idle_timeout = 60
+        assert supervisor.call_tool("postgres_test", "echo", {"value": "again"})["echo"] == "again"
+        assert supervisor.status()["postgres_test"]["failures"] == 0
+
+    def test_idle_stop_is_not_auto_restarted(self, supervisor, monkeypatch):
+        """재시작 뒤 유휴 종료된 서버는 자동 재시작하지 않고, 안정적으로 돌면 실패 수를 초기화"""
+        monkeypatch.setattr(mcp_supervisor, "RESTART_BACKOFF_BASE", 0.01)
+        with pytest.raises(MCPError):
+            supervisor.call_tool("postgres_test", "crash")
+        with pytest.raises(ConnectionError):
+            supervisor.call_tool("postgres_test", "echo")
+        time.sleep(0.05)
+        supervisor.call_tool("postgres_test", "echo")
+        assert supervisor.status()["postgres_test"]["failures"] == 1
+
+        supervisor.idle_timeout = 0
+        time.sleep(0.01)
+        supervisor.check_once()
+        supervisor.check_once()
+        status = supervisor.status()["postgres_test"]
+        assert status["running"] is False and status["failures"] == 0
+
+        supervisor.idle_timeout = 60
+        supervisor.call_tool("postgres_test", "echo")
+        supervisor.servers["postgres_test"].failures = 2
+        monkeypatch.setattr(mcp_supervisor, "STABLE_UPTIME", 0)
+        supervisor.check_once()
+        status = supervisor.status()["postgres_test"]
+        assert status["running"] and status["failures"] == 0 and status["restarts"] == 1
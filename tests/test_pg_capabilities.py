@@ -0,0 +1,173 @@
+"""
+PostgreSQL 버전별 pg_stat_statements 쿼리 생성 테스트
+"""
+from backend.monitoring.pg_capabilities import (
+    CapabilityCache,
+    PgCapabilities,
+    build_statements_query,
+    build_statements_summary_query,
+    statement_columns,
+)
+
+
+class FakeProbeCursor:
+    def __init__(self, probe):
+        self.probe = probe
+        self.rows = None
+
+    def execute(self, sql, params=None):
+        self.probe.calls += 1
+        if "server_version_num" in sql:
+            self.rows = [(self.probe.version_num, "on")]
+        else:
+            self.rows = list(self.probe.extensions.items())
+
+    def fetchone(self):
+        return self.rows[0]
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class FakeProbeConnection:
+    def __init__(self, version_num, extensions):
+        self.version_num = version_num
+        self.extensions = extensions
+        self.calls = 0
+
+    def get_dsn_parameters(self):
+        return {"host": "db", "port": "5432", "dbname": "app", "user": "monitor"}
+
+    def cursor(self):
+        return FakeProbeCursor(self)
+
+
+class TestStatementColumns:
+    """버전별 컬럼 선택 테스트"""
+
+    def test_legacy_columns(self):
+        """pg_stat_statements 1.7 이하는 total_time 컬럼을 쓰고 WAL 통계가 없음"""
+        caps = PgCapabilities(120000, {"pg_stat_statements": "1.7"}, track_io_timing=True)
+        columns = statement_columns(caps)
+
+        assert columns["total_time"] == "total_time"
+        assert columns["blk_read_time"] == "blk_read_time"
+        assert "wal_bytes" not in columns
+        assert not caps.has_info_view
+
+    def test_exec_time_and_wal_columns(self):
+        """1.8 이상은 *_exec_time 과 WAL 통계, 1.11 이상은 shared/local I/O 시간을 사용"""
+        caps = PgCapabilities(170000, {"pg_stat_statements": "1.11"}, track_io_timing=True)
+        query = build_statements_query(caps)
+
+        assert "total_exec_time AS total_time" in query
+        assert "ORDER BY total_exec_time DESC" in query
+        assert "shared_blk_read_time + local_blk_read_time AS blk_read_time" in query
+        assert "wal_bytes AS wal_bytes" in query
+        assert "mean_exec_time > 1000.0" in build_statements_summary_query(caps)
+        # track_io_timing 이 꺼져 있으면 I/O 시간 컬럼 생략
+        assert "blk_read_time" not in statement_columns(PgCapabilities(150000, {"pg_stat_statements": "1.10"}))
+
+
+class TestCapabilityCache:
+    """기능 확인 캐시 테스트"""
+
+    def test_probe_once_per_target(self):
+        """같은 대상은 TTL 동안 한 번만 확인"""
+        conn = FakeProbeConnection(160000, {"plpgsql": "1.0", "pg_stat_statements": "1.10"})
+        cache = CapabilityCache(ttl=60)
+
+        first = cache.get(conn)
+        second = cache.get(conn)
+
+        assert first is second
+        assert conn.calls == 2
+        assert first.exec_time_columns and first.track_io_timing
+        assert first.to_dict()["pg_stat_statements"] == "1.10"
+
+        cache.invalidate()
+        assert not cache.get(FakeProbeConnection(130000, {})).has_pg_stat_statements
+
+
+# get_registered_databases() 가 반환하는 행과 같은 모양 (type 컬럼 없음)
+REGISTERED_DB = {
+    "name": "app", "host": "registered-db", "port": 5432, "user": "monitor", "password": "secret",
+    "dbname": "app", "cloudwatch_id": None, "replica_hosts": None, "read_routing": None,
+    "max_replica_lag_seconds": None
+}
+
+
+class FakeStatementsCursor(FakeProbeCursor):
+    """기능 확인 쿼리와 pg_stat_statements 조회에 응답하는 가짜 커서"""
+
+    description = None
+
+    def execute(self, sql, params=None):
+        if "FROM pg_stat_statements" in sql:
+            self.description = [("query",), ("calls",), ("total_time",)]
+            self.rows = [("SELECT 1", 10, 5.0)]
+        else:
+            super().execute(sql, params)
+
+
+class FakeStatementsConnection(FakeProbeConnection):
+    def get_dsn_parameters(self):
+        return {"host": "registered-db", "port": "5432", "dbname": "app", "user": "monitor"}
+
+    def cursor(self):
+        return FakeStatementsCursor(self)
+
+    def close(self):
+        pass
+
+
+def monitoring_client():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from backend.api import monitoring
+
+    app = FastAPI()
+    app.include_router(monitoring.router)
+    return TestClient(app)
+
+
+class TestRegisteredDatabaseEndpoints:
+    """등록된 DB 행 (type 없음) 으로 조회하는 엔드포인트 테스트"""
+
+    def setup_method(self):
+        from backend.monitoring.pg_capabilities import capability_cache
+        capability_cache.invalidate()
+
+    def test_query_history_defaults_to_postgresql(self):
+        """type 이 없는 등록 DB 는 PostgreSQL 로 보고 pg_stat_statements 를 조회"""
+        from unittest.mock import patch
+        from backend.api import monitoring
+
+        conn = FakeStatementsConnection(160000, {"pg_stat_statements": "1.10"})
+        with patch.object(monitoring, "get_registered_databases", return_value=[dict(REGISTERED_DB)]), \
+                patch("psycopg2.connect", return_value=conn):
+            response = monitoring_client().get("/api/query-history/app")
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["db_type"] == "postgresql"
+        assert body["data"] == [["SELECT 1", 10, 5.0]]
+
+    def test_query_insights_includes_dbview(self):
+        """CloudWatch 로그 그룹이 없어도 type 없는 등록 DB 의 pg_stat_statements 결과를 반환"""
+        from unittest.mock import patch
+        from backend.api import monitoring
+
+        conn = FakeStatementsConnection(160000, {"pg_stat_statements": "1.10"})
+        with patch.object(monitoring, "get_registered_databases", return_value=[dict(REGISTERED_DB)]), \
+                patch.dict("os.environ", {"CLOUDWATCH_LOG_GROUP": ""}), \
+                patch("psycopg2.connect", return_value=conn):
+            response = monitoring_client().get("/api/query-insights/app")
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["source"] == ["dbview"]
+        assert body["dbview"]["data"] == [["SELECT 1", 10, 5.0]]
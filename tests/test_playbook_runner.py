@@ -0,0 +1,63 @@
+"""
+플레이북 일괄 실행 테스트
+"""
+import threading
+import time
+
+import pytest
+
+from backend.services.playbook_runner import run_playbook, step_dependencies
+
+
+class TestRunPlaybook:
+    """단계 동시 실행/의존성 테스트"""
+
+    def test_independent_steps_run_concurrently(self):
+        """독립 단계는 동시에 실행되어 가장 느린 단계 시간 정도에 끝나고, 끝난 순서대로 나옴"""
+        delays = [0.3, 0.1, 0.2, 0.1, 0.2]
+        steps = [{"title": f"s{i}", "prompt": str(delay)} for i, delay in enumerate(delays)]
+        running, peak, lock = [0], [0], threading.Lock()
+
+        def run_step(index, step, history):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(float(step["prompt"]))
+            with lock:
+                running[0] -= 1
+            return {"role": "assistant", "content": step["title"]}
+
+        started = time.time()
+        results = list(run_playbook(steps, run_step, max_parallel=5))
+
+        assert time.time() - started < 0.5
+        assert peak[0] == 5
+        assert sorted(r["index"] for r in results) == [0, 1, 2, 3, 4]
+        assert results[-1]["index"] == 0
+        assert all(r["message"]["content"] == f"s{r['index']}" and r["error"] is None for r in results)
+
+    def test_dependent_step_waits_and_gets_history(self):
+        """dependsOn 단계는 의존 단계가 끝난 뒤 그 질문/응답을 기록으로 받고, 실패는 결과에 담김"""
+        steps = [
+            {"title": "a", "prompt": "first"},
+            {"title": "b", "prompt": "boom"},
+            {"title": "c", "prompt": "third", "dependsOn": [0]},
+        ]
+        histories = {}
+
+        def run_step(index, step, history):
+            if step["prompt"] == "boom":
+                raise RuntimeError("LLM unavailable")
+            histories[step["title"]] = history
+            return {"role": "assistant", "content": f"answer {step['prompt']}"}
+
+        results = {r["index"]: r for r in run_playbook(steps, run_step, max_parallel=1)}
+
+        assert results[1]["error"] == "LLM unavailable" and results[1]["message"] is None
+        assert histories["a"] == []
+        assert [m["content"] for m in histories["c"]] == ["first", "answer first"]
+
+    def test_invalid_dependencies(self):
+        with pytest.raises(ValueError):
+            step_dependencies([{"prompt": "a", "dependsOn": [0]}])
+        assert step_dependencies([{"prompt": "a"}, {"prompt": "b", "dependsOn": [0, 0]}]) == [[], [0]]
@@ -0,0 +1,102 @@
+"""
+플레이북 고정 SQL 테스트
+"""
+import json
+
+from backend.monitoring.pg_capabilities import PgCapabilities
+from backend.services.playbook_sql import (
+    SOURCE_COMPILED,
+    SOURCE_LLM,
+    SOURCE_PINNED,
+    compilable_sql,
+    invalid_version_keys,
+    pinned_sql,
+    prompt_hash,
+    resolve_step_sql,
+    server_version
+)
+from backend.services.sql_analysis import classify_statement, is_blocked, split_statements
+
+STEP = {"title": "t", "prompt": "가장 큰 테이블", "sql": "SELECT old",
+        "sqlByVersion": {"13": "SELECT v13", "10": "SELECT v10", "9.6": "SELECT v96"}}
+PGSS_STEP = {"title": "t", "prompt": "느린 쿼리", "sql": "SELECT total_time",
+             "sqlByPgStatStatements": {"1.8": "SELECT total_exec_time"}}
+
+
+def caps(server_version_num, pgss=None):
+    return PgCapabilities(server_version_num, {"pg_stat_statements": pgss} if pgss else {})
+
+
+class TestResolveStepSql:
+    """단계 SQL 선택 테스트"""
+
+    def test_version_variants(self):
+        """서버 버전 이하 중 가장 높은 변형, 맞는 변형이 없거나 버전을 모르면 "sql\""""
+        assert server_version(160002) == (16,) and server_version(90624) == (9, 6)
+        assert pinned_sql(STEP, caps(160002)) == "SELECT v13"
+        assert pinned_sql(STEP, caps(120005)) == "SELECT v10"
+        assert pinned_sql(STEP, caps(90624)) == "SELECT v96"
+        assert pinned_sql(STEP, caps(90500)) == "SELECT old"
+        assert pinned_sql(STEP, None) == "SELECT old"
+
+    def test_pg_stat_statements_variants(self):
+        """pg_stat_statements 변형은 서버 버전이 아니라 설치된 확장 버전으로 고름"""
+        assert pinned_sql(PGSS_STEP, caps(130004, "1.8")) == "SELECT total_exec_time"
+        assert pinned_sql(PGSS_STEP, caps(130004, "1.7")) == "SELECT total_time"
+        assert pinned_sql(PGSS_STEP, caps(160002, "1.10")) == "SELECT total_exec_time"
+
+    def test_invalid_version_keys_are_reported_not_raised(self):
+        """형식이 잘못된 키는 예외 없이 무시되고 검증에서 보고됨"""
+        step = dict(STEP, sqlByVersion={"13": "SELECT v13", "v14": "SELECT bad", "": "SELECT empty"})
+        assert pinned_sql(step, caps(160002)) == "SELECT v13"
+        assert invalid_version_keys([STEP, step]) == {1: ["v14", ""]}
+
+    def test_pinned_then_compiled_then_llm(self):
+        """고정 SQL 이 우선이고, 컴파일된 SQL 은 프롬프트가 같을 때만 사용"""
+        step = {"title": "t", "prompt": "인덱스 사용률"}
+        compiled = {"prompt_hash": prompt_hash("인덱스 사용률"), "sql": "SELECT compiled"}
+
+        assert resolve_step_sql(STEP, compiled, caps(130004)) == ("SELECT v13", SOURCE_PINNED)
+        assert resolve_step_sql(step, compiled) == ("SELECT compiled", SOURCE_COMPILED)
+        assert resolve_step_sql(dict(step, prompt="바뀐 프롬프트"), compiled) == (None, SOURCE_LLM)
+        assert resolve_step_sql(step, None) == (None, SOURCE_LLM)
+
+
+class TestCompilableSql:
+    """컴파일(고정) 가능 여부 테스트"""
+
+    def test_only_successful_read_only_sql(self):
+        ok = {"sql": "SELECT 1;\nSELECT 2", "result": {"headers": ["n"], "data": [], "statements": [{}, {}]}}
+        assert compilable_sql(ok) == "SELECT 1;\nSELECT 2"
+        assert compilable_sql({"sql": "SELECT 1", "result": "Error: relation does not exist"}) is None
+        assert compilable_sql({"sql": "SELECT 1; SELECT 2", "result": {"statements": [{}, {"error": "Error: x"}]}}) is None
+        assert compilable_sql({"sql": "DELETE FROM t", "result": {"headers": [], "data": []}}) is None
+        assert compilable_sql({"sql": None, "result": None}) is None
+
+    def test_builtin_pinned_sql_is_read_only(self):
+        """playbooks.json 에 고정된 SQL 은 모두 읽기 전용 문장"""
+        with open("playbooks.json", encoding="utf-8") as f:
+            playbooks = json.load(f)
+        pinned = [
+            sql
+            for playbook in playbooks for step in playbook["steps"]
+            for sql in [step.get("sql"), *(step.get("sqlByVersion") or {}).values(),
+                        *(step.get("sqlByPgStatStatements") or {}).values()] if sql
+        ]
+        assert pinned
+        assert invalid_version_keys([step for playbook in playbooks for step in playbook["steps"]]) == {}
+        for sql in pinned:
+            for statement in map(classify_statement, split_statements(sql)):
+                assert statement.read_only and not is_blocked(statement), statement.text
+
+    def test_builtin_pg_stat_statements_defaults_to_current_columns(self):
+        """확장 버전을 모르면 현재 컬럼 (*_exec_time), 1.8 미만일 때만 이전 컬럼을 사용"""
+        with open("playbooks.json", encoding="utf-8") as f:
+            playbooks = json.load(f)
+        steps = [step for playbook in playbooks for step in playbook["steps"] if step.get("sqlByPgStatStatements")]
+        assert steps
+        for step in steps:
+            assert "mean_exec_time" in pinned_sql(step, None)
+            assert "mean_exec_time" in pinned_sql(step, caps(170000, "1.11"))
+            legacy = pinned_sql(step, caps(120000, "1.7"))
+            assert "mean_time" in legacy and "exec_time" not in legacy
@@ -0,0 +1,207 @@
+"""
+PostgreSQL MCP stdio 서버 테스트
+"""
+import importlib.util
+import io
+import json
+import os
+import threading
+import time
+
+SCRIPT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "scripts", "postgres_mcp_server.py")
+spec = importlib.util.spec_from_file_location("postgres_mcp_server", SCRIPT_PATH)
+postgres_mcp_server = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(postgres_mcp_server)
+
+
+class FakeCursor:
+    """SELECT 는 n 개 행, pg_sleep 은 취소될 때까지 대기"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows = []
+        self.description = None
+        self.rowcount = -1
+        self.itersize = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        if "pg_sleep" in sql:
+            self.conn.started.set()
+            if self.conn.cancelled.wait(5):
+                raise Exception("canceling statement due to user request")
+        if sql.lstrip().upper().startswith("SELECT"):
+            self.rows = [{"n": i} for i in range(int(sql.split()[-1]) if sql.split()[-1].isdigit() else 1)]
+            self.description = [("n",)]
+        else:
+            self.rowcount = 3
+
+    def fetchmany(self, size):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def fetchall(self):
+        return self.fetchmany(len(self.rows))
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.started = threading.Event()
+        self.cancelled = threading.Event()
+
+    def cursor(self, name=None):
+        return FakeCursor(self)
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class FakePool:
+    def __init__(self, size):
+        self.free = [FakeConnection() for _ in range(size)]
+        self.lock = threading.Lock()
+        self.in_use = 0
+        self.max_in_use = 0
+
+    def getconn(self):
+        with self.lock:
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+            return self.free.pop()
+
+    def putconn(self, conn, close=False):
+        with self.lock:
+            self.in_use -= 1
+            self.free.append(FakeConnection())
+
+
+class BlockingInput:
+    """테스트가 줄을 넣어 주는 stdin 대용 (close 전까지 대기)"""
+
+    def __init__(self):
+        self.lines = []
+        self.cond = threading.Condition()
+        self.closed = False
+
+    def send(self, message):
+        with self.cond:
+            self.lines.append(json.dumps(message) + "\n")
+            self.cond.notify()
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+
+    def __iter__(self):
+        while True:
+            with self.cond:
+                while not self.lines and not self.closed:
+                    self.cond.wait()
+                if not self.lines:
+                    return
+                line = self.lines.pop(0)
+            yield line
+
+
+def request(request_id, method, params=None):
+    return {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params or {}}
+
+
+def run_server(messages, pool_size=2):
+    server = postgres_mcp_server.PostgreSQLMCPServer("", pool_size=pool_size, pool=FakePool(pool_size))
+    output = io.StringIO()
+    server.serve(io.StringIO("".join(json.dumps(m) + "\n" for m in messages) + "not json\n"), output)
+    return [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+class TestPostgreSQLMCPServer:
+    """JSON-RPC 루프 테스트"""
+
+    def test_pipelined_requests(self):
+        """파이프라인 요청마다 같은 id 로 응답하고, 알림에는 응답하지 않음"""
+        messages = run_server([
+            request(1, "initialize", {"protocolVersion": "2024-11-05"}),
+            {"jsonrpc": "2.0", "method": "notifications/initialized"},
+            request(2, "tools/list"),
+            request(3, "tools/call", {"name": "query", "arguments": {"query": "SELECT 3"}}),
+            request(4, "query", {"query": "UPDATE t SET a = 1"}),
+            request(5, "unknown/method"),
+        ])
+        by_id = {m.get("id"): m for m in messages}
+
+        assert by_id[1]["result"]["capabilities"] == {"tools": {}}
+        assert [t["name"] for t in by_id[2]["result"]["tools"]] == ["list_tables", "describe_table", "query"]
+        assert json.loads(by_id[3]["result"]["content"][0]["text"])["row_count"] == 3
+        assert by_id[4]["result"] == {"success": True, "affected_rows": 3}
+        assert by_id[5]["error"]["code"] == postgres_mcp_server.METHOD_NOT_FOUND
+        assert by_id[None]["error"]["code"] == postgres_mcp_server.PARSE_ERROR
+        assert len(messages) == 6
+
+    def test_streams_chunks(self):
+        """stream=true 이면 행을 청크 알림으로 나눠 보내고 최종 응답에는 요약만 담음"""
+        chunk_rows = postgres_mcp_server.CHUNK_ROWS
+        postgres_mcp_server.CHUNK_ROWS = 2
+        try:
+            messages = run_server([
+                request(7, "tools/call", {"name": "query", "arguments": {"query": "SELECT 5", "stream": True},
+                                          "_meta": {"progressToken": "p"}}),
+            ])
+        finally:
+            postgres_mcp_server.CHUNK_ROWS = chunk_rows
+
+        chunks = [m["params"] for m in messages if m.get("method") == "notifications/query/chunk"]
+        progress = [m["params"]["progress"] for m in messages if m.get("method") == "notifications/progress"]
+        final = json.loads(next(m for m in messages if m.get("id") == 7)["result"]["content"][0]["text"])
+
+        assert [len(c["rows"]) for c in chunks] == [2, 2, 1]
+        assert progress == [2, 4, 5]
+        assert final == {"success": True, "streamed": True, "chunks": 3, "row_count": 5}
+
+    def test_cancel_in_flight_query(self):
+        """실행 중인 쿼리를 취소하면 응답 없이 끝나고 다른 요청은 동시에 처리됨"""
+        pool = FakePool(2)
+        server = postgres_mcp_server.PostgreSQLMCPServer("", pool_size=2, pool=pool)
+        stdin, output = BlockingInput(), io.StringIO()
+        thread = threading.Thread(target=server.serve, args=(stdin, output))
+        thread.start()
+
+        stdin.send(request(1, "query", {"query": "SELECT pg_sleep(10)"}))
+        deadline = time.time() + 5
+        while not server._inflight.get(1, {}).get("conn") and time.time() < deadline:
+            time.sleep(0.01)
+        stdin.send(request(2, "query", {"query": "SELECT 1"}))
+        stdin.send({"jsonrpc": "2.0", "method": "notifications/cancelled", "params": {"requestId": 1}})
+        stdin.close()
+        thread.join(5)
+
+        messages = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert [m["id"] for m in messages] == [2]
+        assert pool.max_in_use == 2
+        assert pool.in_use == 0
+
+    def test_cancel_holds_lock_and_show_is_not_streamed(self):
+        """취소는 잠금을 쥔 채 conn.cancel() 을 호출하고, SHOW 는 서버 측 커서로 스트리밍하지 않음"""
+        server = postgres_mcp_server.PostgreSQLMCPServer("", pool_size=1, pool=FakePool(1))
+        conn = FakeConnection()
+        locked = []
+        conn.cancel = lambda: locked.append(server._inflight_lock.locked())
+        server._inflight[1] = {"conn": conn, "cancelled": False}
+
+        server.cancel(1)
+
+        assert locked == [True] and server._inflight[1]["cancelled"]
+        assert not "SHOW work_mem".upper().startswith(postgres_mcp_server.ROW_RETURNING_PREFIXES)
@@ -0,0 +1,96 @@
+"""
+RDS 로그 파일 로컬 디스크 캐시 테스트
+"""
+import os
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from backend.integrations import aws as aws_module
+from backend.integrations.aws import aws_integration
+from backend.integrations.rds_log_cache import RDSLogCache, is_rotated_log_file
+
+ROTATED_FILE = "error/postgresql.log.2024-01-01-00"
+
+
+class FakePortionRDSClient:
+    """Marker = 읽은 위치인 가짜 RDS 클라이언트 (호출 횟수 기록)"""
+
+    def __init__(self, content: str, portion_size: int = 100):
+        self.content = content
+        self.portion_size = portion_size
+        self.calls = 0
+
+    def download_db_log_file_portion(self, DBInstanceIdentifier, LogFileName, Marker, NumberOfLines):
+        self.calls += 1
+        start = int(Marker)
+        end = min(start + self.portion_size, len(self.content))
+        return {"LogFileData": self.content[start:end], "Marker": str(end),
+                "AdditionalDataPending": end < len(self.content)}
+
+
+class TestRotationDetection:
+    """로테이션 여부 판단 테스트"""
+
+    def test_rotated_by_suffix(self):
+        """시간 접미사가 현재 시각보다 이전이면 로테이션 완료로 판단"""
+        now = datetime(2024, 1, 1, 13, 30, tzinfo=timezone.utc)
+
+        assert is_rotated_log_file("error/postgresql.log.2024-01-01-12", now)
+        assert not is_rotated_log_file("error/postgresql.log.2024-01-01-13", now)
+        assert is_rotated_log_file("error/postgresql.log.2024-01-01-1329", now)
+        assert not is_rotated_log_file("error/postgresql.log.2024-01-01-1330", now)
+        assert not is_rotated_log_file("error/postgresql.log", now)
+
+
+class TestRDSLogCache:
+    """디스크 캐시 테스트"""
+
+    def test_repeated_analysis_served_locally(self, tmp_path):
+        """로테이션된 파일을 다시 분석하면 API 를 호출하지 않음"""
+        line = "2024-01-01 00:00:01 UTC::@:[1]:LOG:  duration: {}.0 ms  statement: SELECT {}\n"
+        rds = FakePortionRDSClient("".join(line.format(1000 + i, i) for i in range(20)))
+        cache = RDSLogCache(str(tmp_path), max_bytes=10 * 1024 * 1024)
+
+        with patch.object(aws_module, "rds_log_cache", cache), \
+                patch.object(aws_integration, "get_client", return_value=rds):
+            first = aws_integration.analyze_rds_log_file(None, "db-1", ROTATED_FILE, top_k=3)
+            calls = rds.calls
+            second = aws_integration.analyze_rds_log_file(None, "db-1", ROTATED_FILE, top_k=3)
+            content = aws_integration.download_rds_log_file(None, "db-1", ROTATED_FILE, max_bytes=10 ** 6)
+
+        assert calls > 1
+        assert rds.calls == calls  # 분석 결과와 조각 모두 캐시에서 읽음
+        assert second == first
+        assert first["analysis"]["total_count"] == 20
+        assert content == rds.content
+
+    def test_active_file_not_cached(self, tmp_path):
+        """아직 쓰이고 있는 파일은 캐시하지 않음"""
+        rds = FakePortionRDSClient("LOG:  duration: 1500.0 ms  statement: SELECT 1\n")
+        cache = RDSLogCache(str(tmp_path))
+
+        with patch.object(aws_module, "rds_log_cache", cache), \
+                patch.object(aws_integration, "get_client", return_value=rds):
+            aws_integration.analyze_rds_log_file(None, "db-1", "error/postgresql.log")
+            aws_integration.analyze_rds_log_file(None, "db-1", "error/postgresql.log")
+
+        assert rds.calls == 2
+        assert os.listdir(tmp_path) == []
+
+    def test_lru_eviction(self, tmp_path):
+        """전체 크기를 넘으면 가장 오래 사용하지 않은 항목부터 삭제"""
+        cache = RDSLogCache(str(tmp_path), max_bytes=10 ** 9)
+        payload = os.urandom(2000).hex()
+        for i in range(3):
+            cache.put_portion("db-1", ROTATED_FILE, str(i), payload + str(i), str(i + 1), True)
+        for i, path in enumerate(sorted(cache._index(), key=os.path.getmtime)):
+            os.utime(path, (1000 + i, 1000 + i))
+        assert cache.get_portion("db-1", ROTATED_FILE, "0") is not None  # 0 을 최근 사용으로 갱신
+
+        cache.max_bytes = sum(cache._index().values())
+        cache.put_portion("db-1", ROTATED_FILE, "3", payload, "4", False)
+
+        assert cache.get_portion("db-1", ROTATED_FILE, "0") is not None
+        assert cache.get_portion("db-1", ROTATED_FILE, "1") is None
+        assert cache.get_portion("db-1", ROTATED_FILE, "3") == {"data": payload, "marker": "4", "pending": False}
+        assert sum(cache._index().values()) <= cache.max_bytes
@@ -0,0 +1,61 @@
+"""
+읽기 복제본 라우팅 테스트
+"""
+from backend.services.read_routing import ReplicaRouter, parse_replica_hosts
+
+
+class FakeProbe:
+    """호스트별로 정해 둔 상태를 돌려주고 확인 횟수를 기록"""
+
+    def __init__(self, statuses):
+        self.statuses = statuses
+        self.calls = []
+
+    def __call__(self, dbinfo, host, port):
+        self.calls.append(host)
+        return self.statuses[host]
+
+
+def healthy(lag):
+    return {"healthy": True, "in_recovery": True, "lag_seconds": lag, "error": None}
+
+
+DOWN = {"healthy": False, "in_recovery": None, "lag_seconds": None, "error": "connection refused"}
+
+
+def dbinfo(policy, max_lag=None):
+    return {"name": "app", "host": "primary", "port": 5432, "user": "u", "password": "p", "dbname": "app",
+            "replica_hosts": "r1:5433, r2,r3:6000", "read_routing": policy, "max_replica_lag_seconds": max_lag}
+
+
+class TestReplicaRouter:
+    """정책별 대상 선택 테스트"""
+
+    def test_parse_replica_hosts(self):
+        assert parse_replica_hosts("r1:5433, r2\nr3:6000,", 5432) == [("r1", 5433), ("r2", 5432), ("r3", 6000)]
+        assert parse_replica_hosts(None) == []
+
+    def test_replica_preferred_round_robin(self):
+        """연결 가능한 복제본을 돌아가며 쓰고, 쓰기와 primary 정책은 프라이머리로"""
+        probe = FakeProbe({"r1": healthy(100), "r2": DOWN, "r3": healthy(0)})
+        router = ReplicaRouter(probe=probe)
+
+        hosts = [router.route(dbinfo("replica"))["host"] for _ in range(4)]
+
+        assert hosts == ["r1", "r3", "r1", "r3"]
+        assert len(probe.calls) == 3
+        assert router.route(dbinfo("replica"), read_only=False)["routed_to"] == "primary"
+        assert router.route(dbinfo("primary"))["host"] == "primary"
+
+    def test_lag_aware_and_failover(self):
+        """지연이 큰 복제본은 제외하고, 실패한 복제본은 건너뛰며, 남은 복제본이 없으면 프라이머리"""
+        probe = FakeProbe({"r1": healthy(100), "r2": healthy(2.5), "r3": healthy(None)})
+        router = ReplicaRouter(probe=probe)
+
+        routed = router.route(dbinfo("lag_aware", max_lag=10))
+        assert (routed["host"], routed["port"], routed["routed_to"]) == ("r2", 5432, "replica")
+
+        router.mark_failed(routed, "server closed the connection")
+        fallback = router.route(dbinfo("lag_aware", max_lag=10))
+        assert (fallback["host"], fallback["routed_to"]) == ("primary", "primary")
+        assert router.route(dbinfo("lag_aware", max_lag=200))["host"] == "r1"
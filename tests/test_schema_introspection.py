@@ -0,0 +1,107 @@
+"""
+PostgreSQL 스키마 일괄 조회 테스트
+"""
+from backend.monitoring.schema_introspection import (
+    COLUMNS_QUERY,
+    CONSTRAINTS_QUERY,
+    INDEXES_QUERY,
+    TABLES_QUERY,
+    SchemaCache,
+    introspect_schema,
+    monitoring_schema,
+    schema_prompt_text,
+)
+
+
+class FakeCatalogConnection:
+    """카탈로그 쿼리별로 미리 정한 행을 돌려주는 가짜 연결 (실행된 쿼리 기록)"""
+
+    def __init__(self, table_count: int):
+        self.executed = []
+        tables, columns, indexes, constraints = [], [], [], []
+        for oid in range(1, table_count + 1):
+            tables.append((oid, "public", f"t{oid}", "r", None, 10 * oid, 8192))
+            columns.append((oid, "id", "integer", "integer", 23, -1, False, "nextval('seq')", None))
+            columns.append((oid, "name", "character varying", "character varying(40)", 1043, 44, True, None, "이름"))
+            indexes.append((oid, f"t{oid}_pkey", True, True, ["id"], "CREATE UNIQUE INDEX ...", 16384))
+            constraints.append((oid, f"t{oid}_pkey", "p", "PRIMARY KEY (id)", ["id"], None, None, []))
+        tables.append((999, "audit", "events", "v", "감사 로그", -1, None))
+        columns.append((999, "at", "timestamp with time zone", "timestamp with time zone", 1184, -1, True, None, None))
+        constraints.append((2, "t2_t1_fk", "f", "FOREIGN KEY (a, b) REFERENCES t1(x, y)", ["a", "b"], "public", "t1", ["x", "y"]))
+        self.results = {TABLES_QUERY: tables, COLUMNS_QUERY: columns, INDEXES_QUERY: indexes,
+                        CONSTRAINTS_QUERY: constraints}
+
+    def get_dsn_parameters(self):
+        return {"host": "db", "port": "5432", "dbname": "app", "user": "monitor"}
+
+    def cursor(self):
+        return FakeCatalogCursor(self)
+
+
+class FakeCatalogCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows = []
+
+    def execute(self, sql, params=None):
+        self.conn.executed.append(sql)
+        self.rows = self.conn.results[sql]
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class TestIntrospectSchema:
+    """카탈로그 일괄 조회 테스트"""
+
+    def test_fixed_query_count(self):
+        """테이블 수와 관계없이 쿼리 4개로 컬럼/인덱스/제약조건을 모두 채움"""
+        conn = FakeCatalogConnection(table_count=500)
+
+        schema_info = introspect_schema(conn)
+
+        assert len(conn.executed) == 4
+        assert len(schema_info["tables"]) == 501
+        table = schema_info["tables"][0]
+        assert table["row_estimate"] == 10 and table["size_bytes"] == 8192
+        assert table["columns"][1] == {
+            "name": "name", "type": "character varying", "full_type": "character varying(40)",
+            "nullable": True, "default": None, "max_length": 40, "precision": None, "scale": None, "comment": "이름"
+        }
+        assert table["columns"][0]["precision"] == 32
+        assert table["indexes"][0]["primary"] is True
+        assert schema_info["tables"][-1]["row_estimate"] is None
+
+    def test_relationships_and_views(self):
+        """다중 컬럼 외래키는 컬럼 쌍별 관계로, API 는 public 테이블만, 프롬프트는 뷰까지 포함"""
+        schema_info = introspect_schema(FakeCatalogConnection(table_count=2))
+        api = monitoring_schema(schema_info)
+        prompt = schema_prompt_text(schema_info)
+
+        assert [(r["column"], r["foreign_column"]) for r in schema_info["relationships"]] == [("a", "x"), ("b", "y")]
+        assert [t["name"] for t in api["tables"]] == ["t1", "t2"]
+        assert len(api["relationships"]) == 2
+        assert prompt.splitlines() == [
+            "public.t1(id integer, name character varying)",
+            "public.t2(id integer, name character varying)",
+            "audit.events(at timestamp with time zone)",
+        ]
+
+
+class TestSchemaCache:
+    """스키마 캐시 테스트"""
+
+    def test_cached_until_refresh(self):
+        """같은 대상은 캐시를 쓰고 refresh 면 다시 조회"""
+        conn = FakeCatalogConnection(table_count=3)
+        cache = SchemaCache(ttl=60)
+
+        first = cache.get(conn)
+        assert cache.get(conn) is first
+        assert len(conn.executed) == 4
+
+        assert cache.get(conn, refresh=True) is not first
+        assert len(conn.executed) == 8
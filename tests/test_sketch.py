@@ -0,0 +1,80 @@
+"""
+DDSketch 분위수 스케치 테스트
+"""
+import json
+import random
+
+from backend.monitoring.sketch import ALL_QUERIES, DDSketch, SketchTimeline
+
+
+def exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+class TestDDSketch:
+    """DDSketch 테스트"""
+
+    def test_relative_accuracy(self):
+        """분위수 추정값이 상대 오차 안에 있음"""
+        rng = random.Random(1)
+        values = [rng.lognormvariate(7, 1.5) for _ in range(20000)]
+        sketch = DDSketch(relative_accuracy=0.01)
+        sketch.extend(values)
+
+        for q in (0.5, 0.95, 0.99):
+            expected = exact_quantile(values, q)
+            assert abs(sketch.quantile(q) - expected) / expected <= 0.011
+        assert sketch.count == 20000
+        assert sketch.quantile(1) == max(values)
+
+    def test_merge_and_persist(self):
+        """나눠 누적한 스케치를 병합하면 한 번에 누적한 것과 같고, JSON 으로 저장/복원 가능"""
+        rng = random.Random(2)
+        values = [rng.expovariate(1 / 1500.0) for _ in range(5000)]
+        whole = DDSketch()
+        whole.extend(values)
+        first, second = DDSketch(), DDSketch()
+        first.extend(values[:2000])
+        second.extend(values[2000:])
+
+        restored = DDSketch.from_dict(json.loads(json.dumps(first.to_dict())))
+        restored.merge(second)
+
+        assert restored.count == whole.count
+        assert restored.quantiles((0.5, 0.99)) == whole.quantiles((0.5, 0.99))
+
+    def test_bounded_bins(self):
+        """버킷 수가 max_bins 를 넘지 않고 상위 분위수는 유지"""
+        sketch = DDSketch(max_bins=64)
+        sketch.extend(float(2 ** (i / 10)) for i in range(1, 1000))
+
+        assert len(sketch.bins) <= 64
+        assert abs(sketch.quantile(0.99) - 2 ** (989 / 10)) / 2 ** (989 / 10) <= 0.02
+
+
+class TestSketchTimeline:
+    """시간 버킷별 스케치 테스트"""
+
+    def test_buckets_by_hour_and_fingerprint(self):
+        """시각별 버킷과 핑거프린트별 스케치로 나눠 누적"""
+        timeline = SketchTimeline(bucket_ms=3600 * 1000)
+        timeline.add(1000, 100.0, "fp1", "select ?")
+        timeline.add(3600 * 1000 + 5, 200.0, "fp1")
+        timeline.add(3600 * 1000 + 6, 300.0)
+        timeline.add(0, 999.0)  # 시각 없는 항목은 무시
+
+        rows = timeline.rows()
+
+        assert [(r['bucket_start'], r['fingerprint']) for r in rows] == [
+            (0, ALL_QUERIES), (0, "fp1"), (3600 * 1000, ALL_QUERIES), (3600 * 1000, "fp1")
+        ]
+        assert rows[1]['query'] == "select ?"
+        assert rows[2]['sketch'].count == 2
+
+    def test_first_full_bucket(self):
+        """분석 시작 시각 이후 온전히 포함되는 첫 버킷 (경계와 같으면 그 버킷)"""
+        timeline = SketchTimeline(bucket_ms=3600 * 1000)
+        assert timeline.first_full_bucket(3600 * 1000) == 3600 * 1000
+        assert timeline.first_full_bucket(3600 * 1000 + 1) == 7200 * 1000
+        assert timeline.first_full_bucket(1) == 3600 * 1000
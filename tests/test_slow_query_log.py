@@ -0,0 +1,135 @@
+"""
+PostgreSQL 슬로우 쿼리 로그 파서 테스트
+"""
+from unittest.mock import patch
+
+from backend.integrations.aws import AWSIntegration
+from backend.monitoring.slow_query_log import (
+    NO_STATEMENT,
+    SlowQueryLogParser,
+    SlowQueryStats,
+    iter_slow_queries,
+    parse_log_text,
+)
+
+SAMPLE_LOG = (
+    "2024-01-01 00:00:01 UTC:10.0.0.1(5432):app@appdb:[101]:LOG:  duration: 1500.250 ms  statement: SELECT *\n"
+    "\tFROM orders\n"
+    "\tWHERE id = 1\n"
+    "2024-01-01 00:00:02 UTC:10.0.0.1(5432):app@appdb:[102]:LOG:  duration: 2500.000 ms  execute S_1: SELECT * FROM t WHERE id = $1\n"
+    "2024-01-01 00:00:02 UTC:10.0.0.1(5432):app@appdb:[102]:DETAIL:  parameters: $1 = '42'\n"
+    "2024-01-01 00:00:03 UTC:10.0.0.1(5432):app@appdb:[103]:LOG:  connection authorized: user=app\n"
+    "2024-01-01 00:00:04 UTC:10.0.0.1(5432):app@appdb:[104]:LOG:  duration: 3000.000 ms\n"
+    "2024-01-01 00:00:05 UTC:10.0.0.1(5432):app@appdb:[105]:LOG:  duration: 10.000 ms  statement: SELECT 1\n"
+)
+
+
+class TestSlowQueryLogParser:
+    """슬로우 쿼리 로그 파서 테스트"""
+
+    def test_statement_kinds_and_parameters(self):
+        """여러 줄 statement, execute + 바인드 파라미터, duration 만 있는 로그를 인식"""
+        entries = list(iter_slow_queries(SAMPLE_LOG, min_duration_ms=1000))
+
+        assert [e['duration'] for e in entries] == [1500.25, 2500.0, 3000.0]
+        assert entries[0]['query'] == "SELECT *\nFROM orders\nWHERE id = 1"
+        assert entries[1]['kind'] == 'execute'
+        assert entries[1]['statement_name'] == 'S_1'
+        assert entries[1]['parameters'] == "$1 = '42'"
+        assert entries[2]['query'] == NO_STATEMENT
+        assert entries[0]['timestamp'] == 1704067201000
+
+    def test_prefix_variants(self):
+        """타임스탬프가 없거나 %m 형식인 log_line_prefix 도 처리"""
+        log = (
+            "[201] app@appdb LOG:  duration: 1200.0 ms  statement: SELECT 2\n"
+            "2024-01-01 00:00:01.250 UTC [202] LOG:  duration: 1300.0 ms  statement: SELECT 3\n"
+        )
+        entries = list(iter_slow_queries(log, min_duration_ms=1000))
+
+        assert [e['query'] for e in entries] == ["SELECT 2", "SELECT 3"]
+        assert entries[0]['timestamp'] == 0
+        assert entries[1]['timestamp'] == 1704067201250
+
+    def test_threshold_boundaries(self):
+        """자릿수로 거르는 정규식 단계 뒤에도 기준 경계가 정확하고, 같은 초의 %m 타임스탬프는 각자 계산"""
+        log = "".join(
+            f"2024-01-01 00:00:01.{i}00 UTC [1] LOG:  duration: {d} ms  statement: SELECT {i}\n"
+            for i, d in enumerate(["999.999", "1000.000", "4999.9", "5000", "12000.5"])
+        )
+        assert [e['duration'] for e in iter_slow_queries(log, 5000)] == [5000.0, 12000.5]
+        assert [e['duration'] for e in iter_slow_queries(log, 1000)] == [1000.0, 4999.9, 5000.0, 12000.5]
+        assert [e['timestamp'] % 1000 for e in iter_slow_queries(log, 0.5)] == [0, 100, 200, 300, 400]
+
+    def test_chunked_feed_matches_full_parse(self):
+        """청크 경계가 어디든 전체 파싱과 같은 결과"""
+        expected = list(iter_slow_queries(SAMPLE_LOG, min_duration_ms=1000))
+        for size in (1, 7, 50, 200):
+            parser = SlowQueryLogParser(min_duration_ms=1000)
+            entries = []
+            for i in range(0, len(SAMPLE_LOG), size):
+                entries.extend(parser.feed(SAMPLE_LOG[i:i + size]))
+            entries.extend(parser.close())
+            assert entries == expected
+
+    def test_call_sites_share_parser(self):
+        """CloudWatch 이벤트 파싱과 로그 파일 파싱이 같은 결과 형태를 반환"""
+        events = [{'message': line, 'timestamp': 1000} for line in SAMPLE_LOG.split('\n2024')]
+        from_events = AWSIntegration().parse_slow_query_log(events)
+        from_text = parse_log_text(SAMPLE_LOG)
+
+        assert [q['duration'] for q in from_events] == [3000.0, 2500.0, 1500.25]
+        assert from_events[0]['duration_seconds'] == 3.0
+        assert from_events[0]['timestamp'] == 1000
+        assert [q['duration'] for q in from_text] == [3000.0, 2500.0, 1500.25]
+
+
+class FakeRDSClient:
+    """로그 파일을 고정 크기 조각으로 나눠 Marker 로 반환하는 가짜 RDS 클라이언트"""
+
+    def __init__(self, content: str, portion_size: int):
+        self.content = content
+        self.portion_size = portion_size
+        self.calls = 0
+
+    def download_db_log_file_portion(self, DBInstanceIdentifier, LogFileName, Marker, NumberOfLines):
+        self.calls += 1
+        start = int(Marker)
+        end = start + self.portion_size
+        return {
+            "LogFileData": self.content[start:end],
+            "Marker": str(end),
+            "AdditionalDataPending": end < len(self.content)
+        }
+
+
+class TestStreamingLogFileAnalysis:
+    """RDS 로그 파일 스트리밍 분석 테스트"""
+
+    def test_stats_keep_bounded_top_k(self):
+        """상위 K개만 유지하면서 개수/분포는 전체를 반영"""
+        stats = SlowQueryStats(top_k=3)
+        stats.extend({'duration': float(d), 'query': str(d)} for d in range(1000, 11000, 1000))
+        result = stats.to_dict()
+
+        assert result['total_count'] == 10
+        assert [q['duration'] for q in result['top_queries']] == [10000.0, 9000.0, 8000.0]
+        assert result['duration_distribution']['1-5s'] == 4
+        assert result['duration_distribution']['10-30s'] == 1
+        assert len(stats._top) == 3
+
+    def test_analyze_rds_log_file_in_portions(self):
+        """로그 파일을 조각 단위로 내려받아 전체 파싱과 같은 통계를 계산"""
+        content = SAMPLE_LOG * 50
+        rds = FakeRDSClient(content, portion_size=97)
+        integration = AWSIntegration()
+
+        with patch.object(integration, "get_client", return_value=rds):
+            result = integration.analyze_rds_log_file(None, "db-1", "error/postgresql.log", top_k=2)
+
+        assert rds.calls == result["portions"]
+        assert result["bytes_processed"] == len(content)
+        assert result["analysis"]["total_count"] == 150
+        assert result["analysis"]["max_duration"] == 3000.0
+        assert len(result["analysis"]["top_queries"]) == 2
+        assert result["analysis"]["top_queries"][0]["duration_seconds"] == 3.0
@@ -0,0 +1,80 @@
+"""
+AI 응답 SQL 추출/분류 테스트
+"""
+from backend.services.sql_analysis import (
+    DDL,
+    READ_ONLY,
+    TRANSACTION,
+    UNKNOWN,
+    WRITE,
+    analyze_response,
+    classify_statement,
+    is_blocked,
+    is_refusal,
+    split_statements,
+)
+
+
+class TestSplitStatements:
+    """문장 분리 테스트"""
+
+    def test_ignores_semicolons_in_literals_and_comments(self):
+        """문자열, 인용 식별자, 주석, 달러 인용 안의 ; 로는 나누지 않고 주석뿐인 문장은 버림"""
+        sql = """SELECT ';' AS "a;b"; -- 주석 ;
+        /* 블록 ; 주석 */ SELECT $fn$ x; y $fn$;
+        ;  -- 빈 문장
+        SELECT 3"""
+
+        assert split_statements(sql) == [
+            "SELECT ';' AS \"a;b\"",
+            "-- 주석 ;\n        /* 블록 ; 주석 */ SELECT $fn$ x; y $fn$",
+            "-- 빈 문장\n        SELECT 3",
+        ]
+
+    def test_backslash_escapes_only_in_e_strings(self):
+        """E'...' 안의 \\' 는 문자열을 닫지 않고, 일반 문자열의 백슬래시는 이스케이프가 아님"""
+        assert split_statements(r"SELECT E'a\'; DELETE FROM t; --'") == [r"SELECT E'a\'; DELETE FROM t; --'"]
+        assert split_statements(r"SELECT e'\\'; SELECT 2") == [r"SELECT e'\\'", "SELECT 2"]
+        assert split_statements(r"SELECT 'a\'; DELETE FROM t") == [r"SELECT 'a\'", "DELETE FROM t"]
+
+
+class TestClassifyStatement:
+    """문장 분류 테스트"""
+
+    def test_read_only_statements(self):
+        for sql in ["select * from t where name = 'update'", "WITH x AS (SELECT 1) SELECT * FROM x",
+                    "(SELECT 1) UNION (SELECT 2)", "EXPLAIN UPDATE t SET a = 1", 'SELECT "delete" FROM t',
+                    "SHOW work_mem", "EXPLAIN (ANALYZE, BUFFERS) SELECT 1"]:
+            assert classify_statement(sql).kind == READ_ONLY, sql
+
+    def test_writes_hidden_in_read_commands(self):
+        """데이터 변경 CTE, EXPLAIN ANALYZE, SELECT INTO, 행 잠금은 읽기 전용이 아님"""
+        assert classify_statement("WITH d AS (DELETE FROM t RETURNING *) SELECT * FROM d").kind == WRITE
+        assert classify_statement("EXPLAIN ANALYZE UPDATE t SET a = 1").kind == WRITE
+        assert classify_statement("SELECT * INTO t2 FROM t").kind == DDL
+        assert classify_statement("SELECT * FROM t FOR NO KEY UPDATE").reason == "행 잠금(FOR UPDATE/SHARE) 사용"
+        assert classify_statement("BEGIN").kind == TRANSACTION
+        assert classify_statement("frobnicate").kind == UNKNOWN
+
+
+class TestAnalyzeResponse:
+    """LLM 응답 후처리 테스트"""
+
+    def test_all_blocks_and_policy(self):
+        """모든 sql 블록의 문장을 꺼내고, 쓰기 문장은 정책에 따라 차단"""
+        response = "설명\n```sql\nSELECT 1;\nDELETE FROM t\n```\n추가로\n```PostgreSQL\nSELECT 2\n```"
+
+        statements = analyze_response(response)
+
+        assert [(s.command, s.kind) for s in statements] == [("SELECT", READ_ONLY), ("DELETE", WRITE), ("SELECT", READ_ONLY)]
+        assert [is_blocked(s, "block") for s in statements] == [False, True, False]
+        assert is_blocked(statements[1], "allow") is False
+        assert is_blocked(classify_statement("frobnicate"), "allow") is True
+
+    def test_bare_sql_and_refusal(self):
+        """코드 블록 없는 SQL 응답도 추출하고, SQL 이 있으면 사과 문구가 있어도 거절이 아님"""
+        assert [s.text for s in analyze_response("select now()")] == ["select now()"]
+        assert analyze_response("테이블이 없습니다.") == []
+        assert is_refusal("죄송합니다. 답변할 수 없습니다.", []) is True
+        assert is_refusal("죄송합니다, 수정했습니다.\n```sql\nSELECT 1\n```",
+                          analyze_response("```sql\nSELECT 1\n```")) is False
@@ -0,0 +1,152 @@
+"""
+AI 응답 SQL 병렬 실행/예산 테스트
+"""
+import threading
+import time
+
+from backend.services import sql_execution
+from backend.services.sql_analysis import analyze_response, classify_statement
+from backend.services.sql_execution import TurnBudget, _run_read, execute_statements
+
+
+class FakeCursor:
+    def __init__(self, conn, name=None):
+        self.conn = conn
+        self.name = name
+        self.rows = []
+        self.description = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        self.conn.executed.append((self.name, sql, params))
+        if sql.startswith("SET"):
+            return
+        self.rows = [(i,) for i in range(self.conn.row_count)]
+        self.description = [("n",)]
+
+    def fetchmany(self, size):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def fetchall(self):
+        return self.fetchmany(len(self.rows))
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, row_count):
+        self.row_count = row_count
+        self.executed = []
+
+    def cursor(self, name=None):
+        return FakeCursor(self, name)
+
+
+class TestExecuteStatements:
+    """문장 실행 순서/병렬성 테스트"""
+
+    def test_reads_run_in_parallel_and_blocked_writes_skipped(self):
+        """읽기 전용 문장은 동시에 실행하고, 차단된 쓰기 문장은 실행하지 않으며 순서는 유지"""
+        running, peak, lock = [0], [0], threading.Lock()
+
+        def run_read(statement, dbinfo, budget):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.2)
+            with lock:
+                running[0] -= 1
+            return {"headers": ["q"], "data": [(statement.text,)], "truncated": False, "routed_to": "primary"}
+
+        statements = analyze_response("```sql\nSELECT 1;\nDELETE FROM t;\nSELECT 2;\nSELECT 3\n```")
+        started = time.time()
+        entries = execute_statements(statements, {}, run_read=run_read)
+
+        assert time.time() - started < 0.5
+        assert peak[0] == 3
+        assert [e.get("data") for e in entries] == [[("SELECT 1",)], None, [("SELECT 2",)], [("SELECT 3",)]]
+        assert entries[1]["blocked"] is True and entries[1]["command"] == "DELETE"
+        assert all("elapsed_ms" in e for i, e in enumerate(entries) if i != 1)
+
+
+    def test_reads_with_allowed_writes_stay_on_primary(self, monkeypatch):
+        """허용된 쓰기와 함께 실행하는 읽기는 복제본 라우팅을 끄고 순서대로 실행"""
+        monkeypatch.setattr(sql_execution, "is_blocked", lambda statement: False)
+        monkeypatch.setattr(sql_execution, "execute_sql", lambda sql, dbinfo: ([], []))
+        routings = []
+
+        def run_read(statement, dbinfo, budget):
+            routings.append(dbinfo.get("read_routing"))
+            return {"headers": [], "data": [], "truncated": False, "routed_to": "primary"}
+
+        statements = analyze_response("```sql\nUPDATE t SET a = 1;\nSELECT a FROM t\n```")
+        dbinfo = {"read_routing": "replica"}
+        entries = execute_statements(statements, dbinfo, run_read=run_read)
+
+        assert routings == ["primary"] and dbinfo["read_routing"] == "replica"
+        assert [e["routed_to"] for e in entries] == ["primary", "primary"]
+
+
+class TestExecuteSql:
+    """단일 연결 실행 테스트"""
+
+    def test_commits_writes_but_not_reads(self, monkeypatch):
+        """허용된 쓰기 문장은 커밋하고, 읽기 전용 실행은 커밋하지 않음"""
+        from backend import database
+
+        class CommitConnection(FakeConnection):
+            commits = 0
+
+            def set_session(self, readonly):
+                pass
+
+            def commit(self):
+                self.commits += 1
+
+            def close(self):
+                pass
+
+        conns = []
+        monkeypatch.setattr(database.psycopg2, "connect", lambda **kw: conns.append(CommitConnection(1)) or conns[-1])
+        dbinfo = {"host": "h", "user": "u", "password": "p", "dbname": "d"}
+
+        database.execute_sql("UPDATE t SET a = 1", dbinfo)
+        database.execute_sql("SELECT 1", dbinfo, read_only=True)
+
+        assert [c.commits for c in conns] == [1, 0]
+
+
+class TestTurnBudget:
+    """턴 예산 테스트"""
+
+    def test_row_budget_shared_across_statements(self, monkeypatch):
+        """행 예산을 문장들이 나눠 쓰고, 넘는 결과는 잘렸다고 표시"""
+        monkeypatch.setattr(sql_execution, "FETCH_SIZE", 4)
+        budget = TurnBudget(max_rows=10, seconds=30)
+        conn = FakeConnection(row_count=7)
+
+        first = _run_read(conn, classify_statement("SELECT n FROM t"), budget)
+        second = _run_read(conn, classify_statement("SELECT n FROM t"), budget)
+
+        assert (len(first["data"]), first["truncated"]) == (7, False)
+        assert (len(second["data"]), second["truncated"]) == (3, True)
+        assert budget.to_dict()["rows_used"] == 10
+        assert conn.executed[0] == (None, "SET TRANSACTION READ ONLY", None)
+        assert conn.executed[1][1] == "SET LOCAL statement_timeout = %s" and 0 < conn.executed[1][2][0] <= 30000
+        assert conn.executed[2][0] is not None  # SELECT 는 서버 측 커서
+
+    def test_time_budget_exhausted(self):
+        """시간 예산이 끝나면 남은 문장은 실행하지 않음"""
+        budget = TurnBudget(max_rows=10, seconds=0)
+        entries = execute_statements([classify_statement("SELECT 1")], {}, budget,
+                                     run_read=lambda s, d, b: _run_read(FakeConnection(1), s, b))
+
+        assert entries[0]["skipped"] is True
+        assert entries[0]["error"].startswith("Error: ")
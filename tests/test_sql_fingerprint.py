@@ -0,0 +1,119 @@
+"""
+SQL 정규화/핑거프린트 집계 테스트
+"""
+from backend.monitoring.slow_query_log import SlowQueryStats
+from backend.monitoring.sql_fingerprint import (
+    OTHER_FINGERPRINT,
+    QueryAggregator,
+    fingerprint,
+    merge_statement_rows,
+    normalize_sql,
+)
+
+
+class TestNormalizeSql:
+    """SQL 정규화 테스트"""
+
+    def test_literals_lists_and_whitespace(self):
+        """리터럴, IN 목록 길이, 공백, 대소문자, 주석만 다른 쿼리는 같은 핑거프린트"""
+        a = "SELECT * FROM orders WHERE id IN (1, 2, 3) AND note = 'it''s' -- trailing"
+        b = "select *  from orders\n where id in (42)   and note='x';"
+
+        assert normalize_sql(a) == "select * from orders where id in (...) and note=?"
+        assert fingerprint(a) == fingerprint(b)
+
+    def test_keeps_structure(self):
+        """컬럼/테이블이 다르면 다른 핑거프린트이고 인용 식별자와 바인드 파라미터를 처리"""
+        assert fingerprint("SELECT a FROM t WHERE id = 1") != fingerprint("SELECT b FROM t WHERE id = 1")
+        assert normalize_sql('SELECT "Col" FROM t WHERE x = $1 AND y = $tag$ body $tag$') == \
+            'select "Col" from t where x=? and y=?'
+        assert normalize_sql("INSERT INTO t (a, b) VALUES (1, 'x'), (2, 'y')") == "insert into t(a, b) values (...)"
+
+
+    def test_escape_string_backslashes(self):
+        """E'...' 문자열의 백슬래시 이스케이프 따옴표까지 하나의 리터럴로 처리"""
+        assert normalize_sql("SELECT E'a\\'b' FROM t") == "select ? from t"
+        assert fingerprint("SELECT E'it\\'s' FROM t WHERE id = 1") == fingerprint("SELECT 'x' FROM t WHERE id = 2")
+
+    def test_quoted_identifiers_keep_case(self):
+        """인용 식별자는 대소문자를 구분하므로 "T" 와 "t" 는 다른 핑거프린트"""
+        assert normalize_sql('SELECT * FROM "T" WHERE "Id" = 1') == 'select * from "T" where "Id"=?'
+        assert fingerprint('SELECT * FROM "T"') != fingerprint('SELECT * FROM "t"')
+        assert fingerprint('SELECT * FROM T') == fingerprint('select * from t')
+
+class TestQueryAggregator:
+    """핑거프린트별 집계 테스트"""
+
+    def test_aggregates_by_fingerprint(self):
+        """호출 수, 총/평균/백분위 시간, 처음/마지막 실행 시각 계산"""
+        aggregator = QueryAggregator()
+        for i in range(1, 101):
+            aggregator.add(f"SELECT * FROM t WHERE id = {i}", float(i), timestamp=1000 + i)
+        aggregator.add("UPDATE t SET a = 1", 5000.0, timestamp=5000)
+
+        results = aggregator.results()
+
+        assert len(aggregator) == 2
+        assert results[0]['query'] == "select * from t where id=?"
+        assert results[0]['count'] == 100
+        assert results[0]['total_duration'] == 5050.0
+        assert results[0]['mean_duration'] == 50.5
+        # DDSketch 상대 오차(1%) 안의 추정값
+        assert abs(results[0]['p50'] - 50.5) / 50.5 <= 0.02
+        assert abs(results[0]['p99'] - 99.01) / 99.01 <= 0.02
+        assert (results[0]['first_seen'], results[0]['last_seen']) == (1001, 1100)
+        assert aggregator.results(order_by='max_duration')[0]['query'] == "update t set a=?"
+
+    def test_slow_query_stats_include_fingerprints(self):
+        """슬로우 쿼리 분석 결과에 핑거프린트별 집계가 포함됨"""
+        stats = SlowQueryStats()
+        stats.extend([
+            {'query': "SELECT 1 FROM t WHERE id = 1", 'duration': 1000.0, 'timestamp': 1},
+            {'query': "SELECT 1 FROM t WHERE id = 2", 'duration': 3000.0, 'timestamp': 2},
+            {'query': "(쿼리문 없음)", 'duration': 2000.0, 'timestamp': 3},
+        ])
+
+        result = stats.to_dict()
+
+        assert result['total_count'] == 3
+        assert len(result['by_fingerprint']) == 1
+        assert result['by_fingerprint'][0]['count'] == 2
+
+    def test_fingerprint_cap_folds_into_other(self):
+        """추적 한도를 넘는 새 핑거프린트는 other 로 합쳐지고, 병합/타임라인도 한도를 지킴"""
+        aggregator = QueryAggregator(max_fingerprints=2)
+        keys = [aggregator.add(f"SELECT * FROM t{i}", 10.0) for i in range(5)]
+        aggregator.add("SELECT * FROM t0", 10.0)
+
+        assert keys[2:] == [OTHER_FINGERPRINT] * 3
+        assert len(aggregator) == 3
+        counts = {r['fingerprint']: r['count'] for r in aggregator.results()}
+        assert counts[keys[0]] == 2 and counts[OTHER_FINGERPRINT] == 3
+
+        stats, other = SlowQueryStats(), SlowQueryStats()
+        stats.fingerprints.max_fingerprints = other.fingerprints.max_fingerprints = 1
+        stats.add({'query': "SELECT * FROM a", 'duration': 1.0, 'timestamp': 1})
+        other.add({'query': "SELECT * FROM b", 'duration': 2.0, 'timestamp': 1})
+        stats.merge(other)
+
+        assert {r['fingerprint'] for r in stats.timeline.rows()} <= {'', fingerprint("SELECT * FROM a"), OTHER_FINGERPRINT}
+        assert len(stats.fingerprints) == 2
+
+    def test_merge_statement_rows(self):
+        """pg_stat_statements 에서 IN 목록 길이만 다른 항목을 병합"""
+        rows = [
+            {'query': "SELECT * FROM t WHERE id IN ($1, $2)", 'calls': 10, 'total_time': 100.0,
+             'rows': 20, 'max_time': 30.0, 'min_time': 1.0},
+            {'query': "SELECT * FROM t WHERE id IN ($1, $2, $3)", 'calls': 30, 'total_time': 300.0,
+             'rows': 90, 'max_time': 50.0, 'min_time': 2.0},
+            {'query': "SELECT now()", 'calls': 1, 'total_time': 1.0,
+             'rows': 1, 'max_time': 1.0, 'min_time': 1.0},
+        ]
+
+        merged = merge_statement_rows(rows)
+
+        assert len(merged) == 2
+        assert merged[0]['calls'] == 40
+        assert merged[0]['mean_time'] == 10.0
+        assert merged[0]['variants'] == 2
+        assert (merged[0]['max_time'], merged[0]['min_time']) == (50.0, 1.0)
@@ -0,0 +1,121 @@
+"""
+pg_stat_statements 스냅샷 비교 테스트
+"""
+import json
+from datetime import datetime
+
+import pytest
+
+from backend.monitoring.pg_capabilities import PgCapabilities
+from backend.monitoring.statement_snapshots import (
+    STATEMENT_COUNTERS,
+    StatementSnapshot,
+    capture_statement_snapshot,
+    diff_snapshots,
+)
+
+
+def counters(calls, total_time, rows=0, hit=0, read=0):
+    values = dict.fromkeys(STATEMENT_COUNTERS, 0.0)
+    values.update(calls=calls, total_time=total_time, rows=rows, shared_blks_hit=hit, shared_blks_read=read)
+    return tuple(float(values[name]) for name in STATEMENT_COUNTERS)
+
+
+class FakeCursor:
+    def __init__(self, results):
+        self.results = results
+        self.executed = []
+        self.current = None
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+        self.current = next(rows for marker, rows in self.results if marker in sql)
+
+    def fetchall(self):
+        return self.current
+
+    def fetchone(self):
+        return self.current[0] if self.current else None
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+    def rollback(self):
+        pass
+
+
+class TestDiffSnapshots:
+    """스냅샷 차이 계산 테스트"""
+
+    def test_deltas_new_and_evicted(self):
+        """기존 항목은 증가량, 새 항목은 전체 값, 사라진 항목은 evicted 로 집계"""
+        start = StatementSnapshot(0, {
+            (1, 10, 100): counters(100, 1000.0, 100, 50, 50),
+            (2, 10, 100): counters(10, 50.0),
+            (3, 10, 100): counters(5, 5.0),
+        }, dealloc=2, snapshot_id=1)
+        end = StatementSnapshot(3600 * 1000, {
+            (1, 10, 100): counters(160, 7000.0, 130, 80, 70),
+            (2, 10, 100): counters(10, 50.0),
+            (4, 10, 100): counters(3, 600.0),
+        }, dealloc=5, snapshot_id=2)
+
+        result = diff_snapshots(start, end)
+
+        assert [(s['queryid'], s['status']) for s in result['statements']] == [(1, 'existing'), (4, 'new')]
+        assert result['statements'][0]['calls'] == 60
+        assert result['statements'][0]['total_time'] == 6000.0
+        assert result['statements'][0]['mean_time'] == 100.0
+        assert result['statements'][0]['blks'] == 50
+        assert result['totals']['calls'] == 63
+        assert result['evicted'] == 1
+        assert result['dealloc'] == 3
+        assert result['window_seconds'] == 3600
+        assert diff_snapshots(start, end, order_by='mean_time')['statements'][0]['queryid'] == 4
+
+    def test_resets(self):
+        """전체 리셋이나 항목 단위 리셋 뒤에는 end 값을 구간 값으로 사용"""
+        start = StatementSnapshot(0, {(1, 10, 100): counters(100, 1000.0), (2, 10, 100): counters(50, 500.0)},
+                                  stats_reset="2024-01-01T00:00:00")
+        end = StatementSnapshot(1000, {(1, 10, 100): counters(120, 1300.0), (2, 10, 100): counters(5, 40.0)},
+                                stats_reset="2024-01-01T00:00:00")
+        item_reset = diff_snapshots(start, end, order_by='calls')
+        end.stats_reset = "2024-01-01T00:00:30"
+        full_reset = diff_snapshots(start, end, order_by='calls')
+
+        assert [(s['queryid'], s['status'], s['calls']) for s in item_reset['statements']] == \
+            [(1, 'existing', 20), (2, 'reset', 5)]
+        assert full_reset['reset'] is True
+        assert [(s['calls'], s['status']) for s in full_reset['statements']] == [(120, 'new'), (5, 'new')]
+        with pytest.raises(ValueError):
+            diff_snapshots(start, end, order_by='query')
+
+
+class TestStatementSnapshot:
+    """스냅샷 수집/저장 형식 테스트"""
+
+    def test_capture_fetches_only_new_texts(self):
+        """텍스트 없이 카운터를 읽고 처음 보는 queryid 의 텍스트만 조회"""
+        cursor = FakeCursor([
+            ("pg_stat_statements(false)", [(1, 10, 100) + counters(3, 30.0), (2, 10, 100) + counters(1, 5.0)]),
+            ("ANY(%s)", [(2, "select $1")]),
+            ("pg_stat_statements_info", [(7, datetime(2024, 1, 1))]),
+        ])
+
+        caps = PgCapabilities(160000, {"pg_stat_statements": "1.10"})
+        snapshot = capture_statement_snapshot(FakeConnection(cursor), known_queryids={1}, caps=caps)
+        restored = StatementSnapshot.from_dict(json.loads(json.dumps(snapshot.to_dict())), snapshot.captured_at)
+
+        assert "total_exec_time" in cursor.executed[0][0]
+        assert cursor.executed[1][1] == ([2],)
+        assert snapshot.queries == {2: "select $1"}
+        assert (snapshot.dealloc, snapshot.stats_reset) == (7, "2024-01-01T00:00:00")
+        assert restored.entries == snapshot.entries
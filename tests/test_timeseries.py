@@ -0,0 +1,85 @@
+"""
+메트릭 시계열 저장소 테스트
+"""
+import math
+from datetime import datetime, timedelta
+
+from backend.models.database import DatabaseMetrics
+from backend.monitoring.timeseries import MetricsTimeSeries, lttb_indices
+
+
+class TestLTTB:
+    """LTTB 다운샘플링 테스트"""
+
+    def test_keeps_all_points_below_threshold(self):
+        """포인트 수가 threshold 이하이면 그대로 반환"""
+        assert lttb_indices([0, 1, 2], [5, 6, 7], 10) == [0, 1, 2]
+
+    def test_downsamples_to_threshold_and_keeps_peak(self):
+        """threshold 개수로 줄이고 첫/끝 포인트와 스파이크를 유지"""
+        xs = list(range(1000))
+        ys = [math.sin(x / 50.0) for x in xs]
+        ys[537] = 100.0
+
+        idx = lttb_indices(xs, ys, 50)
+
+        assert len(idx) == 50
+        assert idx[0] == 0 and idx[-1] == 999
+        assert idx == sorted(idx)
+        assert 537 in idx
+
+
+class TestMetricsTimeSeries:
+    """컬럼형 시계열 테스트"""
+
+    def test_append_metrics_and_series(self):
+        """DatabaseMetrics 를 추가하고 필드별 시계열 조회 (결측치 제외)"""
+        series = MetricsTimeSeries()
+        base = datetime.now() - timedelta(minutes=10)
+        for i in range(5):
+            series.append_metrics(DatabaseMetrics(
+                db_name="test",
+                timestamp=base + timedelta(minutes=i),
+                active_connections=i,
+                disk_usage=None if i == 2 else 10.0 * i
+            ))
+
+        result = series.series(["active_connections", "disk_usage"], since=0)
+
+        assert result["active_connections"]["v"] == [0, 1, 2, 3, 4]
+        assert len(result["disk_usage"]["t"]) == 4
+        assert series.count(since=(base + timedelta(minutes=3)).timestamp()) == 2
+
+    def test_upsert_merges_and_orders(self):
+        """같은 타임스탬프는 병합하고 과거 포인트는 정렬 위치에 삽입"""
+        series = MetricsTimeSeries()
+        series.upsert(100.0, {"a": 1})
+        series.upsert(300.0, {"a": 3})
+        series.upsert(200.0, {"a": 2})
+        series.upsert(300.0, {"CPUUtilization": 55.0})
+
+        assert list(series.timestamps) == [100.0, 200.0, 300.0]
+        xs, values = series.aligned(["a", "CPUUtilization"], since=0)
+        assert values["a"] == [1, 2, 3]
+        assert values["CPUUtilization"] == [0, 0, 55.0]
+
+    def test_max_points(self):
+        """최대 포인트 수를 넘으면 오래된 포인트부터 제거"""
+        series = MetricsTimeSeries(max_points=10)
+        for i in range(25):
+            series.upsert(float(i), {"a": i})
+
+        assert len(series) == 10
+        assert series.timestamps[0] == 15.0
+        assert list(series.columns["a"]) == [float(i) for i in range(15, 25)]
+
+    def test_aligned_downsampling(self):
+        """aligned 는 width 로 다운샘플링해도 모든 필드의 길이가 같음"""
+        series = MetricsTimeSeries(max_points=2000)
+        for i in range(1500):
+            series.upsert(float(i), {"a": i % 7, "b": i})
+
+        xs, values = series.aligned(["a", "b"], since=0, width=100)
+
+        assert len(xs) == 100
+        assert len(values["a"]) == len(values["b"]) == 100